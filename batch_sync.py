@@ -0,0 +1,207 @@
+# -------------------------------------------------------
+# 여러 문서 동시 동기화 (브라우저 워커 풀)
+#
+# 메인 로직은 문서 하나(STOCK_DOC_URL)를 로그인 → 다운로드 → 병합 → 업로드 순서로 처리하고 끝납니다.
+# 매장별 재고 시트가 수십 개면 이를 문서 수만큼 직렬로 반복해야 합니다.
+#
+# 이 모듈은 (문서 URL, 판매 파일) 목록을 정해진 수의 워커에 나눠 처리합니다.
+# - 워커 하나 = 스레드 하나 + 크롬 드라이버 하나. 드라이버는 워커가 첫 작업을 받을 때 만들고,
+#   이후 작업에서 계속 재사용합니다(로그인/브라우저 시작 비용을 워커당 한 번만 치름).
+# - 각 워커는 자기 전용 크롬 프로필을 쓰고, 작업마다 run_dirs의 빈 폴더에 받아서 서로의 파일을 건드리지 않습니다.
+# - 한 작업이 실패하면 그 워커의 드라이버는 닫고, 다음 작업에서 새로 띄웁니다.
+# - 끝나거나 실패하거나 Ctrl+C로 중단되어도 모든 워커의 driver.quit()을 호출합니다.
+# - 마지막에 성공/실패 건수와 처리량(문서/분)을 출력합니다.
+#
+# 브라우저 작업은 대부분 네트워크/렌더링 대기이므로 프로세스가 아닌 스레드로 충분합니다.
+# -------------------------------------------------------
+
+import os
+import re
+import json
+import time
+import queue
+import threading
+
+# 기본 동시 워커 수. 워커마다 크롬 한 벌(수백 MB)이 뜨므로 서버 메모리에 맞춰 조절합니다.
+DEFAULT_WORKERS = 3
+
+
+# ---------------------------------
+# 작업 목록
+# ---------------------------------
+def doc_key(doc_url):
+    """
+    문서 URL에서 파일명에 쓸 수 있는 짧은 키를 만듭니다.
+    예: "https://sg.docs.wps.com/p/89316816846831" → "89316816846831"
+    """
+
+    tail = doc_url.rstrip("/").rsplit("/", 1)[-1]
+    return re.sub(r"[^0-9A-Za-z_-]", "_", tail) or "doc"
+
+
+def load_sync_jobs(jobs_file, ledger_dir=None):
+    """
+    동기화 작업 목록(JSON)을 읽습니다.
+
+    형식:
+        [
+          {"doc_url": "https://sg.docs.wps.com/p/...", "sales_file": "/path/store_a_sales.xlsx"},
+          {"doc_url": "...", "sales_file": "...", "ledger_path": "/path/store_b_ledger.json"},
+          ...
+        ]
+
+    ledger_path를 생략하면 ledger_dir 아래 "sales_ledger_<문서키>.json"을 씁니다.
+    (판매 반영 장부는 "어느 판매를 어느 재고 문서에 반영했는지"이므로 문서마다 따로 둡니다.)
+
+    :param jobs_file: 작업 목록 JSON 파일 경로.
+    :param ledger_dir: (선택) 기본 장부 폴더. None이면 장부 없이 판매 파일 전체를 반영.
+    :return: 작업 dict 리스트.
+    :raises ValueError: 항목에 doc_url/sales_file이 없거나 같은 문서가 두 번 나오는 경우.
+    """
+
+    with open(jobs_file, encoding="utf-8") as f:
+        raw_jobs = json.load(f)
+
+    jobs = []
+    seen = set()
+    for i, raw in enumerate(raw_jobs):
+        if not raw.get("doc_url") or not raw.get("sales_file"):
+            raise ValueError(f"{jobs_file} {i}번째 항목에 doc_url/sales_file이 없습니다: {raw}")
+        # 같은 문서를 두 워커가 동시에 올리면 서로의 결과를 덮어쓰므로 허용하지 않습니다.
+        if raw["doc_url"] in seen:
+            raise ValueError(f"{jobs_file}에 같은 문서가 두 번 있습니다: {raw['doc_url']}")
+        seen.add(raw["doc_url"])
+
+        ledger_path = raw.get("ledger_path")
+        if ledger_path is None and ledger_dir is not None:
+            ledger_path = os.path.join(ledger_dir, f"sales_ledger_{doc_key(raw['doc_url'])}.json")
+        jobs.append({"doc_url": raw["doc_url"], "sales_file": raw["sales_file"], "ledger_path": ledger_path})
+    return jobs
+
+
+# ---------------------------------
+# 워커 풀
+# ---------------------------------
+def _close_quietly(close_driver, driver):
+    """드라이버 종료 중 오류(이미 죽은 크롬 등)는 무시합니다. 종료는 끝까지 시도해야 하므로."""
+    if driver is None:
+        return
+    try:
+        close_driver(driver)
+    except Exception as e:
+        print(f"[batch] 드라이버 종료 중 오류(무시): {e}")
+
+
+def run_sync_pool(jobs, make_driver, sync_job, workers=DEFAULT_WORKERS, close_driver=None):
+    """
+    작업 목록을 최대 workers개의 브라우저 워커로 나눠 처리합니다.
+
+    1) 작업을 큐에 넣고 워커 스레드 min(workers, 작업 수)개를 띄웁니다.
+    2) 워커는 큐에서 작업을 하나씩 꺼내 sync_job(driver, job, index)를 호출합니다.
+       드라이버는 첫 작업 때 make_driver(index)로 만들고 이후 재사용합니다.
+    3) 작업이 예외를 내면 실패로 기록하고, 그 드라이버는 닫은 뒤 다음 작업에서 새로 만듭니다.
+    4) 큐가 비면 워커는 자기 드라이버를 닫고 끝납니다.
+       Ctrl+C(KeyboardInterrupt)면 남은 작업을 취소하고 살아 있는 모든 드라이버를 닫은 뒤 다시 예외를 올립니다.
+
+    :param jobs: 작업 리스트(load_sync_jobs 결과 등).
+    :param make_driver: index를 받아 로그인까지 끝난 드라이버를 반환하는 함수.
+    :param sync_job: (driver, job, index)를 받아 작업 하나를 처리하는 함수. 반환값은 결과에 그대로 기록.
+    :param workers: 최대 동시 워커 수.
+    :param close_driver: (선택) 드라이버 종료 함수. 기본값은 driver.quit().
+    :return: 작업별 결과 dict 리스트({"doc_url", "ok", "value", "error", "seconds", "worker"}), 작업 순서대로.
+    """
+
+    close_driver = close_driver or (lambda d: d.quit())
+    job_queue = queue.Queue()
+    for position, job in enumerate(jobs):
+        job_queue.put((position, job))
+
+    results = [None] * len(jobs)
+    live_drivers = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def release(index):
+        # 중단 시 메인 스레드가 이미 가져가 닫은 드라이버는 다시 닫지 않도록, 꺼낸 쪽만 닫습니다.
+        with lock:
+            driver = live_drivers.pop(index, None)
+        _close_quietly(close_driver, driver)
+
+    def worker(index):
+        driver = None
+        try:
+            while not stop.is_set():
+                try:
+                    position, job = job_queue.get_nowait()
+                except queue.Empty:
+                    return
+                job_start = time.perf_counter()
+                result = {"doc_url": job.get("doc_url"), "ok": False, "value": None, "error": None, "worker": index}
+                try:
+                    if driver is None:
+                        driver = make_driver(index)
+                        with lock:
+                            live_drivers[index] = driver
+                    result["value"] = sync_job(driver, job, index)
+                    result["ok"] = True
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    print(f"[batch] w{index} 실패 {job.get('doc_url')}: {result['error']}")
+                    # 실패한 브라우저는 어떤 화면에 멈춰 있는지 알 수 없으므로 닫고 새로 시작
+                    release(index)
+                    driver = None
+                result["seconds"] = time.perf_counter() - job_start
+                results[position] = result
+        finally:
+            release(index)
+
+    threads = [
+        threading.Thread(target=worker, args=(index,), name=f"sync-w{index}", daemon=True)
+        for index in range(max(1, min(workers, len(jobs))))
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for thread in threads:
+            # join(timeout)으로 돌려야 메인 스레드가 Ctrl+C를 받을 수 있습니다.
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        print("[batch] 중단 요청 → 남은 작업 취소, 모든 드라이버 종료")
+        stop.set()
+        with lock:
+            drivers = list(live_drivers.values())
+            live_drivers.clear()
+        for driver in drivers:
+            _close_quietly(close_driver, driver)
+        raise
+
+    return [r for r in results if r is not None]
+
+
+def report_sync_results(results, elapsed, workers):
+    """
+    배치 결과를 출력하고 요약 dict를 반환합니다.
+
+    :param results: run_sync_pool 결과.
+    :param elapsed: 전체 소요 시간(초).
+    :param workers: 사용한 워커 수.
+    :return: {"documents", "succeeded", "failed", "seconds", "docs_per_minute"}
+    """
+
+    succeeded = sum(1 for r in results if r["ok"])
+    failed = [r for r in results if not r["ok"]]
+    docs_per_minute = succeeded / elapsed * 60 if elapsed > 0 else 0.0
+
+    for r in failed:
+        print(f"[batch] 실패: {r['doc_url']} ({r['error']})")
+    print(f"[batch] 문서 {len(results)}개 중 {succeeded}개 성공, {len(failed)}개 실패 | "
+          f"{elapsed:.1f}초, {docs_per_minute:.2f}문서/분 (워커 {workers}개)")
+    return {
+        "documents": len(results),
+        "succeeded": succeeded,
+        "failed": len(failed),
+        "seconds": elapsed,
+        "docs_per_minute": docs_per_minute,
+    }
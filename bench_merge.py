@@ -0,0 +1,261 @@
+# -------------------------------------------------------
+# 병합 엔진 벤치마크
+#
+# synth_data로 만든 재고/판매 파일로 병합 경로(백엔드)마다
+#   - 전체 시간(wall)
+#   - 단계별 시간: parse(재고+판매 읽기) / compute(집계+병합) / write(저장)  ← sync_metrics의 span
+#   - 최대 RSS
+# 를 잽니다. 최대 RSS는 프로세스 시작 이후의 최댓값이라, 경우마다 별도의 자식 프로세스에서 실행합니다.
+#
+# 결과를 기준선(baseline) JSON으로 저장해 두고, 다음 버전에서 --compare로 비교하면
+# 기준선보다 threshold배 이상 느려지거나 메모리를 더 쓰는 경우를 회귀로 표시합니다(종료 코드 1).
+# 작은 경우(수천 행)는 import/프로세스 시작 비용(~0.1초, ~120MB)이 대부분이라 배율이 잡음만으로도 흔들리므로,
+# 배율과 함께 절대 차이(--min-seconds, --min-mb)도 넘어야 회귀로 봅니다.
+# 저장소의 bench_baseline.json은 파싱/계산/쓰기가 시간을 지배하는 100,000행으로 기록했습니다.
+#
+# 명령줄:
+#     python bench_merge.py --rows 100000 --repeat 3 --save-baseline bench_baseline.json
+#     python bench_merge.py --rows 100000 --repeat 3 --compare bench_baseline.json
+# -------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from synth_data import generate_dataset
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK_PATH = os.path.join(HERE, "update_stock.ipynb")
+# 자식 프로세스가 결과 줄 앞에 붙이는 표시(병합 함수의 print 출력과 구분)
+RESULT_MARK = "BENCH_RESULT "
+
+# 측정할 백엔드: 이름 → (대상, 옵션)
+#   script   : stock_merge.merge_local_sales_with_downloaded_stock (두 스크립트가 쓰는 병합)
+#   notebook : update_stock.ipynb의 update_stock (같은 병합을 openpyxl 저장으로 부른 뒤 재고 파일을 덮어씀)
+BACKENDS = {
+    "script:pandas+openpyxl": ("script", {"reader": "pandas", "writer": "openpyxl"}),
+    "script:pandas+patch": ("script", {"reader": "pandas", "writer": "patch"}),
+    "script:stream+patch": ("script", {"reader": "stream", "writer": "patch"}),
+    "script:pandas+numpy": ("script", {"reader": "pandas", "writer": "patch", "engine": "numpy"}),
+    "script:stream+numpy": ("script", {"reader": "stream", "writer": "patch", "engine": "numpy"}),
+    "notebook:pandas": ("notebook", {"reader": "pandas"}),
+    "notebook:stream": ("notebook", {"reader": "stream"}),
+}
+# 회귀로 보려면 배율과 함께 넘어야 하는 절대 차이(잡음 하한)
+MIN_REGRESSION_SECONDS = 0.25
+MIN_REGRESSION_MB = 25
+# 단계(span) → 벤치마크 구간
+PHASES = {"parse_stock": "parse", "parse_sales": "parse", "aggregate": "compute", "write": "write"}
+
+
+# ---------------------------------
+# 자식 프로세스: 경우 하나 실행
+# ---------------------------------
+def load_notebook_function(notebook_path, name):
+    """
+    노트북의 코드 셀을 위에서부터 실행하다가 name이 정의되면 멈추고 그 함수를 반환합니다.
+    (그 아래의 예시 호출 셀은 실행하지 않음)
+    """
+
+    with open(notebook_path, encoding="utf-8") as f:
+        notebook = json.load(f)
+    namespace = {"__name__": "update_stock_notebook"}
+    for cell in notebook["cells"]:
+        if cell["cell_type"] != "code":
+            continue
+        exec(compile("".join(cell["source"]), notebook_path, "exec"), namespace)
+        if name in namespace:
+            return namespace[name]
+    raise ValueError(f"{notebook_path}에 {name}이(가) 없습니다.")
+
+
+def run_case(backend, stock_file, sales_file, work_dir):
+    """
+    백엔드 하나로 병합을 한 번 실행하고 결과 dict를 반환합니다. (자식 프로세스에서 호출)
+
+    노트북의 update_stock은 재고 파일을 덮어쓰므로, 두 대상 모두 재고 파일 복사본으로 실행합니다.
+    """
+
+    from sync_metrics import SyncTracer, stage_totals
+    from xlsx_stream import peak_rss_mb
+
+    target, options = BACKENDS[backend]
+    # 모듈 import(판다스 로드)는 측정 구간에서 뺍니다.
+    if target == "script":
+        from stock_merge import merge_local_sales_with_downloaded_stock as merge
+    else:
+        merge = load_notebook_function(NOTEBOOK_PATH, "update_stock")
+
+    stock_copy = os.path.join(work_dir, "stock" + os.path.splitext(stock_file)[1])
+    shutil.copyfile(stock_file, stock_copy)
+
+    tracer = SyncTracer()
+    start = time.perf_counter()
+    with tracer.activate():
+        if target == "script":
+            merge(stock_copy, sales_file, work_dir=work_dir, **options)
+        else:
+            merge(stock_copy, sales_file, **options)
+    wall = time.perf_counter() - start
+
+    phases = {}
+    for stage, seconds in stage_totals(tracer.spans).items():
+        if stage in PHASES:
+            phases[PHASES[stage]] = phases.get(PHASES[stage], 0.0) + seconds
+    return {"wall_seconds": wall, "phases": phases, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_case_in_subprocess(backend, stock_file, sales_file):
+    """
+    run_case를 새 파이썬 프로세스에서 실행해 결과를 받습니다(최대 RSS를 경우별로 분리하기 위함).
+    """
+
+    work_dir = tempfile.mkdtemp(prefix="wps_bench_")
+    try:
+        spec = json.dumps({"backend": backend, "stock": stock_file, "sales": sales_file, "work_dir": work_dir})
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", spec],
+            capture_output=True, text=True, cwd=HERE,
+        )
+        for line in reversed(proc.stdout.splitlines()):
+            if line.startswith(RESULT_MARK):
+                return json.loads(line[len(RESULT_MARK):])
+        raise RuntimeError(f"{backend} 실행 실패:\n{proc.stderr.strip()[-2000:]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ---------------------------------
+# 벤치마크 / 기준선
+# ---------------------------------
+def machine_info():
+    """기준선에 함께 저장할 실행 환경 정보."""
+    import pandas as pd
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes, backends, skew=1.0, data_dir=None, repeat=1, seed=0):
+    """
+    판매 행 수(sizes) × 백엔드마다 repeat번 실행해, 가장 빠른 실행의 시간과 가장 큰 최대 RSS를 기록합니다.
+
+    :return: 결과 dict 리스트({"backend", "rows", "skew", "wall_seconds", "phases", "peak_rss_mb"}).
+    """
+
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), "wps_bench_data")
+    results = []
+    for rows in sizes:
+        dataset = generate_dataset(data_dir, rows, skew=skew, formats=("xlsx",), seed=seed)
+        for backend in backends:
+            runs = [
+                run_case_in_subprocess(backend, dataset["stock"]["xlsx"], dataset["sales"]["xlsx"])
+                for _ in range(repeat)
+            ]
+            best = min(runs, key=lambda r: r["wall_seconds"])
+            peaks = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+            result = {
+                "backend": backend,
+                "rows": rows,
+                "skew": skew,
+                "wall_seconds": round(best["wall_seconds"], 4),
+                "phases": {k: round(v, 4) for k, v in best["phases"].items()},
+                "peak_rss_mb": round(max(peaks), 1) if peaks else None,
+            }
+            print_result(result)
+            results.append(result)
+    return results
+
+
+def print_result(result):
+    phases = " ".join(f"{k} {result['phases'][k]:.3f}" for k in ("parse", "compute", "write") if k in result["phases"])
+    peak = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "-"
+    print(f"{result['backend']:24s} {result['rows']:>10,d}행  {result['wall_seconds']:8.3f}초  "
+          f"[{phases}]  최대 RSS {peak}")
+
+
+def _case_key(result):
+    return (result["backend"], result["rows"], result["skew"])
+
+
+def compare_with_baseline(results, baseline, threshold=1.25, min_seconds=MIN_REGRESSION_SECONDS,
+                          min_mb=MIN_REGRESSION_MB):
+    """
+    기준선과 같은 (백엔드, 행 수, skew) 경우끼리 비교해 출력하고, 회귀 목록을 반환합니다.
+
+    - 시간 또는 최대 RSS가 기준선의 threshold배를 넘고, 차이도 min_seconds초 / min_mb MB를 넘으면 회귀로 봅니다.
+      (작은 경우의 시작 비용 잡음으로 회귀가 뜨지 않도록)
+    - 기준선은 다른 머신에서 만들었을 수 있으므로 machine 정보가 다르면 경고만 출력합니다.
+    """
+
+    if baseline.get("machine") != machine_info():
+        print("[bench] 주의: 기준선과 실행 환경이 다릅니다 → 비교 결과는 참고용입니다.")
+
+    base_by_key = {_case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = base_by_key.get(_case_key(result))
+        if base is None:
+            print(f"{result['backend']:24s} {result['rows']:>10,d}행  기준선 없음")
+            continue
+        time_ratio = result["wall_seconds"] / base["wall_seconds"] if base["wall_seconds"] else 1.0
+        mem_ratio = (result["peak_rss_mb"] / base["peak_rss_mb"]
+                     if result["peak_rss_mb"] and base.get("peak_rss_mb") else 1.0)
+        slower = time_ratio > threshold and result["wall_seconds"] - base["wall_seconds"] > min_seconds
+        bigger = mem_ratio > threshold and (result["peak_rss_mb"] or 0) - (base.get("peak_rss_mb") or 0) > min_mb
+        flag = "회귀" if slower or bigger else "ok"
+        print(f"{result['backend']:24s} {result['rows']:>10,d}행  시간 x{time_ratio:.2f}  메모리 x{mem_ratio:.2f}  {flag}")
+        if flag != "ok":
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="병합 엔진 벤치마크")
+    parser.add_argument("--rows", default="100000", help="판매 행 수 목록(쉼표 구분)")
+    parser.add_argument("--skew", type=float, default=1.0, help="판매 쏠림(Zipf 지수)")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="측정할 백엔드(쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=1, help="경우마다 반복 횟수(가장 빠른 값 사용)")
+    parser.add_argument("--data-dir", default=None, help="합성 데이터 폴더(기본: 임시 폴더)")
+    parser.add_argument("--save-baseline", default=None, help="결과를 기준선 JSON으로 저장")
+    parser.add_argument("--compare", default=None, help="기준선 JSON과 비교")
+    parser.add_argument("--threshold", type=float, default=1.25, help="회귀로 볼 배율")
+    parser.add_argument("--min-seconds", type=float, default=MIN_REGRESSION_SECONDS, help="회귀로 볼 최소 시간 차이(초)")
+    parser.add_argument("--min-mb", type=float, default=MIN_REGRESSION_MB, help="회귀로 볼 최소 메모리 차이(MB)")
+    parser.add_argument("--run-one", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        spec = json.loads(args.run_one)
+        outcome = run_case(spec["backend"], spec["stock"], spec["sales"], spec["work_dir"])
+        print(RESULT_MARK + json.dumps(outcome))
+        sys.exit(0)
+
+    sizes = [int(x) for x in args.rows.split(",")]
+    backends = args.backends.split(",")
+    for backend in backends:
+        if backend not in BACKENDS:
+            parser.error(f"알 수 없는 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+
+    results = run_benchmarks(sizes, backends, skew=args.skew, data_dir=args.data_dir, repeat=args.repeat)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine_info(), "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"[bench] 기준선 저장: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare_with_baseline(results, baseline, args.threshold, args.min_seconds, args.min_mb):
+            sys.exit(1)
@@ -0,0 +1,180 @@
+# -------------------------------------------------------
+# 경량(lean) 브라우저 모드와 크롬 자원 사용량 보고
+#
+# 한 리눅스 서버에 동기화 작업을 여러 개 올리려면 크롬 한 벌이 차지하는 메모리/CPU를 줄여야 합니다.
+# - apply_lean_options   : headless, GPU/확장 프로그램 끄기, 작은 고정 뷰포트, 이미지 로드 차단 설정
+# - block_heavy_resources: CDP(Network.setBlockedURLs)로 이미지/폰트 요청 자체를 차단
+# - browser_usage        : chromedriver 아래 크롬 프로세스 트리 전체의 RSS/CPU 시간 합계
+#
+# 주의: headless에서는 사람이 로그인할 화면이 없으므로, 영구 프로필(wps_session)로
+#       세션이 살아 있을 때 쓰는 것을 전제로 합니다.
+# -------------------------------------------------------
+
+import os
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 경량 모드 고정 뷰포트 (편집기 메뉴가 접히지 않는 최소 크기)
+LEAN_WINDOW_SIZE = (1280, 800)
+
+# 경량 모드에서 차단할 요청 패턴 (이미지 + 웹폰트)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+
+# ---------------------------------
+# 크롬 옵션 / CDP 차단
+# ---------------------------------
+def apply_lean_options(chrome_options):
+    """
+    chrome_options에 경량 모드 옵션을 추가합니다.
+
+    - --headless=new        : 화면 없이 실행(새 headless는 다운로드도 일반 모드와 동일하게 동작)
+    - --disable-gpu         : GPU 프로세스 생략
+    - --disable-extensions  : 확장 프로그램 로드 생략
+    - --window-size         : 작은 고정 뷰포트
+    - 이미지 콘텐츠 설정 차단 : CDP 차단 전에 시작되는 요청까지 막기 위함
+    """
+
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--window-size={},{}".format(*LEAN_WINDOW_SIZE))
+
+
+def lean_prefs():
+    """경량 모드에서 prefs에 더할 항목 (이미지 로드 차단)."""
+    return {"profile.managed_default_content_settings.images": 2}
+
+
+def block_heavy_resources(driver, patterns=None):
+    """
+    CDP Network.setBlockedURLs로 이미지/폰트 요청을 네트워크 단계에서 차단합니다.
+    드라이버 생성 직후 한 번 호출하면 이후 모든 페이지 이동에 적용됩니다.
+
+    :return: 적용했으면 True, CDP를 쓸 수 없으면 False.
+    """
+
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or BLOCKED_URL_PATTERNS})
+        return True
+    except Exception:
+        return False
+
+
+# ---------------------------------
+# 프로세스 트리 자원 사용량
+# ---------------------------------
+def _proc_children_map():
+    """
+    /proc를 읽어 {부모 pid: [자식 pid, ...]} 맵을 만듭니다. (psutil이 없는 Linux용)
+    """
+
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 프로세스 이름에 공백/괄호가 있을 수 있으므로 마지막 ')' 뒤부터 나눕니다.
+        fields = stat[stat.rfind(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+
+def _proc_usage(pid):
+    """
+    /proc/<pid>에서 (RSS 바이트, CPU 시간 초)를 읽습니다.
+    """
+
+    with open(f"/proc/{pid}/stat") as f:
+        stat = f.read()
+    fields = stat[stat.rfind(")") + 2:].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    # fields[11], [12] = utime, stime (stat 기준 14, 15번째 항목)
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    return rss, cpu
+
+
+def process_tree_usage(root_pid):
+    """
+    root_pid와 그 모든 하위 프로세스의 RSS 합계와 CPU 시간(user+system) 합계를 구합니다.
+
+    psutil이 있으면 psutil로, 없으면 Linux /proc로 계산합니다. 둘 다 안 되면 None.
+
+    :param root_pid: 최상위 프로세스 pid(보통 chromedriver).
+    :return: {"processes": 개수, "rss_mb": MB, "cpu_seconds": 초} 또는 None.
+    """
+
+    pids = []
+    rss_total = 0
+    cpu_total = 0.0
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(root_pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        for proc in procs:
+            try:
+                rss_total += proc.memory_info().rss
+                times = proc.cpu_times()
+                cpu_total += times.user + times.system
+                pids.append(proc.pid)
+            except psutil.Error:
+                continue
+    elif os.path.isdir("/proc"):
+        children = _proc_children_map()
+        stack = [root_pid]
+        while stack:
+            pid = stack.pop()
+            try:
+                rss, cpu = _proc_usage(pid)
+            except OSError:
+                continue
+            rss_total += rss
+            cpu_total += cpu
+            pids.append(pid)
+            stack.extend(children.get(pid, []))
+    else:
+        return None
+
+    return {"processes": len(pids), "rss_mb": rss_total / (1024 * 1024), "cpu_seconds": cpu_total}
+
+
+def browser_usage(driver):
+    """
+    드라이버가 띄운 chromedriver + 크롬 프로세스 트리의 자원 사용량을 구합니다.
+    driver.quit() 전에 호출해야 합니다.
+    """
+
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    return process_tree_usage(pid)
+
+
+def report_browser_usage(driver):
+    """
+    browser_usage 결과를 한 줄로 출력하고 그대로 반환합니다.
+    """
+
+    usage = browser_usage(driver)
+    if usage is None:
+        print("[browser] 크롬 프로세스 사용량을 측정할 수 없습니다.")
+    else:
+        print(f"[browser] 크롬 프로세스 {usage['processes']}개, "
+              f"RSS {usage['rss_mb']:.1f}MB, CPU {usage['cpu_seconds']:.1f}초")
+    return usage
@@ -0,0 +1,199 @@
+# -------------------------------------------------------
+# 내보내기(xlsx) 요청을 HTTP로 직접 받기
+#
+# 편집기 경로는 문서 열기 → 편집기 렌더링 대기 → File Operations → Download 클릭 → 파일 대기 순서라
+# 실제로 필요한 것은 마지막 HTTP 응답 하나뿐인데도 편집기 렌더링 비용을 매번 치릅니다.
+#
+# 1) 기록 : 편집기 경로로 한 번 받을 때 DownloadWatcher가 본 다운로드 URL(downloadWillBegin.url)을
+#           문서 URL별로 레시피 파일(JSON)에 저장합니다.
+# 2) 재생 : 다음 실행부터는 드라이버의 로그인 쿠키를 HTTP 세션(requests.Session, 연결 재사용)에 복사해
+#           그 URL을 바로 요청하고, 응답을 메모리 또는 디스크로 받습니다.
+# 응답이 xlsx가 아니거나(로그인 페이지, 만료된 서명 URL 등) 요청이 실패하면 None을 돌려주므로
+# 호출하는 쪽에서 편집기 경로로 대체하고, 그때 새 URL이 다시 기록됩니다.
+#
+# requests가 설치되어 있지 않으면 직접 받기는 비활성화됩니다(편집기 경로만 사용).
+# -------------------------------------------------------
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+from wps_session import browser_cookies
+
+# xlsx(zip) 파일의 시작 바이트
+XLSX_MAGIC = b"PK\x03\x04"
+# 직접 요청할 수 있는 URL 스킴. CDP가 알려 주는 blob:/data: URL은 브라우저 안에서만 의미가 있음
+FETCHABLE_SCHEMES = ("http", "https")
+# 응답을 읽는 단위(바이트)
+CHUNK_SIZE = 256 * 1024
+
+# 배치 모드의 여러 워커가 같은 레시피 파일을 동시에 고치지 않도록 잠급니다.
+_RECIPE_LOCK = threading.Lock()
+
+
+class ExportFetchError(Exception):
+    """직접 받기 응답이 xlsx가 아니거나 요청이 실패했을 때 발생하는 예외."""
+
+
+# ---------------------------------
+# 레시피(기록된 내보내기 요청)
+# ---------------------------------
+def load_export_recipe(recipe_file, doc_url):
+    """
+    doc_url에 대해 기록된 내보내기 요청을 반환합니다. 없으면 None.
+
+    :param recipe_file: 레시피 JSON 파일 경로. {문서 URL: {"export_url", "recorded_at"}}
+    :param doc_url: 스프레드시트 문서 URL.
+    """
+
+    if not recipe_file or not os.path.exists(recipe_file):
+        return None
+    with open(recipe_file, encoding="utf-8") as f:
+        return json.load(f).get(doc_url)
+
+
+def is_fetchable_url(url):
+    """HTTP로 다시 요청할 수 있는 URL(http/https)이면 True."""
+    return urlsplit(url or "").scheme.lower() in FETCHABLE_SCHEMES
+
+
+def record_export_request(recipe_file, doc_url, export_url):
+    """
+    편집기 경로에서 관찰한 다운로드 URL을 문서 URL별로 레시피 파일에 저장합니다.
+    http(s)가 아닌 URL(blob:, data: 등 페이지가 만든 다운로드)은 다시 요청할 수 없으므로 기록하지 않습니다.
+
+    :return: 기록했으면 True.
+    """
+
+    if not is_fetchable_url(export_url):
+        return False
+    with _RECIPE_LOCK:
+        recipes = {}
+        if os.path.exists(recipe_file):
+            with open(recipe_file, encoding="utf-8") as f:
+                recipes = json.load(f)
+        recipes[doc_url] = {"export_url": export_url, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+        tmp_path = recipe_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(recipes, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, recipe_file)
+    return True
+
+
+# ---------------------------------
+# 드라이버 쿠키 → HTTP 세션
+# ---------------------------------
+def session_from_driver(driver):
+    """
+    드라이버의 로그인 쿠키와 User-Agent를 복사한 requests.Session을 만듭니다.
+    같은 세션으로 여러 번 요청하면 연결(keep-alive)이 재사용됩니다.
+    쿠키는 현재 페이지(account.wps.com)만이 아니라 브라우저의 모든 도메인에서 가져옵니다(docs.wps.com 포함).
+
+    :return: requests.Session. requests가 없으면 None.
+    """
+
+    if requests is None:
+        return None
+
+    session = requests.Session()
+    for cookie in browser_cookies(driver):
+        session.cookies.set(
+            cookie["name"], cookie["value"],
+            domain=cookie.get("domain"), path=cookie.get("path", "/"), secure=cookie.get("secure", False),
+        )
+    try:
+        session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    except Exception:
+        pass
+    return session
+
+
+def fetch_export(session, export_url, dest_path=None, timeout=30, referer=None):
+    """
+    내보내기 URL을 직접 요청해 xlsx를 받습니다.
+
+    - dest_path가 None이면 내용을 bytes로 반환합니다(메모리).
+    - dest_path가 있으면 임시 파일에 스트리밍으로 쓴 뒤 os.replace로 교체하고 경로를 반환합니다.
+    - 응답 코드가 200이 아니거나, 내용이 xlsx(zip)로 시작하지 않으면 ExportFetchError.
+    - 받는 도중 연결이 끊기거나(ChunkedEncodingError 등) 읽기 시간이 지나도 ExportFetchError로 바꾸고,
+      쓰다 만 임시 파일(.part)은 지웁니다.
+
+    :param session: session_from_driver로 만든 requests.Session.
+    :param export_url: 기록된 내보내기 URL.
+    :param dest_path: (선택) 저장할 경로.
+    :param timeout: 요청 시간 제한(초).
+    :param referer: (선택) Referer 헤더(문서 URL).
+    """
+
+    if not is_fetchable_url(export_url):
+        raise ExportFetchError(f"http(s) URL이 아닙니다: {export_url[:40]}")
+    headers = {"Referer": referer} if referer else {}
+    try:
+        response = session.get(export_url, headers=headers, timeout=timeout, stream=True)
+    except requests.RequestException as e:
+        raise ExportFetchError(f"요청 실패: {e}")
+
+    with response:
+        if response.status_code != 200:
+            raise ExportFetchError(f"응답 코드 {response.status_code}")
+        tmp_path = None
+        try:
+            chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+            first = next(chunks, b"")
+            if not first.startswith(XLSX_MAGIC):
+                raise ExportFetchError("응답이 xlsx 파일이 아닙니다(로그인 만료 또는 URL 만료).")
+
+            if dest_path is None:
+                return first + b"".join(chunks)
+
+            tmp_path = dest_path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(first)
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, dest_path)
+            tmp_path = None
+            return dest_path
+        except requests.RequestException as e:
+            raise ExportFetchError(f"받는 중 실패: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def fetch_stock_direct(driver, doc_url, dest_path, recipe_file):
+    """
+    기록된 내보내기 요청이 있으면 편집기를 열지 않고 재고 xlsx를 바로 받아 dest_path에 저장합니다.
+
+    :param driver: 로그인된 Selenium WebDriver.
+    :param doc_url: 스프레드시트 문서 URL.
+    :param dest_path: 저장할 경로(예: DOWNLOAD_DIR/stock.xlsx).
+    :param recipe_file: 레시피 JSON 파일 경로.
+    :return: 저장한 경로. 기록이 없거나 실패하면 None(→ 편집기 경로로 대체).
+    """
+
+    recipe = load_export_recipe(recipe_file, doc_url)
+    if recipe is None:
+        return None
+    session = session_from_driver(driver)
+    if session is None:
+        print("requests가 설치되어 있지 않아 직접 받기를 건너뜁니다.")
+        return None
+
+    start = time.perf_counter()
+    try:
+        with session:
+            path = fetch_export(session, recipe["export_url"], dest_path, referer=doc_url)
+    except ExportFetchError as e:
+        print(f"직접 받기 실패 → 편집기에서 다운로드: {e}")
+        return None
+    print(f"직접 받기 완료 ({time.perf_counter() - start:.2f}초, {os.path.getsize(path) / 1024:.1f}KB)")
+    return path
@@ -0,0 +1,150 @@
+# -------------------------------------------------------
+# MutationObserver 기반 DOM 대기 (push 방식)
+#
+# WebDriverWait는 조건을 0.5초마다 WebDriver 프로토콜로 다시 물어봅니다(find_element 왕복).
+# 요소가 나타난 뒤에도 다음 확인까지 최대 0.5초를 그냥 기다리고, 확인할 때마다 왕복 지연이 더해집니다.
+#
+# 여기서는 execute_async_script 한 번으로 브라우저 안에 MutationObserver를 걸어 두고,
+# 대상 요소(와 텍스트)가 DOM에 나타나는 순간 스크립트가 그 요소를 돌려주게 합니다.
+#   - 처음부터 있으면 바로 반환(왕복 1회)
+#   - 없으면 DOM 변경(자식 추가/텍스트/속성)마다 브라우저 안에서만 다시 확인
+#   - max_wait가 지나면 null을 돌려주고, 파이썬 쪽에서 TimeoutException(WebDriverWait와 같은 예외)
+# 대기 중에 페이지가 이동하면(로그인 후 리다이렉트 등) 스크립트가 중단되므로 남은 시간으로 다시 겁니다.
+# 스크립트로 찾을 수 없는 방식(By.LINK_TEXT 등)은 WebDriverWait 폴링으로 기다립니다.
+#
+# 대기마다 걸린 시간을 sync_metrics의 "wait" span으로 기록합니다(무엇을, 어떤 방식으로, 몇 초).
+# -------------------------------------------------------
+
+import time
+import weakref
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from sync_metrics import span
+
+# 스크립트로 찾을 수 있는 방식
+OBSERVABLE_BY = (By.CSS_SELECTOR, By.ID, By.NAME, By.CLASS_NAME, By.TAG_NAME, By.XPATH)
+# 브라우저 쪽 제한 시간이 지난 뒤 결과를 돌려받을 여유(초). 드라이버의 스크립트 제한 시간은 max_wait + 이 값
+SCRIPT_TIMEOUT_MARGIN = 5
+# 페이지 이동으로 스크립트가 끊겼을 때 다시 걸기 전에 쉬는 시간(초)
+RETRY_DELAY = 0.05
+
+# arguments: [by, locator, text, timeoutMs, callback]
+# text가 null이 아니면 요소의 textContent에 text가 들어 있을 때만 찾은 것으로 봅니다(EC.text_to_be_present_in_element와 같음).
+_OBSERVE_JS = """
+const [by, locator, text, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+function find() {
+    let el = null;
+    if (by === 'css selector') el = document.querySelector(locator);
+    else if (by === 'id') el = document.getElementById(locator);
+    else if (by === 'name') el = document.getElementsByName(locator)[0] || null;
+    else if (by === 'class name') el = document.getElementsByClassName(locator)[0] || null;
+    else if (by === 'tag name') el = document.getElementsByTagName(locator)[0] || null;
+    else if (by === 'xpath') el = document.evaluate(
+        locator, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (el && text !== null && !(el.textContent || '').includes(text)) return null;
+    return el;
+}
+const first = find();
+if (first) { done(first); return; }
+let finished = false;
+const observer = new MutationObserver(() => {
+    const el = find();
+    if (el) finish(el);
+});
+const timer = setTimeout(() => finish(null), timeoutMs);
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(value);
+}
+observer.observe(document, {childList: true, subtree: true, characterData: true, attributes: true});
+"""
+
+# 드라이버별로 마지막에 설정한 스크립트 제한 시간(초). 필요할 때만 늘려 왕복을 아낌
+_script_timeouts = weakref.WeakKeyDictionary()
+
+
+def _ensure_script_timeout(driver, seconds):
+    try:
+        current = _script_timeouts.get(driver)
+    except TypeError:
+        current = None
+    if current is None or current < seconds:
+        driver.set_script_timeout(seconds)
+        try:
+            _script_timeouts[driver] = seconds
+        except TypeError:
+            pass
+
+
+def _document_unloaded(error):
+    """페이지 이동으로 비동기 스크립트가 끊긴 오류인지."""
+    message = (getattr(error, "msg", None) or str(error)).lower()
+    return "unload" in message or "navigat" in message or "detached" in message
+
+
+def _poll(driver, by, locator, text, max_wait):
+    """WebDriverWait 폴링(스크립트로 찾을 수 없는 방식용)."""
+    if text is None:
+        return WebDriverWait(driver, max_wait).until(EC.presence_of_element_located((by, locator)))
+    WebDriverWait(driver, max_wait).until(EC.text_to_be_present_in_element((by, locator), text))
+    return driver.find_element(by, locator)
+
+
+def wait_for_dom(driver, by, locator, text=None, max_wait=10, label=None):
+    """
+    요소가(text가 주어지면 그 텍스트를 담은 채로) DOM에 나타나는 순간 반환합니다.
+
+    1) by가 스크립트로 찾을 수 있는 방식이면 MutationObserver로 기다립니다(execute_async_script).
+    2) 대기 중 페이지가 이동해 스크립트가 끊기면 남은 시간으로 다시 겁니다.
+    3) 그 밖의 방식이면 WebDriverWait 폴링으로 기다립니다.
+    대기 시간은 "wait" span(wait=label, mode=observer/poll, retries)으로 기록합니다.
+
+    :param driver: Selenium WebDriver 객체.
+    :param by: 요소를 찾는 방식(예: By.CSS_SELECTOR).
+    :param locator: 선택자.
+    :param text: (선택) 요소의 텍스트에 들어 있어야 하는 문자열.
+    :param max_wait: 최대 대기 시간(초).
+    :param label: (선택) 기록에 남길 대기 이름. None이면 locator.
+    :return: 찾은 WebElement.
+    :raises TimeoutException: max_wait 안에 요소(텍스트)가 나타나지 않은 경우.
+    """
+
+    start = time.monotonic()
+    with span("wait", wait=label or locator, mode="observer") as s:
+        if by not in OBSERVABLE_BY:
+            s["mode"] = "poll"
+            return _poll(driver, by, locator, text, max_wait)
+
+        _ensure_script_timeout(driver, max_wait + SCRIPT_TIMEOUT_MARGIN)
+        retries = 0
+        while True:
+            remaining = max_wait - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            try:
+                element = driver.execute_async_script(_OBSERVE_JS, by, locator, text, int(remaining * 1000))
+            except TimeoutException:
+                # 드라이버의 스크립트 제한 시간이 먼저 끝남(다른 곳에서 짧게 바꾼 경우)
+                break
+            except WebDriverException as e:
+                # JavascriptException 포함. 페이지 이동으로 끊긴 경우만 다시 걸고 나머지는 그대로 올림
+                if not _document_unloaded(e):
+                    raise
+                retries += 1
+                s["retries"] = retries
+                time.sleep(RETRY_DELAY)
+                continue
+            if element is not None:
+                return element
+            break
+
+        target = f"'{text}' 텍스트를 담은 {locator}" if text is not None else locator
+        raise TimeoutException(f"{max_wait}초 안에 {target} 요소가 나타나지 않았습니다.")
@@ -0,0 +1,260 @@
+# -------------------------------------------------------
+# 다운로드 완료 감지
+#
+# 기존 wait_for_file_download는 1초마다 DOWNLOAD_DIR을 glob으로 훑어서
+# - 완료 후 최대 1초를 더 기다리고,
+# - 아직 쓰는 중인 파일이나 예전 실행에서 남은 stock(3).xlsx를 잡을 수 있었습니다.
+#
+# DownloadWatcher는 Download 버튼을 누르기 "전에" 만들어 두고, 누른 뒤 wait()를 호출합니다.
+# 1) Chrome DevTools(CDP) 다운로드 이벤트
+#    Browser.setDownloadBehavior로 다운로드 폴더를 지정하고,
+#    ChromeDriver 성능 로그(goog:loggingPrefs performance, perfLoggingPrefs enablePage)로 들어오는
+#    Page.downloadWillBegin / Page.downloadProgress 이벤트를 읽어
+#    이번 세션이 시작한 다운로드(guid)가 completed 되는 순간을 잡습니다.
+#    (Browser.download* 이벤트는 브라우저 타깃 이벤트라 페이지 세션의 성능 로그에는 오지 않으므로 쓰지 않음)
+#    성능 로그는 드라이버를 만들 때 켜야 합니다(get_chrome_driver(download_events=True)). 꺼져 있으면 2)만 씁니다.
+# 2) 파일시스템 감시(대체 경로)
+#    Linux에서는 inotify로 폴더 변화가 생기는 즉시 깨어나고, 그 외 OS는 0.1초 간격으로 확인합니다.
+#    만들기 전 스냅샷에 없던 파일만 보며, .crdownload 같은 임시 파일은 무시합니다.
+# -------------------------------------------------------
+
+import os
+import json
+import time
+import ctypes
+import ctypes.util
+import select
+
+# 다운로드 중인 임시 파일 확장자(Chrome, Edge, Firefox)
+TEMP_SUFFIXES = (".crdownload", ".part", ".tmp", ".download")
+
+# 성능 로그에서 읽는 다운로드 이벤트(CDP method → 종류)
+DOWNLOAD_EVENT_METHODS = {
+    "Page.downloadWillBegin": "downloadWillBegin",
+    "Page.downloadProgress": "downloadProgress",
+}
+
+# inotify 상수 (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+# 다운로드 감시에 쓰는 이벤트(파일 생성/이름변경/쓰기 완료)
+DOWNLOAD_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+# ---------------------------------
+# inotify (Linux 전용, ctypes)
+# ---------------------------------
+class _Inotify:
+    """
+    디렉터리 하나를 inotify로 감시하다가, 파일 생성/이름변경/쓰기 완료가 생기면 wait()에서 바로 깨어납니다.
+    이벤트 내용은 해석하지 않고 "변화가 있었다"는 신호로만 씁니다(깨어나면 폴더를 다시 확인).
+
+    :param path: 감시할 디렉터리.
+    :param mask: inotify 이벤트 마스크(기본값: DOWNLOAD_EVENTS).
+    """
+
+    def __init__(self, path, mask=DOWNLOAD_EVENTS):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch 실패: {path}")
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 64 * 1024):
+                    pass
+            except BlockingIOError:
+                pass
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_inotify(path, mask=DOWNLOAD_EVENTS):
+    """inotify를 쓸 수 있으면 _Inotify를, 아니면(macOS/Windows 등) None을 반환합니다."""
+    if not hasattr(os, "O_NONBLOCK") or not os.path.exists("/proc/sys/fs/inotify"):
+        return None
+    try:
+        return _Inotify(path, mask)
+    except (OSError, AttributeError):
+        return None
+
+
+# ---------------------------------
+# CDP 다운로드 이벤트
+# ---------------------------------
+def enable_download_events(driver, download_dir):
+    """
+    Browser.setDownloadBehavior로 다운로드 경로를 download_dir로 지정합니다.
+    (완료 이벤트는 이 호출이 아니라 성능 로그의 Page.download* 이벤트로 받음)
+
+    :return: 성공하면 True. Chrome이 아니거나 CDP를 쓸 수 없으면 False.
+    """
+
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": download_dir,
+        })
+        return True
+    except Exception:
+        return False
+
+
+def _read_download_events(driver):
+    """
+    ChromeDriver 성능 로그에서 Page.downloadWillBegin / Page.downloadProgress 이벤트만 골라
+    (종류, params) 리스트로 반환합니다. 성능 로그를 읽을 수 없으면(드라이버에서 켜지 않음) None.
+    """
+
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        kind = DOWNLOAD_EVENT_METHODS.get(message.get("method"))
+        if kind:
+            events.append((kind, message.get("params", {})))
+    return events
+
+
+# ---------------------------------
+# 다운로드 감시자
+# ---------------------------------
+class DownloadWatcher:
+    """
+    이번 세션에서 새로 받은 파일 하나를, 완료되는 즉시 정확히 찾아주는 감시자.
+
+    사용법:
+        watcher = DownloadWatcher(driver, DOWNLOAD_DIR, keyword="stock")   # 클릭 "전"
+        download_elem.click()
+        path = watcher.wait(timeout=30)
+
+    :param driver: Selenium WebDriver (None이거나 성능 로그가 꺼져 있으면 파일시스템 감시만 사용).
+    :param download_dir: 다운로드 폴더. CDP(Browser.setDownloadBehavior)로 크롬의 다운로드 폴더를 여기로 바꿉니다.
+    :param keyword: (선택) 파일명에 포함되어야 하는 문자열(대소문자 무시).
+    :param suffix: 받을 파일 확장자(기본값: ".xlsx").
+    :raises Exception: CDP로 폴더를 바꾸지 못했는데 크롬의 다운로드 폴더(driver.download_dir)가 download_dir과 다른 경우
+                       (파일이 아무도 보지 않는 폴더로 받아지므로 기다리지 않고 바로 실패).
+    """
+
+    def __init__(self, driver, download_dir, keyword=None, suffix=".xlsx"):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.keyword = keyword.lower() if keyword else None
+        self.suffix = suffix.lower()
+        self.snapshot = set(os.listdir(download_dir))
+        self.guids = {}
+        self.urls = {}
+        self.completed = []
+        # 완료된 다운로드의 요청 URL (CDP 이벤트로 알 수 있을 때만). direct_export에서 기록용으로 사용.
+        self.download_url = None
+        self.use_events = False
+
+        if driver is None:
+            return
+        if not enable_download_events(driver, download_dir):
+            # 폴더를 바꾸지 못함 → 크롬이 원래 폴더(get_chrome_driver의 download_dir)에 받으므로 그 폴더여야 함
+            default_dir = getattr(driver, "download_dir", None)
+            if default_dir and os.path.abspath(default_dir) != os.path.abspath(download_dir):
+                raise Exception(
+                    f"다운로드 폴더를 {download_dir}(으)로 바꾸지 못했습니다(CDP 실패). 크롬은 {default_dir}에 받습니다."
+                )
+            return
+        # 예전 로그를 비워 두고, 성능 로그를 읽을 수 있을 때만 이벤트 경로를 사용
+        self.use_events = _read_download_events(driver) is not None
+
+    def _is_candidate(self, name):
+        lowered = name.lower()
+        if lowered.endswith(TEMP_SUFFIXES) or not lowered.endswith(self.suffix):
+            return False
+        return self.keyword is None or self.keyword in lowered
+
+    def _poll_events(self):
+        """
+        새 CDP 이벤트를 읽어, 완료된 다운로드의 최종 파일 경로를 반환합니다(없으면 None).
+
+        Chrome은 같은 이름이 있으면 "stock (1).xlsx"처럼 이름을 바꿔 저장하므로
+        suggestedFilename을 그대로 믿지 않고, 스냅샷에 없던 파일 중 이름이 맞는 것을 찾습니다.
+        """
+
+        for kind, params in _read_download_events(self.driver) or []:
+            guid = params.get("guid")
+            if kind == "downloadWillBegin":
+                self.guids[guid] = params.get("suggestedFilename", "")
+                self.urls[guid] = params.get("url")
+            elif kind == "downloadProgress" and guid in self.guids:
+                if params.get("state") == "completed":
+                    self.completed.append(guid)
+                elif params.get("state") == "canceled":
+                    raise Exception(f"다운로드가 취소되었습니다: {self.guids[guid]}")
+
+        if not self.completed:
+            return None
+        for guid in self.completed:
+            stem = os.path.splitext(self.guids[guid])[0].lower()
+            for name in self._new_files():
+                if name.lower().startswith(stem):
+                    self.download_url = self.urls.get(guid)
+                    return os.path.join(self.download_dir, name)
+        return None
+
+    def _new_files(self):
+        return [name for name in os.listdir(self.download_dir)
+                if name not in self.snapshot and self._is_candidate(name)]
+
+    def wait(self, timeout=30):
+        """
+        다운로드가 끝날 때까지 기다렸다가 완성된 파일의 전체 경로를 반환합니다.
+
+        - CDP 이벤트가 있으면 completed 이벤트가 오는 즉시 반환합니다.
+        - 이벤트가 없더라도, 스냅샷에 없던 완성 파일(임시 확장자가 아닌 파일)이 생기면 반환합니다.
+          Chrome은 .crdownload로 받다가 끝나는 순간 최종 이름으로 바꾸므로, 최종 이름이 보이면 완료입니다.
+
+        :param timeout: 최대 대기 시간(초).
+        :return: 새로 받은 파일의 전체 경로.
+        :raises Exception: timeout 안에 파일이 완성되지 않은 경우.
+        """
+
+        deadline = time.monotonic() + timeout
+        notifier = open_inotify(self.download_dir)
+        try:
+            while True:
+                if self.use_events:
+                    path = self._poll_events()
+                    if path:
+                        return path
+                new_files = self._new_files()
+                if new_files:
+                    # 여러 개면 가장 최근에 완성된 파일
+                    new_files.sort(key=lambda n: os.path.getmtime(os.path.join(self.download_dir, n)))
+                    return os.path.join(self.download_dir, new_files[-1])
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception(f"다운로드 파일을 {timeout}초 내에 찾지 못했습니다.")
+                # inotify가 있으면 폴더 변화 즉시 깨어나고, CDP 이벤트 확인을 위해 최대 0.1초마다 돕니다.
+                if notifier is not None:
+                    notifier.wait(min(remaining, 0.1))
+                else:
+                    time.sleep(min(remaining, 0.1))
+        finally:
+            if notifier is not None:
+                notifier.close()
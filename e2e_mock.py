@@ -0,0 +1,195 @@
+# -------------------------------------------------------
+# 모의 WPS 사이트로 전체 흐름 시간 재기 (네트워크 없이, headless)
+#
+# mock_wps.MockWPS를 띄우고, 스크립트(wps_selenium_script)의 주소/경로 설정을 모의 사이트와 임시 폴더로 바꾼 뒤
+# 메인 로직(로그인 확인 → 재고 받기 → 병합 → 업로드)을 runs번 실행합니다.
+#
+# - 1회차: 내보내기 기록이 없으므로 편집기 경로(File Operations → Download)로 받고 URL을 기록
+# - 2회차부터: 기록된 URL로 직접 받기(DIRECT_EXPORT) → 편집기를 열지 않는지 모의 사이트 요청 수로 확인
+# - 매 회 업로드된 파일의 stock_qty가 "재고 - 판매 합계(0 미만은 0)"와 같은지 판다스로 따로 계산해 확인
+# - 단계별 시간은 sync_metrics의 JSON Lines에서 회차별로 모아 표로 출력(wait 열은 요소 대기 합계)
+#
+# 크롬/크롬드라이버만 있으면 되고(LEAN_BROWSER=headless), 실제 WPS 계정이나 사람의 로그인은 필요 없습니다.
+#
+# 명령줄:
+#     python e2e_mock.py --runs 2 --latency 0.05 --export-latency 0.5 --editor-delay 2
+# -------------------------------------------------------
+
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import importlib
+
+import pandas as pd
+
+from mock_wps import MockWPS
+from sync_metrics import STAGES, NESTED_STAGES
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# 스크립트 모듈 → 메인 함수 이름
+MAIN_FUNCTIONS = {
+    "wps_selenium_script": "download_merge_upload_with_finder",
+    "windows_wps_selenium_script": "download_merge_upload_with_explorer",
+}
+
+
+# ---------------------------------
+# 스크립트 설정 바꾸기
+# ---------------------------------
+def configure_script(script, site, work_root, sales_file):
+    """
+    스크립트 모듈의 전역 설정을 모의 사이트 주소와 work_root 아래 임시 경로로 바꿉니다.
+    (DOWNLOAD_DIR에서 파생된 경로는 import 시점에 이미 계산되어 있으므로 하나씩 다시 지정)
+    Windows 스크립트처럼 설정을 공용 스크립트(shared)에서 가져오는 모듈이면 그 공용 모듈의 값을 바꿉니다.
+
+    - 판매 반영 장부는 끔(SALES_LEDGER_PATH=None) → 매 회 같은 판매를 반영해 회차끼리 시간을 비교할 수 있음
+    - 영구 프로필 없이 headless 경량 모드, 업로드는 input[type=file] 직접 지정
+    """
+
+    settings = {
+        "WPS_ACCOUNT_URL": site.account_url,
+        "UPLOAD_PAGE_URL": site.upload_page_url,
+        "STOCK_DOC_URL": site.doc_url,
+        "DOWNLOAD_DIR": work_root,
+        "LOCAL_SALES_PATH": sales_file,
+        "SALES_LEDGER_PATH": None,
+        "FRAME_CACHE_DIR": os.path.join(work_root, ".frame_cache"),
+        "RUNS_DIR": os.path.join(work_root, ".wps_runs"),
+        "METRICS_JSONL": os.path.join(work_root, "sync_spans.jsonl"),
+        "METRICS_PROM_DIR": os.path.join(work_root, "metrics"),
+        "EXPORT_RECIPE_FILE": os.path.join(work_root, "export_recipe.json"),
+        "SESSION_COOKIE_FILE": os.path.join(work_root, "cookies.json"),
+        "SYNC_FINGERPRINT_FILE": os.path.join(work_root, "sync_fingerprints.json"),
+        "BROWSER_PROFILE_DIR": None,
+        "LEAN_BROWSER": True,
+        "UPLOAD_BACKEND": "input",
+    }
+    target = getattr(script, "shared", script)
+    for name, value in settings.items():
+        if not hasattr(target, name):
+            raise AttributeError(f"{target.__name__}에 {name} 설정이 없습니다.")
+        setattr(target, name, value)
+    return settings
+
+
+# ---------------------------------
+# 결과 확인
+# ---------------------------------
+def expected_stock(stock_file, sales_file):
+    """재고 - product_id별 판매 합계(0 미만은 0)를 {product_id: stock_qty}로 계산합니다."""
+    stock_df = pd.read_excel(stock_file)
+    sold = pd.read_excel(sales_file).groupby("product_id")["quantity_sold"].sum()
+    remaining = (stock_df["stock_qty"] - stock_df["product_id"].map(sold).fillna(0)).clip(lower=0)
+    return dict(zip(stock_df["product_id"].tolist(), remaining.astype(int).tolist()))
+
+
+def check_upload(upload_path, expected):
+    """
+    업로드된 파일의 stock_qty가 기대값과 같은지 확인합니다.
+
+    :raises AssertionError: 다른 값이 있는 경우.
+    """
+
+    uploaded = pd.read_excel(upload_path)
+    actual = dict(zip(uploaded["product_id"].tolist(), uploaded["stock_qty"].astype(int).tolist()))
+    if actual != expected:
+        diff = {k: (actual.get(k), v) for k, v in expected.items() if actual.get(k) != v}
+        raise AssertionError(f"업로드된 재고가 기대값과 다릅니다(실제, 기대): {diff}")
+
+
+def run_timings(jsonl_path):
+    """JSON Lines의 span을 실행(run_id)별 {단계: 초}로 모읍니다(기록 순서대로)."""
+    runs = {}
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            stages = runs.setdefault(entry["run_id"], {})
+            stages[entry["stage"]] = stages.get(entry["stage"], 0.0) + entry["seconds"]
+    return list(runs.values())
+
+
+def print_timings(timings):
+    # wait(요소 대기)는 다른 단계에 포함된 시간이라 total 앞에 따로 둠
+    columns = [s for s in STAGES + NESTED_STAGES if any(s in t for t in timings)] + ["total"]
+    print("회차  " + " ".join(f"{c:>11s}" for c in columns))
+    for i, stages in enumerate(timings, 1):
+        print(f"{i:4d}  " + " ".join(f"{stages[c]:11.2f}" if c in stages else f"{'-':>11s}" for c in columns))
+
+
+# ---------------------------------
+# 실행
+# ---------------------------------
+def run_mock_e2e(runs=2, script_name="wps_selenium_script", stock_file=None, sales_file=None,
+                 latency=0.0, export_latency=0.0, upload_latency=0.0, editor_delay=0.0, keep=False):
+    """
+    모의 사이트를 띄우고 스크립트의 메인 로직을 runs번 실행해 회차별 단계 시간을 반환합니다.
+
+    :param runs: 실행 횟수(1회차는 편집기 경로, 2회차부터 직접 받기).
+    :param script_name: 실행할 스크립트 모듈(MAIN_FUNCTIONS 참고).
+    :param stock_file: 모의 사이트가 내려줄 재고 파일. 기본값 sample_data/stock.xlsx.
+    :param sales_file: 로컬 판매 파일. 기본값 sample_data/sales.xlsx.
+    :param latency: 모든 응답 지연(초).
+    :param export_latency: 내보내기 응답 추가 지연(초).
+    :param upload_latency: 업로드 응답 추가 지연(초).
+    :param editor_delay: 편집기 File Operations 버튼 표시 지연(초).
+    :param keep: True면 임시 폴더를 지우지 않고 경로를 출력합니다.
+    :return: 회차별 {단계: 초} 리스트.
+    :raises AssertionError: 업로드 결과가 틀리거나, 직접 받기 회차에서 편집기를 연 경우.
+    """
+
+    stock_file = stock_file or os.path.join(HERE, "sample_data", "stock.xlsx")
+    sales_file = os.path.abspath(sales_file or os.path.join(HERE, "sample_data", "sales.xlsx"))
+    expected = expected_stock(stock_file, sales_file)
+
+    work_root = tempfile.mkdtemp(prefix="wps_e2e_")
+    site = MockWPS(
+        stock_file, os.path.join(work_root, "uploads"), latency=latency,
+        route_latency={"/export/": export_latency, "/api/upload": upload_latency}, editor_delay=editor_delay,
+    )
+    try:
+        with site:
+            script = importlib.import_module(script_name)
+            settings = configure_script(script, site, work_root, sales_file)
+            main = getattr(script, MAIN_FUNCTIONS[script_name])
+
+            for run in range(1, runs + 1):
+                editor_hits = site.hits.get("/p/", 0)
+                main()
+                if len(site.uploads) != run:
+                    raise AssertionError(f"{run}회차 업로드가 모의 사이트에 도착하지 않았습니다.")
+                check_upload(site.uploads[-1], expected)
+                opened_editor = site.hits.get("/p/", 0) > editor_hits
+                if run > 1 and opened_editor:
+                    raise AssertionError(f"{run}회차가 직접 받기 대신 편집기를 열었습니다.")
+                print(f"[e2e] {run}회차 통과 ({'편집기' if opened_editor else '직접 받기'} 경로)")
+
+        timings = run_timings(settings["METRICS_JSONL"])
+        print_timings(timings)
+        return timings
+    finally:
+        if keep:
+            print(f"[e2e] 작업 폴더: {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모의 WPS 사이트로 전체 흐름 시간 재기")
+    parser.add_argument("--runs", type=int, default=2, help="실행 횟수(1회차 편집기, 이후 직접 받기)")
+    parser.add_argument("--script", default="wps_selenium_script", choices=sorted(MAIN_FUNCTIONS))
+    parser.add_argument("--stock", default=None, help="모의 사이트가 내려줄 재고 파일")
+    parser.add_argument("--sales", default=None, help="로컬 판매 파일")
+    parser.add_argument("--latency", type=float, default=0.0, help="모든 응답 지연(초)")
+    parser.add_argument("--export-latency", type=float, default=0.0, help="내보내기 응답 추가 지연(초)")
+    parser.add_argument("--upload-latency", type=float, default=0.0, help="업로드 응답 추가 지연(초)")
+    parser.add_argument("--editor-delay", type=float, default=0.0, help="File Operations 버튼 표시 지연(초)")
+    parser.add_argument("--keep", action="store_true", help="임시 작업 폴더를 남김")
+    args = parser.parse_args()
+
+    run_mock_e2e(
+        args.runs, args.script, args.stock, args.sales, latency=args.latency,
+        export_latency=args.export_latency, upload_latency=args.upload_latency,
+        editor_delay=args.editor_delay, keep=args.keep,
+    )
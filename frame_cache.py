@@ -0,0 +1,255 @@
+# -------------------------------------------------------
+# 파싱된 워크북(DataFrame) 캐시
+#
+# 스크립트와 노트북은 내용이 바뀌지 않은 sales.xlsx / stock.xlsx도 매번 pd.read_excel로 다시 파싱합니다.
+# 이 모듈은 한 번 파싱한 DataFrame을 Arrow Feather(IPC) 파일로 저장해 두고,
+# 같은 내용의 파일을 다시 읽을 때는 엑셀 파싱 없이 Feather에서 바로 불러옵니다.
+#
+# - 캐시 키 : 파일 내용의 SHA-256 (+ read_excel 옵션)
+#             파일 크기와 수정 시각(mtime)이 지난번과 같으면 해시도 다시 계산하지 않습니다.
+# - 용량 관리 : 캐시 폴더 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 항목부터 삭제(LRU).
+#               크기는 인덱스가 아니라 폴더의 *.feather 목록으로 다시 세므로 인덱스에 빠진 파일도 정리됩니다.
+# - 동시 접근 : 배치 모드의 워커 스레드와 샤드 집계 워커 프로세스가 같은 캐시 폴더를 씁니다.
+#               index.json을 읽고-고치고-쓰는 동안 잠금 파일(index.lock)을 잡아 서로의 기록을 덮어쓰지 않습니다.
+# - pyarrow가 설치되어 있지 않으면 캐시 없이 pd.read_excel만 사용합니다.
+# -------------------------------------------------------
+
+import os
+import json
+import time
+import hashlib
+import threading
+import contextlib
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Feather 읽기/쓰기에 필요)
+except ImportError:
+    pyarrow = None
+
+# 프로세스 사이 잠금: 유닉스는 fcntl.flock, Windows는 msvcrt.locking
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# 캐시 형식이 바뀌면 올려서 예전 항목을 무효화합니다.
+CACHE_FORMAT_VERSION = 1
+# 기본 캐시 용량 상한: 512MB
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_NAME = "index.json"
+LOCK_NAME = "index.lock"
+CACHE_SUFFIX = ".feather"
+
+
+# ---------------------------------
+# 파일 해시
+# ---------------------------------
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    파일 내용을 1MB씩 읽어 SHA-256 해시(16진수 문자열)를 계산합니다.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------
+# 캐시 인덱스
+# ---------------------------------
+def _load_index(cache_dir):
+    """
+    캐시 인덱스(index.json)를 읽습니다.
+
+    - files   : {원본 파일 절대경로: {"size", "mtime_ns", "sha256"}}  → 크기/mtime이 같으면 해시 재사용
+    - entries : {캐시 파일명: {"bytes", "last_access"}}             → LRU 삭제 기준
+    """
+
+    path = os.path.join(cache_dir, INDEX_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # 인덱스가 깨졌으면 새로 시작합니다(캐시 파일은 다시 채워짐).
+            pass
+    return {"version": CACHE_FORMAT_VERSION, "files": {}, "entries": {}}
+
+
+def _save_index(cache_dir, index):
+    path = os.path.join(cache_dir, INDEX_NAME)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            # LK_LOCK은 10초 동안 다시 시도한 뒤 OSError를 냄 → 잡힐 때까지 반복
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def _locked_index(cache_dir):
+    """
+    index.json을 잠금 파일로 잠근 채 읽어 내주고, with 블록이 정상으로 끝나면 저장한 뒤 잠금을 풉니다.
+    배치 모드의 워커 스레드, 샤드 집계 워커 프로세스가 서로의 인덱스 기록을 덮어쓰지 않도록 합니다.
+    (flock/locking은 열린 파일마다 걸리므로 같은 프로세스의 다른 스레드끼리도 기다립니다)
+    """
+
+    with open(os.path.join(cache_dir, LOCK_NAME), "a+b") as lock_file:
+        _lock(lock_file)
+        try:
+            index = _load_index(cache_dir)
+            yield index
+            _save_index(cache_dir, index)
+        finally:
+            _unlock(lock_file)
+
+
+def _content_hash(index, path):
+    """
+    원본 파일의 내용 해시를 반환합니다.
+    크기와 mtime이 인덱스에 기록된 값과 같으면 파일을 다시 읽지 않고 기록된 해시를 씁니다.
+    """
+
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    known = index["files"].get(abs_path)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        return known["sha256"]
+
+    sha = file_sha256(abs_path)
+    index["files"][abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    return sha
+
+
+def _entry_name(sha, read_kwargs):
+    """
+    캐시 파일명 = 내용 해시 + read_excel 옵션 해시.
+    같은 파일이라도 usecols/dtype 같은 옵션이 다르면 다른 DataFrame이므로 따로 저장합니다.
+    """
+
+    options = json.dumps(read_kwargs, sort_keys=True, default=str)
+    options_hash = hashlib.sha256(f"v{CACHE_FORMAT_VERSION}:{options}".encode()).hexdigest()[:12]
+    return f"{sha[:32]}-{options_hash}{CACHE_SUFFIX}"
+
+
+def _evict(cache_dir, index, max_bytes):
+    """
+    캐시 파일 총 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 항목부터 삭제합니다.
+
+    크기는 폴더의 *.feather 목록으로 다시 셉니다. 인덱스에 없는 캐시 파일(잠금 전 버전이 덮어써 기록을 잃은 항목 등)은
+    파일 수정 시각을 마지막 사용 시각으로 보고 함께 정리하고, 파일이 사라진 항목은 인덱스에서 뺍니다.
+    """
+
+    # 이미 지워진 원본 파일의 해시 기록도 함께 정리합니다.
+    for abs_path in [p for p in index["files"] if not os.path.exists(p)]:
+        del index["files"][abs_path]
+
+    entries = index["entries"]
+    on_disk = {}
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_SUFFIX):
+            try:
+                st = os.stat(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                continue
+            on_disk[name] = st
+    for name in [n for n in entries if n not in on_disk]:
+        del entries[name]
+    for name, st in on_disk.items():
+        entry = entries.setdefault(name, {"last_access": st.st_mtime})
+        entry["bytes"] = st.st_size
+
+    total = sum(e["bytes"] for e in entries.values())
+    for name in sorted(entries, key=lambda n: entries[n]["last_access"]):
+        if total <= max_bytes:
+            break
+        total -= entries[name]["bytes"]
+        del entries[name]
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------------
+# 캐시를 거치는 read_excel
+# ---------------------------------
+def read_excel_cached(path, cache_dir, max_bytes=DEFAULT_MAX_BYTES, **read_kwargs):
+    """
+    pd.read_excel(path, **read_kwargs)와 같은 DataFrame을 반환하되, 캐시가 있으면 Feather에서 읽습니다.
+
+    1) cache_dir이 None이거나 pyarrow가 없으면 그냥 pd.read_excel을 호출합니다.
+    2) 파일 내용 해시(+옵션)로 캐시 파일을 찾고, 있으면 pd.read_feather로 바로 불러옵니다(캐시 적중).
+    3) 없으면 pd.read_excel로 파싱한 뒤 Feather로 저장하고, 용량 상한을 넘으면 LRU로 정리합니다.
+       Feather로 저장할 수 없는 DataFrame(섞인 타입 컬럼 등)은 캐시하지 않고 그대로 반환합니다.
+
+    :param path: 엑셀 파일 경로(str).
+    :param cache_dir: 캐시 폴더 경로(str). None이면 캐시를 사용하지 않음.
+    :param max_bytes: 캐시 폴더 용량 상한(바이트). 기본값 512MB.
+    :param read_kwargs: pd.read_excel에 그대로 넘길 옵션.
+    :return: 파싱된 DataFrame.
+    """
+
+    if cache_dir is None or pyarrow is None:
+        return pd.read_excel(path, **read_kwargs)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    start = time.perf_counter()
+    # 해시 계산(큰 파일은 느림)은 잠금 밖에서, 읽기만 한 인덱스로 합니다.
+    snapshot = _load_index(cache_dir)
+    abs_path = os.path.abspath(path)
+    name = _entry_name(_content_hash(snapshot, path), read_kwargs)
+    entry_path = os.path.join(cache_dir, name)
+
+    df = None
+    with _locked_index(cache_dir) as index:
+        index["files"][abs_path] = snapshot["files"][abs_path]
+        # 잠금 안에서 읽으므로 그 사이에 다른 워커가 이 항목을 지울 수 없음
+        if name in index["entries"] and os.path.exists(entry_path):
+            df = pd.read_feather(entry_path)
+            index["entries"][name]["last_access"] = time.time()
+    if df is not None:
+        print(f"[cache] {os.path.basename(path)} 캐시 적중 ({time.perf_counter() - start:.3f}초)")
+        return df
+
+    df = pd.read_excel(path, **read_kwargs)
+    tmp_path = f"{entry_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, entry_path)
+    except (ValueError, TypeError, pyarrow.ArrowException) as e:
+        print(f"[cache] {os.path.basename(path)} 캐시 저장 생략: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return df
+
+    with _locked_index(cache_dir) as index:
+        index["entries"][name] = {"bytes": os.path.getsize(entry_path), "last_access": time.time()}
+        _evict(cache_dir, index, max_bytes)
+    print(f"[cache] {os.path.basename(path)} 파싱 후 캐시 저장 ({time.perf_counter() - start:.3f}초)")
+    return df
@@ -0,0 +1,355 @@
+# -------------------------------------------------------
+# 오프라인 시험용 모의(mock) WPS 사이트
+#
+# 전체 흐름(로그인 확인 → 편집기 → Download → 병합 → 업로드)은 실제 WPS와 사람의 로그인이 있어야만 돌아서,
+# 네트워크가 없는 Linux 서버에서는 시간을 재거나 회귀를 확인할 수 없습니다.
+#
+# 이 모듈은 스크립트가 기대하는 선택자를 그대로 가진 페이지를 표준 라이브러리 HTTP 서버로 띄웁니다.
+#   /account/         계정 페이지      : 로그인 쿠키가 있으면 <div class="header-title">User Center</div>
+#   /p/<문서ID>        스프레드시트 편집기: editor_delay 뒤에 File Operations 버튼(button.kd-button.kd-button-icon),
+#                                      버튼을 누르면 <div data-key="Download"> 메뉴
+#   /export/<문서ID>.xlsx 내보내기     : 고정 재고 파일(stock_file)을 첨부 파일로 응답(로그인 쿠키 필요)
+#   /                 문서 목록(업로드) : label.upload-btn-warp → label.upload-file + input[type=file]
+#   /api/upload       업로드 수신      : 받은 파일을 upload_dir에 저장하고 완료 토스트(.upload-success) 표시
+#
+# 지연은 주입할 수 있습니다.
+#   latency       : 모든 응답 앞에 쉬는 시간(초)
+#   route_latency : 경로 접두사별 추가 지연(초), 예: {"/export/": 2.0, "/api/upload": 1.0}
+#   editor_delay  : 편집기 페이지가 뜬 뒤 File Operations 버튼이 나타나기까지(초, 브라우저 쪽 렌더링 지연)
+# 내보내기 응답을 export_truncate바이트에서 끊을 수도 있습니다(받는 도중 연결이 끊기는 경우 시험용).
+# 서버가 도는 동안에도 속성을 바꾸면 다음 요청부터 반영됩니다.
+#
+# 사용법:
+#     with MockWPS("sample_data/stock.xlsx", "/tmp/uploads", latency=0.05) as site:
+#         site.account_url, site.doc_url, site.upload_page_url  → 스크립트의 주소 설정에 넣어 실행
+#         site.uploads                                          → 업로드된 파일 경로 목록
+#
+# 명령줄(서버만 띄우기):
+#     python mock_wps.py --stock sample_data/stock.xlsx --port 8765 --latency 0.1 --editor-delay 1.5
+# -------------------------------------------------------
+
+import os
+import re
+import json
+import time
+import html
+import secrets
+import argparse
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+# 로그인 쿠키 이름
+SESSION_COOKIE = "wps_sid"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# ---------------------------------
+# 페이지 HTML
+# ---------------------------------
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+_ACCOUNT_BODY = """<div class="header-title">User Center</div>
+<p>mock user</p>"""
+
+_LOGIN_BODY = """<div class="header-title">Sign in</div>
+<form method="post" action="/account/login"><button type="submit" id="login">Sign in</button></form>"""
+
+# 편집기: 렌더링 지연 뒤 File Operations 버튼을 만들고, 버튼 → Download 메뉴 → 내보내기 URL 다운로드
+_EDITOR_BODY = """<div id="editor">loading...</div>
+<script>
+setTimeout(function () {
+    var editor = document.getElementById('editor');
+    editor.textContent = '';
+    var button = document.createElement('button');
+    button.className = 'kd-button kd-button-icon';
+    button.textContent = 'File Operations';
+    button.addEventListener('click', function () {
+        if (document.querySelector('[data-key="Download"]')) { return; }
+        var item = document.createElement('div');
+        item.setAttribute('data-key', 'Download');
+        item.className = 'kd-menu-item';
+        item.textContent = 'Download';
+        item.addEventListener('click', function () {
+            var link = document.createElement('a');
+            link.href = '/export/%(doc_id)s.xlsx?ts=' + Date.now();
+            document.body.appendChild(link);
+            link.click();
+        });
+        editor.appendChild(item);
+    });
+    editor.appendChild(button);
+}, %(delay_ms)d);
+</script>"""
+
+# 문서 목록: Upload → File(input[type=file]) → /api/upload로 전송 → 완료 토스트
+_UPLOAD_BODY = """<label class="upload-btn-warp">Upload</label>
+<div id="upload-menu" style="display:none">
+  <label class="upload-file" for="upload-input">File</label>
+  <input type="file" id="upload-input" style="display:none">
+</div>
+<div id="upload-status"></div>
+<script>
+document.querySelector('label.upload-btn-warp').addEventListener('click', function () {
+    document.getElementById('upload-menu').style.display = 'block';
+});
+document.getElementById('upload-input').addEventListener('change', function (event) {
+    var file = event.target.files[0];
+    if (!file) { return; }
+    fetch('/api/upload', {method: 'POST', body: file, headers: {'X-File-Name': encodeURIComponent(file.name)}})
+        .then(function (response) {
+            var toast = document.createElement('div');
+            toast.className = response.ok ? 'upload-success' : 'upload-error';
+            toast.textContent = response.ok ? 'Upload complete' : 'Upload failed';
+            document.getElementById('upload-status').appendChild(toast);
+        });
+});
+</script>"""
+
+
+# ---------------------------------
+# 요청 처리
+# ---------------------------------
+class _MockHandler(BaseHTTPRequestHandler):
+    """경로별로 모의 페이지를 응답합니다. 사이트 상태(설정, 업로드 목록)는 self.server.site에 있습니다."""
+
+    def log_message(self, format, *args):
+        if self.server.site.verbose:
+            super().log_message(format, *args)
+
+    # ---------------------------------
+    # 공통
+    # ---------------------------------
+    def _delay(self, path):
+        site = self.server.site
+        seconds = site.latency + sum(v for prefix, v in site.route_latency.items() if path.startswith(prefix))
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _logged_in(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value == self.server.site.session_token
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None, truncate=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            # truncate: Content-Length는 전체 크기로 알리고 앞부분만 보낸 뒤 연결을 닫음
+            self.wfile.write(body if truncate is None else body[:truncate])
+        if truncate is not None:
+            self.close_connection = True
+
+    def _send_page(self, title, body, headers=None):
+        self._send(200, _PAGE.format(title=html.escape(title), body=body).encode("utf-8"), headers=headers)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, headers={"Location": location, **(headers or {})})
+
+    def _session_cookie_header(self):
+        return {"Set-Cookie": f"{SESSION_COOKIE}={self.server.site.session_token}; Path=/; HttpOnly"}
+
+    # ---------------------------------
+    # GET / POST
+    # ---------------------------------
+    def do_GET(self):
+        site = self.server.site
+        path = urlsplit(self.path).path
+        self._delay(path)
+        site.count(path)
+
+        if path in ("/account", "/account/"):
+            if self._logged_in():
+                self._send_page("WPS Account", _ACCOUNT_BODY)
+            elif site.auto_login:
+                # 사람의 로그인 없이 바로 세션을 발급(무인 시험용)
+                self._send_page("WPS Account", _ACCOUNT_BODY, headers=self._session_cookie_header())
+            else:
+                self._send_page("WPS Sign in", _LOGIN_BODY)
+            return
+
+        # 아래 페이지는 모두 로그인 쿠키가 필요합니다. 없으면 계정 페이지로 보냄(HTML 응답).
+        if not self._logged_in():
+            self._redirect("/account/")
+            return
+
+        if path == "/":
+            self._send_page("WPS Docs", _UPLOAD_BODY)
+        elif path == f"/p/{site.doc_id}":
+            body = _EDITOR_BODY % {"doc_id": site.doc_id, "delay_ms": int(site.editor_delay * 1000)}
+            self._send_page("Stock - WPS Spreadsheets", body)
+        elif path == f"/export/{site.doc_id}.xlsx":
+            with open(site.stock_file, "rb") as f:
+                data = f.read()
+            self._send(200, data, XLSX_CONTENT_TYPE, headers={
+                "Content-Disposition": f'attachment; filename="{site.export_name}"',
+            }, truncate=site.export_truncate)
+        else:
+            self._send(404, b"not found", "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        site = self.server.site
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        self._delay(path)
+        site.count(path)
+
+        if path == "/account/login":
+            self._redirect("/account/", headers=self._session_cookie_header())
+        elif path == "/api/upload":
+            if not self._logged_in():
+                self._send(401, b'{"ok": false}', "application/json")
+                return
+            name = unquote(self.headers.get("X-File-Name") or "upload.xlsx")
+            saved = site.save_upload(name, data)
+            body = json.dumps({"ok": True, "name": os.path.basename(saved), "bytes": len(data)}).encode("utf-8")
+            self._send(200, body, "application/json")
+        else:
+            self._send(404, b"not found", "text/plain; charset=utf-8")
+
+
+# ---------------------------------
+# 모의 사이트
+# ---------------------------------
+class MockWPS:
+    """
+    모의 WPS 사이트를 백그라운드 스레드의 HTTP 서버로 띄웁니다.
+
+    :param stock_file: 내보내기(Download)로 내려줄 재고 xlsx 파일.
+    :param upload_dir: 업로드된 파일을 저장할 폴더.
+    :param latency: 모든 응답 앞의 지연(초).
+    :param route_latency: (선택) {경로 접두사: 추가 지연(초)}.
+    :param editor_delay: 편집기에서 File Operations 버튼이 나타나기까지의 지연(초).
+    :param doc_id: 문서 ID(주소 /p/<doc_id>).
+    :param auto_login: True면 계정 페이지를 여는 것만으로 로그인 쿠키를 발급합니다.
+                       False면 로그인 버튼을 눌러야 합니다(세션 만료 흐름 시험용).
+    :param export_truncate: (선택) 내보내기 응답을 이 바이트 수만 보내고 연결을 끊습니다.
+    :param host: 바인드할 주소.
+    :param port: 포트. 0이면 빈 포트를 고릅니다.
+    :param verbose: True면 요청 로그를 출력합니다.
+    """
+
+    def __init__(self, stock_file, upload_dir, latency=0.0, route_latency=None, editor_delay=0.0,
+                 doc_id="mock-stock", auto_login=True, export_truncate=None, host="127.0.0.1", port=0,
+                 verbose=False):
+        if not re.fullmatch(r"[0-9A-Za-z_-]+", doc_id):
+            raise ValueError(f"문서 ID에는 영문/숫자/_/-만 쓸 수 있습니다: {doc_id}")
+        self.stock_file = os.path.abspath(stock_file)
+        self.upload_dir = os.path.abspath(upload_dir)
+        self.latency = latency
+        self.route_latency = dict(route_latency or {})
+        self.editor_delay = editor_delay
+        self.doc_id = doc_id
+        self.auto_login = auto_login
+        self.export_truncate = export_truncate
+        self.verbose = verbose
+        self.export_name = "stock.xlsx"
+        self.session_token = secrets.token_hex(16)
+        self.uploads = []
+        self.hits = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.site = self
+        self._thread = None
+
+    # ---------------------------------
+    # 주소
+    # ---------------------------------
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def account_url(self):
+        return f"{self.base_url}/account/"
+
+    @property
+    def doc_url(self):
+        return f"{self.base_url}/p/{self.doc_id}"
+
+    @property
+    def upload_page_url(self):
+        return f"{self.base_url}/"
+
+    # ---------------------------------
+    # 상태
+    # ---------------------------------
+    def count(self, path):
+        """경로별 요청 수를 셉니다(직접 받기가 편집기를 건너뛰었는지 등을 확인할 때 사용)."""
+        key = "/p/" if path.startswith("/p/") else "/export/" if path.startswith("/export/") else path
+        with self._lock:
+            self.hits[key] = self.hits.get(key, 0) + 1
+
+    def save_upload(self, name, data):
+        """업로드 본문을 upload_dir/<번호>-<파일명>으로 저장하고 경로를 반환합니다."""
+        safe_name = re.sub(r"[^0-9A-Za-z._-]", "_", os.path.basename(name)) or "upload.xlsx"
+        with self._lock:
+            path = os.path.join(self.upload_dir, f"{len(self.uploads):03d}-{safe_name}")
+            self.uploads.append(path)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    # ---------------------------------
+    # 시작 / 종료
+    # ---------------------------------
+    def start(self):
+        """서버를 백그라운드 스레드로 시작합니다."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-wps", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """서버를 멈추고 포트를 닫습니다."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 시험용 모의 WPS 사이트")
+    parser.add_argument("--stock", default=os.path.join("sample_data", "stock.xlsx"), help="내보내기로 내려줄 재고 파일")
+    parser.add_argument("--uploads", default="mock_uploads", help="업로드 저장 폴더")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="모든 응답 지연(초)")
+    parser.add_argument("--export-latency", type=float, default=0.0, help="내보내기 응답 추가 지연(초)")
+    parser.add_argument("--upload-latency", type=float, default=0.0, help="업로드 응답 추가 지연(초)")
+    parser.add_argument("--editor-delay", type=float, default=0.0, help="File Operations 버튼 표시 지연(초)")
+    parser.add_argument("--manual-login", action="store_true", help="로그인 버튼을 눌러야 세션 발급")
+    args = parser.parse_args()
+
+    site = MockWPS(
+        args.stock, args.uploads, latency=args.latency,
+        route_latency={"/export/": args.export_latency, "/api/upload": args.upload_latency},
+        editor_delay=args.editor_delay, auto_login=not args.manual_login, port=args.port, verbose=True,
+    )
+    site.start()
+    print(f"모의 WPS 사이트: 계정 {site.account_url} | 문서 {site.doc_url} | 업로드 {site.upload_page_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.stop()
@@ -0,0 +1,248 @@
+# -------------------------------------------------------
+# NumPy 인덱스 기반 판매 집계/재고 차감 엔진
+#
+# pandas 경로는 groupby().sum() → pd.merge(how="left") → fillna(0) → 뺄셈 → 음수 마스킹 순서로
+# 단계마다 재고/판매 크기의 중간 DataFrame을 새로 만듭니다.
+#
+# product_id가 정수인 보통의 경우에는 다음으로 충분합니다.
+# 1) 재고의 product_id로 "상품 → 칸(slot)" 인덱스를 한 번 만듭니다.
+#    - 밀집(dense) : id 범위(max - min + 1)가 상품 수에 비해 크지 않으면 id - min이 곧 칸 번호
+#    - 정렬(sorted): 그 밖에는 정렬된 고유 id 배열에서 np.searchsorted로 칸 번호를 찾음
+# 2) 판매 id를 칸 번호로 바꿔 np.bincount(칸, 수량, minlength)로 칸별 판매량을 누적합니다(재고에 없는 id는 버림).
+#    np.add.at은 버퍼 없이 원소마다 더해 판매 행이 많으면 훨씬 느리므로, 합이 float64로 정확히 표현되지
+#    않을 만큼 클 때만 씁니다.
+# 3) stock_qty 배열 복사본 하나에서 빼고, 음수를 0으로 제자리(in place)에서 고칩니다.
+#
+# 결과(값과 dtype)는 pandas 경로와 정확히 같습니다.
+# - 판매가 없는 상품이 하나라도 있으면 pandas는 merge에서 NaN이 생겨 float64가 되므로 여기서도 float64
+# - 재고의 product_id가 중복되면 각 행에 같은 합계를 뺌(merge와 동일)
+# - 판매 id/수량이 비어 있는 행은 groupby/sum과 같이 각각 건너뜀/0으로 취급
+# 정확히 같게 만들 수 없는 데이터(정수가 아닌 id, 소수 수량 등)면 None을 반환하므로
+# 호출하는 쪽에서 pandas 경로로 대체합니다.
+# -------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+# id 범위가 (상품 수 × 이 값 + DENSE_SLACK) 이하이면 밀집 인덱스를 씁니다(칸 배열 메모리 상한).
+DENSE_SPAN_FACTOR = 4
+DENSE_SLACK = 1024
+# float64로 정수를 정확히 나타낼 수 있는 한계
+_FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+# ---------------------------------
+# 입력 정리
+# ---------------------------------
+def integer_ids(values):
+    """
+    product_id 값을 int64 배열로 바꿉니다.
+
+    - 정수 dtype : 그대로
+    - float dtype: 비어 있는 값(NaN)과 정수가 아닌 값은 정수 재고 id와 절대 맞지 않으므로 버림
+    - 그 밖(문자열/섞인 object 등): 이 엔진으로는 다룰 수 없음
+
+    :return: (ids, keep) 튜플. keep은 남긴 행의 bool 마스크(모두 남기면 None). 다룰 수 없으면 None.
+    """
+
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False), None
+    if values.dtype.kind == "f":
+        keep = np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < _FLOAT_EXACT_LIMIT)
+        return values[keep].astype(np.int64), keep
+    return None
+
+
+def exact_quantities(values):
+    """
+    quantity_sold 값을 누적용 배열로 바꿉니다. 비어 있는 값(NaN)은 0(groupby.sum과 동일).
+
+    정수 dtype이면 그대로(int32 등 원래 dtype 유지), float이면 모든 값이 정수로 떨어질 때만 float64로 씁니다.
+    (소수 수량은 더하는 순서에 따라 마지막 자리가 pandas와 달라질 수 있으므로 다루지 않음)
+
+    :return: 배열. 다룰 수 없으면 None.
+    """
+
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values
+    if values.dtype.kind == "f":
+        values = np.where(np.isnan(values), 0.0, values)
+        if not np.all((np.floor(values) == values) & (np.abs(values) < _FLOAT_EXACT_LIMIT)):
+            return None
+        return values
+    return None
+
+
+# ---------------------------------
+# 상품 인덱스
+# ---------------------------------
+class ProductIndex:
+    """
+    재고 product_id(int64 배열)에서 만든 "상품 → 칸" 인덱스.
+
+    :ivar size: 칸 수.
+    :ivar stock_slots: 재고 각 행의 칸 번호.
+    :ivar dense: True면 밀집 인덱스(칸 = id - min), False면 정렬 인덱스.
+    """
+
+    def __init__(self, stock_ids):
+        stock_ids = np.asarray(stock_ids, dtype=np.int64)
+        self._offset = 0
+        self._keys = None
+        if len(stock_ids) == 0:
+            self.dense = True
+            self.size = 0
+            self.stock_slots = stock_ids
+            return
+
+        low, high = int(stock_ids.min()), int(stock_ids.max())
+        limit = len(stock_ids) * DENSE_SPAN_FACTOR + DENSE_SLACK
+        # id가 0 근처에서 시작하면 0부터 칸을 잡아, 판매 id를 빼기 없이(복사 없이) 그대로 칸 번호로 씀
+        if 0 <= low and high + 1 <= limit:
+            low = 0
+        span = high - low + 1
+        self.dense = span <= limit
+        if self.dense:
+            self._offset = low
+            self.size = span
+            self.stock_slots = stock_ids - low
+        else:
+            self._keys = np.unique(stock_ids)
+            self.size = len(self._keys)
+            self.stock_slots = np.searchsorted(self._keys, stock_ids)
+
+    def lookup(self, ids):
+        """
+        판매 id 배열의 칸 번호를 구합니다.
+
+        :return: (slots, found) 튜플. found는 재고에 있는 id인지 나타내는 bool 배열
+                 (모든 id가 칸 범위 안이면 None).
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.size == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        if self.dense:
+            slots = ids - self._offset if self._offset else ids
+            if len(slots) == 0 or (slots.min() >= 0 and slots.max() < self.size):
+                return slots, None
+            found = (slots >= 0) & (slots < self.size)
+            return slots, found
+        slots = np.searchsorted(self._keys, ids)
+        found = slots < self.size
+        found[found] = self._keys[slots[found]] == ids[found]
+        return slots, found
+
+
+class SalesAccumulator:
+    """
+    ProductIndex의 칸별 판매 합계를 누적합니다. add()를 여러 번(청크/파일마다) 불러도 됩니다.
+
+    :ivar totals: 칸별 판매 합계(int64, 소수 dtype 수량이 들어오면 float64).
+    :ivar seen: 칸별로 판매 행이 하나라도 있었는지(pandas의 sales_agg에 행이 생기는지와 같음).
+    :ivar sold_dtype: 들어온 수량의 dtype. pandas의 groupby.sum은 int32 수량을 int32로 합치므로
+                      결과 dtype을 맞출 때 씁니다(누적 자체는 넘침 없이 int64/float64로 함).
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.totals = np.zeros(index.size, dtype=np.int64)
+        self.seen = np.zeros(index.size, dtype=bool)
+        self.sold_dtype = None
+
+    def add(self, ids, quantities):
+        """
+        판매 id/수량 배열을 누적합니다. 재고에 없는 id는 버립니다.
+
+        :param ids: integer_ids로 정리한 int64 배열.
+        :param quantities: exact_quantities로 정리한 같은 길이의 배열.
+        """
+
+        quantities = np.asarray(quantities)
+        self.sold_dtype = (quantities.dtype if self.sold_dtype is None
+                           else np.result_type(self.sold_dtype, quantities.dtype))
+        slots, found = self.index.lookup(ids)
+        if found is not None:
+            slots = slots[found]
+            quantities = quantities[found]
+        if quantities.dtype.kind == "f" and self.totals.dtype.kind != "f":
+            self.totals = self.totals.astype(np.float64)
+        # bincount는 float64로 더하므로, 정수 합이 2**53을 넘을 수 있으면 np.add.at으로 정확히 더함
+        if self.totals.dtype.kind == "f" or np.abs(quantities).sum(dtype=np.float64) < _FLOAT_EXACT_LIMIT:
+            sums = np.bincount(slots, weights=quantities, minlength=self.index.size)
+            self.totals += sums.astype(self.totals.dtype, copy=False)
+        else:
+            np.add.at(self.totals, slots, quantities)
+        self.seen[slots] = True
+
+    @property
+    def products(self):
+        """판매가 있었던 (재고에 있는) 상품 수. 밀집 인덱스에서 재고에 없는 id의 칸은 세지 않습니다."""
+        in_stock = np.zeros(self.index.size, dtype=bool)
+        in_stock[self.index.stock_slots] = True
+        return int(np.count_nonzero(self.seen & in_stock))
+
+    def apply(self, stock_qty):
+        """
+        stock_qty에서 칸별 합계를 빼고 음수를 0으로 고친 새 배열을 반환합니다(pandas 경로와 같은 dtype).
+
+        :param stock_qty: 재고 수량 배열(재고 행 순서).
+        """
+
+        stock_qty = np.asarray(stock_qty)
+        slots = self.index.stock_slots
+        matched_all = bool(self.seen[slots].all()) if len(slots) else True
+        # pandas: 판매 없는 상품이 있으면 merge에서 NaN → quantity_sold가 float64
+        sold_dtype = (self.sold_dtype or self.totals.dtype) if matched_all else np.dtype(np.float64)
+        result = stock_qty.astype(np.result_type(stock_qty.dtype, sold_dtype))
+        np.subtract(result, self.totals[slots], out=result, casting="unsafe")
+        np.copyto(result, 0, where=result < 0)
+        return result
+
+
+# ---------------------------------
+# 한 번에 적용
+# ---------------------------------
+def numpy_stock_update(stock_df, sale_ids, quantities):
+    """
+    재고 DataFrame과 판매 id/수량으로 차감한 stock_qty 배열을 구합니다.
+
+    sale_ids/quantities는 판매 행 그대로여도, 이미 product_id별로 합친 값이어도 됩니다.
+
+    :param stock_df: product_id, stock_qty 컬럼이 있는 재고 DataFrame.
+    :param sale_ids: 판매 product_id (배열/Series).
+    :param quantities: 판매 수량 (배열/Series).
+    :return: (updated_qty, products) 튜플. products는 판매가 있었던 재고 상품 수.
+             이 엔진으로 pandas와 같은 결과를 보장할 수 없으면 None.
+    """
+
+    stock_ids = integer_ids(stock_df["product_id"].to_numpy())
+    stock_qty = stock_df["stock_qty"].to_numpy()
+    if stock_ids is None or stock_ids[1] is not None or stock_qty.dtype.kind not in "iuf":
+        return None
+    sales = integer_ids(sale_ids)
+    qty = exact_quantities(quantities)
+    if sales is None or qty is None:
+        return None
+    ids, keep = sales
+    if keep is not None:
+        qty = qty[keep]
+
+    accumulator = SalesAccumulator(ProductIndex(stock_ids[0]))
+    accumulator.add(ids, qty)
+    return accumulator.apply(stock_qty), accumulator.products
+
+
+def totals_to_arrays(totals):
+    """
+    스트리밍 리더의 {product_id: 합계} dict를 (ids, quantities) 배열로 바꿉니다.
+
+    :return: (ids, quantities) 튜플. id가 모두 정수(bool 제외)가 아니면 None.
+    """
+
+    keys = list(totals.keys())
+    if not all(type(k) is int for k in keys):
+        return None
+    return np.array(keys, dtype=np.int64), pd.Series(list(totals.values())).to_numpy()
@@ -0,0 +1,157 @@
+# -------------------------------------------------------
+# 페이지 준비 상태 대기
+#
+# 기존 흐름은 스프레드시트를 연 뒤 10초(Windows 15초), 업로드 뒤 5초를 무조건 쉬었습니다.
+# 네트워크가 빠르면 그만큼이 그대로 낭비되고, 느리면 10초로도 부족할 수 있습니다.
+#
+# 여기서는 "실제로 준비되었다"는 신호를 기다리고, 상한(max_wait)만 설정으로 둡니다.
+# - 문서 상태      : document.readyState
+# - 네트워크 유휴  : Resource Timing 항목 수가 idle_time 동안 늘지 않으면 유휴로 판단
+# - 편집기 준비    : File Operations 버튼이 클릭 가능한 상태
+# - 업로드 완료    : 완료 토스트(선택자) 또는 업로드 요청 이후 네트워크 유휴
+# -------------------------------------------------------
+
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# 편집기가 준비되었을 때 나타나는 File Operations 버튼
+EDITOR_READY_SELECTOR = "button.kd-button.kd-button-icon"
+# 업로드 완료 안내(토스트/목록 상태)로 쓰이는 선택자. WPS 화면이 바뀌면 여기만 고치면 됩니다.
+UPLOAD_DONE_SELECTOR = ".upload-success, .kd-message-success, .kd-toast-success"
+# 편집기 버튼이 준비된 뒤 네트워크 유휴를 기다리는 상한(초).
+# 편집기는 협업 폴링/스트리밍으로 요청이 계속 생길 수 있어, 전체 상한(max_wait)까지 기다리면 예전 고정 sleep보다 느려짐
+EDITOR_IDLE_MAX_WAIT = 2.5
+
+# readyState와 Resource Timing 항목 수를 한 번에 읽는 스크립트.
+# 기본 버퍼(250개)가 차면 항목 수가 더 늘지 않아 유휴로 오판하므로 버퍼를 넉넉히 늘려 둡니다.
+_NETWORK_STATE_JS = """
+if (!window.__wpsBufferResized) {
+    performance.setResourceTimingBufferSize(100000);
+    window.__wpsBufferResized = true;
+}
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+
+# ---------------------------------
+# 문서 / 네트워크
+# ---------------------------------
+def wait_for_document_ready(driver, max_wait=30, states=("interactive", "complete")):
+    """
+    document.readyState가 states 중 하나가 될 때까지 최대 max_wait초 대기합니다.
+
+    page_load_strategy="eager"면 driver.get()이 DOMContentLoaded에서 바로 돌아오므로,
+    이후 필요한 준비 신호는 이 함수들로 따로 기다립니다.
+    """
+
+    WebDriverWait(driver, max_wait).until(
+        lambda d: d.execute_script("return document.readyState") in states
+    )
+
+
+def wait_for_network_idle(driver, idle_time=0.5, max_wait=30, min_new_requests=0):
+    """
+    Resource Timing 항목 수가 idle_time초 동안 변하지 않으면 네트워크 유휴로 보고 반환합니다.
+
+    :param driver: Selenium WebDriver 객체.
+    :param idle_time: 이 시간(초) 동안 새 요청이 끝나지 않으면 유휴로 판단.
+    :param max_wait: 최대 대기 시간(초). 넘으면 TimeoutException.
+    :param min_new_requests: 호출 시점 이후 최소 이만큼의 요청이 끝난 뒤부터 유휴를 판단
+                             (예: 업로드 요청이 끝나기 전에 "유휴"로 판단하는 것을 방지).
+    :return: 대기한 시간(초).
+    """
+
+    start = time.monotonic()
+    _, baseline = driver.execute_script(_NETWORK_STATE_JS)
+    last_count = baseline
+    last_change = start
+
+    while True:
+        now = time.monotonic()
+        state, count = driver.execute_script(_NETWORK_STATE_JS)
+        if count != last_count:
+            last_count = count
+            last_change = now
+        elif (state == "complete" and count - baseline >= min_new_requests
+              and now - last_change >= idle_time):
+            return now - start
+
+        if now - start > max_wait:
+            raise TimeoutException(f"{max_wait}초 안에 네트워크가 유휴 상태가 되지 않았습니다.")
+        time.sleep(0.1)
+
+
+# ---------------------------------
+# 편집기 / 업로드
+# ---------------------------------
+def wait_for_editor_ready(driver, max_wait=30, idle_time=0.5, idle_max_wait=EDITOR_IDLE_MAX_WAIT):
+    """
+    스프레드시트 편집기가 조작 가능한 상태가 될 때까지 대기합니다. (기존 time.sleep(10)/(15) 대체)
+
+    1) document.readyState가 interactive/complete가 될 때까지
+    2) File Operations 버튼(EDITOR_READY_SELECTOR)이 클릭 가능해질 때까지
+    3) 편집기 초기 리소스 요청이 잦아들 때까지(네트워크 유휴). 이 단계는 idle_max_wait초(남은 시간이 더 짧으면 그만큼)만
+       기다리고, 그래도 요청이 계속되면(폴링/스트리밍) 버튼이 이미 준비되었으므로 예외 없이 진행합니다.
+
+    :param driver: Selenium WebDriver 객체.
+    :param max_wait: 전체 상한(초).
+    :param idle_time: 네트워크 유휴 판단 시간(초).
+    :param idle_max_wait: 버튼이 준비된 뒤 네트워크 유휴를 기다리는 상한(초).
+    :return: 대기한 시간(초).
+    :raises TimeoutException: max_wait 안에 버튼이 준비되지 않은 경우.
+    """
+
+    start = time.monotonic()
+    wait_for_document_ready(driver, max_wait)
+    remaining = max(max_wait - (time.monotonic() - start), 0.1)
+    WebDriverWait(driver, remaining).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, EDITOR_READY_SELECTOR))
+    )
+    remaining = max(max_wait - (time.monotonic() - start), 0.1)
+    try:
+        wait_for_network_idle(driver, idle_time=idle_time, max_wait=min(idle_max_wait, remaining))
+    except TimeoutException:
+        pass
+    return time.monotonic() - start
+
+
+def wait_for_upload_complete(driver, max_wait=60, idle_time=1.0, done_selector=UPLOAD_DONE_SELECTOR):
+    """
+    파일 선택 후 업로드가 끝날 때까지 대기합니다. (기존 업로드 후 time.sleep(5) 대체)
+
+    다음 중 먼저 오는 신호를 완료로 봅니다.
+    - 업로드 완료 토스트(done_selector)가 화면에 나타남
+    - 호출 이후 요청이 최소 1건 끝났고, 그 뒤 idle_time초 동안 새 요청이 없음(네트워크 유휴)
+
+    :param driver: Selenium WebDriver 객체.
+    :param max_wait: 최대 대기 시간(초).
+    :param idle_time: 네트워크 유휴 판단 시간(초).
+    :param done_selector: 업로드 완료 안내 요소의 CSS 선택자.
+    :return: 대기한 시간(초).
+    :raises TimeoutException: max_wait 안에 어떤 완료 신호도 없는 경우.
+    """
+
+    start = time.monotonic()
+    _, baseline = driver.execute_script(_NETWORK_STATE_JS)
+    last_count = baseline
+    last_change = start
+
+    while True:
+        now = time.monotonic()
+        if done_selector and driver.find_elements(By.CSS_SELECTOR, done_selector):
+            return now - start
+
+        _, count = driver.execute_script(_NETWORK_STATE_JS)
+        if count != last_count:
+            last_count = count
+            last_change = now
+        elif count > baseline and now - last_change >= idle_time:
+            return now - start
+
+        if now - start > max_wait:
+            raise TimeoutException(f"{max_wait}초 안에 업로드 완료 신호가 없었습니다.")
+        time.sleep(0.1)
@@ -0,0 +1,142 @@
+# -------------------------------------------------------
+# 실행별 전용 다운로드 폴더
+#
+# 기존에는 모든 실행이 같은 DOWNLOAD_DIR(개인 Downloads 폴더)에 받고,
+# 이름에 "stock"이 들어간 아무 *.xlsx를 골라 stock.xlsx로 바꿨습니다.
+# - 두 작업이 동시에 돌면 서로의 파일을 집어 갈 수 있고,
+# - Downloads 폴더가 커질수록 glob 검색이 느려집니다.
+#
+# 여기서는 실행(또는 작업)마다 빈 폴더를 새로 만들어 크롬의 다운로드 폴더(download.default_directory)로 씁니다.
+# 폴더가 비어 있는 상태에서 시작하므로 "완성된 파일이 정확히 하나" 생기면 그것이 이번 다운로드입니다.
+#
+# 폴더 구조:  <root>/<YYYYmmdd-HHMMSS>-<pid>-<번호>-<라벨>/
+#             사용 중인 폴더에는 ACTIVE_MARKER 파일이 있고, finish_run_dir()에서 지웁니다.
+# 보존 정책: cleanup_run_dirs()가 최근 keep개를 남기고 max_age_hours보다 오래된 폴더를 지웁니다.
+#            사용 중 표시가 있고 그 프로세스가 아직 살아 있는 폴더는 지우지 않습니다.
+# -------------------------------------------------------
+
+import os
+import re
+import time
+import shutil
+import itertools
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from download_watch import TEMP_SUFFIXES
+
+# 사용 중 표시 파일
+ACTIVE_MARKER = ".active"
+# 같은 초에 여러 폴더를 만들 때 이름이 겹치지 않도록 붙이는 번호
+_sequence = itertools.count()
+
+
+def create_run_dir(root, label="run"):
+    """
+    root 아래에 이번 실행 전용 빈 폴더를 만들고 사용 중 표시를 남깁니다.
+
+    :param root: 실행 폴더들을 모아 두는 상위 폴더.
+    :param label: 폴더 이름 끝에 붙일 라벨(예: 워커 번호, 문서 키).
+    :return: 만든 폴더의 절대경로.
+    """
+
+    safe_label = re.sub(r"[^0-9A-Za-z_-]", "_", label) or "run"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}-{safe_label}"
+    path = os.path.abspath(os.path.join(root, name))
+    os.makedirs(path)
+    with open(os.path.join(path, ACTIVE_MARKER), "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+    return path
+
+
+def finish_run_dir(run_dir):
+    """
+    사용 중 표시를 지워 정리 대상이 될 수 있게 합니다. 폴더 내용(받은 파일)은 보존 정책에 따라 나중에 지워집니다.
+    """
+
+    try:
+        os.remove(os.path.join(run_dir, ACTIVE_MARKER))
+    except FileNotFoundError:
+        pass
+
+
+def _owner_alive(run_dir):
+    """
+    사용 중 표시를 남긴 프로세스가 아직 살아 있는지 확인합니다. 표시가 없으면 False.
+    """
+
+    try:
+        with open(os.path.join(run_dir, ACTIVE_MARKER), encoding="utf-8") as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return False
+
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == "nt":
+        # Windows의 os.kill은 확인이 아니라 종료이므로 쓸 수 없음 → 안전하게 사용 중으로 간주
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def find_single_download(run_dir, suffix=".xlsx"):
+    """
+    실행 폴더에서 완성된 다운로드 파일을 정확히 하나 찾습니다.
+
+    - 임시 파일(.crdownload 등)과 확장자가 다른 파일은 무시합니다.
+    - 이름(부분 문자열)으로 고르지 않습니다. 빈 폴더에서 시작했으므로 완성된 파일은 이번 다운로드뿐이어야 합니다.
+
+    :return: 파일 경로. 아직 없으면 None.
+    :raises Exception: 완성된 파일이 둘 이상이어서 어느 것이 이번 다운로드인지 알 수 없는 경우.
+    """
+
+    found = [
+        name for name in os.listdir(run_dir)
+        if name.lower().endswith(suffix) and not name.lower().endswith(TEMP_SUFFIXES)
+    ]
+    if len(found) > 1:
+        raise Exception(f"실행 폴더에 다운로드 파일이 여러 개입니다: {run_dir} {sorted(found)}")
+    return os.path.join(run_dir, found[0]) if found else None
+
+
+def cleanup_run_dirs(root, keep=5, max_age_hours=24):
+    """
+    보존 정책에 따라 오래된 실행 폴더를 지웁니다.
+
+    1) 가장 최근에 만든 keep개는 나이와 상관없이 남깁니다(직전 실행 결과 확인용).
+    2) 나머지 중 마지막 수정 후 max_age_hours가 지난 폴더를 지웁니다.
+    3) 사용 중 표시가 있는 폴더는 표시를 남긴 프로세스가 살아 있으면 건너뜁니다.
+       프로세스가 없으면 비정상 종료로 남은 폴더로 보고 지웁니다.
+
+    :param root: 실행 폴더들의 상위 폴더.
+    :param keep: 항상 남길 최근 폴더 수.
+    :param max_age_hours: 이보다 오래된 폴더를 지움(시간).
+    :return: 지운 폴더 수.
+    """
+
+    if not os.path.isdir(root):
+        return 0
+
+    run_dirs = [os.path.join(root, name) for name in os.listdir(root)
+                if os.path.isdir(os.path.join(root, name))]
+    run_dirs.sort(key=os.path.getmtime, reverse=True)
+
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in run_dirs[keep:]:
+        if os.path.getmtime(path) > cutoff:
+            continue
+        if _owner_alive(path):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
@@ -0,0 +1,111 @@
+# -------------------------------------------------------
+# CSV / Arrow IPC 판매 피드 읽기
+#
+# POS는 판매를 xlsx보다 훨씬 빨리 CSV나 Arrow IPC(Feather v2)로 내보낼 수 있습니다.
+# xlsx는 zip + XML이라 파싱이 판매 준비 시간의 대부분이었는데, 이 형식들은 그 비용이 거의 없습니다.
+#
+# 이 모듈은 판매 파일의 형식을 확장자로 구분하고, 필요한 컬럼만 청크(DataFrame) 단위로 내보냅니다.
+#   - CSV   : pd.read_csv(chunksize=...)로 CSV_CHUNK_ROWS행씩. 파일이 커도 메모리는 청크 크기만큼만 씀
+#   - Arrow : pyarrow.memory_map으로 파일을 메모리에 매핑하고 레코드 배치마다 내보냄.
+#             배치 버퍼는 파일 페이지를 그대로 가리키므로(zero-copy) 읽기 위해 파일을 복사하지 않습니다.
+# 청크를 스키마 적용 → 장부 필터 → 키별 합산하는 일은 sales_shards.feed_sales_aggregate가 합니다
+# (xlsx 스트리밍 리더와 같은 {product_id: 합계} 결과).
+# pyarrow가 없으면 CSV만 읽을 수 있습니다.
+# -------------------------------------------------------
+
+import os
+import csv
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# 확장자 → 판매 파일 형식
+FEED_FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+# CSV 한 청크의 행 수
+CSV_CHUNK_ROWS = 100_000
+# CSV 인코딩(엑셀이 붙이는 BOM이 있어도 헤더 이름이 깨지지 않도록 utf-8-sig)
+CSV_ENCODING = "utf-8-sig"
+
+
+def feed_format(path):
+    """확장자로 판매 파일 형식("xlsx", "csv", "arrow")을 구합니다. 모르는 확장자는 "xlsx"."""
+    return FEED_FORMATS.get(os.path.splitext(path)[1].lower(), "xlsx")
+
+
+def is_sales_feed(path):
+    """xlsx가 아닌 판매 피드(CSV/Arrow)면 True."""
+    return feed_format(path) != "xlsx"
+
+
+# ---------------------------------
+# Arrow IPC
+# ---------------------------------
+def _open_arrow(source):
+    """메모리 매핑한 파일에서 IPC 리더를 엽니다. 파일 형식(Feather v2)이 아니면 스트림 형식으로 엽니다."""
+    try:
+        return pyarrow.ipc.open_file(source)
+    except pyarrow.ArrowInvalid:
+        source.seek(0)
+        return pyarrow.ipc.open_stream(source)
+
+
+def _arrow_batches(reader):
+    if isinstance(reader, pyarrow.ipc.RecordBatchFileReader):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    else:
+        yield from reader
+
+
+def _require_pyarrow(path):
+    if pyarrow is None:
+        raise ImportError(f"{os.path.basename(path)}: Arrow 판매 파일을 읽으려면 pyarrow가 필요합니다.")
+
+
+# ---------------------------------
+# 헤더 / 청크
+# ---------------------------------
+def read_feed_header(path):
+    """
+    판매 피드의 컬럼 이름 리스트. CSV는 첫 줄만, Arrow는 스키마만 읽습니다.
+    """
+
+    if feed_format(path) == "csv":
+        with open(path, newline="", encoding=CSV_ENCODING) as f:
+            header = next(csv.reader(f), [])
+        return [h for h in header if h]
+    _require_pyarrow(path)
+    with pyarrow.memory_map(path, "r") as source:
+        return list(_open_arrow(source).schema.names)
+
+
+def iter_feed_chunks(path, columns, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    판매 피드에서 columns만 골라 DataFrame 청크를 차례로 내보냅니다.
+    청크의 index는 파일 전체의 행 번호(0부터)라서 오류 메시지의 행 번호가 파일과 맞습니다.
+
+    :param path: CSV 또는 Arrow IPC 파일 경로.
+    :param columns: 읽을 컬럼 이름 리스트.
+    :param chunk_rows: CSV 청크 행 수. Arrow는 파일에 기록된 레코드 배치 단위입니다.
+    :return: DataFrame을 내보내는 generator.
+    """
+
+    if feed_format(path) == "csv":
+        with pd.read_csv(path, usecols=columns, chunksize=chunk_rows, encoding=CSV_ENCODING) as chunks:
+            yield from chunks
+        return
+
+    _require_pyarrow(path)
+    offset = 0
+    with pyarrow.memory_map(path, "r") as source:
+        for batch in _arrow_batches(_open_arrow(source)):
+            # split_blocks: 컬럼마다 따로 변환해 결측 없는 숫자 컬럼은 매핑된 버퍼를 그대로 씀
+            chunk = batch.select(columns).to_pandas(split_blocks=True)
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
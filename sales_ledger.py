@@ -0,0 +1,343 @@
+# -------------------------------------------------------
+# 판매 반영 장부(ledger)
+#
+# 매 실행마다 sales.xlsx 전체를 새로 받은 재고에서 빼면,
+# 이미 반영된 판매가 다시 차감되고(중복 차감) 처리량도 누적 판매 수에 비례해 커집니다.
+#
+# 이 모듈은 "마지막으로 반영한 sale_date"(워터마크)와 그 시각에 반영된 행들의
+# 식별자(동일 시각 판매 구분용)를 JSON 파일에 저장해 두고,
+# 다음 실행에서는 그보다 새로운 판매 행만 골라 집계하도록 합니다.
+#
+# 장부 저장은 두 단계로 나뉩니다.
+#   1) stage_ledger  : 병합 직후 "<장부>.pending"에 새 워터마크를 기록
+#   2) commit_ledger : 업로드까지 끝난 뒤 pending을 실제 장부로 교체
+# 업로드 전에 실패하면 장부가 바뀌지 않으므로, 다음 실행에서 같은 판매가 다시 반영됩니다.
+#
+# 판매 샤드(폴더/glob)를 쓰면 워터마크를 장부의 "shards"에 샤드(파일 이름)마다 둡니다(sales_shards 참고).
+# 파일 하나 ↔ 샤드 모드를 바꿔도 같은 장부를 이어 쓸 수 있도록 sales_shards.ShardWatermarks가 두 형식을 맞춥니다.
+# -------------------------------------------------------
+
+import os
+import json
+import datetime
+
+import pandas as pd
+
+from xlsx_stream import iter_xlsx_columns, excel_serial_to_datetime
+
+LEDGER_VERSION = 1
+
+
+class LedgerLayoutError(ValueError):
+    """장부의 형식(파일 하나/샤드)과 판매 경로가 맞지 않아 이미 반영한 판매를 알 수 없을 때 발생하는 예외."""
+
+
+# ---------------------------------
+# 장부 파일 읽기/쓰기
+# ---------------------------------
+def empty_ledger():
+    """
+    아무 판매도 반영하지 않은 초기 장부를 반환합니다.
+
+    - last_sale_date : 마지막으로 반영한 판매 시각(ISO 문자열). 없으면 None.
+    - tie_keys       : last_sale_date와 같은 시각에 이미 반영한 행들의 식별자 목록.
+    - applied_rows   : 지금까지 반영한 판매 행 수(누적, 로그용).
+    """
+
+    return {
+        "version": LEDGER_VERSION,
+        "last_sale_date": None,
+        "tie_keys": [],
+        "applied_rows": 0,
+        "updated_at": None,
+    }
+
+
+def load_ledger(path):
+    """
+    장부 파일(JSON)을 읽습니다. 파일이 없으면 초기 장부를 반환합니다(= 전체 판매 반영).
+
+    :param path: 장부 파일 경로(str).
+    :return: 장부 dict.
+    """
+
+    if not os.path.exists(path):
+        return empty_ledger()
+    with open(path, encoding="utf-8") as f:
+        ledger = json.load(f)
+    if ledger.get("version") != LEDGER_VERSION:
+        raise ValueError(f"지원하지 않는 장부 버전입니다: {ledger.get('version')} ({path})")
+    return ledger
+
+
+def pending_path(path):
+    """장부의 임시(pending) 파일 경로. 예) sales_ledger.json → sales_ledger.json.pending"""
+    return path + ".pending"
+
+
+def _write_json_atomic(path, data):
+    """
+    임시 파일에 먼저 쓴 뒤 os.replace로 교체해, 쓰는 도중 중단되어도 장부가 깨지지 않도록 합니다.
+    """
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stage_ledger(path, ledger):
+    """
+    새 워터마크를 pending 파일에 기록합니다. 실제 장부는 commit_ledger 전까지 그대로입니다.
+
+    :param path: 장부 파일 경로(str).
+    :param ledger: 새 장부 dict.
+    """
+
+    _write_json_atomic(pending_path(path), ledger)
+
+
+def commit_ledger(path):
+    """
+    pending 장부를 실제 장부로 교체합니다. 업로드가 끝난 뒤 호출합니다.
+
+    :param path: 장부 파일 경로(str).
+    :return: 교체했으면 True, pending 파일이 없으면 False.
+    """
+
+    pending = pending_path(path)
+    if not os.path.exists(pending):
+        return False
+    os.replace(pending, path)
+    return True
+
+
+# ---------------------------------
+# 값 정규화 / 행 식별자
+# ---------------------------------
+def _normalize_number(value):
+    """
+    numpy 스칼라나 1.0 같은 float를 파이썬 int로 맞춥니다.
+    (pandas 리더는 int64/float64, 스트리밍 리더는 int/float를 돌려주므로 식별자를 통일하기 위함)
+    """
+
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def normalize_sale_date(value):
+    """
+    sale_date 값을 밀리초 단위 datetime으로 맞춥니다.
+
+    - pandas Timestamp / datetime : 그대로 사용(밀리초 미만은 버림)
+    - 엑셀 일련번호(float/int)     : 스트리밍 리더에서 온 값 → datetime으로 변환
+    - 문자열                       : ISO 형식으로 파싱
+    - 비어 있으면 None
+
+    :return: datetime 또는 None.
+    """
+
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    elif isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    elif not isinstance(value, datetime.datetime):
+        value = excel_serial_to_datetime(value)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000, tzinfo=None)
+
+
+def _iso(dt):
+    return dt.isoformat(timespec="milliseconds")
+
+
+def row_identity(product_id, quantity_sold, sale_dt, occurrence):
+    """
+    같은 시각에 찍힌 판매 행들을 구분하기 위한 식별자 문자열.
+
+    판매 파일에는 별도의 주문번호가 없으므로 (product_id, quantity_sold, sale_date)에
+    "같은 값이 파일에서 몇 번째로 나왔는지(occurrence)"를 붙여 구분합니다.
+    완전히 같은 판매가 같은 시각에 두 번 찍혀도 0번째/1번째로 따로 셉니다.
+    """
+
+    return f"{_normalize_number(product_id)}|{_normalize_number(quantity_sold)}|{_iso(sale_dt)}|{occurrence}"
+
+
+# ---------------------------------
+# 워터마크 필터
+# ---------------------------------
+class SalesWatermark:
+    """
+    판매 행을 파일 순서대로 하나씩 받아, 아직 반영하지 않은 행인지 판단하는 필터.
+
+    - sale_date < 워터마크             : 이미 반영됨 → 제외
+    - sale_date == 워터마크            : tie_keys에 있는 식별자면 제외, 없으면 새 행
+    - sale_date > 워터마크             : 새 행
+    - sale_date가 비어 있는 행         : 워터마크로 관리할 수 없으므로 제외(undated_rows로 집계)
+
+    주의: 워터마크보다 과거 시각으로 늦게 추가된 판매 행은 반영되지 않습니다.
+          POS가 판매 시각 순서대로 행을 덧붙인다는 전제입니다.
+
+    식별자(occurrence)는 워터마크 시각과 "현재까지의 최대 시각"에 해당하는 행만 세므로,
+    메모리는 전체 판매 수가 아니라 그 두 시각의 행 수에 비례합니다.
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.last = normalize_sale_date(ledger.get("last_sale_date"))
+        self.tie_keys = set(ledger.get("tie_keys", []))
+        self.new_max = None
+        self.new_max_keys = []
+        self.new_rows = 0
+        self.undated_rows = 0
+        # iso 시각 → {(product_id, qty): 등장 횟수}
+        self._occurrences = {}
+
+    def _next_occurrence(self, product_id, quantity_sold, sale_dt):
+        iso = _iso(sale_dt)
+        counts = self._occurrences.setdefault(iso, {})
+        key = (_normalize_number(product_id), _normalize_number(quantity_sold))
+        occurrence = counts.get(key, 0)
+        counts[key] = occurrence + 1
+        return occurrence
+
+    def _forget_old_occurrences(self):
+        keep = {_iso(d) for d in (self.last, self.new_max) if d is not None}
+        for iso in list(self._occurrences):
+            if iso not in keep:
+                del self._occurrences[iso]
+
+    def accept(self, product_id, quantity_sold, sale_date):
+        """
+        판매 행 하나가 아직 반영되지 않은 새 행이면 True를 반환합니다.
+        """
+
+        sale_dt = normalize_sale_date(sale_date)
+        if sale_dt is None:
+            self.undated_rows += 1
+            return False
+        if self.last is not None and sale_dt < self.last:
+            return False
+
+        # 워터마크 시각 또는 현재까지의 최대 시각에 해당하는 행만 식별자가 필요합니다.
+        identity = None
+        if sale_dt == self.last or self.new_max is None or sale_dt >= self.new_max:
+            occurrence = self._next_occurrence(product_id, quantity_sold, sale_dt)
+            identity = row_identity(product_id, quantity_sold, sale_dt, occurrence)
+
+        if sale_dt == self.last and identity in self.tie_keys:
+            return False
+
+        if self.new_max is None or sale_dt > self.new_max:
+            self.new_max = sale_dt
+            self.new_max_keys = []
+            self._forget_old_occurrences()
+        if sale_dt == self.new_max:
+            self.new_max_keys.append(identity)
+
+        self.new_rows += 1
+        return True
+
+    def to_ledger(self):
+        """
+        지금까지 받은 행을 기준으로 갱신된 장부 dict를 만듭니다.
+        새 행이 하나도 없으면 기존 장부 내용을 그대로(시각만 갱신) 돌려줍니다.
+        """
+
+        ledger = dict(self.ledger)
+        if self.new_max is not None:
+            if self.new_max == self.last:
+                # 같은 워터마크 시각에 행이 추가된 경우: 기존 식별자 + 새 식별자
+                tie_keys = sorted(self.tie_keys | set(self.new_max_keys))
+            else:
+                tie_keys = self.new_max_keys
+            ledger["last_sale_date"] = _iso(self.new_max)
+            ledger["tie_keys"] = tie_keys
+        ledger["applied_rows"] = ledger.get("applied_rows", 0) + self.new_rows
+        ledger["updated_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        return ledger
+
+
+# ---------------------------------
+# 리더별 적용 함수
+# ---------------------------------
+def filter_new_sales(sales_df, ledger, watermark=None):
+    """
+    pandas로 읽은 판매 DataFrame에서 아직 반영하지 않은 행만 남깁니다.
+
+    워터마크보다 확실히 새로운/오래된 행은 벡터 연산으로 한 번에 거르고,
+    워터마크 시각과 같은 행, 새 최대 시각의 행(대개 몇 건)만 SalesWatermark로 한 행씩 판단합니다.
+
+    파일을 청크로 나눠 읽을 때는 앞 청크의 watermark를 넘겨 파일 순서대로 이어서 판단합니다.
+    (청크마다 그 청크의 최대 시각 행을 식별하므로, 파일 전체의 최대 시각 행은 모두 식별자가 남음)
+
+    :param sales_df: product_id, quantity_sold, sale_date 컬럼이 있는 판매 DataFrame.
+    :param ledger: load_ledger로 읽은 장부 dict.
+    :param watermark: (선택) 앞 청크에서 쓰던 SalesWatermark. None이면 새로 만듭니다.
+    :return: (new_sales_df, watermark) 튜플. 새 장부는 watermark.to_ledger()로 얻습니다.
+    """
+
+    if watermark is None:
+        watermark = SalesWatermark(ledger)
+    dates = pd.to_datetime(sales_df["sale_date"]).dt.floor("ms")
+
+    if watermark.last is None:
+        candidate = dates.notna()
+    else:
+        candidate = dates >= pd.Timestamp(watermark.last)
+    watermark.undated_rows += int(dates.isna().sum())
+
+    if not candidate.any():
+        return sales_df.iloc[0:0], watermark
+
+    # 새 최대 시각과 워터마크 시각의 행만 식별자 판단이 필요합니다.
+    new_max = dates[candidate].max()
+    boundary = candidate & ((dates == new_max) | (dates == pd.Timestamp(watermark.last or new_max)))
+    keep = candidate.copy()
+
+    boundary_rows = sales_df.loc[boundary, ["product_id", "quantity_sold"]]
+    for idx, product_id, quantity_sold in boundary_rows.itertuples(name=None):
+        keep.loc[idx] = watermark.accept(product_id, quantity_sold, dates.loc[idx])
+
+    # 경계가 아닌 새 행은 개수만 반영합니다(식별자가 필요 없음).
+    watermark.new_rows += int((candidate & ~boundary).sum())
+    return sales_df[keep], watermark
+
+
+def stream_new_sales_aggregate(sales_file, ledger, key_col="product_id", value_col="quantity_sold",
+                               date_col="sale_date"):
+    """
+    판매 xlsx를 스트리밍으로 읽으면서 새 행만 product_id별로 합산합니다.
+    (xlsx_stream.stream_sales_aggregate의 장부 적용 버전)
+
+    key_col이 컬럼 튜플이면 (product_id, location)별로 합산합니다. 행 식별자는 pandas 리더(filter_new_sales)와
+    같도록 첫 번째 키(product_id)로만 만들어, 리더를 바꿔도 같은 장부를 그대로 씁니다.
+
+    :param sales_file: 판매 엑셀 파일 경로(str).
+    :param ledger: load_ledger로 읽은 장부 dict.
+    :return: (totals, new_rows, watermark) 튜플.
+    """
+
+    watermark = SalesWatermark(ledger)
+    totals = {}
+    if isinstance(key_col, (tuple, list)):
+        for row in iter_xlsx_columns(sales_file, [*key_col, value_col, date_col]):
+            key, qty, sale_date = row[:-2], row[-2], row[-1]
+            if not watermark.accept(key[0], qty, sale_date):
+                continue
+            if key[0] is None:
+                continue
+            totals[key] = totals.get(key, 0) + (qty or 0)
+        return totals, watermark.new_rows, watermark
+
+    for key, qty, sale_date in iter_xlsx_columns(sales_file, [key_col, value_col, date_col]):
+        if not watermark.accept(key, qty, sale_date):
+            continue
+        if key is None:
+            continue
+        totals[key] = totals.get(key, 0) + (qty or 0)
+    return totals, watermark.new_rows, watermark
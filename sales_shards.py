@@ -0,0 +1,361 @@
+# -------------------------------------------------------
+# 매장/일자별로 나뉜 판매 파일(샤드)을 프로세스 풀로 병렬 집계
+#
+# POS는 매장마다, 하루마다 판매 엑셀을 하나씩 떨어뜨립니다(예: sales/2025-01-03_store07.xlsx).
+# LOCAL_SALES_PATH에 파일 하나 대신 폴더나 glob 패턴을 주면, 이 모듈이
+#   1) map   : 샤드마다 워커 프로세스에서 파싱 + product_id별 판매량 합계(부분 합계)를 만들고
+#   2) reduce: 부모 프로세스에서 부분 합계 dict들을 샤드 순서대로 더합니다.
+# 엑셀 파싱은 CPU를 쓰는 순수 파이썬 작업이라(GIL) 스레드가 아닌 프로세스로 나눠야 코어 수만큼 빨라지고,
+# 워커가 돌려보내는 것은 행 전체가 아니라 상품 수 크기의 dict뿐이라 프로세스 간 전송 비용이 작습니다.
+# 판매 시트에 location 컬럼이 있으면 (product_id, location)별로 합산합니다(stock_index 참고).
+# 샤드(또는 판매 파일 하나)가 CSV/Arrow 피드면 feed_sales_aggregate가 청크 단위로 같은 합계를 만듭니다(sales_feed 참고).
+#
+# 판매 반영 장부를 쓰면 워터마크를 샤드(파일 이름)마다 따로 둡니다.
+#   {"version": 1, "shards": {"2025-01-03_store07.xlsx": {"last_sale_date": ..., "tie_keys": [...]}, ...}, ...}
+# 매장마다 판매 시각이 겹치므로 파일 하나의 워터마크로는 다른 매장의 늦게 도착한 판매를 빠뜨릴 수 있기 때문입니다.
+# 장부 맨 위의 last_sale_date는 전체 샤드 중 가장 늦은 시각(로그용)입니다.
+# 모드를 바꿔도 이미 반영한 판매를 다시 빼지 않도록 두 형식을 맞춥니다(ShardWatermarks).
+#   - 파일 하나 모드의 장부("shards" 없음)를 샤드 모드에서 읽으면, 모든 샤드를 맨 위 워터마크에서 시작
+#   - 샤드 모드의 장부를 파일 하나 모드에서 읽으면, 같은 이름의 샤드 워터마크에서 이어 가고 장부는 샤드 형식으로 씀
+#     (그 이름의 샤드가 없으면 어디까지 반영했는지 알 수 없으므로 LedgerLayoutError)
+#
+# 워커 프로세스는 spawn으로 띄웁니다(SHARD_START_METHOD). 판매 준비는 크롬 시작/로그인과 동시에 도는 스레드나
+# 배치 모드의 브라우저 워커 스레드 안에서 불리는데, fork는 다른 스레드가 잡고 있던 락까지 복사해 자식이 멈출 수 있습니다.
+# 배치 모드에서 문서마다 CPU 수만큼 풀을 만들면 코어를 몇 배로 나눠 쓰게 되므로,
+# 동시에 도는 문서 수로 나눈 워커 수(shard_workers_per_job)를 넘깁니다.
+#
+# 명령줄(워커 수별 집계 시간 비교):
+#     python sales_shards.py "/path/sales/*.xlsx" --workers 1,2,4 --reader stream
+# -------------------------------------------------------
+
+import os
+import glob
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from xlsx_stream import stream_sales_aggregate
+from sales_ledger import (
+    LedgerLayoutError, SalesWatermark, empty_ledger, filter_new_sales, stream_new_sales_aggregate,
+)
+from sheet_schema import SALES_SCHEMA, SchemaError, check_header, read_sheet, apply_schema, check_sales_totals
+from sales_feed import is_sales_feed, iter_feed_chunks
+
+# 폴더를 주었을 때 샤드로 읽을 파일 패턴
+SHARD_PATTERNS = ("*.xlsx", "*.csv", "*.arrow", "*.feather")
+# 워커 프로세스 시작 방식. 부모의 스레드/락을 물려받지 않는 spawn(Windows/macOS 기본값과 같음)
+SHARD_START_METHOD = "spawn"
+
+
+# ---------------------------------
+# 샤드 목록
+# ---------------------------------
+def is_sales_shard_spec(spec):
+    """판매 경로가 파일 하나가 아니라 폴더나 glob 패턴(*, ?, [)이면 True."""
+    return os.path.isdir(spec) or glob.has_magic(spec)
+
+
+def expand_sales_shards(spec):
+    """
+    폴더/glob 패턴을 판매 샤드 파일 목록(이름순)으로 펼칩니다.
+    엑셀이 열려 있을 때 생기는 잠금 파일(~$...)은 제외합니다.
+
+    :param spec: 폴더 경로 또는 glob 패턴.
+    :return: 파일 경로 리스트.
+    :raises FileNotFoundError: 맞는 파일이 하나도 없는 경우.
+    :raises ValueError: 파일 이름이 겹치는 경우(장부가 파일 이름으로 샤드를 구분하므로).
+    """
+
+    patterns = [os.path.join(spec, p) for p in SHARD_PATTERNS] if os.path.isdir(spec) else [spec]
+    paths = sorted(
+        p for pattern in patterns for p in glob.glob(pattern)
+        if os.path.isfile(p) and not os.path.basename(p).startswith("~$")
+    )
+    if not paths:
+        raise FileNotFoundError(f"판매 샤드 파일이 없습니다: {', '.join(patterns)}")
+    names = [os.path.basename(p) for p in paths]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"판매 샤드 파일 이름이 겹칩니다(장부는 파일 이름으로 구분): {duplicates}")
+    return paths
+
+
+# ---------------------------------
+# map: 샤드 하나 집계 (워커 프로세스)
+# ---------------------------------
+def _plain_number(value):
+    """numpy 스칼라/1.0 같은 float를 파이썬 int로(스트리밍 리더의 dict와 같은 모양)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _plain_key(key):
+    """(product_id, location) 그룹 키를 스트리밍 리더의 키 모양으로(빈 위치 NaN → None)."""
+    return tuple(None if v is None or v != v else _plain_number(v) for v in key)
+
+
+def _sum_by_keys(sales_df, keys):
+    """판매 DataFrame의 키별 quantity_sold 합계를 스트리밍 리더와 같은 모양의 dict로."""
+    if len(keys) > 1:
+        # 스트리밍 리더처럼 product_id가 빈 행만 버리고, 위치가 빈 행은 (product_id, None)으로 셈
+        sums = sales_df.dropna(subset=["product_id"]).groupby(list(keys), observed=True, dropna=False)
+        return {_plain_key(k): _plain_number(v) for k, v in sums["quantity_sold"].sum().items()}
+    sums = sales_df.groupby("product_id")["quantity_sold"].sum()
+    return {_plain_number(k): _plain_number(v) for k, v in sums.items()}
+
+
+def feed_sales_aggregate(path, keys=("product_id",), ledger=None):
+    """
+    CSV/Arrow 판매 피드를 청크마다 스키마 적용 → (장부 필터) → 키별 합산한 뒤 더합니다.
+    메모리는 파일 크기가 아니라 청크 크기 + 키 수에 비례합니다.
+
+    :param path: 판매 피드 파일 경로(.csv / .arrow / .feather).
+    :param keys: 합산 기준 컬럼들(aggregate_shard 참고).
+    :param ledger: (선택) 장부 dict. 주어지면 워터마크 이후 판매만 합산합니다(청크 사이에 워터마크를 이어 씀).
+    :return: (totals, rows, watermark) 튜플. 장부가 없으면 watermark는 None.
+    :raises SchemaError: 컬럼이 없거나 값이 스키마 타입과 맞지 않는 경우.
+    """
+
+    source = os.path.basename(path)
+    optional = () if ledger is not None else ("sale_date",)
+    columns = check_header(path, SALES_SCHEMA, optional=optional)
+    _require_keys(columns, keys, source)
+    watermark = SalesWatermark(ledger) if ledger is not None else None
+    parts = []
+    rows = 0
+    for chunk in iter_feed_chunks(path, columns):
+        chunk = apply_schema(chunk, SALES_SCHEMA, source)
+        if watermark is not None:
+            chunk, watermark = filter_new_sales(chunk, ledger, watermark)
+        rows += len(chunk)
+        parts.append(_sum_by_keys(chunk, keys))
+    totals = merge_totals(parts)
+    check_sales_totals(totals, source)
+    return totals, rows, watermark
+
+
+def aggregate_shard(path, reader="stream", ledger=None, cache_dir=None, keys=("product_id",)):
+    """
+    판매 샤드 하나를 읽어 product_id별 판매량 합계를 만듭니다. 워커 프로세스에서 실행됩니다.
+
+    :param path: 판매 샤드 파일 경로. CSV/Arrow 피드면 reader와 관계없이 feed_sales_aggregate로 읽습니다.
+    :param reader: "stream"(xlsx_stream) 또는 "pandas"(sheet_schema.read_sheet + groupby).
+    :param ledger: (선택) 이 샤드의 장부 dict. 주어지면 워터마크 이후 판매만 합산합니다.
+    :param cache_dir: (선택) frame_cache 폴더(pandas 리더).
+    :param keys: 합산 기준 컬럼들. ("product_id", "location")이면 {(product_id, location): 합계}를 만듭니다.
+    :return: (totals, rows, new_ledger, undated_rows) 튜플. 장부가 없으면 new_ledger는 None, undated_rows는 0.
+    :raises SchemaError: 컬럼이 없거나 값이 스키마 타입과 맞지 않는 경우.
+    """
+
+    source = os.path.basename(path)
+    optional = () if ledger is not None else ("sale_date",)
+    watermark = None
+    key_col = tuple(keys) if len(keys) > 1 else keys[0]
+    if is_sales_feed(path):
+        totals, rows, watermark = feed_sales_aggregate(path, keys, ledger)
+    elif reader == "stream":
+        columns = check_header(path, SALES_SCHEMA, optional=optional)
+        _require_keys(columns, keys, source)
+        if ledger is None:
+            totals, rows = stream_sales_aggregate(path, key_col)
+        else:
+            totals, rows, watermark = stream_new_sales_aggregate(path, ledger, key_col)
+    elif reader == "pandas":
+        sales_df = read_sheet(path, SALES_SCHEMA, cache_dir, optional=optional)
+        _require_keys(sales_df.columns, keys, source)
+        if ledger is not None:
+            sales_df, watermark = filter_new_sales(sales_df, ledger)
+        rows = len(sales_df)
+        totals = _sum_by_keys(sales_df, keys)
+    else:
+        raise ValueError(f"알 수 없는 판매 리더: {reader}")
+    check_sales_totals(totals, source)
+
+    if watermark is None:
+        return totals, rows, None, 0
+    return totals, rows, watermark.to_ledger(), watermark.undated_rows
+
+
+def _require_keys(columns, keys, source):
+    """위치별 합산인데 샤드에 location 컬럼이 없으면 실패(샤드마다 합계 키 모양이 달라지므로)."""
+    missing = [k for k in keys if k not in columns]
+    if missing:
+        raise SchemaError(f"{source}에 필요한 컬럼 {missing}이 없습니다. (다른 샤드에는 위치별 판매가 있음)")
+
+
+def _aggregate_shard_task(args):
+    return aggregate_shard(*args)
+
+
+# ---------------------------------
+# reduce: 부분 합계 더하기
+# ---------------------------------
+def merge_totals(parts):
+    """
+    부분 합계 dict들을 순서대로 더해 하나의 {product_id: 합계} dict로 만듭니다.
+    (가장 큰 dict를 복사해 시작하면 더하는 횟수가 줄지만, 순서를 고정해 소수 합계도 항상 같은 값이 되게 함)
+    """
+
+    totals = {}
+    for part in parts:
+        for key, qty in part.items():
+            totals[key] = totals.get(key, 0) + qty
+    return totals
+
+
+class ShardWatermarks:
+    """
+    샤드별 새 장부를 모은 결과. SalesWatermark처럼 to_ledger()/undated_rows를 제공해
+    병합 함수가 파일 하나일 때와 같은 방식으로 stage_ledger에 넘길 수 있습니다.
+
+    장부가 파일 하나 모드로 기록되어 있으면("shards" 없이 맨 위에 워터마크) 처음 보는 샤드를 그 워터마크에서 시작합니다.
+    (같은 판매 파일을 폴더로 옮겨 샤드 모드로 바꿨을 때 이미 반영한 판매를 다시 빼지 않도록)
+    샤드 형식의 장부에서 처음 보는 샤드는 초기 장부에서 시작합니다(새 매장/날짜 파일의 판매는 아직 반영 전).
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.shards = dict(ledger.get("shards", {}))
+        self.seed = None
+        if "shards" not in ledger and ledger.get("last_sale_date"):
+            self.seed = {k: ledger.get(k) for k in ("last_sale_date", "tie_keys")}
+        self.new_rows = 0
+        self.undated_rows = 0
+
+    def shard_ledger(self, name):
+        """샤드의 기존 장부. 처음 보는 샤드면 파일 하나 모드의 워터마크(있으면) 또는 초기 장부."""
+        if name in self.shards:
+            return self.shards[name]
+        ledger = empty_ledger()
+        if self.seed is not None:
+            ledger.update(self.seed, tie_keys=list(self.seed["tie_keys"] or []))
+        return ledger
+
+    def add(self, name, shard_ledger, rows, undated_rows):
+        self.shards[name] = {k: shard_ledger[k] for k in ("last_sale_date", "tie_keys", "applied_rows")}
+        self.new_rows += rows
+        self.undated_rows += undated_rows
+
+    def to_ledger(self):
+        ledger = dict(self.ledger)
+        dates = [s["last_sale_date"] for s in self.shards.values() if s.get("last_sale_date")]
+        ledger["shards"] = dict(sorted(self.shards.items()))
+        # ISO 문자열(같은 형식)이므로 문자열 비교로 가장 늦은 시각을 고름
+        ledger["last_sale_date"] = max(dates) if dates else None
+        ledger["tie_keys"] = []
+        ledger["applied_rows"] = ledger.get("applied_rows", 0) + self.new_rows
+        ledger["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        return ledger
+
+
+def single_file_ledger(ledger, sales_file):
+    """
+    파일 하나 모드에서 쓸 장부를 고릅니다.
+
+    1) 장부가 파일 하나 형식이면 그대로 씁니다(ShardWatermarks 없음).
+    2) 샤드 형식이면 판매 파일과 같은 이름의 샤드 워터마크를 쓰고, 새 장부도 샤드 형식으로 남기도록
+       ShardWatermarks를 함께 돌려줍니다(다른 샤드의 워터마크를 지우지 않음).
+
+    :param ledger: load_ledger로 읽은 장부 dict.
+    :param sales_file: 판매 파일 경로.
+    :return: (이 파일의 장부 dict, ShardWatermarks 또는 None) 튜플.
+    :raises LedgerLayoutError: 샤드 형식의 장부에 이 파일 이름의 샤드가 없는 경우.
+    """
+
+    if "shards" not in ledger:
+        return ledger, None
+    name = os.path.basename(sales_file)
+    watermarks = ShardWatermarks(ledger)
+    if name not in watermarks.shards:
+        known = ", ".join(sorted(watermarks.shards)) or "없음"
+        raise LedgerLayoutError(
+            f"판매 반영 장부가 샤드 모드로 기록되어 있는데 {name} 샤드가 없습니다(기록된 샤드: {known}). "
+            "이미 반영한 판매를 알 수 없으므로 중단합니다. 판매 샤드 폴더를 LOCAL_SALES_PATH로 쓰거나, "
+            "장부를 확인한 뒤 옮기거나 지우세요."
+        )
+    return watermarks.shard_ledger(name), watermarks
+
+
+# ---------------------------------
+# 병렬 집계
+# ---------------------------------
+def shard_workers_per_job(concurrent_jobs, workers=None):
+    """
+    동시에 도는 동기화 작업(배치 모드의 문서)들이 CPU를 나눠 쓰도록 작업 하나가 쓸 샤드 워커 수를 구합니다.
+
+    :param concurrent_jobs: 동시에 판매를 준비할 수 있는 작업 수(배치 워커 수).
+    :param workers: 전체 샤드 워커 수. None이면 CPU 수.
+    :return: max(1, workers // concurrent_jobs). 1이면 풀 없이 작업 스레드에서 차례로 집계합니다.
+    """
+
+    return max(1, (workers or os.cpu_count() or 1) // max(1, concurrent_jobs))
+
+
+def parallel_sales_aggregate(paths, reader="stream", ledger=None, cache_dir=None, workers=None,
+                             keys=("product_id",)):
+    """
+    판매 샤드들을 프로세스 풀에서 집계하고(map) 부분 합계를 더합니다(reduce).
+
+    - 워커 수는 min(workers, 샤드 수). 1이면 풀을 만들지 않고 현재 프로세스에서 차례로 집계합니다.
+    - 풀은 SHARD_START_METHOD(spawn)로 띄웁니다. 워커마다 모듈을 새로 import하므로 시작에 조금 더 걸립니다.
+    - 한 샤드라도 실패(SchemaError 등)하면 남은 샤드는 취소하고 그 예외를 그대로 올립니다.
+
+    :param paths: expand_sales_shards로 펼친 샤드 파일 목록.
+    :param reader: 샤드 리더("stream" 또는 "pandas").
+    :param ledger: (선택) load_ledger로 읽은 장부 dict. 샤드별 워터마크는 ledger["shards"]에 있습니다.
+                   파일 하나 모드의 장부면 처음 보는 샤드를 그 워터마크에서 시작합니다(ShardWatermarks).
+    :param cache_dir: (선택) frame_cache 폴더(pandas 리더).
+    :param workers: 최대 워커 프로세스 수. None이면 CPU 수.
+    :param keys: 합산 기준 컬럼들(aggregate_shard 참고). 모든 샤드에 이 컬럼들이 있어야 합니다.
+    :return: (totals, rows, watermarks) 튜플. 장부가 없으면 watermarks는 None.
+    """
+
+    watermarks = ShardWatermarks(ledger) if ledger is not None else None
+    tasks = [
+        (path, reader, watermarks.shard_ledger(os.path.basename(path)) if watermarks else None, cache_dir, keys)
+        for path in paths
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+
+    if workers == 1:
+        results = [_aggregate_shard_task(task) for task in tasks]
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(SHARD_START_METHOD)
+        )
+        try:
+            # 샤드 순서대로 결과를 받아 reduce 순서를 고정
+            results = list(pool.map(_aggregate_shard_task, tasks))
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+    rows = 0
+    for path, (_, shard_rows, shard_ledger, undated_rows) in zip(paths, results):
+        rows += shard_rows
+        if watermarks is not None:
+            watermarks.add(os.path.basename(path), shard_ledger, shard_rows, undated_rows)
+    return merge_totals(r[0] for r in results), rows, watermarks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="판매 샤드 병렬 집계 시간 비교")
+    parser.add_argument("spec", help="판매 샤드 폴더 또는 glob 패턴")
+    parser.add_argument("--workers", default="1,2,4", help="비교할 워커 수(쉼표 구분)")
+    parser.add_argument("--reader", default="stream", choices=["stream", "pandas"])
+    args = parser.parse_args()
+
+    shard_paths = expand_sales_shards(args.spec)
+    print(f"샤드 {len(shard_paths)}개, CPU {os.cpu_count()}개")
+    base = None
+    for n in (int(w) for w in args.workers.split(",")):
+        start = time.perf_counter()
+        totals, total_rows, _ = parallel_sales_aggregate(shard_paths, args.reader, workers=n)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(f"워커 {n:3d}: {elapsed:8.3f}초  x{base / elapsed:5.2f}  ({total_rows}행, 상품 {len(totals)}개)")
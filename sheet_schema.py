@@ -0,0 +1,197 @@
+# -------------------------------------------------------
+# 재고/판매 시트 스키마(컬럼과 타입)
+#
+# 두 리더는 시트의 모든 컬럼을 기본 dtype(int64/object)으로 읽습니다.
+# 판매 시트에는 병합에 쓰지 않는 컬럼(주문번호, 메모 등)이 붙어 있는 경우가 많아 그만큼 메모리가 낭비되고,
+# 컬럼 이름이 틀리거나 숫자 칸에 글자가 섞여 있으면 파싱이 다 끝난 뒤 병합 도중에야 알 수 있었습니다.
+#
+# 여기서는 시트별로 필요한 컬럼과 타입을 선언해 두고
+#   1) 판매 시트는 헤더만 먼저 읽어 필요한 컬럼이 있는지 확인합니다(무거운 파싱 전에 SchemaError로 바로 실패).
+#   2) 선언된 컬럼만 읽고(usecols), 읽은 뒤 작은 dtype으로 바꿉니다.
+#      - "int"      : 정수. 값 범위가 맞으면 int32, 넘으면 int64. 빈 칸이 있으면 float64로 둠(pandas와 같은 결과 유지)
+#      - "category" : 반복되는 문자열(상품명)
+#      - "datetime" : datetime64
+#   값이 타입과 맞지 않으면(예: product_id 칸의 "A-1") 어느 행인지 알려 주고 실패합니다.
+#
+# 재고 시트는 병합 결과를 다시 저장(to_excel)할 때 모든 컬럼이 필요하므로 컬럼을 거르지 않고 타입만 맞춥니다.
+# location(창고 위치)은 위치별로 재고를 관리하는 시트에만 있으므로 어느 시트에서든 없어도 됩니다(OPTIONAL_COLUMNS).
+# -------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from xlsx_stream import iter_xlsx_rows
+from frame_cache import read_excel_cached
+from sales_feed import is_sales_feed, read_feed_header
+
+# 시트별 {컬럼: 타입}
+STOCK_SCHEMA = {"product_id": "int", "product_name": "category", "stock_qty": "int", "location": "category"}
+SALES_SCHEMA = {"product_id": "int", "quantity_sold": "int", "sale_date": "datetime", "location": "category"}
+# 어느 시트에서든 없어도 되는 컬럼(위치별 재고일 때만 있음)
+OPTIONAL_COLUMNS = ("location",)
+
+_INT32 = np.iinfo(np.int32)
+# 오류 메시지에 보여 줄 잘못된 행 수
+_MAX_BAD_ROWS = 5
+
+
+class SchemaError(ValueError):
+    """시트의 컬럼이나 값이 선언된 스키마와 맞지 않을 때 발생하는 예외."""
+
+
+# ---------------------------------
+# 헤더 확인 (파싱 전)
+# ---------------------------------
+def read_header(path):
+    """
+    xlsx 첫 시트의 첫 행(헤더)만 스트리밍으로 읽어 컬럼 이름 리스트를 반환합니다.
+    CSV/Arrow 판매 피드면 sales_feed.read_feed_header로 첫 줄/스키마만 읽습니다.
+    """
+
+    if is_sales_feed(path):
+        return read_feed_header(path)
+    rows = iter_xlsx_rows(path)
+    try:
+        header = next(rows, None)
+    finally:
+        rows.close()
+    return [h for h in (header or []) if h is not None]
+
+
+def check_header(path, schema, optional=()):
+    """
+    헤더에 스키마의 컬럼이 모두 있는지 확인합니다.
+
+    :param path: xlsx 파일 경로.
+    :param schema: {컬럼: 타입} dict.
+    :param optional: 없어도 되는 컬럼들(예: 장부를 쓰지 않을 때의 sale_date).
+    :return: 시트에 실제로 있는 스키마 컬럼 리스트(스키마 순서).
+    :raises SchemaError: 필수 컬럼이 없는 경우.
+    """
+
+    return _require_columns(read_header(path), schema, optional, os.path.basename(path))
+
+
+def _require_columns(header, schema, optional, source):
+    header = list(header)
+    missing = [c for c in schema if c not in header and c not in optional and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise SchemaError(f"{source}에 필요한 컬럼 {missing}이 없습니다. (시트 헤더: {header})")
+    return [c for c in schema if c in header]
+
+
+# ---------------------------------
+# 타입 적용
+# ---------------------------------
+def _bad_rows(mask, values):
+    """잘못된 값의 엑셀 행 번호(헤더가 1행)와 값을 몇 개만 보여 줍니다."""
+    rows = [f"{idx + 2}행={_plain(values.loc[idx])!r}" for idx in values.index[mask][:_MAX_BAD_ROWS]]
+    more = int(mask.sum()) - len(rows)
+    return ", ".join(rows) + (f" 외 {more}개" if more > 0 else "")
+
+
+def _plain(value):
+    """numpy 스칼라를 파이썬 값으로(메시지에 np.float64(...) 대신 1.5로 보이도록)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _to_int(values, column, source):
+    """
+    정수 컬럼을 int32(범위를 넘으면 int64)로 바꿉니다. 빈 칸이 있으면 float64로 둡니다.
+    """
+
+    if values.dtype.kind in "iu":
+        numbers = values
+    else:
+        numbers = pd.to_numeric(values, errors="coerce")
+        invalid = numbers.isna() & values.notna()
+        if invalid.any():
+            raise SchemaError(f"{source} {column} 컬럼에 숫자가 아닌 값이 있습니다: {_bad_rows(invalid, values)}")
+        fractional = numbers.notna() & (numbers != np.floor(numbers))
+        if fractional.any():
+            raise SchemaError(f"{source} {column} 컬럼에 정수가 아닌 값이 있습니다: {_bad_rows(fractional, values)}")
+        if numbers.isna().any():
+            return numbers.astype(np.float64)
+
+    if len(numbers) and (numbers.min() < _INT32.min or numbers.max() > _INT32.max):
+        return numbers.astype(np.int64)
+    return numbers.astype(np.int32)
+
+
+def apply_schema(df, schema, source="시트"):
+    """
+    스키마의 컬럼을 선언된 타입으로 바꾼 DataFrame을 반환합니다. 스키마에 없는 컬럼은 그대로 둡니다.
+
+    :param df: 읽은 DataFrame.
+    :param schema: {컬럼: 타입} dict.
+    :param source: 오류 메시지에 쓸 이름(보통 파일명).
+    :raises SchemaError: 값이 타입과 맞지 않는 경우.
+    """
+
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if kind == "int":
+            df[column] = _to_int(values, column, source)
+        elif kind == "category":
+            df[column] = values.astype("category")
+        elif kind == "datetime":
+            if values.dtype.kind != "M":
+                converted = pd.to_datetime(values, errors="coerce")
+                invalid = converted.isna() & values.notna()
+                if invalid.any():
+                    raise SchemaError(f"{source} {column} 컬럼에 날짜가 아닌 값이 있습니다: {_bad_rows(invalid, values)}")
+                df[column] = converted
+        else:
+            raise ValueError(f"알 수 없는 스키마 타입: {kind}")
+    return df
+
+
+# ---------------------------------
+# 스키마를 거치는 리더
+# ---------------------------------
+def read_sheet(path, schema, cache_dir=None, project=True, optional=()):
+    """
+    엑셀을 읽고 스키마 타입을 적용합니다.
+    project=True면 헤더를 먼저 확인해 스키마 컬럼만 읽고, False면 읽은 DataFrame의 컬럼으로 확인합니다.
+
+    :param path: xlsx 파일 경로.
+    :param schema: {컬럼: 타입} dict.
+    :param cache_dir: (선택) frame_cache 폴더. 캐시 키에는 usecols가 들어가므로 전체/일부 읽기가 섞이지 않습니다.
+    :param project: True면 스키마 컬럼만 읽음(usecols). 다시 저장할 시트(재고)는 False.
+    :param optional: 없어도 되는 컬럼들.
+    :return: DataFrame.
+    :raises SchemaError: 컬럼이 없거나 값이 타입과 맞지 않는 경우.
+    """
+
+    source = os.path.basename(path)
+    if project:
+        df = read_excel_cached(path, cache_dir, usecols=check_header(path, schema, optional))
+    else:
+        df = read_excel_cached(path, cache_dir)
+        _require_columns(df.columns, schema, optional, source)
+    return apply_schema(df, schema, source)
+
+
+def _is_integral(value):
+    return type(value) is int or (isinstance(value, float) and value.is_integer())
+
+
+def check_sales_totals(totals, source="판매 시트"):
+    """
+    스트리밍 리더의 {product_id: 합계}에서 product_id나 합계가 정수가 아닌 항목이 있으면 병합 전에 실패합니다.
+    (스트리밍 리더는 행 단위 값을 남기지 않으므로 합계로 확인합니다)
+    위치별 합계({(product_id, location): 합계})면 키의 product_id 부분을 확인합니다.
+
+    :raises SchemaError: 정수가 아닌 product_id 또는 판매량 합계가 있는 경우.
+    """
+
+    bad = [k for k in totals if not _is_integral(k[0] if isinstance(k, tuple) else k)]
+    if bad:
+        raise SchemaError(f"{source} product_id 컬럼에 정수가 아닌 값이 있습니다: {bad[:_MAX_BAD_ROWS]}")
+    bad = [k for k, v in totals.items() if not _is_integral(v)]
+    if bad:
+        raise SchemaError(f"{source} quantity_sold 합계가 정수가 아닌 상품이 있습니다: {bad[:_MAX_BAD_ROWS]}")
@@ -0,0 +1,247 @@
+# -------------------------------------------------------
+# 명령줄 진입점 (필요한 모듈만 불러오는 빠른 시작)
+#
+# 두 스크립트를 바로 실행하면 셀레니움과 보조 모듈을 모두 불러온 뒤에야 일을 시작하고,
+# 이미 받아 둔 파일로 병합만 다시 할 때도 브라우저 쪽 import 비용을 치렀습니다(짧은 실행은 import가 대부분).
+# 이 CLI는 명령마다 필요한 모듈만 그때 import합니다.
+#   merge    : stock_merge만(판다스). 셀레니움/pywinauto/스크립트를 불러오지 않음
+#   download : 플랫폼 스크립트(셀레니움). 로그인 → 재고 받기만 하고 판다스는 불러오지 않음
+#   upload   : 플랫폼 스크립트(셀레니움). 로그인 → 파일 올리기만(pywinauto는 OS 대화상자 대체 경로에서만)
+#   sync     : 플랫폼 스크립트의 메인 로직(기본), --batch(여러 문서), --daemon(상주 모드)
+#
+# --import-profile을 주면 명령이 불러오는 모듈 그룹별 import 시간과 새로 로드된 모듈 수,
+# 로드되지 않은 무거운 패키지, 실행 중에 추가로 로드된 패키지를 출력합니다.
+# (모듈 하나하나의 시간은 python -X importtime stock_cli.py ...로 볼 수 있습니다)
+#
+# 명령줄:
+#     python stock_cli.py merge ~/Downloads/stock.xlsx ~/Downloads/sales.xlsx --import-profile
+#     python stock_cli.py download --out-dir ~/Downloads
+#     python stock_cli.py upload ~/Downloads/stock_updated.xlsx
+#     python stock_cli.py sync [--batch | --daemon]
+# -------------------------------------------------------
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import importlib
+
+# 이 모듈이 로드되기 시작한 시각(--import-profile의 기준)
+_START = time.perf_counter()
+
+# 브라우저 명령이 쓰는 스크립트(플랫폼별)와 그 메인 함수
+SCRIPT_MODULE = "windows_wps_selenium_script" if sys.platform.startswith("win") else "wps_selenium_script"
+MAIN_FUNCTIONS = {
+    "wps_selenium_script": "download_merge_upload_with_finder",
+    "windows_wps_selenium_script": "download_merge_upload_with_explorer",
+}
+
+# 명령 → 차례로 import할 모듈. 앞의 모듈이 뒤의 모듈 안에서 먼저 로드되므로 줄마다 그 그룹이 더한 비용이 됩니다.
+# "{script}"는 --script(기본값 SCRIPT_MODULE)로 바뀝니다.
+COMMAND_IMPORTS = {
+    "merge": ("numpy", "pandas", "stock_merge"),
+    "download": ("selenium.webdriver", "{script}"),
+    "upload": ("selenium.webdriver", "{script}"),
+    "sync": ("selenium.webdriver", "{script}", "pandas", "stock_merge"),
+}
+# 로드 여부를 보여 줄 무거운 패키지
+HEAVY_PACKAGES = ("pandas", "numpy", "pyarrow", "openpyxl", "selenium", "pywinauto")
+
+
+# ---------------------------------
+# import 시간 측정
+# ---------------------------------
+class ImportProfile:
+    """
+    명령이 쓰는 모듈을 차례로 import하면서 모듈별 시간과 새로 로드된 모듈 수를 기록합니다.
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def load(self, names):
+        """
+        names를 순서대로 import합니다.
+
+        :param names: 모듈 이름들.
+        :return: {이름: 모듈} dict.
+        """
+
+        modules = {}
+        for name in names:
+            before = len(sys.modules)
+            start = time.perf_counter()
+            modules[name] = importlib.import_module(name)
+            self.rows.append((name, time.perf_counter() - start, len(sys.modules) - before))
+        return modules
+
+    def report(self, command):
+        """모듈별 import 시간, CLI 시작 이후 시간, 로드되지 않은 무거운 패키지를 출력합니다."""
+        total = sum(seconds for _, seconds, _ in self.rows)
+        print(f"[import] {command} 명령 준비 {time.perf_counter() - _START:.3f}초 (그중 import {total:.3f}초)")
+        for name, seconds, count in self.rows:
+            print(f"  {name:<30} {seconds:7.3f}초  모듈 {count:4d}개")
+        missing = [p for p in HEAVY_PACKAGES if p not in sys.modules]
+        if missing:
+            print(f"  로드하지 않음: {', '.join(missing)}")
+
+
+def loaded_heavy_packages():
+    return {p for p in HEAVY_PACKAGES if p in sys.modules}
+
+
+# ---------------------------------
+# 명령
+# ---------------------------------
+def run_merge(args, modules):
+    """이미 받아 둔 재고 파일과 판매 파일로 병합만 합니다. 단계별 시간을 출력합니다."""
+    from sync_metrics import SyncTracer
+
+    stock_merge = modules["stock_merge"]
+    out_dir = args.out_dir or os.path.dirname(os.path.abspath(args.stock))
+    os.makedirs(out_dir, exist_ok=True)
+    tracer = SyncTracer()
+    success = False
+    try:
+        with tracer.activate():
+            rows = stock_merge.merge_local_sales_with_downloaded_stock(
+                args.stock, args.sales, reader=args.reader, ledger_path=args.ledger, cache_dir=args.cache_dir,
+                writer=args.writer, work_dir=out_dir, engine=args.engine, shard_workers=args.shard_workers
+            )
+        success = True
+    finally:
+        tracer.finish(success)
+    print(f"병합 완료 → {os.path.join(out_dir, 'stock_updated.xlsx')} (판매 {rows}행 반영)")
+    if args.ledger:
+        # 장부는 업로드가 끝나야 확정(commit_ledger)하므로 병합만 할 때는 pending으로 남김
+        print("판매 반영 장부는 pending에만 기록했습니다(업로드까지 하는 sync에서 확정).")
+    return rows
+
+
+def _open_browser(script):
+    state = {"driver": None, "run_dir": script.create_run_dir(script.RUNS_DIR, "cli")}
+    try:
+        script.start_logged_in_driver(state)
+    except BaseException:
+        _close_browser(script, state)
+        raise
+    return state
+
+
+def _close_browser(script, state):
+    try:
+        if state["driver"] is not None:
+            script.report_browser_usage(state["driver"])
+            state["driver"].quit()
+    finally:
+        script.finish_run_dir(state["run_dir"])
+
+
+def run_download(args, modules):
+    """로그인 → 재고 받기. 받은 파일을 out_dir/stock.xlsx로 복사합니다."""
+    script = modules[args.script]
+    out_dir = args.out_dir or script.DOWNLOAD_DIR
+    state = _open_browser(script)
+    try:
+        stock_file_path = script.download_stock_document(
+            state["driver"], args.doc_url or script.STOCK_DOC_URL, state["run_dir"]
+        )
+    finally:
+        _close_browser(script, state)
+    os.makedirs(out_dir, exist_ok=True)
+    saved_path = shutil.copyfile(stock_file_path, os.path.join(out_dir, "stock.xlsx"))
+    print(f"재고 파일 저장 → {saved_path}")
+    return saved_path
+
+
+def run_upload(args, modules):
+    """로그인 → 업로드 페이지에서 파일 올리기."""
+    script = modules[args.script]
+    path = os.path.abspath(args.file)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"업로드할 파일이 없습니다: {path}")
+    state = _open_browser(script)
+    try:
+        return script.upload_stock_document(state["driver"], path)
+    finally:
+        _close_browser(script, state)
+
+
+def run_sync(args, modules):
+    """스크립트의 메인 로직(기본), 배치 모드(--batch), 상주 모드(--daemon)."""
+    script = modules[args.script]
+    if args.batch:
+        return script.sync_documents_batch()
+    if args.daemon:
+        return script.run_sync_daemon()
+    return getattr(script, MAIN_FUNCTIONS[args.script])()
+
+
+COMMANDS = {"merge": run_merge, "download": run_download, "upload": run_upload, "sync": run_sync}
+
+
+# ---------------------------------
+# 인자
+# ---------------------------------
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--import-profile", action="store_true", help="명령 시작 전 import 비용을 출력")
+    browser = argparse.ArgumentParser(add_help=False)
+    browser.add_argument("--script", default=SCRIPT_MODULE, choices=sorted(MAIN_FUNCTIONS),
+                         help="브라우저 단계를 맡을 스크립트(기본값: 현재 OS용)")
+
+    parser = argparse.ArgumentParser(description="WPS 재고 동기화 명령줄")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser("merge", parents=[common], help="받아 둔 재고 파일에 판매를 반영(브라우저 없음)")
+    merge.add_argument("stock", help="재고 파일(stock.xlsx)")
+    merge.add_argument("sales", help="판매 파일(.xlsx/.csv/.arrow/.feather), 또는 판매 샤드 폴더/glob 패턴")
+    merge.add_argument("--out-dir", default=None, help="stock_updated.xlsx를 저장할 폴더(기본값: 재고 파일 폴더)")
+    merge.add_argument("--reader", default="pandas", choices=["pandas", "stream"])
+    merge.add_argument("--engine", default="numpy", choices=["pandas", "numpy"])
+    merge.add_argument("--writer", default="patch", choices=["openpyxl", "patch"])
+    merge.add_argument("--ledger", default=None, help="판매 반영 장부 경로(워터마크 이후 판매만 반영)")
+    merge.add_argument("--cache-dir", default=None, help="frame_cache 폴더")
+    merge.add_argument("--shard-workers", type=int, default=None, help="판매 샤드 집계 워커 수(기본값: CPU 수)")
+
+    download = commands.add_parser("download", parents=[common, browser], help="로그인 후 재고 파일만 받기")
+    download.add_argument("--doc-url", default=None, help="재고 문서 URL(기본값: 스크립트의 STOCK_DOC_URL)")
+    download.add_argument("--out-dir", default=None, help="stock.xlsx를 저장할 폴더(기본값: 스크립트의 DOWNLOAD_DIR)")
+
+    upload = commands.add_parser("upload", parents=[common, browser], help="로그인 후 파일만 업로드")
+    upload.add_argument("file", help="업로드할 파일(stock_updated.xlsx)")
+
+    sync = commands.add_parser("sync", parents=[common, browser], help="받기 → 병합 → 업로드 전체")
+    mode = sync.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true", help="SYNC_JOBS_FILE의 여러 문서를 워커 풀로 동기화")
+    mode.add_argument("--daemon", action="store_true", help="판매 파일 변화를 감시하며 계속 동기화")
+    return parser
+
+
+def main(argv=None):
+    """
+    명령에 필요한 모듈만 import한 뒤 실행합니다.
+
+    :param argv: (선택) 인자 리스트. None이면 sys.argv[1:].
+    :return: 명령의 반환값.
+    """
+
+    args = build_parser().parse_args(argv)
+    profile = ImportProfile()
+    script = getattr(args, "script", SCRIPT_MODULE)
+    modules = profile.load([name.format(script=script) for name in COMMAND_IMPORTS[args.command]])
+    if args.import_profile:
+        profile.report(args.command)
+        before = loaded_heavy_packages()
+    try:
+        return COMMANDS[args.command](args, modules)
+    finally:
+        if args.import_profile:
+            added = sorted(loaded_heavy_packages() - before)
+            if added:
+                print(f"[import] 실행 중 추가로 로드: {', '.join(added)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+# -------------------------------------------------------
+# 재고 키 인덱스: (product_id[, location]) → 재고 행
+#
+# 병합은 재고 한 행 = product_id 하나라고 가정했습니다. 창고별로 재고를 관리하면 같은 product_id가
+# 위치(location)마다 한 행씩 있고, 그대로 product_id로 left merge하면 판매가 위치마다 한 번씩 빠지며
+# 행이 조용히 늘어나거나(fan-out) 같은 판매가 여러 행에서 차감됩니다.
+#
+# 이 모듈은 재고 시트의 키 컬럼으로 정렬 인덱스를 만들어
+#   1) 키가 겹치는 행이 있으면 DuplicateKeyError로 병합 전에 실패하고(어느 엑셀 행인지 알려 줌),
+#   2) 판매 키를 np.searchsorted로 재고 행 번호에 바로 대응시킵니다(numpy_engine.SalesAccumulator가 그대로 씀).
+#      stock_merge의 numpy 엔진은 (상품, 위치) 키와, 재고 id에 빈 칸이 있는 상품 키에 이 대응을 씁니다.
+#      보통의 상품 키는 numpy_engine.ProductIndex(밀집 인덱스)로 대응시키고, 여기서는 중복 검사만 합니다.
+# 키는 int64 하나로 부호화합니다: product_id × (위치 수 + 1) + 위치 번호. 위치가 없는 시트는 product_id 그대로.
+#
+# 재고 수량은 매번 바뀌어도 키(상품/위치 구성)는 거의 바뀌지 않으므로, 인덱스를 frame_cache 폴더 아래
+# stock_index/에 키 컬럼 해시 이름의 .npz로 저장해 두고 다음 실행에서는 정렬/중복 검사를 건너뜁니다.
+# -------------------------------------------------------
+
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from numpy_engine import integer_ids, exact_quantities, SalesAccumulator
+from sheet_schema import SchemaError
+
+LOCATION_COLUMN = "location"
+# 병합 키: 상품만, 또는 (상품, 위치)
+PRODUCT_KEYS = ("product_id",)
+LOCATION_KEYS = ("product_id", LOCATION_COLUMN)
+
+INDEX_VERSION = 1
+# cache_dir 아래 인덱스를 저장하는 폴더와 남겨 둘 파일 수(오래된 것부터 지움)
+INDEX_DIR = "stock_index"
+MAX_SAVED_INDEXES = 8
+# 오류 메시지에 보여 줄 중복 키 수
+_MAX_DUPLICATES = 5
+# 부호화한 키가 int64를 넘지 않도록 하는 한계
+_CODE_LIMIT = 2 ** 62
+
+
+class DuplicateKeyError(SchemaError):
+    """재고 시트에 같은 키(product_id[, location])의 행이 두 개 이상 있을 때 발생하는 예외."""
+
+
+# ---------------------------------
+# 키 컬럼
+# ---------------------------------
+def sales_key_columns(columns):
+    """판매 시트 컬럼에 location이 있으면 (product_id, location), 없으면 (product_id,)."""
+    return LOCATION_KEYS if LOCATION_COLUMN in columns else PRODUCT_KEYS
+
+
+def merge_key_columns(stock_columns, sales_keys):
+    """
+    재고와 판매 양쪽에 location이 있을 때만 (product_id, location)으로 병합합니다.
+    판매에만 location이 있으면 위치별 합계를 product_id로 합쳐(collapse_totals) 상품 단위로 차감합니다.
+    """
+
+    if LOCATION_COLUMN in stock_columns and LOCATION_COLUMN in sales_keys:
+        return LOCATION_KEYS
+    return PRODUCT_KEYS
+
+
+def location_text(value):
+    """
+    위치 값을 비교용 문자열로 바꿉니다. 비어 있으면 None.
+    (엑셀에서 숫자로 적은 위치 3과 3.0, 문자열 "3"을 같은 위치로 봄)
+    """
+
+    if hasattr(value, "item"):
+        value = value.item()
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def normalize_locations(values):
+    """
+    위치 컬럼 전체를 location_text로 바꾼 Series(object, 빈 칸은 None).
+    고유값에만 location_text를 적용하므로 행이 많아도 파이썬 반복은 위치 종류 수만큼입니다.
+    """
+
+    categorical = pd.Categorical(values)
+    texts = np.array([location_text(c) for c in categorical.categories] + [None], dtype=object)
+    # 빈 칸의 코드 -1은 마지막(None)을 가리킴
+    return pd.Series(texts[categorical.codes], index=getattr(values, "index", None))
+
+
+def collapse_totals(totals):
+    """{(product_id, location): 합계}를 {product_id: 합계}로 합칩니다(재고 시트에 location이 없을 때)."""
+    collapsed = {}
+    for (product_id, _), qty in totals.items():
+        collapsed[product_id] = collapsed.get(product_id, 0) + qty
+    return collapsed
+
+
+def totals_to_key_arrays(totals):
+    """
+    {(product_id, location): 합계} dict를 (ids, quantities, locations)로 바꿉니다(indexed_stock_update의 인자 순서).
+
+    :return: 튜플. product_id가 모두 정수(bool 제외)가 아니면 None.
+    """
+
+    keys = list(totals.keys())
+    if not all(type(k[0]) is int for k in keys):
+        return None
+    ids = np.array([k[0] for k in keys], dtype=np.int64)
+    locations = pd.Series([k[1] for k in keys], dtype=object)
+    return ids, pd.Series(list(totals.values())).to_numpy(), locations
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ---------------------------------
+# 인덱스
+# ---------------------------------
+class StockKeyIndex:
+    """
+    재고 키 → 재고 행 번호 정렬 인덱스. numpy_engine.ProductIndex와 같은 모양(size, stock_slots, lookup)이라
+    SalesAccumulator에 넘길 수 있습니다.
+    재고 행마다 칸이 하나씩이고(size = 행 수), 키가 비어 있는 행(product_id/위치가 빈 칸)은 어떤 판매와도 맞지 않습니다.
+
+    :ivar keys: 키 컬럼 튜플(PRODUCT_KEYS 또는 LOCATION_KEYS).
+    :ivar locations: 위치 문자열 목록(정렬). 위치 번호는 이 목록의 위치입니다.
+    :ivar size: 칸 수(= 재고 행 수).
+    :ivar stock_slots: 재고 각 행의 칸 번호(0..size-1).
+    """
+
+    def __init__(self, keys, codes, rows, locations, size):
+        self.keys = tuple(keys)
+        self.locations = list(locations)
+        self._location_pos = {loc: i for i, loc in enumerate(self.locations)}
+        self._codes = codes
+        self._rows = rows
+        self.size = size
+        self.stock_slots = np.arange(size, dtype=np.int64)
+
+    @property
+    def _base(self):
+        # 위치 번호 len(locations)는 "재고에 없는 위치"(판매 쪽에만 있는 위치)
+        return len(self.locations) + 1
+
+    @classmethod
+    def build(cls, stock_df, keys, source="재고 시트"):
+        """
+        재고 DataFrame의 키 컬럼으로 인덱스를 만듭니다.
+
+        :param stock_df: 재고 DataFrame.
+        :param keys: PRODUCT_KEYS 또는 LOCATION_KEYS.
+        :param source: 오류 메시지에 쓸 이름.
+        :return: StockKeyIndex. product_id가 정수가 아니면 None.
+        :raises DuplicateKeyError: 같은 키의 재고 행이 두 개 이상 있는 경우.
+        """
+
+        converted = integer_ids(stock_df["product_id"].to_numpy())
+        if converted is None:
+            return None
+        ids, keep = converted
+        rows = np.arange(len(stock_df), dtype=np.int64)
+        if keep is not None:
+            rows = rows[keep]
+
+        locations = []
+        if len(keys) > 1:
+            values = stock_df[LOCATION_COLUMN].to_numpy()
+            if keep is not None:
+                values = values[keep]
+            texts = (location_text(c) for c in pd.Categorical(values).categories)
+            locations = sorted({t for t in texts if t is not None})
+
+        index = cls(keys, None, None, locations, len(stock_df))
+        codes = index._encode(ids, values if len(keys) > 1 else None, missing=-1)
+        if codes is None:
+            return None
+        if len(keys) > 1:
+            # 위치가 빈 칸인 재고 행은 키가 없음(어떤 판매와도 맞지 않음)
+            codes, rows = codes[0][codes[1]], rows[codes[1]]
+        order = np.argsort(codes, kind="stable")
+        index._codes, index._rows = codes[order], rows[order]
+        index._check_unique(stock_df, source)
+        return index
+
+    def _location_positions(self, values, missing):
+        """위치 값 배열을 위치 번호로. 재고에 없는 위치는 len(locations), 빈 칸은 missing."""
+        categorical = pd.Categorical(values)
+        unknown = self._base - 1
+        lookup = []
+        for category in categorical.categories:
+            text = location_text(category)
+            lookup.append(missing if text is None else self._location_pos.get(text, unknown))
+        # 빈 칸의 코드 -1은 마지막(missing)을 가리킴
+        lookup = np.array(lookup + [missing], dtype=np.int64)
+        return lookup[categorical.codes]
+
+    def _encode(self, ids, locations=None, missing=None):
+        """
+        (product_id, 위치 번호)를 int64 코드로. 범위를 넘으면 None.
+        missing=-1이면 (codes, present) 튜플을 반환합니다(present: 위치가 있는 행).
+        missing=None이면 빈 위치도 재고에 없는 위치로 부호화합니다(판매 쪽).
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(self.keys) == 1:
+            return ids
+        base = self._base
+        if len(ids) and int(np.abs(ids).max()) >= _CODE_LIMIT // base:
+            return None
+        positions = self._location_positions(locations, base - 1 if missing is None else missing)
+        codes = ids * base + positions
+        if missing is None:
+            return codes
+        return codes, positions != missing
+
+    def _check_unique(self, stock_df, source):
+        duplicated = np.flatnonzero(self._codes[1:] == self._codes[:-1])
+        if len(duplicated) == 0:
+            return
+        starts = np.unique(self._codes[duplicated])
+        shown = []
+        for code in starts[:_MAX_DUPLICATES]:
+            rows = self._rows[self._codes == code]
+            key = tuple(_plain(stock_df[k].iloc[rows[0]]) for k in self.keys)
+            key = key[0] if len(key) == 1 else key
+            shown.append(f"{key!r}: " + "/".join(f"{r + 2}행" for r in rows))
+        more = len(starts) - len(shown)
+        hint = ""
+        if LOCATION_COLUMN in stock_df.columns and len(self.keys) == 1:
+            hint = " (재고 시트는 위치별 행인데 판매 시트에 location 컬럼이 없습니다)"
+        raise DuplicateKeyError(
+            f"{source}에 같은 키 {list(self.keys)}의 행이 여러 개 있어 판매가 중복 차감됩니다{hint}: "
+            + ", ".join(shown) + (f" 외 {more}개" if more > 0 else "")
+        )
+
+    def encode(self, product_ids, locations=None):
+        """
+        판매 키를 인덱스 코드로 바꿉니다.
+
+        :param product_ids: 판매 product_id (배열/Series).
+        :param locations: 위치 키 인덱스면 판매 위치 (배열/Series).
+        :return: (codes, keep) 튜플. keep은 남긴 행의 bool 마스크(모두 남기면 None).
+                 product_id가 정수가 아니면 None.
+        """
+
+        converted = integer_ids(product_ids)
+        if converted is None:
+            return None
+        ids, keep = converted
+        if len(self.keys) == 1:
+            return ids, keep
+        locations = np.asarray(locations, dtype=object)
+        if keep is not None:
+            locations = locations[keep]
+        codes = self._encode(ids, locations)
+        if codes is None:
+            return None
+        return codes, keep
+
+    def lookup(self, codes):
+        """
+        encode한 판매 코드의 칸(재고 행) 번호를 구합니다.
+
+        :return: (slots, found) 튜플. found는 재고에 있는 키인지 나타내는 bool 배열.
+        """
+
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(self._codes) == 0:
+            return np.zeros(len(codes), dtype=np.int64), np.zeros(len(codes), dtype=bool)
+        positions = np.searchsorted(self._codes, codes)
+        found = positions < len(self._codes)
+        found[found] = self._codes[positions[found]] == codes[found]
+        slots = np.zeros(len(codes), dtype=np.int64)
+        slots[found] = self._rows[positions[found]]
+        return slots, found
+
+    # ---------------------------------
+    # 저장/불러오기
+    # ---------------------------------
+    def save(self, path):
+        """인덱스를 .npz로 저장합니다. 임시 파일에 쓴 뒤 교체합니다."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=INDEX_VERSION, keys=np.array(self.keys), codes=self._codes, rows=self._rows,
+                     locations=np.array(self.locations, dtype=str), size=self.size)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """save로 저장한 인덱스. 파일이 없거나 형식이 다르면 None."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return None
+                return cls(tuple(data["keys"].tolist()), data["codes"], data["rows"],
+                           data["locations"].tolist(), int(data["size"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def stock_key_digest(stock_df, keys):
+    """재고 키 컬럼의 값(행 순서 포함)으로 만든 해시. stock_qty 등 다른 컬럼이 바뀌어도 같습니다."""
+    digest = hashlib.sha256(f"v{INDEX_VERSION}:{','.join(keys)}:{len(stock_df)}".encode())
+    hashed = pd.util.hash_pandas_object(stock_df[list(keys)], index=False)
+    digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _prune_saved_indexes(index_dir):
+    paths = [os.path.join(index_dir, n) for n in os.listdir(index_dir) if n.endswith(".npz")]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[MAX_SAVED_INDEXES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_stock_index(stock_df, keys, cache_dir=None, source="재고 시트"):
+    """
+    재고 키 인덱스를 저장된 파일에서 불러오고, 없으면 만들어 저장합니다.
+
+    :param stock_df: 재고 DataFrame.
+    :param keys: PRODUCT_KEYS 또는 LOCATION_KEYS.
+    :param cache_dir: (선택) frame_cache 폴더. None이면 저장하지 않고 매번 만듭니다.
+    :param source: 오류 메시지에 쓸 이름.
+    :return: (index, cached) 튜플. product_id가 정수가 아니면 index는 None.
+    :raises DuplicateKeyError: 같은 키의 재고 행이 두 개 이상 있는 경우.
+    """
+
+    path = None
+    if cache_dir:
+        index_dir = os.path.join(cache_dir, INDEX_DIR)
+        path = os.path.join(index_dir, stock_key_digest(stock_df, keys) + ".npz")
+        index = StockKeyIndex.load(path)
+        if index is not None and index.size == len(stock_df):
+            os.utime(path)
+            return index, True
+
+    index = StockKeyIndex.build(stock_df, keys, source)
+    if index is not None and path is not None:
+        try:
+            index.save(path)
+            _prune_saved_indexes(index_dir)
+        except OSError as e:
+            print(f"[index] 재고 키 인덱스를 저장하지 못했습니다: {e}")
+    return index, False
+
+
+# ---------------------------------
+# 인덱스로 차감
+# ---------------------------------
+def indexed_stock_update(stock_df, index, sale_ids, quantities, sale_locations=None):
+    """
+    재고 키 인덱스로 판매를 재고 행에 누적하고 차감한 stock_qty 배열을 구합니다.
+    (상품 키에서는 numpy_engine.numpy_stock_update와 같은 결과. 재고 id로 칸을 새로 잡는 대신 이 인덱스를 씀)
+
+    :param stock_df: stock_qty 컬럼이 있는 재고 DataFrame(index를 만든 것과 같은 행).
+    :param index: load_stock_index로 얻은 StockKeyIndex.
+    :param sale_ids: 판매 product_id (배열/Series). 판매 행 그대로여도, 키별로 합친 값이어도 됩니다.
+    :param quantities: 판매 수량 (배열/Series).
+    :param sale_locations: 위치 키 인덱스면 판매 위치 (배열/Series).
+    :return: (updated_qty, products) 튜플. 정수 id/수량이 아니어서 pandas와 같은 결과를 보장할 수 없으면 None.
+    """
+
+    stock_qty = stock_df["stock_qty"].to_numpy()
+    if stock_qty.dtype.kind not in "iuf":
+        return None
+    encoded = index.encode(sale_ids, sale_locations)
+    qty = exact_quantities(quantities)
+    if encoded is None or qty is None:
+        return None
+    codes, keep = encoded
+    if keep is not None:
+        qty = qty[keep]
+
+    accumulator = SalesAccumulator(index)
+    accumulator.add(codes, qty)
+    return accumulator.apply(stock_qty), accumulator.products
@@ -0,0 +1,345 @@
+# -------------------------------------------------------
+# 재고+판매 엑셀 병합 (브라우저 없이)
+#
+# 병합 함수는 두 스크립트(wps_selenium_script / windows_wps_selenium_script)에 똑같이 들어 있었고,
+# 이미 받아 둔 파일로 병합만 다시 하려 해도 셀레니움(윈도우는 pywinauto까지)을 함께 import해야 했습니다.
+# 판매 준비(prepare_local_sales)와 병합(merge_local_sales_with_downloaded_stock)을 이 모듈로 옮겨
+# 두 스크립트와 stock_cli.py의 merge 명령이 함께 씁니다. 이 모듈은 셀레니움을 import하지 않습니다.
+# -------------------------------------------------------
+
+import os
+import time
+
+import pandas as pd
+
+from xlsx_stream import stream_sales_aggregate, report_parse_stats
+from sales_ledger import load_ledger, stage_ledger, filter_new_sales, stream_new_sales_aggregate
+from xlsx_patch import write_stock_patch, XlsxPatchError
+from sync_metrics import span
+from numpy_engine import numpy_stock_update, totals_to_arrays
+from sheet_schema import STOCK_SCHEMA, SALES_SCHEMA, check_header, read_header, read_sheet, check_sales_totals
+from sales_shards import (
+    is_sales_shard_spec, expand_sales_shards, parallel_sales_aggregate, feed_sales_aggregate, single_file_ledger,
+)
+from sales_feed import is_sales_feed, feed_format
+from stock_index import (
+    PRODUCT_KEYS, sales_key_columns, merge_key_columns, collapse_totals, normalize_locations,
+    totals_to_key_arrays, load_stock_index, indexed_stock_update
+)
+
+
+# ---------------------------------
+# 판매 준비
+# ---------------------------------
+def prepare_local_sales(sales_file: str, reader: str = "pandas", ledger_path: str = None,
+                        cache_dir: str = None, shard_workers: int = None) -> dict:
+    """
+    병합의 판매 쪽 준비. 다운로드한 재고와 무관하므로 브라우저 단계(드라이버 시작/로그인/다운로드)와 동시에 할 수 있습니다.
+
+    1) 판매 파일(또는 샤드)이 있는지, 헤더에 필요한 컬럼이 있는지 확인합니다.
+    2) reader/샤드에 맞게 판매를 읽어 product_id별 합계(totals) 또는 판매 DataFrame(sales_df)을 만듭니다.
+       ledger_path가 주어지면 워터마크 이후 판매만 남기고, 새 워터마크를 watermark로 돌려줍니다.
+    3) 판매 시트에 location 컬럼이 있으면 (product_id, location)별로 합산합니다(keys).
+    4) 판매 파일이 CSV/Arrow 피드(.csv/.arrow/.feather)면 reader와 관계없이 청크 단위로 읽어 합계를 만듭니다.
+
+    :param sales_file: 로컬 판매 파일 경로(str). 폴더나 glob 패턴이면 판매 샤드 파일들.
+    :param reader: xlsx 판매 파일 리더. "pandas"(기본값) 또는 "stream".
+    :param ledger_path: (선택) 판매 반영 장부(JSON) 경로.
+    :param cache_dir: (선택) 파싱된 엑셀 캐시 폴더.
+    :param shard_workers: 판매 샤드 집계 워커 프로세스 수. None이면 CPU 수.
+    :return: {"aggregated", "totals", "sales_df", "rows", "watermark", "keys"} dict.
+             aggregated가 True면 totals({product_id: 합계}, 위치별이면 {(product_id, location): 합계}),
+             False면 sales_df를 씁니다. keys는 합산 기준 컬럼 튜플입니다.
+    :raises FileNotFoundError: sales_file이 존재하지 않을 경우(샤드 패턴에 맞는 파일이 없을 때 포함).
+    :raises SchemaError: 판매 시트에 필요한 컬럼이 없거나 값이 스키마 타입과 맞지 않을 경우.
+    :raises LedgerLayoutError: 장부가 샤드 모드로 기록되어 있는데 판매 파일 이름의 샤드가 없는 경우.
+    """
+
+    shards = expand_sales_shards(sales_file) if is_sales_shard_spec(sales_file) else None
+    if shards is None and not os.path.exists(sales_file):
+        raise FileNotFoundError("로컬 판매 파일(sales.xlsx)이 없음.")
+
+    # ---------------------------------
+    # 판매 시트 헤더 확인: 컬럼이 빠졌으면 재고/판매를 파싱하기 전에 바로 실패
+    # (sale_date는 장부를 쓸 때만 필요. 샤드는 워커가 파일마다 확인)
+    # ---------------------------------
+    sales_optional = () if ledger_path else ("sale_date",)
+    if shards is None:
+        keys = sales_key_columns(check_header(sales_file, SALES_SCHEMA, optional=sales_optional))
+    else:
+        # 위치별 합산 여부는 첫 샤드의 헤더로 정함(다른 샤드에 location이 없으면 워커가 SchemaError)
+        keys = sales_key_columns(read_header(shards[0]))
+    key_col = keys if len(keys) > 1 else keys[0]
+
+    # ---------------------------------
+    # 판매 수량 합산(sales_agg)
+    # product_id별 quantity_sold 합계를 구하여, 
+    # 그룹화 결과를 sales_agg에 저장
+    # ---------------------------------
+    ledger = load_ledger(ledger_path) if ledger_path else None
+    watermark = None
+    # 파일 하나 모드인데 장부가 샤드 형식이면 같은 이름의 샤드 워터마크로 이어 감(없으면 LedgerLayoutError)
+    shard_marks = None
+    if ledger is not None and shards is None:
+        ledger, shard_marks = single_file_ledger(ledger, sales_file)
+
+    # 샤드든 스트리밍 리더든 피드든 product_id별 합계(totals)로 끝나면 aggregate 단계에는 차감만 남습니다.
+    feed = shards is None and is_sales_feed(sales_file)
+    if feed:
+        reader = feed_format(sales_file)
+    aggregated = shards is not None or reader == "stream" or feed
+    totals = sales_df = None
+    sales_bytes = sum(os.path.getsize(p) for p in shards) if shards else os.path.getsize(sales_file)
+    parse_start = time.perf_counter()
+    with span("parse_sales", reader=reader, bytes=sales_bytes) as s:
+        if shards is not None:
+            # 판매 샤드: 파일마다 워커 프로세스에서 파싱+합산(map) → 부분 합계를 샤드 순서대로 더함(reduce)
+            totals, sales_rows, watermark = parallel_sales_aggregate(
+                shards, reader, ledger, cache_dir, workers=shard_workers, keys=keys
+            )
+            s["shards"] = len(shards)
+        elif feed:
+            # CSV/Arrow 피드: CSV는 청크로, Arrow는 메모리 매핑한 레코드 배치로 읽어 청크마다 합산
+            totals, sales_rows, watermark = feed_sales_aggregate(sales_file, keys, ledger)
+        elif reader == "stream":
+            # 스트리밍 리더: product_id/quantity_sold(+sale_date) 칸만 읽어 dict에 바로 누적
+            # (합산이 파싱과 함께 끝나므로 aggregate 단계에는 병합/차감만 남습니다)
+            if ledger is None:
+                totals, sales_rows = stream_sales_aggregate(sales_file, key_col)
+            else:
+                totals, sales_rows, watermark = stream_new_sales_aggregate(sales_file, ledger, key_col)
+            check_sales_totals(totals, os.path.basename(sales_file))
+        elif reader == "pandas":
+            # 스키마 컬럼(product_id, quantity_sold, sale_date)만 읽어 int32/datetime으로
+            sales_df = read_sheet(sales_file, SALES_SCHEMA, cache_dir, optional=sales_optional)
+            if ledger is not None:
+                # 워터마크 이후의 판매 행만 남김
+                sales_df, watermark = filter_new_sales(sales_df, ledger)
+            sales_rows = len(sales_df)
+        else:
+            raise ValueError(f"알 수 없는 판매 리더: {reader}")
+        if shard_marks is not None:
+            shard_marks.add(os.path.basename(sales_file), watermark.to_ledger(), sales_rows, watermark.undated_rows)
+            watermark = shard_marks
+        s["rows"] = sales_rows
+    report_parse_stats(reader, time.perf_counter() - parse_start, sales_rows, None if shards else sales_file)
+
+    return {"aggregated": aggregated, "totals": totals, "sales_df": sales_df, "rows": sales_rows,
+            "watermark": watermark, "keys": keys}
+
+
+# ---------------------------------
+# 재고+판매 병합
+# ---------------------------------
+def merge_local_sales_with_downloaded_stock(stock_file: str, sales_file: str, reader: str = "pandas",
+                                            ledger_path: str = None, cache_dir: str = None,
+                                            writer: str = "openpyxl", work_dir: str = None,
+                                            engine: str = "pandas", shard_workers: int = None,
+                                            prepared_sales: dict = None) -> int:
+    """
+    다운로드 받은 재고 파일(stock_file)과 
+    로컬 판매 파일(sales_file)을 병합해 재고를 차감한 뒤, 
+    'stock_updated.xlsx'라는 이름으로 저장하는 함수.
+
+    1) stock_file(엑셀)과 sales_file(엑셀)을 각각 읽어서 
+       Pandas DataFrame(stock_df, sales_df)에 로드합니다.
+    2) sales_df를 product_id 기준으로 판매 개수(quantity_sold) 합계를 구하여 
+       stock_df와 병합.
+    3) 기존 재고(stock_qty)에서 판매 수량(quantity_sold)을 차감해 updated_stock를 계산.
+       음수가 되지 않도록 0으로 처리합니다.
+    4) 최종 재고를 'stock_updated.xlsx' 파일에 저장하고,
+       이 함수가 처리한 판매 건수(len(sales_df))를 정수로 반환합니다.
+    5) reader="stream"이면 판매 파일을 DataFrame으로 읽지 않고 xlsx_stream으로 한 행씩 읽어
+       product_id별 합계만 바로 만듭니다. 어느 경로든 파싱 시간과 최대 RSS를 출력합니다.
+    6) ledger_path가 주어지면 장부의 워터마크(마지막 sale_date) 이후 판매만 반영하고,
+       새 워터마크를 "<ledger_path>.pending"에 기록합니다.
+       업로드가 끝난 뒤 commit_ledger(ledger_path)를 호출해야 장부가 실제로 갱신됩니다.
+    7) cache_dir이 주어지면 엑셀을 frame_cache로 읽어, 내용이 같은 파일은 파싱을 건너뜁니다.
+    8) writer="patch"면 to_excel로 새로 쓰는 대신 다운로드한 stock_file을 복사하면서
+       바뀐 stock_qty 셀만 고칩니다(WPS 서식/사용자 데이터 유지). 패치할 수 없으면 to_excel로 대체.
+    9) engine="numpy"면 2)~3)의 groupby/merge 대신 numpy_engine으로 재고 product_id 인덱스(id 범위가 좁으면 밀집)에
+       판매량을 누적하고 stock_qty 배열에서 바로 차감합니다. 결과는 pandas 경로와 같고, 정수 id가 아니면 pandas 경로로 대체.
+    10) 두 시트는 sheet_schema의 스키마(STOCK_SCHEMA/SALES_SCHEMA)로 읽습니다.
+        판매 시트는 헤더를 먼저 확인하고 필요한 컬럼만 읽으며(usecols), 정수 컬럼은 int32, 상품명은 category로 줄입니다.
+        컬럼이 없거나 값이 타입과 맞지 않으면 파싱/병합 전에 SchemaError로 실패합니다.
+    11) sales_file이 폴더나 glob 패턴이면 그 안의 판매 파일(샤드)마다 sales_shards의 워커 프로세스에서
+        product_id별 합계를 만들고(map), 부모에서 더한 뒤(reduce) 스트리밍 리더의 합계처럼 차감합니다.
+        장부는 샤드(파일 이름)마다 워터마크를 따로 둡니다. 파일 하나 ↔ 샤드 모드를 바꿔도 같은 장부를 이어 쓰며
+        (sales_shards.ShardWatermarks), 이어 쓸 수 없으면 LedgerLayoutError로 중단합니다(중복 차감 방지).
+    12) 판매 쪽(파일/헤더 확인, 읽기, 합산)은 prepare_local_sales(...)가 합니다.
+        prepared_sales로 미리 준비한 결과를 넘기면 재고만 읽고 바로 차감합니다(스크립트가 브라우저 단계와 겹쳐 실행).
+    13) 재고와 판매 시트에 모두 location 컬럼이 있으면 (product_id, location)으로, 아니면 product_id로 병합합니다.
+        재고 시트의 키로 만든 인덱스(stock_index)로 키가 겹치는 재고 행을 찾아 DuplicateKeyError로 실패하고
+        (같은 판매가 여러 행에서 빠지는 일을 막음), numpy 엔진은 (상품, 위치) 키일 때 이 인덱스로 판매 키를 재고 행에 대응시킵니다.
+        cache_dir이 있으면 인덱스를 저장해 두고 재고 키가 같으면 다시 쓰며, 판매에만 location이 있으면 상품별로 합쳐 차감합니다.
+    14) sales_file(또는 샤드)이 CSV/Arrow IPC 피드면 엑셀 파싱 없이 sales_feed로 읽습니다.
+        CSV는 정해진 행 수의 청크로, Arrow는 메모리 매핑한 레코드 배치로 읽어 청크마다 합산하므로(11의 합계와 같은 모양)
+        판매 파일이 커도 메모리는 청크 크기만큼만 씁니다.
+
+    :param stock_file: 다운로드된 재고 파일 경로(str).
+    :param sales_file: 로컬 판매 파일 경로(str, .xlsx/.csv/.arrow/.feather). 폴더나 glob 패턴이면 판매 샤드 파일들.
+    :param reader: xlsx 판매 파일 리더. "pandas"(기본값) 또는 "stream".
+    :param ledger_path: (선택) 판매 반영 장부(JSON) 경로. None이면 판매 파일 전체를 반영.
+    :param cache_dir: (선택) 파싱된 엑셀 캐시 폴더. None이면 매번 pd.read_excel로 파싱.
+    :param writer: 저장 방식. "openpyxl"(기본값, to_excel) 또는 "patch"(셀 패치).
+    :param work_dir: (선택) 'stock_updated.xlsx'를 저장할 폴더. None이면 stock_file이 있는 폴더.
+    :param engine: 판매 차감 엔진. "pandas"(기본값, groupby + merge) 또는 "numpy".
+    :param shard_workers: 판매 샤드 집계 워커 프로세스 수. None이면 CPU 수.
+    :param prepared_sales: (선택) 같은 인자로 미리 부른 prepare_local_sales(...)의 결과. None이면 여기서 준비.
+    :return: 이번에 반영한 판매 행 수를 int로 반환(장부가 없으면 판매 엑셀의 전체 행 수).
+    :raises FileNotFoundError: stock_file 또는 sales_file이 존재하지 않을 경우(샤드 패턴에 맞는 파일이 없을 때 포함).
+    :raises SchemaError: 시트에 필요한 컬럼이 없거나 값이 스키마 타입과 맞지 않을 경우.
+    :raises DuplicateKeyError: 재고 시트에 같은 키(product_id[, location])의 행이 여러 개 있을 경우.
+    """
+
+    # ---------------------------------
+    # 파일 존재 여부 체크
+    # ---------------------------------
+    if not os.path.exists(stock_file):
+        raise FileNotFoundError("다운로드된 재고 파일이 없음.")
+
+    # ---------------------------------
+    # 판매 준비(파일 확인 → 헤더 확인 → 읽기/합산). 스크립트가 브라우저 단계와 동시에 미리 했으면 그 결과를 씀
+    # ---------------------------------
+    if prepared_sales is None:
+        prepared_sales = prepare_local_sales(sales_file, reader, ledger_path, cache_dir, shard_workers)
+    aggregated = prepared_sales["aggregated"]
+    totals, sales_df = prepared_sales["totals"], prepared_sales["sales_df"]
+    sales_rows, watermark = prepared_sales["rows"], prepared_sales["watermark"]
+    sales_keys = prepared_sales.get("keys", PRODUCT_KEYS)
+
+    # ---------------------------------
+    # 엑셀 읽기
+    # ---------------------------------
+    with span("parse_stock", bytes=os.path.getsize(stock_file)) as s:
+        # 다시 저장할 시트이므로 모든 컬럼을 읽고 스키마 컬럼의 타입만 줄임
+        stock_df = read_sheet(stock_file, STOCK_SCHEMA, cache_dir, project=False)
+        s["rows"] = len(stock_df)
+
+    with span("aggregate", reader=reader, engine=engine) as s:
+        # ---------------------------------
+        # 병합 키와 재고 키 인덱스
+        # 재고 키가 겹치면(같은 상품/위치 행이 둘 이상) 판매가 행마다 빠지므로 DuplicateKeyError로 실패
+        # ---------------------------------
+        keys = merge_key_columns(stock_df.columns, sales_keys)
+        if keys != sales_keys and aggregated:
+            # 판매에만 location이 있음 → 위치별 합계를 상품별로 합침
+            totals = collapse_totals(totals)
+        index, cached = load_stock_index(stock_df, keys, cache_dir, os.path.basename(stock_file))
+        s["keys"] = "+".join(keys)
+        s["index"] = "cached" if cached else "built"
+
+        updated = None
+        if engine == "numpy":
+            # NumPy 엔진: 판매 키 → 재고 칸 + np.bincount 누적 + 배열 하나에서 차감/0 처리
+            # (pandas 경로와 값/dtype이 같고 중간 DataFrame을 만들지 않음. 정수 id가 아니면 None → pandas 경로)
+            if index is None:
+                updated = None
+            elif len(keys) > 1:
+                # (상품, 위치): 재고 키 인덱스(부호화한 키의 정렬 배열)로 재고 행을 찾음
+                if aggregated:
+                    arrays = totals_to_key_arrays(totals)
+                    updated = indexed_stock_update(stock_df, index, *arrays) if arrays else None
+                else:
+                    updated = indexed_stock_update(stock_df, index, sales_df["product_id"],
+                                                   sales_df["quantity_sold"], sales_df[keys[1]])
+            else:
+                # 상품만: 재고 id로 만든 numpy_engine.ProductIndex로 찾음
+                # (id 범위가 좁으면 밀집 인덱스: 칸 = id - min, 정렬/탐색 없음. 중복 검사는 위의 재고 키 인덱스가 함)
+                # 재고 id에 빈 칸이 있으면 ProductIndex를 쓸 수 없으므로(None) 재고 키 인덱스로 계산
+                arrays = totals_to_arrays(totals) if aggregated else (sales_df["product_id"],
+                                                                      sales_df["quantity_sold"])
+                if arrays:
+                    updated = numpy_stock_update(stock_df, *arrays)
+                    if updated is None:
+                        updated = indexed_stock_update(stock_df, index, *arrays)
+            if updated is None:
+                print("[numpy] 정수 product_id/수량이 아니어서 pandas 엔진으로 계산합니다.")
+                s["engine"] = "pandas"
+        elif engine != "pandas":
+            raise ValueError(f"알 수 없는 병합 엔진: {engine}")
+
+        if updated is not None:
+            updated_qty, s["rows"] = updated
+        else:
+            merge_df = stock_df
+            if len(keys) > 1:
+                # 위치별: 위치 값을 같은 문자열로 맞춘 뒤 (product_id, location)별로 합산
+                if aggregated:
+                    sales_keys_df = pd.DataFrame({
+                        "product_id": pd.Series([k[0] for k in totals], dtype=stock_df["product_id"].dtype),
+                        "location": [k[1] for k in totals],
+                        "quantity_sold": list(totals.values()),
+                    })
+                else:
+                    sales_keys_df = sales_df[["product_id", "location", "quantity_sold"]]
+                sales_keys_df = sales_keys_df.assign(location=normalize_locations(sales_keys_df["location"]))
+                sales_agg = sales_keys_df.groupby(list(keys))["quantity_sold"].sum().reset_index()
+                merge_df = stock_df[["product_id", "stock_qty"]].assign(
+                    location=normalize_locations(stock_df["location"])
+                )
+            elif aggregated:
+                sales_agg = pd.DataFrame({
+                    "product_id": pd.Series(list(totals.keys()), dtype=stock_df["product_id"].dtype),
+                    "quantity_sold": list(totals.values()),
+                })
+            else:
+                sales_agg = sales_df.groupby("product_id")["quantity_sold"].sum().reset_index()
+
+            # ---------------------------------
+            # stock_df와 sales_agg를 병합
+            # how="left"로, 재고에 없는 product_id는 무시, 
+            # 재고에 있지만 판매된 적이 없다면 NaN(→0 처리)
+            # (재고 키는 인덱스에서 중복이 없음을 확인했으므로 행이 늘어나지 않음)
+            # ---------------------------------
+            merged_df = pd.merge(merge_df, sales_agg, on=list(keys), how="left", validate="many_to_one")
+            merged_df["quantity_sold"] = merged_df["quantity_sold"].fillna(0)
+
+            # ---------------------------------
+            # updated_stock = stock_qty - quantity_sold
+            # 음수가 되면 0으로 처리하여 재고가 음수가 되지 않도록 함.
+            # ---------------------------------
+            merged_df["updated_stock"] = merged_df["stock_qty"] - merged_df["quantity_sold"]
+            merged_df.loc[merged_df["updated_stock"] < 0, "updated_stock"] = 0
+            updated_qty = merged_df["updated_stock"]
+            s["rows"] = len(sales_agg)
+
+    # ---------------------------------
+    # 병합 결과를 원본 stock_df에 반영한 뒤,
+    # 'stock_updated.xlsx'로 저장
+    # ---------------------------------
+    original_qty = stock_df["stock_qty"].copy()
+    stock_df["stock_qty"] = updated_qty
+    updated_path = os.path.join(work_dir or os.path.dirname(os.path.abspath(stock_file)), "stock_updated.xlsx")
+
+    write_start = time.perf_counter()
+    with span("write", writer=writer, rows=len(stock_df)) as s:
+        if writer == "patch":
+            try:
+                changed = write_stock_patch(stock_file, updated_path, original_qty, stock_df["stock_qty"])
+                print(f"[patch] stock_qty {changed}칸 수정 저장 ({time.perf_counter() - write_start:.3f}초)")
+            except XlsxPatchError as e:
+                # 셀 위치를 확신할 수 없으면 예전 방식으로 전체 저장
+                print(f"[patch] 셀 패치 불가 → to_excel로 저장: {e}")
+                s["writer"] = "openpyxl"
+                stock_df.to_excel(updated_path, index=False)
+        elif writer == "openpyxl":
+            stock_df.to_excel(updated_path, index=False)
+            print(f"[openpyxl] 재고 파일 전체 저장 ({time.perf_counter() - write_start:.3f}초)")
+        else:
+            raise ValueError(f"알 수 없는 저장 방식: {writer}")
+        s["bytes"] = os.path.getsize(updated_path)
+
+    # ---------------------------------
+    # 새 워터마크를 pending 장부에 기록 (업로드 후 commit_ledger로 확정)
+    # ---------------------------------
+    if watermark is not None:
+        new_ledger = watermark.to_ledger()
+        stage_ledger(ledger_path, new_ledger)
+        print(f"신규 판매 {sales_rows}행 반영 (워터마크: {new_ledger['last_sale_date']})")
+        if watermark.undated_rows:
+            print(f"경고: sale_date가 비어 있는 판매 {watermark.undated_rows}행은 반영하지 않았습니다.")
+
+    # 반환값: 이번에 반영한 판매 행 수(장부를 쓰지 않으면 = len(sales_df))
+    # 참고: 실제 판매 건수(총 qty 합)는 아니라, sales_df의 행 row 개수를 의미.
+    return sales_rows
@@ -0,0 +1,171 @@
+# -------------------------------------------------------
+# 상주(daemon) 모드: 판매 파일이 바뀌면 바로 동기화
+#
+# 스크립트는 cron이 띄우는 일회성 실행이라, POS가 판매 파일을 쓴 뒤 WPS 시트에 반영되기까지
+# "다음 cron 주기 + 크롬 시작/로그인" 만큼 걸립니다.
+#
+# 이 모듈은 프로세스를 띄워 둔 채로
+#   1) 판매 입력(파일 하나 또는 샤드 폴더/glob)이 있는 폴더를 inotify로 감시하고(그 밖의 OS는 주기적 확인),
+#   2) 변화가 생기면 debounce초 동안 조용해질 때까지 기다려(최대 max_batch초) 연달아 쓴 파일들을 한 번의 동기화로 묶고,
+#   3) 동기화가 실패하면 backoff_base초부터 두 배씩(최대 backoff_max초) 기다렸다가 다시 시도합니다.
+# 브라우저(드라이버)를 만들고 유지하는 일은 sync_once를 넘겨주는 스크립트 쪽이 맡습니다(로그인된 드라이버 재사용).
+#
+# 변화 판단은 inotify 이벤트 내용이 아니라 판매 입력 파일들의 (이름, 크기, 수정 시각) 서명으로 합니다.
+# 같은 폴더의 다른 파일이 바뀌어 깨어나도 서명이 같으면 무시하고, 동기화 중에 새로 쓴 파일은 다음 차례에 반영됩니다.
+# -------------------------------------------------------
+
+import os
+import glob
+import time
+import threading
+
+from download_watch import open_inotify, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE
+from sales_shards import is_sales_shard_spec, expand_sales_shards
+
+# 판매 폴더에서 감시할 이벤트(쓰기 완료/이동/생성/삭제)
+SALES_EVENTS = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# inotify를 못 쓸 때 서명을 다시 계산하는 간격(초)
+POLL_INTERVAL = 1.0
+# 변화가 없을 때도 이 간격(초)마다 한 번 깨어나 서명을 확인(이벤트를 놓친 경우 대비)
+IDLE_CHECK_INTERVAL = 60.0
+
+
+# ---------------------------------
+# 판매 입력 감시
+# ---------------------------------
+class SalesChangeWatcher:
+    """
+    판매 입력의 서명을 계산하고, 폴더 변화를 기다립니다.
+
+    :param sales_spec: 판매 파일 경로 또는 판매 샤드 폴더/glob 패턴.
+    """
+
+    def __init__(self, sales_spec):
+        self.sales_spec = sales_spec
+        if os.path.isdir(sales_spec):
+            watch_dir = sales_spec
+        else:
+            watch_dir = os.path.dirname(os.path.abspath(sales_spec))
+        # 폴더 이름에도 glob 문자가 있으면(예: sales/*/day.xlsx) 한 폴더만 감시할 수 없으므로 주기적 확인
+        self.notifier = None if glob.has_magic(watch_dir) else open_inotify(watch_dir, SALES_EVENTS)
+        self.watch_dir = watch_dir
+
+    def signature(self):
+        """판매 입력 파일들의 (이름, 크기, 수정 시각) 튜플. 파일이 없으면 빈 튜플."""
+        try:
+            paths = expand_sales_shards(self.sales_spec) if is_sales_shard_spec(self.sales_spec) else [self.sales_spec]
+            return tuple((p, os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths)
+        except (FileNotFoundError, ValueError):
+            return ()
+
+    def wait(self, timeout):
+        """폴더에 변화가 생기거나 timeout초가 지날 때까지 기다립니다(폴링이면 POLL_INTERVAL까지만)."""
+        if self.notifier is not None:
+            self.notifier.wait(timeout)
+        else:
+            time.sleep(min(timeout, POLL_INTERVAL))
+
+    def wait_quiet(self, debounce, max_wait, stop=None):
+        """
+        서명이 debounce초 동안 바뀌지 않을 때까지 기다립니다. 계속 바뀌어도 max_wait초가 지나면 돌아옵니다.
+
+        :return: (마지막 서명, 그 사이 서명이 바뀐 횟수) 튜플.
+        """
+
+        start = quiet_since = time.monotonic()
+        last = self.signature()
+        changes = 0
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            remaining = debounce - (now - quiet_since)
+            if remaining <= 0 or now - start >= max_wait:
+                break
+            self.wait(min(remaining, max_wait - (now - start)))
+            current = self.signature()
+            if current != last:
+                last = current
+                changes += 1
+                quiet_since = time.monotonic()
+        return last, changes
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+
+
+# ---------------------------------
+# 재시도 간격
+# ---------------------------------
+class Backoff:
+    """
+    연속 실패 횟수에 따라 base, base*2, base*4, ... (최대 cap)초를 돌려주는 재시도 간격.
+    """
+
+    def __init__(self, base=5.0, cap=300.0):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def failure(self):
+        """실패를 하나 세고 다음 시도까지 기다릴 초를 반환합니다."""
+        self.failures += 1
+        return min(self.cap, self.base * 2 ** (self.failures - 1))
+
+    def reset(self):
+        self.failures = 0
+
+
+# ---------------------------------
+# 상주 루프
+# ---------------------------------
+def run_daemon(watcher, sync_once, debounce=3.0, max_batch=30.0, backoff=None, stop=None, initial_sync=True):
+    """
+    판매 입력이 바뀔 때마다 sync_once()를 호출하는 루프. stop이 설정되거나 Ctrl+C가 들어올 때까지 돌아갑니다.
+
+    1) initial_sync면 시작하자마자 한 번 동기화합니다(꺼져 있던 동안 바뀐 판매 반영).
+    2) 서명이 마지막으로 동기화한 서명과 같으면 폴더 변화(또는 IDLE_CHECK_INTERVAL)를 기다립니다.
+    3) 달라졌으면 watcher.wait_quiet(debounce, max_batch)로 연속된 변화를 한 번으로 묶은 뒤 sync_once()를 호출합니다.
+    4) sync_once가 예외를 내면 backoff 간격만큼 기다렸다가(그동안 stop을 확인) 다시 3)부터 시도합니다.
+
+    :param watcher: SalesChangeWatcher.
+    :param sync_once: 인자 없이 동기화 한 번을 하는 함수.
+    :param debounce: 마지막 변화 뒤 이만큼(초) 조용하면 동기화.
+    :param max_batch: 변화가 계속되어도 첫 변화 뒤 이만큼(초) 지나면 동기화.
+    :param backoff: (선택) Backoff. None이면 Backoff().
+    :param stop: (선택) threading.Event. 설정되면 진행 중인 동기화를 마치고 끝냅니다.
+    :param initial_sync: 시작할 때 한 번 동기화할지 여부.
+    :return: {"syncs", "failures", "coalesced"} 통계 dict.
+    """
+
+    backoff = backoff or Backoff()
+    stop = stop or threading.Event()
+    stats = {"syncs": 0, "failures": 0, "coalesced": 0}
+    synced = None if initial_sync else watcher.signature()
+
+    print(f"[daemon] 판매 입력 감시 시작: {watcher.sales_spec} "
+          f"({'inotify' if watcher.notifier else f'{POLL_INTERVAL:g}초 간격 확인'}, debounce {debounce:g}초)")
+    while not stop.is_set():
+        if watcher.signature() == synced:
+            watcher.wait(IDLE_CHECK_INTERVAL)
+            continue
+
+        signature, changes = watcher.wait_quiet(debounce, max_batch, stop)
+        if stop.is_set():
+            break
+        stats["coalesced"] += changes
+        start = time.monotonic()
+        try:
+            sync_once()
+        except Exception as e:
+            stats["failures"] += 1
+            delay = backoff.failure()
+            print(f"[daemon] 동기화 실패({backoff.failures}회 연속): {type(e).__name__}: {e} → {delay:g}초 뒤 재시도")
+            stop.wait(delay)
+            continue
+        backoff.reset()
+        synced = signature
+        stats["syncs"] += 1
+        merged = f", 변화 {changes + 1}건 묶음" if changes else ""
+        print(f"[daemon] 동기화 완료 ({time.monotonic() - start:.1f}초{merged})")
+    return stats
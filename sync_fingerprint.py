@@ -0,0 +1,144 @@
+# -------------------------------------------------------
+# 변경 감지: 바뀐 것이 없으면 병합/저장/업로드를 건너뛰기 (no-op)
+#
+# 정기 실행 대부분은 새 판매가 없는데도 크롬을 띄우고, 재고를 받고, 병합하고, 같은 내용의
+# stock_updated.xlsx를 다시 업로드합니다. 업로드는 느리고 자주 흔들리는 UI 단계라 건너뛸수록 이득입니다.
+#
+# 문서마다 "마지막으로 성공한 동기화"의 지문(fingerprint)을 JSON 파일에 남겨 두고 비교합니다.
+#   - inputs : 판매 입력(파일 하나 또는 샤드들)의 내용 해시 + 판매 반영 장부 파일의 내용 해시
+#   - stock  : 그때 업로드한(또는 그대로 둔) 재고 시트의 셀 값 해시
+#
+# 확인은 세 번입니다.
+#   1) 브라우저를 띄우기 전: 장부를 쓰고 inputs가 그대로면, 반영할 새 판매가 없다는 뜻이므로 전체를 건너뜀
+#   2) 재고를 받은 뒤     : inputs와 받은 재고의 stock이 모두 그대로면 병합/저장/업로드를 건너뜀
+#                          (장부 없이 판매 전체를 반영하는 설정에서 같은 판매를 두 번 빼지 않게 됨)
+#   3) 병합한 뒤          : 결과 재고의 셀 값이 받은 재고와 같으면(반영할 판매 0건 등) 업로드만 건너뜀
+#
+# 재고 지문은 파일 바이트가 아니라 셀 값으로 만듭니다. WPS가 내보낼 때마다 xlsx 안의 시각/서식 정보가 달라져도
+# 값이 같으면 같은 지문이 되고, 1과 1.0처럼 정수로 떨어지는 숫자는 같은 값으로 봅니다.
+# 지문은 업로드(또는 업로드할 필요가 없음을 확인)까지 끝난 뒤에만 기록하므로, 중간에 실패한 실행은 다음에 다시 처리됩니다.
+# -------------------------------------------------------
+
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+from xlsx_stream import iter_xlsx_rows
+from frame_cache import file_sha256
+from sales_shards import is_sales_shard_spec, expand_sales_shards
+
+FINGERPRINT_VERSION = 1
+
+# 배치 모드에서 여러 워커 스레드가 같은 지문 파일을 고쳐 쓰므로 잠급니다.
+_STORE_LOCK = threading.Lock()
+
+
+# ---------------------------------
+# 지문 계산
+# ---------------------------------
+def input_fingerprint(sales_file, ledger_path=None):
+    """
+    판매 입력과 장부의 내용 지문을 만듭니다.
+
+    - 판매 파일 하나면 그 파일, 폴더/glob이면 샤드 파일 전부(이름 + 내용 해시)
+    - 장부를 쓰면 장부 파일 내용(없으면 "없음"). 장부를 지우거나 되돌리면 지문이 바뀌어 다시 반영합니다.
+
+    :param sales_file: 판매 파일 경로 또는 판매 샤드 폴더/glob 패턴.
+    :param ledger_path: (선택) 판매 반영 장부 경로.
+    :return: 16진수 문자열.
+    """
+
+    paths = expand_sales_shards(sales_file) if is_sales_shard_spec(sales_file) else [sales_file]
+    digest = hashlib.sha256(f"v{FINGERPRINT_VERSION}".encode())
+    for path in paths:
+        digest.update(f"sales:{os.path.basename(path)}:{file_sha256(path)}\n".encode())
+    if ledger_path:
+        ledger_hash = file_sha256(ledger_path) if os.path.exists(ledger_path) else "none"
+        digest.update(f"ledger:{ledger_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def _plain_cell(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def stock_fingerprint(path):
+    """
+    xlsx 첫 시트의 셀 값으로 지문을 만듭니다. 빈 행과 행 끝의 빈 칸은 무시합니다.
+
+    :param path: 재고 xlsx 경로.
+    :return: 16진수 문자열.
+    """
+
+    digest = hashlib.sha256(f"v{FINGERPRINT_VERSION}".encode())
+    for row in iter_xlsx_rows(path):
+        values = [_plain_cell(v) for v in row]
+        while values and values[-1] is None:
+            values.pop()
+        if values:
+            digest.update(json.dumps(values, ensure_ascii=False, default=str).encode("utf-8"))
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+# ---------------------------------
+# 지문 저장소
+# ---------------------------------
+class FingerprintStore:
+    """
+    문서 키 → 마지막으로 성공한 동기화의 지문을 담는 JSON 파일.
+
+        {"version": 1, "docs": {"8931...": {"inputs": "...", "stock": "...", "updated_at": "..."}}}
+
+    :param path: 지문 파일 경로.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {"version": FINGERPRINT_VERSION, "docs": {}}
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FINGERPRINT_VERSION:
+            # 형식이 바뀐 지문은 비교할 수 없으므로 처음부터(= 모두 변경된 것으로) 시작
+            return {"version": FINGERPRINT_VERSION, "docs": {}}
+        return data
+
+    def get(self, key):
+        """마지막 지문 dict. 기록이 없으면 None."""
+        with _STORE_LOCK:
+            return self._load()["docs"].get(key)
+
+    def record(self, key, inputs, stock):
+        """
+        성공한 동기화의 지문을 기록합니다. 임시 파일에 쓴 뒤 교체하므로 중간에 멈춰도 파일이 깨지지 않습니다.
+        """
+
+        with _STORE_LOCK:
+            data = self._load()
+            data["docs"][key] = {
+                "inputs": inputs,
+                "stock": stock,
+                "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def inputs_unchanged(last, inputs):
+    """마지막 지문(last)이 있고 판매 입력/장부 지문이 같으면 True."""
+    return last is not None and last.get("inputs") == inputs
+
+
+def sync_unchanged(last, inputs, stock):
+    """판매 입력/장부와 받은 재고가 모두 마지막 지문과 같으면 True."""
+    return inputs_unchanged(last, inputs) and last.get("stock") == stock
@@ -0,0 +1,268 @@
+# -------------------------------------------------------
+# 동기화 파이프라인 단계별 시간 측정(span)과 지표 내보내기
+#
+# download_merge_upload_with_finder의 출력은 print 몇 줄뿐이라 몇 분이 어디서 걸리는지 알 수 없습니다.
+# 이 모듈은 단계마다 span을 기록합니다.
+#
+#   change_check → login → page_load → menu → download → parse_stock → parse_sales → aggregate → write → upload
+#
+# 각 span에는 소요 시간, 성공 여부, 그 시점의 최대 RSS(MB)와 단계별 속성(행 수, 파일 크기 등)이 들어갑니다.
+# - JSON Lines : 한 span = 한 줄. 실행이 쌓이므로 회귀를 시간순으로 비교할 수 있습니다.
+# - Prometheus : node_exporter textfile collector가 읽는 *.prom 파일.
+#                마지막 실행의 단계별 시간/행 수/크기와 성공 여부를 gauge로 씁니다(경보용).
+#
+# 사용법:
+#     tracer = SyncTracer(jsonl_path, prom_path, labels={"doc": "8931..."})
+#     with tracer.activate():
+#         with span("download") as s:
+#             path = ...
+#             s["bytes"] = os.path.getsize(path)
+#     tracer.finish(success=True)
+#
+# span()은 현재 스레드에서 활성화된 tracer에 기록합니다. 활성화된 tracer가 없으면 아무것도 기록하지 않으므로
+# 함수 안쪽(병합 등)에 span을 넣어 두어도 노트북이나 단독 호출에서는 그냥 지나갑니다.
+# 배치 모드의 워커 스레드는 문서마다 자기 tracer를 활성화합니다. 다른 스레드에서 돌릴 함수는 tracer.wrap(func)으로 감쌉니다.
+#
+# "wait" span(dom_wait의 요소 대기)은 다른 단계 안에서 기록되는 중첩 span이라 단계 합계/가장 오래 걸린 단계에서 빼고
+# 따로 "대기 합계(횟수)"로 출력합니다. Prometheus에는 대기 이름별 시간(wait_seconds{wait})도 씁니다.
+#
+# span 속성에 outcome(예: "noop")을 넣으면 실행 결과로 보고 total span과 Prometheus 지표(last_run_noop)에 남깁니다.
+# -------------------------------------------------------
+
+import os
+import json
+import time
+import threading
+import contextlib
+
+from xlsx_stream import peak_rss_mb
+
+# Prometheus 지표 이름 접두사
+METRIC_PREFIX = "wps_sync"
+# 한 줄 요약에 표시할 단계 순서
+STAGES = ("change_check", "login", "page_load", "menu", "download", "parse_stock", "parse_sales", "aggregate", "write", "upload")
+# 다른 단계 안에서 기록되는 span(시간이 바깥 단계에 이미 들어 있음)
+NESTED_STAGES = ("wait",)
+
+_local = threading.local()
+# 배치 모드에서 여러 스레드가 같은 JSONL 파일에 줄을 섞어 쓰지 않도록 잠급니다.
+_JSONL_LOCK = threading.Lock()
+
+
+# ---------------------------------
+# span 기록
+# ---------------------------------
+@contextlib.contextmanager
+def span(name, **attrs):
+    """
+    with 블록의 소요 시간을 name 단계로 기록합니다.
+
+    블록 안에서 yield된 dict에 값을 넣으면(예: s["rows"] = 1200) span 속성으로 함께 기록됩니다.
+    블록이 예외로 끝나면 status="error"로 기록하고 예외는 그대로 올립니다.
+
+    :param name: 단계 이름(STAGES 참고).
+    :param attrs: 처음부터 알고 있는 속성(예: reader="stream").
+    """
+
+    tracer = getattr(_local, "tracer", None)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        if tracer is not None:
+            tracer.record(name, time.perf_counter() - start, status, attrs)
+
+
+class SyncTracer:
+    """
+    실행(문서) 하나의 span들을 모아 JSON Lines / Prometheus 파일로 내보냅니다.
+
+    :param jsonl_path: (선택) span을 한 줄씩 덧붙일 JSON Lines 파일.
+    :param prom_path: (선택) finish()에서 쓸 Prometheus textfile(*.prom) 경로.
+    :param labels: (선택) 모든 span과 지표에 붙일 라벨(예: {"doc": 문서키}).
+    """
+
+    def __init__(self, jsonl_path=None, prom_path=None, labels=None):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.labels = dict(labels or {})
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{threading.get_ident() % 100000}"
+        self.spans = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """with 블록 동안 현재 스레드의 span()이 이 tracer에 기록되도록 합니다."""
+        previous = getattr(_local, "tracer", None)
+        _local.tracer = self
+        try:
+            yield self
+        finally:
+            _local.tracer = previous
+
+    def wrap(self, func):
+        """
+        다른 스레드(asyncio.to_thread, 스레드 풀 등)에서 실행할 함수가 이 tracer에 span을 기록하도록 감쌉니다.
+        (span()은 스레드별로 활성화된 tracer를 보므로, 새 스레드에서는 다시 활성화해야 함)
+        """
+
+        def run(*args, **kwargs):
+            with self.activate():
+                return func(*args, **kwargs)
+        return run
+
+    def record(self, name, seconds, status="ok", attrs=None):
+        """
+        span 하나를 기록하고 JSON Lines 파일에 덧붙입니다.
+        """
+
+        peak = peak_rss_mb()
+        entry = {
+            "run_id": self.run_id,
+            "ts": round(time.time(), 3),
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "status": status,
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        }
+        entry.update(self.labels)
+        entry.update(attrs or {})
+        self.spans.append(entry)
+
+        if self.jsonl_path:
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            with _JSONL_LOCK:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        return entry
+
+    def finish(self, success):
+        """
+        전체 소요 시간을 "total" span으로 기록하고, Prometheus 파일을 쓰고, 단계별 요약을 한 줄로 출력합니다.
+
+        :param success: 실행 전체의 성공 여부.
+        :return: {단계: 초} dict.
+        """
+
+        outcome = self.outcome
+        self.record("total", time.perf_counter() - self._start, "ok" if success else "error",
+                    {"outcome": outcome} if outcome else None)
+        totals = stage_totals(self.spans)
+        if self.prom_path:
+            write_prometheus(self.prom_path, self.spans, self.labels, success)
+        print_stage_summary(totals, sum(1 for e in self.spans if e["stage"] == "wait"))
+        if outcome == "noop":
+            print("[metrics] 결과: no-op (바뀐 것이 없어 병합/업로드를 건너뜀)")
+        return totals
+
+    @property
+    def outcome(self):
+        """span에 기록된 마지막 outcome 속성(예: "noop", "changed"). 없으면 None."""
+        return next((e["outcome"] for e in reversed(self.spans) if e.get("outcome")), None)
+
+
+# ---------------------------------
+# 집계 / 출력
+# ---------------------------------
+def stage_totals(spans):
+    """
+    단계별 소요 시간 합계 {단계: 초}를 구합니다. (같은 단계가 여러 번 나오면 더함)
+    """
+
+    totals = {}
+    for entry in spans:
+        totals[entry["stage"]] = totals.get(entry["stage"], 0.0) + entry["seconds"]
+    return totals
+
+
+def print_stage_summary(totals, wait_count=None):
+    """
+    "[metrics] login 1.2초 | download 4.0초 | ... → 가장 오래 걸린 단계: download (41%)" 형태로 출력합니다.
+    요소 대기("wait")가 있으면 " | 대기 1.30초(7회)"처럼 따로 붙입니다(바깥 단계 시간에 이미 포함).
+
+    :param totals: stage_totals()의 결과.
+    :param wait_count: (선택) "wait" span 수.
+    """
+
+    total = totals.get("total")
+    skip = ("total",) + NESTED_STAGES
+    ordered = [s for s in STAGES if s in totals] + sorted(s for s in totals if s not in STAGES and s not in skip)
+    if not ordered:
+        return
+    parts = " | ".join(f"{s} {totals[s]:.2f}초" for s in ordered)
+    slowest = max(ordered, key=totals.get)
+    share = f" ({totals[slowest] / total * 100:.0f}%)" if total else ""
+    waits = ""
+    if "wait" in totals:
+        waits = f" | 대기 {totals['wait']:.2f}초" + (f"({wait_count}회)" if wait_count else "")
+    print(f"[metrics] {parts}{waits} → 가장 오래 걸린 단계: {slowest}{share}")
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def write_prometheus(prom_path, spans, labels=None, success=True):
+    """
+    마지막 실행의 지표를 Prometheus textfile collector 형식으로 씁니다.
+
+    - <접두사>_stage_duration_seconds{stage}  단계별 소요 시간(초)
+    - <접두사>_stage_rows{stage}              단계에서 처리한 행 수(기록된 단계만)
+    - <접두사>_stage_bytes{stage}             단계에서 다룬 파일 크기(기록된 단계만)
+    - <접두사>_wait_seconds{wait}             요소 대기 이름별 소요 시간(초, dom_wait를 쓴 실행만)
+    - <접두사>_peak_rss_bytes                 실행 중 최대 RSS
+    - <접두사>_last_run_success               성공 1 / 실패 0
+    - <접두사>_last_run_noop                  바뀐 것이 없어 병합/업로드를 건너뛰었으면 1 (outcome을 기록한 실행만)
+    - <접두사>_last_run_timestamp_seconds     실행이 끝난 시각(유닉스 시간)
+
+    collector가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 os.replace로 교체합니다.
+    """
+
+    labels = labels or {}
+    durations = stage_totals(spans)
+    rows = {e["stage"]: e["rows"] for e in spans if e.get("rows") is not None}
+    sizes = {e["stage"]: e["bytes"] for e in spans if e.get("bytes") is not None}
+    peaks = [e["peak_rss_mb"] for e in spans if e.get("peak_rss_mb") is not None]
+    waits = {}
+    for e in spans:
+        if e["stage"] == "wait":
+            waits[e.get("wait")] = waits.get(e.get("wait"), 0.0) + e["seconds"]
+
+    lines = []
+
+    def gauge(name, help_text, samples):
+        lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        for extra, value in samples:
+            lines.append(f"{METRIC_PREFIX}_{name}{_format_labels({**labels, **extra})} {value}")
+
+    gauge("stage_duration_seconds", "마지막 실행의 단계별 소요 시간(초)",
+          [({"stage": s}, f"{v:.4f}") for s, v in durations.items()])
+    if rows:
+        gauge("stage_rows", "마지막 실행에서 단계가 처리한 행 수", [({"stage": s}, v) for s, v in rows.items()])
+    if sizes:
+        gauge("stage_bytes", "마지막 실행에서 단계가 다룬 파일 크기(바이트)", [({"stage": s}, v) for s, v in sizes.items()])
+    if waits:
+        gauge("wait_seconds", "마지막 실행의 요소 대기 이름별 소요 시간(초)",
+              [({"wait": w}, f"{v:.4f}") for w, v in waits.items()])
+    if peaks:
+        gauge("peak_rss_bytes", "마지막 실행의 최대 RSS(바이트)", [({}, int(max(peaks) * 1024 * 1024))])
+    gauge("last_run_success", "마지막 실행 성공 여부(1/0)", [({}, 1 if success else 0)])
+    outcomes = [e["outcome"] for e in spans if e.get("outcome")]
+    if outcomes:
+        gauge("last_run_noop", "마지막 실행이 no-op이었는지(1/0)", [({}, 1 if outcomes[-1] == "noop" else 0)])
+    gauge("last_run_timestamp_seconds", "마지막 실행이 끝난 시각", [({}, f"{time.time():.0f}")])
+
+    os.makedirs(os.path.dirname(os.path.abspath(prom_path)), exist_ok=True)
+    tmp_path = f"{prom_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, prom_path)
@@ -0,0 +1,167 @@
+# -------------------------------------------------------
+# 벤치마크용 합성 재고/판매 데이터 생성기
+#
+# sample_data의 엑셀은 3~4행뿐이라 병합 엔진의 속도/메모리를 실제 규모에서 잴 수 없습니다.
+# 이 모듈은 sample_data와 같은 컬럼 구성으로 원하는 크기의 데이터를 만듭니다.
+#
+# - stock : product_id, product_name, stock_qty
+# - sales : product_id, quantity_sold, sale_date (sale_date는 시간순으로 증가)
+# - 판매의 product_id는 Zipf 분포로 뽑아 인기 상품 쏠림(skew)을 조절합니다.
+#   skew=0이면 모든 상품이 같은 확률, 1.0 이상이면 소수 상품에 판매가 몰립니다.
+# - 같은 인자와 seed면 항상 같은 데이터가 나옵니다(버전 간 비교용).
+# - 형식: .xlsx(엑셀은 시트당 1,048,576행 제한), .csv, .arrow(Arrow IPC/Feather)
+#
+# 명령줄:
+#     python synth_data.py --rows 1000000 --products 50000 --skew 1.1 --formats xlsx,csv,arrow --out /tmp/wps_bench_data
+# -------------------------------------------------------
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# 엑셀 시트 최대 행 수(머리글 포함)
+XLSX_MAX_ROWS = 1048576
+SUPPORTED_FORMATS = ("xlsx", "csv", "arrow")
+
+
+# ---------------------------------
+# DataFrame 생성
+# ---------------------------------
+def product_weights(n_products, skew):
+    """
+    상품별 판매 확률을 만듭니다. 순위 r인 상품의 가중치 = 1 / r**skew (Zipf).
+
+    :param n_products: 상품 수.
+    :param skew: 쏠림 정도(0이면 균등).
+    :return: 합이 1인 numpy 배열.
+    """
+
+    ranks = np.arange(1, n_products + 1, dtype=np.float64)
+    weights = 1.0 / ranks ** skew
+    return weights / weights.sum()
+
+
+def make_stock_frame(n_products, seed=0):
+    """
+    product_id 1..n_products의 재고 DataFrame을 만듭니다. stock_qty는 0~999 사이 난수.
+    """
+
+    rng = np.random.default_rng(seed)
+    product_ids = np.arange(1, n_products + 1, dtype=np.int64)
+    return pd.DataFrame({
+        "product_id": product_ids,
+        "product_name": [f"상품{pid}" for pid in product_ids],
+        "stock_qty": rng.integers(0, 1000, size=n_products, dtype=np.int64),
+    })
+
+
+def make_sales_frame(n_rows, n_products, skew=1.0, seed=0, start="2025-01-01"):
+    """
+    판매 DataFrame을 만듭니다.
+
+    - product_id : product_weights(n_products, skew)로 뽑음. 인기 순위는 seed로 섞어 id 순서와 무관하게 함.
+    - quantity_sold : 1~5
+    - sale_date : start부터 평균 30초 간격으로 증가(초 단위)
+
+    :param n_rows: 판매 행 수.
+    :param n_products: 상품 수(재고와 같게 두면 모든 판매가 재고에 매칭).
+    :param skew: 쏠림 정도.
+    :param seed: 난수 시드.
+    :param start: 첫 판매 시각.
+    """
+
+    rng = np.random.default_rng(seed + 1)
+    popularity = rng.permutation(n_products) + 1
+    picks = rng.choice(n_products, size=n_rows, p=product_weights(n_products, skew))
+    gaps = rng.integers(1, 60, size=n_rows, dtype=np.int64)
+    return pd.DataFrame({
+        "product_id": popularity[picks].astype(np.int64),
+        "quantity_sold": rng.integers(1, 6, size=n_rows, dtype=np.int64),
+        "sale_date": pd.Timestamp(start) + pd.to_timedelta(np.cumsum(gaps), unit="s"),
+    })
+
+
+# ---------------------------------
+# 파일 쓰기
+# ---------------------------------
+def write_frame(df, path):
+    """
+    확장자에 맞는 형식으로 DataFrame을 저장합니다(.xlsx / .csv / .arrow).
+    임시 파일에 쓴 뒤 교체하므로, 중간에 멈춰도 반쯤 쓴 파일이 남지 않습니다.
+
+    :raises ValueError: 엑셀 행 제한을 넘거나 지원하지 않는 확장자인 경우.
+    """
+
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    tmp_path = f"{path}.tmp.{ext}"
+    if ext == "xlsx":
+        if len(df) + 1 > XLSX_MAX_ROWS:
+            raise ValueError(f"엑셀은 시트당 {XLSX_MAX_ROWS - 1}행까지입니다({len(df)}행). csv/arrow를 쓰세요.")
+        df.to_excel(tmp_path, index=False)
+    elif ext == "csv":
+        df.to_csv(tmp_path, index=False)
+    elif ext == "arrow":
+        df.to_feather(tmp_path)
+    else:
+        raise ValueError(f"지원하지 않는 형식: {path}")
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_names(n_rows, n_products, skew, seed):
+    """파일 이름에 생성 인자를 모두 넣어, 같은 인자의 데이터는 다시 만들지 않고 재사용합니다. (재고, 판매) 순."""
+    return f"stock_p{n_products}_seed{seed}", f"sales_r{n_rows}_p{n_products}_s{skew:g}_seed{seed}"
+
+
+def generate_dataset(out_dir, sales_rows, n_products=None, skew=1.0, formats=("xlsx",), seed=0):
+    """
+    재고/판매 파일을 formats 형식마다 만들고 경로를 반환합니다. 이미 있으면 다시 만들지 않습니다.
+
+    :param out_dir: 저장 폴더.
+    :param sales_rows: 판매 행 수.
+    :param n_products: 상품 수. None이면 판매 행의 1/20(최소 10, 최대 100,000).
+    :param skew: 판매 쏠림 정도.
+    :param formats: "xlsx", "csv", "arrow" 중 일부.
+    :param seed: 난수 시드.
+    :return: {"stock": {형식: 경로}, "sales": {형식: 경로}, "products": 상품 수}
+    """
+
+    if n_products is None:
+        n_products = min(max(sales_rows // 20, 10), 100000)
+    os.makedirs(out_dir, exist_ok=True)
+
+    stock_df = sales_df = None
+    stock_name, sales_name = dataset_names(sales_rows, n_products, skew, seed)
+    paths = {"stock": {}, "sales": {}, "products": n_products}
+    for fmt in formats:
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"지원하지 않는 형식: {fmt}")
+        stock_path = os.path.join(out_dir, f"{stock_name}.{fmt}")
+        sales_path = os.path.join(out_dir, f"{sales_name}.{fmt}")
+        if not os.path.exists(stock_path):
+            stock_df = make_stock_frame(n_products, seed) if stock_df is None else stock_df
+            write_frame(stock_df, stock_path)
+        if not os.path.exists(sales_path):
+            sales_df = make_sales_frame(sales_rows, n_products, skew, seed) if sales_df is None else sales_df
+            write_frame(sales_df, sales_path)
+        paths["stock"][fmt] = stock_path
+        paths["sales"][fmt] = sales_path
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 재고/판매 데이터 생성")
+    parser.add_argument("--rows", type=int, default=100000, help="판매 행 수")
+    parser.add_argument("--products", type=int, default=None, help="상품 수(기본: 판매 행의 1/20)")
+    parser.add_argument("--skew", type=float, default=1.0, help="판매 쏠림(Zipf 지수, 0=균등)")
+    parser.add_argument("--formats", default="xlsx", help="쉼표로 구분: xlsx,csv,arrow")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synth_data", help="저장 폴더")
+    args = parser.parse_args()
+
+    result = generate_dataset(args.out, args.rows, args.products, args.skew, args.formats.split(","), args.seed)
+    for kind in ("stock", "sales"):
+        for fmt, path in result[kind].items():
+            print(f"{kind:5s} {fmt:5s} {os.path.getsize(path) / 1024:10.1f}KB  {path}")
@@ -0,0 +1,68 @@
+# -------------------------------------------------------
+# pytest 공통 설정
+#
+# 모듈들이 저장소 최상위에 평평하게 있으므로(패키지 아님) 최상위 폴더를 import 경로에 넣습니다.
+# 실행: 저장소 최상위에서 python -m pytest -q
+# -------------------------------------------------------
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SAMPLE_DIR = os.path.join(ROOT, "sample_data")
+
+
+@pytest.fixture
+def sample_dir():
+    """sample_data 폴더(stock.xlsx, sales.xlsx, 기대 결과 stock_updated.xlsx)."""
+    return SAMPLE_DIR
+
+
+@pytest.fixture
+def sample_sales(sample_dir):
+    """sample_data/sales.xlsx를 읽은 DataFrame."""
+    import pandas as pd
+    return pd.read_excel(os.path.join(sample_dir, "sales.xlsx"))
+
+
+@pytest.fixture
+def expected(sample_dir):
+    """sample_data/stock_updated.xlsx(stock.xlsx에서 sales.xlsx를 뺀 기대 결과)를 읽은 DataFrame."""
+    import pandas as pd
+    return pd.read_excel(os.path.join(sample_dir, "stock_updated.xlsx"))
+
+
+@pytest.fixture
+def write_sales():
+    """판매 DataFrame을 확장자에 맞는 형식(.xlsx/.csv/.arrow)으로 저장하고 경로를 돌려주는 함수."""
+
+    def write(df, path):
+        path = str(path)
+        ext = os.path.splitext(path)[1]
+        if ext == ".csv":
+            df.to_csv(path, index=False)
+        elif ext == ".arrow":
+            df.reset_index(drop=True).to_feather(path)
+        else:
+            df.to_excel(path, index=False)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def merge():
+    """merge_local_sales_with_downloaded_stock을 work_dir에서 실행하고 (반영 행 수, 결과 경로)를 돌려주는 함수."""
+    from stock_merge import merge_local_sales_with_downloaded_stock
+
+    def run(stock_file, sales_file, work_dir, **kwargs):
+        os.makedirs(work_dir, exist_ok=True)
+        rows = merge_local_sales_with_downloaded_stock(stock_file, str(sales_file), work_dir=str(work_dir), **kwargs)
+        return rows, os.path.join(work_dir, "stock_updated.xlsx")
+
+    return run
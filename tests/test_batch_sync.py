@@ -0,0 +1,151 @@
+# -------------------------------------------------------
+# batch_sync: 작업 목록 읽기, 워커 풀(드라이버 재사용/실패 시 닫기), 결과 요약
+#
+# 크롬 대신 만들고 닫힌 기록만 남기는 가짜 드라이버를 씁니다.
+# -------------------------------------------------------
+
+import json
+import time
+import threading
+
+import pytest
+
+from batch_sync import doc_key, load_sync_jobs, run_sync_pool, report_sync_results
+
+
+class FakeDriver:
+    def __init__(self, index, serial):
+        self.index = index
+        self.serial = serial
+        self.closed = 0
+
+    def quit(self):
+        self.closed += 1
+
+
+class DriverFactory:
+    """make_driver로 넘길 함수. 만든 드라이버를 모두 기억합니다."""
+
+    def __init__(self):
+        self.created = []
+        self.lock = threading.Lock()
+
+    def __call__(self, index):
+        with self.lock:
+            driver = FakeDriver(index, len(self.created))
+            self.created.append(driver)
+        return driver
+
+
+def _slow_job(driver, job, index):
+    # 두 워커가 모두 작업을 받도록 잠깐 걸리는 작업
+    time.sleep(0.05)
+    return job["sales_file"]
+
+
+def _jobs(n):
+    return [{"doc_url": f"https://sg.docs.wps.com/p/{i}", "sales_file": f"s{i}.xlsx", "ledger_path": None}
+            for i in range(n)]
+
+
+def test_doc_key():
+    assert doc_key("https://sg.docs.wps.com/p/89316816846831/") == "89316816846831"
+    assert doc_key("https://example.com/p/a b?c") == "a_b_c"
+
+
+def test_load_sync_jobs_defaults_ledger_per_doc(tmp_path):
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps([
+        {"doc_url": "https://sg.docs.wps.com/p/1", "sales_file": "a.xlsx"},
+        {"doc_url": "https://sg.docs.wps.com/p/2", "sales_file": "b.xlsx", "ledger_path": "own.json"},
+    ]), encoding="utf-8")
+
+    jobs = load_sync_jobs(str(jobs_file), ledger_dir=str(tmp_path))
+
+    assert [j["ledger_path"] for j in jobs] == [str(tmp_path / "sales_ledger_1.json"), "own.json"]
+    assert load_sync_jobs(str(jobs_file))[0]["ledger_path"] is None
+
+
+@pytest.mark.parametrize("raw", [
+    [{"doc_url": "https://sg.docs.wps.com/p/1"}],
+    [{"doc_url": "https://sg.docs.wps.com/p/1", "sales_file": "a.xlsx"}] * 2,
+])
+def test_load_sync_jobs_rejects_bad_lists(tmp_path, raw):
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps(raw), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_sync_jobs(str(jobs_file))
+
+
+def test_pool_reuses_drivers_and_closes_all():
+    factory = DriverFactory()
+
+    results = run_sync_pool(_jobs(6), factory, _slow_job, workers=2)
+
+    assert [r["value"] for r in results] == [f"s{i}.xlsx" for i in range(6)]
+    assert all(r["ok"] for r in results)
+    # 워커당 드라이버 하나를 계속 쓰고, 끝나면 한 번씩 닫음
+    assert len(factory.created) == 2
+    assert [d.closed for d in factory.created] == [1, 1]
+
+
+def test_failing_job_releases_its_driver():
+    factory = DriverFactory()
+    used = []
+
+    def sync_job(driver, job, index):
+        used.append(driver.serial)
+        if job["sales_file"] == "s1.xlsx":
+            raise RuntimeError("upload failed")
+        return 1
+
+    results = run_sync_pool(_jobs(3), factory, sync_job, workers=1)
+
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "RuntimeError: upload failed"
+    # 실패한 드라이버는 바로 닫고, 다음 작업은 새 드라이버로
+    assert used == [0, 0, 1]
+    assert [d.closed for d in factory.created] == [1, 1]
+
+
+def test_failing_make_driver_is_recorded_and_retried():
+    calls = []
+
+    def make_driver(index):
+        calls.append(index)
+        if len(calls) == 1:
+            raise RuntimeError("login timeout")
+        return FakeDriver(index, len(calls))
+
+    results = run_sync_pool(_jobs(2), make_driver, lambda driver, job, index: "done", workers=1)
+
+    assert [r["ok"] for r in results] == [False, True]
+    assert "login timeout" in results[0]["error"]
+
+
+def test_custom_close_driver_errors_are_ignored():
+    closed = []
+
+    def close_driver(driver):
+        closed.append(driver.serial)
+        raise RuntimeError("chrome already gone")
+
+    results = run_sync_pool(_jobs(2), DriverFactory(), _slow_job, workers=2, close_driver=close_driver)
+
+    assert all(r["ok"] for r in results)
+    assert sorted(closed) == [0, 1]
+
+
+def test_report_sync_results(capsys):
+    results = [
+        {"doc_url": "a", "ok": True, "value": 3, "error": None, "seconds": 1.0, "worker": 0},
+        {"doc_url": "b", "ok": False, "value": None, "error": "RuntimeError: x", "seconds": 1.0, "worker": 1},
+        {"doc_url": "c", "ok": True, "value": 0, "error": None, "seconds": 1.0, "worker": 0},
+    ]
+
+    summary = report_sync_results(results, 30.0, 2)
+
+    assert summary == {"documents": 3, "succeeded": 2, "failed": 1, "seconds": 30.0, "docs_per_minute": 4.0}
+    assert "실패: b (RuntimeError: x)" in capsys.readouterr().out
+    assert report_sync_results([], 0.0, 1)["docs_per_minute"] == 0.0
@@ -0,0 +1,106 @@
+# -------------------------------------------------------
+# direct_export: 모의 WPS 사이트(mock_wps)의 내보내기 URL로 직접 받기
+#
+# 성공, xlsx가 아닌 응답(로그인 만료 → 계정 페이지 HTML), 받는 도중 끊긴 응답, http(s)가 아닌 기록 URL을 확인합니다.
+# 브라우저 대신 쿠키/User-Agent만 돌려주는 가짜 드라이버를 씁니다.
+# -------------------------------------------------------
+
+import os
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+import direct_export
+from mock_wps import MockWPS, SESSION_COOKIE
+
+
+class CookieDriver:
+    """session_from_driver가 쓰는 get_cookies/execute_script만 가진 가짜 드라이버(CDP 없음)."""
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def execute_script(self, script):
+        return "pytest"
+
+
+@pytest.fixture
+def site(sample_dir, tmp_path):
+    with MockWPS(os.path.join(sample_dir, "stock.xlsx"), str(tmp_path / "uploads")) as site:
+        yield site
+
+
+def _driver(site, token=None):
+    return CookieDriver([{
+        "name": SESSION_COOKIE, "value": token or site.session_token, "domain": "127.0.0.1", "path": "/",
+    }])
+
+
+def _recipe(tmp_path, site):
+    recipe_file = str(tmp_path / "export_recipe.json")
+    assert direct_export.record_export_request(recipe_file, site.doc_url, f"{site.base_url}/export/{site.doc_id}.xlsx")
+    return recipe_file
+
+
+def test_fetch_stock_direct_saves_fixture_workbook(site, tmp_path):
+    dest = str(tmp_path / "stock.xlsx")
+    path = direct_export.fetch_stock_direct(_driver(site), site.doc_url, dest, _recipe(tmp_path, site))
+
+    assert path == dest
+    with open(dest, "rb") as got, open(site.stock_file, "rb") as expected:
+        assert got.read() == expected.read()
+    assert site.hits.get("/export/") == 1
+    assert not os.path.exists(dest + ".part")
+
+
+def test_fetch_export_to_memory(site):
+    session = direct_export.session_from_driver(_driver(site))
+    with session:
+        data = direct_export.fetch_export(session, f"{site.base_url}/export/{site.doc_id}.xlsx")
+    with open(site.stock_file, "rb") as f:
+        assert data == f.read()
+
+
+def test_expired_login_returns_html_and_falls_back(site, tmp_path):
+    """쿠키가 맞지 않으면 계정 페이지 HTML로 리다이렉트됨 → ExportFetchError → None(편집기 경로로 대체)."""
+    dest = str(tmp_path / "stock.xlsx")
+    driver = _driver(site, token="expired")
+
+    with direct_export.session_from_driver(driver) as session:
+        with pytest.raises(direct_export.ExportFetchError, match="xlsx"):
+            direct_export.fetch_export(session, f"{site.base_url}/export/{site.doc_id}.xlsx", dest)
+    assert direct_export.fetch_stock_direct(driver, site.doc_url, dest, _recipe(tmp_path, site)) is None
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+
+
+def test_truncated_stream_falls_back_and_removes_part(site, tmp_path, monkeypatch):
+    """첫 청크는 받았고 그 뒤에 연결이 끊긴 경우: requests 예외가 새지 않고 None, .part는 남지 않음."""
+    monkeypatch.setattr(direct_export, "CHUNK_SIZE", 1024)
+    site.export_truncate = os.path.getsize(site.stock_file) // 2
+    dest = str(tmp_path / "stock.xlsx")
+
+    with direct_export.session_from_driver(_driver(site)) as session:
+        with pytest.raises(direct_export.ExportFetchError, match="받는 중"):
+            direct_export.fetch_export(session, f"{site.base_url}/export/{site.doc_id}.xlsx", dest)
+    assert direct_export.fetch_stock_direct(_driver(site), site.doc_url, dest, _recipe(tmp_path, site)) is None
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+
+
+@pytest.mark.parametrize("url", ["blob:https://docs.wps.com/6f1c", "data:application/octet-stream;base64,UEsDBA=="])
+def test_non_http_export_url_is_not_recorded_or_fetched(site, tmp_path, url):
+    recipe_file = str(tmp_path / "export_recipe.json")
+    assert direct_export.record_export_request(recipe_file, site.doc_url, url) is False
+    assert not os.path.exists(recipe_file)
+
+    # 예전 버전이 기록해 둔 blob: URL도 요청하지 않고 편집기 경로로 대체
+    with open(recipe_file, "w", encoding="utf-8") as f:
+        json.dump({site.doc_url: {"export_url": url}}, f)
+    assert direct_export.fetch_stock_direct(_driver(site), site.doc_url, str(tmp_path / "s.xlsx"), recipe_file) is None
+    assert site.hits.get("/export/") is None
@@ -0,0 +1,111 @@
+# -------------------------------------------------------
+# dom_wait: MutationObserver 대기(스크립트 결과/페이지 이동 재시도/시간 초과)와 폴링 대체, "wait" span 기록
+#
+# 브라우저 대신 execute_async_script가 정해 둔 결과(요소, null, 예외)를 차례로 돌려주는 가짜 드라이버를 씁니다.
+# -------------------------------------------------------
+
+import pytest
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException, TimeoutException,
+                                        WebDriverException)
+from selenium.webdriver.common.by import By
+
+import dom_wait
+from dom_wait import wait_for_dom
+from sync_metrics import SyncTracer
+
+
+class ScriptDriver:
+    """
+    outcomes: execute_async_script가 차례로 돌려줄 값. 예외 객체면 그 예외를 냅니다.
+    elements: find_element(폴링 방식)가 찾을 수 있는 {(by, locator): 요소}.
+    """
+
+    def __init__(self, outcomes=(), elements=None):
+        self.outcomes = list(outcomes)
+        self.elements = elements or {}
+        self.calls = []
+        self.script_timeouts = []
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+
+    def execute_async_script(self, script, *args):
+        self.calls.append(args)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def find_element(self, by, locator):
+        if (by, locator) not in self.elements:
+            raise NoSuchElementException(locator)
+        return self.elements[(by, locator)]
+
+
+def test_returns_element_from_observer():
+    driver = ScriptDriver(["element"])
+    tracer = SyncTracer()
+
+    with tracer.activate():
+        assert wait_for_dom(driver, By.XPATH, "//span", text="User Center", max_wait=3, label="user_center") \
+            == "element"
+
+    by, locator, text, timeout_ms = driver.calls[0]
+    assert (by, locator, text) == ("xpath", "//span", "User Center")
+    assert 0 < timeout_ms <= 3000
+    assert driver.script_timeouts == [3 + dom_wait.SCRIPT_TIMEOUT_MARGIN]
+    assert tracer.spans[0]["wait"] == "user_center" and tracer.spans[0]["mode"] == "observer"
+
+
+def test_script_timeout_is_raised_only_when_needed():
+    driver = ScriptDriver(["a", "b", "c"])
+
+    wait_for_dom(driver, By.ID, "x", max_wait=10)
+    wait_for_dom(driver, By.ID, "x", max_wait=5)
+    wait_for_dom(driver, By.ID, "x", max_wait=20)
+
+    assert driver.script_timeouts == [10 + dom_wait.SCRIPT_TIMEOUT_MARGIN, 20 + dom_wait.SCRIPT_TIMEOUT_MARGIN]
+
+
+def test_rearms_after_navigation(monkeypatch):
+    monkeypatch.setattr(dom_wait, "RETRY_DELAY", 0)
+    unloaded = JavascriptException("javascript error: document unloaded while waiting for result")
+    driver = ScriptDriver([unloaded, unloaded, "element"])
+    tracer = SyncTracer()
+
+    with tracer.activate():
+        assert wait_for_dom(driver, By.CSS_SELECTOR, "#app", max_wait=5) == "element"
+
+    assert len(driver.calls) == 3
+    # 다시 걸 때는 남은 시간만큼만 기다림
+    assert driver.calls[2][3] <= driver.calls[0][3]
+    assert tracer.spans[0]["retries"] == 2
+
+
+def test_other_script_errors_are_raised():
+    with pytest.raises(WebDriverException, match="stale"):
+        wait_for_dom(ScriptDriver([WebDriverException("stale element reference")]), By.ID, "x", max_wait=5)
+
+
+@pytest.mark.parametrize("outcome", [None, TimeoutException("script timeout")])
+def test_times_out_when_nothing_appears(outcome):
+    tracer = SyncTracer()
+
+    with tracer.activate():
+        with pytest.raises(TimeoutException, match="'저장' 텍스트를 담은 .toast"):
+            wait_for_dom(ScriptDriver([outcome]), By.CSS_SELECTOR, ".toast", text="저장", max_wait=1)
+
+    assert tracer.spans[0]["status"] == "error"
+
+
+def test_link_text_falls_back_to_polling():
+    driver = ScriptDriver(elements={(By.LINK_TEXT, "다운로드"): "link"})
+    tracer = SyncTracer()
+
+    with tracer.activate():
+        assert wait_for_dom(driver, By.LINK_TEXT, "다운로드", max_wait=1) == "link"
+        with pytest.raises(TimeoutException):
+            wait_for_dom(driver, By.LINK_TEXT, "없음", max_wait=0.6)
+
+    assert driver.calls == []
+    assert [s["mode"] for s in tracer.spans] == ["poll", "poll"]
@@ -0,0 +1,115 @@
+# -------------------------------------------------------
+# download_watch: 성능 로그의 다운로드 이벤트와 폴더 감시(대체 경로)로 받은 파일 찾기
+#
+# 실제 크롬 대신 execute_cdp_cmd/get_log만 가진 가짜 드라이버에 성능 로그 항목을 미리 넣어 둡니다.
+# -------------------------------------------------------
+
+import json
+
+import pytest
+
+from download_watch import DownloadWatcher
+
+EXPORT_URL = "https://sg.docs.wps.com/export/stock.xlsx"
+
+
+class PerfLogDriver:
+    """
+    get_log("performance")가 쌓인 항목을 돌려주고 비우는 가짜 드라이버(ChromeDriver와 같은 동작).
+    performance=False면 성능 로그를 켜지 않은 드라이버처럼 get_log가 실패합니다.
+    """
+
+    def __init__(self, performance=True):
+        self.performance = performance
+        self.entries = []
+        self.cdp_calls = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp_calls.append((cmd, params))
+        return {}
+
+    def get_log(self, log_type):
+        if not self.performance:
+            raise Exception("log type 'performance' not found")
+        entries, self.entries = self.entries, []
+        return entries
+
+    def emit(self, method, **params):
+        message = {"message": {"method": method, "params": params}}
+        self.entries.append({"level": "INFO", "message": json.dumps(message), "timestamp": 0})
+
+
+def test_page_download_events_complete_download(tmp_path):
+    driver = PerfLogDriver()
+    watcher = DownloadWatcher(driver, str(tmp_path))
+    assert watcher.use_events
+    assert driver.cdp_calls == [("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": str(tmp_path)})]
+
+    driver.emit("Page.downloadWillBegin", guid="g1", suggestedFilename="stock.xlsx", url=EXPORT_URL)
+    driver.emit("Page.downloadProgress", guid="g1", state="completed")
+    # Chrome은 같은 이름이 있으면 이름을 바꿔 저장함
+    (tmp_path / "stock (1).xlsx").write_bytes(b"xlsx")
+
+    assert watcher.wait(timeout=1) == str(tmp_path / "stock (1).xlsx")
+    assert watcher.download_url == EXPORT_URL
+
+
+def test_browser_download_events_are_not_used(tmp_path):
+    driver = PerfLogDriver()
+    watcher = DownloadWatcher(driver, str(tmp_path))
+
+    driver.emit("Browser.downloadWillBegin", guid="g1", suggestedFilename="stock.xlsx", url=EXPORT_URL)
+    driver.emit("Browser.downloadProgress", guid="g1", state="completed")
+    (tmp_path / "stock.xlsx").write_bytes(b"xlsx")
+
+    # 폴더 감시로 찾고, 이벤트 경로가 아니므로 내보내기 URL은 모름
+    assert watcher.wait(timeout=1) == str(tmp_path / "stock.xlsx")
+    assert watcher.download_url is None
+
+
+def test_canceled_download_raises(tmp_path):
+    driver = PerfLogDriver()
+    watcher = DownloadWatcher(driver, str(tmp_path))
+
+    driver.emit("Page.downloadWillBegin", guid="g1", suggestedFilename="stock.xlsx", url=EXPORT_URL)
+    driver.emit("Page.downloadProgress", guid="g1", state="canceled")
+
+    with pytest.raises(Exception, match="취소"):
+        watcher.wait(timeout=1)
+
+
+def test_listdir_fallback_ignores_temp_and_old_files(tmp_path):
+    (tmp_path / "stock.xlsx").write_bytes(b"old")
+    watcher = DownloadWatcher(PerfLogDriver(performance=False), str(tmp_path), keyword="stock")
+    assert not watcher.use_events
+
+    (tmp_path / "stock (1).xlsx.crdownload").write_bytes(b"partial")
+    (tmp_path / "stock.tmp").write_bytes(b"partial")
+    (tmp_path / "other.xlsx").write_bytes(b"xlsx")
+    with pytest.raises(Exception, match="찾지 못했습니다"):
+        watcher.wait(timeout=0.3)
+
+    (tmp_path / "stock (1).xlsx").write_bytes(b"xlsx")
+    assert watcher.wait(timeout=1) == str(tmp_path / "stock (1).xlsx")
+
+
+class NoCdpDriver(PerfLogDriver):
+    """CDP 명령이 실패하는 드라이버(크롬은 get_chrome_driver가 정한 download_dir에 받음)."""
+
+    def __init__(self, download_dir):
+        super().__init__(performance=False)
+        self.download_dir = download_dir
+
+    def execute_cdp_cmd(self, cmd, params):
+        raise Exception("CDP unavailable")
+
+
+def test_failed_redirect_to_other_dir_fails_loudly(tmp_path):
+    worker_dir, job_dir = tmp_path / "worker", tmp_path / "job"
+    worker_dir.mkdir()
+    job_dir.mkdir()
+
+    with pytest.raises(Exception, match="바꾸지 못했습니다"):
+        DownloadWatcher(NoCdpDriver(str(worker_dir)), str(job_dir))
+    # 크롬의 폴더를 그대로 보는 경우는 CDP 없이도 폴더 감시로 진행
+    assert not DownloadWatcher(NoCdpDriver(str(job_dir)), str(job_dir)).use_events
@@ -0,0 +1,77 @@
+# -------------------------------------------------------
+# numpy_engine: 상품 인덱스(밀집/정렬) + np.bincount 누적이 pandas 경로(groupby + merge)와 같은 값/dtype을 내는지
+# -------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from numpy_engine import ProductIndex, SalesAccumulator, numpy_stock_update
+
+
+def _pandas_update(stock_df, sales_df):
+    """stock_merge의 pandas 경로와 같은 계산."""
+    sales_agg = sales_df.groupby("product_id")["quantity_sold"].sum().reset_index()
+    merged = pd.merge(stock_df, sales_agg, on="product_id", how="left")
+    merged["quantity_sold"] = merged["quantity_sold"].fillna(0)
+    merged["updated_stock"] = merged["stock_qty"] - merged["quantity_sold"]
+    merged.loc[merged["updated_stock"] < 0, "updated_stock"] = 0
+    return merged["updated_stock"].to_numpy()
+
+
+@pytest.mark.parametrize("reader", ("pandas", "stream"))
+def test_numpy_engine_reproduces_sample(sample_dir, expected, merge, tmp_path, reader):
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), os.path.join(sample_dir, "sales.xlsx"),
+                          tmp_path / "out", reader=reader, engine="numpy")
+
+    assert rows == 3
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+
+
+@pytest.mark.parametrize("id_offset, dense", [(0, True), (1000, True), (10 ** 12, False)])
+def test_matches_pandas_for_dense_and_sparse_ids(id_offset, dense):
+    rng = np.random.default_rng(0)
+    if dense:
+        stock_ids = id_offset + rng.permutation(500)
+    else:
+        stock_ids = id_offset + rng.choice(10 ** 9, size=500, replace=False)
+    stock_df = pd.DataFrame({"product_id": stock_ids, "stock_qty": rng.integers(0, 50, 500)})
+    # 재고에 없는 id(범위 밖/안)도 섞음
+    sale_ids = np.concatenate([rng.choice(stock_ids, 3000), [id_offset - 5, id_offset + 10 ** 6]])
+    sales_df = pd.DataFrame({"product_id": sale_ids, "quantity_sold": rng.integers(1, 5, len(sale_ids))})
+
+    assert ProductIndex(stock_ids).dense is dense
+    updated, products = numpy_stock_update(stock_df, sales_df["product_id"], sales_df["quantity_sold"])
+    expected_qty = _pandas_update(stock_df, sales_df)
+
+    assert updated.dtype == expected_qty.dtype
+    np.testing.assert_array_equal(updated, expected_qty)
+    assert products == len(set(sale_ids) & set(stock_ids))
+
+
+def test_nan_sale_ids_and_quantities_match_pandas():
+    stock_df = pd.DataFrame({"product_id": [1, 2, 3], "stock_qty": [10, 10, 10]})
+    sales_df = pd.DataFrame({"product_id": [1.0, np.nan, 2.0, 9.0, 3.0], "quantity_sold": [4, 1, np.nan, 1, 20]})
+
+    updated, _ = numpy_stock_update(stock_df, sales_df["product_id"], sales_df["quantity_sold"])
+
+    np.testing.assert_array_equal(updated, _pandas_update(stock_df, sales_df))
+
+
+def test_huge_integer_totals_stay_exact():
+    index = ProductIndex(np.array([7, 8]))
+    accumulator = SalesAccumulator(index)
+    # 합이 2**53을 넘으면 float64 bincount가 아니라 정수로 정확히 더함
+    accumulator.add(np.array([7, 7, 8]), np.array([2 ** 60, 1, 3], dtype=np.int64))
+    accumulator.add(np.array([7]), np.array([2], dtype=np.int64))
+
+    assert accumulator.totals.dtype == np.int64
+    assert accumulator.totals[index.lookup([7, 8])[0]].tolist() == [2 ** 60 + 3, 3]
+
+
+def test_non_integer_ids_fall_back():
+    stock_df = pd.DataFrame({"product_id": ["a", "b"], "stock_qty": [1, 2]})
+
+    assert numpy_stock_update(stock_df, ["a"], [1]) is None
@@ -0,0 +1,104 @@
+# -------------------------------------------------------
+# page_ready: 고정 sleep 대신 readyState / 네트워크 유휴 / 편집기 버튼 / 업로드 완료 신호 대기
+#
+# 브라우저 대신 execute_script 결과(readyState, Resource Timing 항목 수)를 시간에 따라 돌려주는 가짜 드라이버를 씁니다.
+# -------------------------------------------------------
+
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from page_ready import wait_for_network_idle, wait_for_editor_ready, wait_for_upload_complete
+
+
+class FakeElement:
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+
+class FakePage:
+    """
+    requests: 시작 후 (초, 끝난 요청 수) 목록. 그 시각이 지나면 항목 수가 그 값이 됩니다.
+    ready_after / toast_after: 편집기 버튼 / 업로드 완료 토스트가 나타나는 시각(초, None이면 안 나타남).
+    """
+
+    def __init__(self, requests=(), ready_state="complete", ready_after=0.0, toast_after=None):
+        self.start = time.monotonic()
+        self.requests = sorted(requests)
+        self.ready_state = ready_state
+        self.ready_after = ready_after
+        self.toast_after = toast_after
+
+    def _elapsed(self):
+        return time.monotonic() - self.start
+
+    def _count(self):
+        count = 0
+        for at, value in self.requests:
+            if self._elapsed() >= at:
+                count = value
+        return count
+
+    def execute_script(self, script, *args):
+        if script.strip() == "return document.readyState":
+            return self.ready_state
+        return [self.ready_state, self._count()]
+
+    def find_element(self, by, value):
+        if self.ready_after is None or self._elapsed() < self.ready_after:
+            raise NoSuchElementException(value)
+        return FakeElement()
+
+    def find_elements(self, by, value):
+        if self.toast_after is not None and self._elapsed() >= self.toast_after:
+            return [FakeElement()]
+        return []
+
+
+def test_network_idle_waits_for_requests_to_settle():
+    page = FakePage(requests=[(0.0, 3), (0.2, 5), (0.4, 8)])
+
+    waited = wait_for_network_idle(page, idle_time=0.3, max_wait=5)
+
+    assert 0.6 <= waited < 2
+
+
+def test_network_idle_needs_min_new_requests():
+    with pytest.raises(TimeoutException):
+        wait_for_network_idle(FakePage(requests=[(0.0, 3)]), idle_time=0.1, max_wait=0.5, min_new_requests=1)
+
+
+def test_editor_ready_waits_for_button_but_not_endless_polling():
+    # 편집기는 계속 요청을 만듦(폴링) → 버튼이 준비되면 idle_max_wait까지만 기다리고 진행
+    polling = [(i * 0.05, i) for i in range(200)]
+    page = FakePage(requests=polling, ready_after=0.3)
+
+    waited = wait_for_editor_ready(page, max_wait=5, idle_time=0.2, idle_max_wait=0.5)
+
+    assert 0.3 <= waited < 2
+
+
+def test_editor_ready_times_out_without_button():
+    with pytest.raises(TimeoutException):
+        wait_for_editor_ready(FakePage(ready_after=None), max_wait=0.5)
+
+
+def test_upload_complete_on_toast():
+    assert wait_for_upload_complete(FakePage(toast_after=0.2), max_wait=5) < 1
+
+
+def test_upload_complete_on_idle_after_upload_request():
+    page = FakePage(requests=[(0.0, 10), (0.3, 11)])
+
+    waited = wait_for_upload_complete(page, max_wait=5, idle_time=0.3)
+
+    assert 0.6 <= waited < 2
+
+
+def test_upload_without_any_signal_times_out():
+    with pytest.raises(TimeoutException):
+        wait_for_upload_complete(FakePage(requests=[(0.0, 10)]), max_wait=0.5, idle_time=0.1)
@@ -0,0 +1,66 @@
+# -------------------------------------------------------
+# run_dirs: 실행 전용 폴더에서 받은 파일 찾기와 보존 정책(keep / max_age / 사용 중 표시)
+# -------------------------------------------------------
+
+import os
+import time
+
+import pytest
+
+from run_dirs import ACTIVE_MARKER, create_run_dir, finish_run_dir, find_single_download, cleanup_run_dirs
+
+
+def test_find_single_download_ignores_temp_and_other_files(tmp_path):
+    run_dir = create_run_dir(str(tmp_path), "job")
+    assert find_single_download(run_dir) is None
+
+    for name in ("stock.xlsx.crdownload", "stock.tmp", "notes.txt"):
+        open(os.path.join(run_dir, name), "w").close()
+    assert find_single_download(run_dir) is None
+
+    open(os.path.join(run_dir, "export (1).xlsx"), "w").close()
+    assert find_single_download(run_dir) == os.path.join(run_dir, "export (1).xlsx")
+
+    open(os.path.join(run_dir, "stock.xlsx"), "w").close()
+    with pytest.raises(Exception, match="여러 개"):
+        find_single_download(run_dir)
+
+
+def _aged_run_dir(root, label, hours_ago, active=False):
+    path = create_run_dir(str(root), label)
+    if not active:
+        finish_run_dir(path)
+    stamp = time.time() - hours_ago * 3600
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_cleanup_keeps_recent_and_young_dirs(tmp_path):
+    old = [_aged_run_dir(tmp_path, f"old{i}", 48 + i) for i in range(3)]
+    young = _aged_run_dir(tmp_path, "young", 1)
+    newest = _aged_run_dir(tmp_path, "newest", 0)
+
+    # 최근 2개(newest, young)는 남기고, 나머지 중 24시간이 지난 3개를 지움
+    assert cleanup_run_dirs(str(tmp_path), keep=2, max_age_hours=24) == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in (young, newest))
+    assert not any(os.path.exists(p) for p in old)
+
+    # keep=0이어도 max_age_hours 안쪽 폴더는 남김
+    assert cleanup_run_dirs(str(tmp_path), keep=0, max_age_hours=24) == 0
+
+
+def test_cleanup_skips_active_dirs_of_live_processes(tmp_path):
+    active = _aged_run_dir(tmp_path, "active", 48, active=True)
+    stale = _aged_run_dir(tmp_path, "stale", 48, active=True)
+    # 비정상 종료로 남은 표시: 이미 끝난 프로세스의 pid
+    with open(os.path.join(stale, ACTIVE_MARKER), "w", encoding="utf-8") as f:
+        f.write(str(2 ** 22 + 1))
+    os.utime(stale, (time.time() - 48 * 3600,) * 2)
+
+    assert cleanup_run_dirs(str(tmp_path), keep=0, max_age_hours=24) == 1
+    assert os.path.exists(active)
+    assert not os.path.exists(stale)
+
+
+def test_cleanup_missing_root(tmp_path):
+    assert cleanup_run_dirs(str(tmp_path / "missing")) == 0
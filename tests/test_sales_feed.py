@@ -0,0 +1,98 @@
+# -------------------------------------------------------
+# sales_feed: CSV / Arrow IPC 판매 피드 읽기와, 판매 형식이 달라도 병합 결과가 같은지
+#
+# sample_data의 stock.xlsx + sales.xlsx를 병합하면 stock_updated.xlsx가 나와야 합니다.
+#   - reader(pandas/stream) x engine(pandas/numpy) x 판매 형식(xlsx/csv/arrow) 12가지 조합
+#   - CSV/Arrow 판매로 나눠 받은 판매를 장부로 이어 반영
+# -------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pytest
+
+from sales_feed import pyarrow, feed_format, is_sales_feed, iter_feed_chunks, read_feed_header
+from sales_ledger import commit_ledger
+
+READERS = ("pandas", "stream")
+ENGINES = ("pandas", "numpy")
+# Arrow 판매는 pyarrow가 있을 때만
+needs_pyarrow = pytest.mark.skipif(pyarrow is None, reason="pyarrow가 없음")
+ARROW = pytest.param("arrow", marks=needs_pyarrow)
+FEEDS = ("xlsx", "csv", ARROW)
+
+
+def test_feed_format_by_extension():
+    assert [feed_format(p) for p in ("a.xlsx", "a.CSV", "a.feather", "a.ipc", "a.xls")] == \
+        ["xlsx", "csv", "arrow", "arrow", "xlsx"]
+    assert is_sales_feed("a.arrow") and not is_sales_feed("a.xlsx")
+
+
+def test_csv_header_with_bom_and_chunk_row_numbers(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("product_id,quantity_sold,memo\n1,2,a\n2,3,b\n3,4,c\n", encoding="utf-8-sig")
+
+    assert read_feed_header(str(path)) == ["product_id", "quantity_sold", "memo"]
+    chunks = list(iter_feed_chunks(str(path), ["product_id", "quantity_sold"], chunk_rows=2))
+    assert [list(c.index) for c in chunks] == [[0, 1], [2]]
+    assert list(chunks[0].columns) == ["product_id", "quantity_sold"]
+
+
+@needs_pyarrow
+def test_arrow_stream_batches_keep_file_row_numbers(tmp_path):
+    path = str(tmp_path / "sales.arrow")
+    batch = pyarrow.record_batch({"product_id": [1, 2], "quantity_sold": [3, 4], "memo": ["a", "b"]})
+    # Feather(파일 형식)가 아니라 IPC 스트림 형식, 레코드 배치 두 개
+    with pyarrow.OSFile(path, "wb") as sink, pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+        writer.write_batch(batch)
+
+    assert read_feed_header(path) == ["product_id", "quantity_sold", "memo"]
+    chunks = list(iter_feed_chunks(path, ["product_id", "quantity_sold"]))
+    assert [list(c.index) for c in chunks] == [[0, 1], [2, 3]]
+    assert pd.concat(chunks)["quantity_sold"].tolist() == [3, 4, 3, 4]
+
+
+@pytest.mark.parametrize("feed", FEEDS)
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("reader", READERS)
+def test_every_combination_reproduces_sample(sample_dir, sample_sales, expected, merge, write_sales, tmp_path,
+                                             reader, engine, feed):
+    sales_file = write_sales(sample_sales, tmp_path / f"sales.{feed}")
+
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), sales_file, tmp_path / "out",
+                          reader=reader, engine=engine)
+
+    assert rows == len(sample_sales)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+
+
+@pytest.mark.parametrize("feed", ("csv", ARROW))
+def test_ledger_applies_split_feed_once(sample_dir, sample_sales, expected, merge, write_sales, tmp_path, feed):
+    ledger = str(tmp_path / "ledger.json")
+    first = write_sales(sample_sales.iloc[:2], tmp_path / f"first.{feed}")
+    full = write_sales(sample_sales, tmp_path / f"full.{feed}")
+
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), first, tmp_path / "run1", ledger_path=ledger)
+    assert rows == 2
+    assert commit_ledger(ledger)
+
+    rows, updated = merge(updated, full, tmp_path / "run2", ledger_path=ledger)
+    assert rows == len(sample_sales) - 2
+    assert commit_ledger(ledger)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+
+    # 같은 피드로 다시 실행하면 반영할 판매가 없음
+    assert merge(updated, full, tmp_path / "run3", ledger_path=ledger)[0] == 0
+
+
+def test_shard_folder_mixes_formats(sample_dir, sample_sales, expected, merge, write_sales, tmp_path):
+    shards = tmp_path / "sales"
+    shards.mkdir()
+    write_sales(sample_sales.iloc[:1], shards / "2025-03-28_store01.xlsx")
+    write_sales(sample_sales.iloc[1:], shards / "2025-03-28_store02.csv")
+
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), shards, tmp_path / "out", shard_workers=1)
+
+    assert rows == len(sample_sales)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
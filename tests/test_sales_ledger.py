@@ -0,0 +1,73 @@
+# -------------------------------------------------------
+# sales_ledger: 판매 반영 장부로 같은 판매를 두 번 빼지 않는지
+#
+# 나눠 받은 판매를 이어 반영, commit 전 재실행(다시 반영), 같은 파일 재실행(0행),
+# 워터마크와 같은 시각의 판매(tie_keys)를 확인합니다.
+# -------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pytest
+
+from sales_ledger import commit_ledger, load_ledger, pending_path
+
+READERS = ("pandas", "stream")
+
+
+def _sales_frame(rows):
+    """(product_id, quantity_sold, sale_date) 튜플들로 판매 DataFrame을 만듭니다."""
+    df = pd.DataFrame(rows, columns=["product_id", "quantity_sold", "sale_date"])
+    df["sale_date"] = pd.to_datetime(df["sale_date"])
+    return df
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_ledger_applies_split_sales_once(sample_dir, sample_sales, expected, merge, write_sales, tmp_path, reader):
+    ledger = str(tmp_path / "ledger.json")
+    stock = os.path.join(sample_dir, "stock.xlsx")
+    first = write_sales(sample_sales.iloc[:2], tmp_path / "first.xlsx")
+    full = write_sales(sample_sales, tmp_path / "full.xlsx")
+
+    # 업로드 전에 실패(commit 안 함) → 장부는 그대로라 다음 실행에서 같은 판매를 다시 반영
+    assert merge(stock, first, tmp_path / "try", reader=reader, ledger_path=ledger)[0] == 2
+    assert os.path.exists(pending_path(ledger))
+    assert load_ledger(ledger)["last_sale_date"] is None
+    rows, updated = merge(stock, first, tmp_path / "run1", reader=reader, ledger_path=ledger)
+    assert rows == 2
+    assert commit_ledger(ledger)
+    assert not os.path.exists(pending_path(ledger))
+
+    # 올린 재고를 다시 받아, 전체 판매 파일에서 나머지만 반영
+    rows, updated = merge(updated, full, tmp_path / "run2", reader=reader, ledger_path=ledger)
+    assert rows == len(sample_sales) - 2
+    assert commit_ledger(ledger)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+
+    # 같은 파일로 다시 실행하면 반영할 판매가 없음
+    rows, replayed = merge(updated, full, tmp_path / "run3", reader=reader, ledger_path=ledger)
+    assert rows == 0
+    pd.testing.assert_frame_equal(pd.read_excel(replayed), expected)
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_tie_keys_keep_same_time_sales_apart(sample_dir, merge, write_sales, tmp_path, reader):
+    ledger = str(tmp_path / "ledger.json")
+    at = "2025-03-28 12:00:00"
+    first = write_sales(_sales_frame([(1, 1, at), (2, 2, at)]), tmp_path / "first.xlsx")
+    # 워터마크와 같은 시각에 같은 판매가 한 번 더, 다른 상품 판매가 하나 더 찍힘
+    later = write_sales(_sales_frame([(1, 1, at), (2, 2, at), (1, 1, at), (3, 3, at)]), tmp_path / "later.xlsx")
+
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), first, tmp_path / "run1",
+                          reader=reader, ledger_path=ledger)
+    assert rows == 2
+    assert commit_ledger(ledger)
+    assert len(load_ledger(ledger)["tie_keys"]) == 2
+
+    rows, updated = merge(updated, later, tmp_path / "run2", reader=reader, ledger_path=ledger)
+    assert rows == 2
+    assert pd.read_excel(updated)["stock_qty"].tolist() == [9 - 1 - 1, 48 - 2, 97 - 3]
+
+
+def test_commit_without_pending_is_noop(tmp_path):
+    assert not commit_ledger(str(tmp_path / "ledger.json"))
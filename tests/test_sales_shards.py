@@ -0,0 +1,78 @@
+# -------------------------------------------------------
+# sales_shards: 샤드 목록 펼치기, 부분 합계 reduce, 샤드 폴더 병합과 샤드별 장부
+# -------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pytest
+
+from sales_ledger import LedgerLayoutError, commit_ledger, load_ledger
+from sales_shards import (expand_sales_shards, is_sales_shard_spec, merge_totals, parallel_sales_aggregate,
+                          shard_workers_per_job)
+
+
+def _shard_folder(tmp_path, sample_sales, write_sales):
+    """sample 판매를 매장 두 곳의 샤드로 나눠 담은 폴더."""
+    shards = tmp_path / "sales"
+    shards.mkdir()
+    write_sales(sample_sales.iloc[:1], shards / "2025-03-28_store01.xlsx")
+    write_sales(sample_sales.iloc[1:], shards / "2025-03-28_store02.xlsx")
+    return shards
+
+
+def test_expand_sales_shards_skips_lock_files(tmp_path):
+    for name in ("b.xlsx", "a.xlsx", "~$a.xlsx", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+
+    assert is_sales_shard_spec(str(tmp_path)) and is_sales_shard_spec(str(tmp_path / "*.xlsx"))
+    assert not is_sales_shard_spec(str(tmp_path / "a.xlsx"))
+    assert [os.path.basename(p) for p in expand_sales_shards(str(tmp_path))] == ["a.xlsx", "b.xlsx"]
+    with pytest.raises(FileNotFoundError):
+        expand_sales_shards(str(tmp_path / "*.csv"))
+
+
+def test_expand_sales_shards_rejects_duplicate_names(tmp_path):
+    for sub in ("store01", "store02"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "sales.xlsx").write_bytes(b"")
+
+    with pytest.raises(ValueError, match="sales.xlsx"):
+        expand_sales_shards(str(tmp_path / "*" / "*.xlsx"))
+
+
+def test_merge_totals_and_workers_per_job():
+    assert merge_totals([{1: 2, 2: 1}, {2: 3}, {3: 4}]) == {1: 2, 2: 4, 3: 4}
+    assert shard_workers_per_job(3, workers=8) == 2
+    assert shard_workers_per_job(8, workers=4) == 1
+
+
+def test_process_pool_matches_serial(tmp_path, sample_sales, write_sales):
+    paths = expand_sales_shards(str(_shard_folder(tmp_path, sample_sales, write_sales)))
+
+    serial = parallel_sales_aggregate(paths, workers=1)[:2]
+    pooled = parallel_sales_aggregate(paths, workers=2)[:2]
+
+    assert pooled == serial
+    assert serial[1] == len(sample_sales)
+
+
+def test_ledger_with_shard_folder(sample_dir, sample_sales, expected, merge, write_sales, tmp_path):
+    ledger = str(tmp_path / "ledger.json")
+    shards = _shard_folder(tmp_path, sample_sales, write_sales)
+
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), shards, tmp_path / "run1",
+                          ledger_path=ledger, shard_workers=1)
+    assert rows == len(sample_sales)
+    assert commit_ledger(ledger)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+    assert sorted(load_ledger(ledger)["shards"]) == ["2025-03-28_store01.xlsx", "2025-03-28_store02.xlsx"]
+
+    # 같은 샤드로 다시 실행하면 반영할 판매가 없음
+    rows, _ = merge(updated, shards, tmp_path / "run2", ledger_path=ledger, shard_workers=1)
+    assert rows == 0
+
+    # 샤드 형식의 장부에 없는 파일을 파일 하나 모드로 주면 중단
+    other = write_sales(sample_sales, tmp_path / "other.xlsx")
+    with pytest.raises(LedgerLayoutError, match="other.xlsx"):
+        merge(updated, other, tmp_path / "run3", ledger_path=ledger)
@@ -0,0 +1,87 @@
+# -------------------------------------------------------
+# sheet_schema: 필요한 컬럼/타입이 맞지 않으면 병합 전에 SchemaError로 바로 실패하는지,
+# 정수 컬럼이 int32(넘치면 int64)로 줄어드는지
+# -------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sheet_schema import (SALES_SCHEMA, STOCK_SCHEMA, SchemaError, apply_schema, check_header, check_sales_totals,
+                          read_sheet)
+
+READERS = ("pandas", "stream")
+
+
+def test_check_header_reports_missing_column(write_sales, tmp_path):
+    path = write_sales(pd.DataFrame({"product_id": [1], "qty": [2]}), tmp_path / "sales.xlsx")
+
+    with pytest.raises(SchemaError, match="quantity_sold"):
+        check_header(path, SALES_SCHEMA)
+    # sale_date는 optional로 줄 수 있고, location은 어느 시트에서든 없어도 됨
+    ok = write_sales(pd.DataFrame({"product_id": [1], "quantity_sold": [2]}), tmp_path / "ok.xlsx")
+    assert check_header(ok, SALES_SCHEMA, optional=("sale_date",)) == ["product_id", "quantity_sold"]
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_merge_fails_fast_on_missing_column(sample_dir, merge, write_sales, tmp_path, reader):
+    sales = write_sales(pd.DataFrame({"product": [1], "quantity_sold": [2]}), tmp_path / "sales.xlsx")
+
+    with pytest.raises(SchemaError, match="product_id"):
+        merge(os.path.join(sample_dir, "stock.xlsx"), sales, tmp_path / "out", reader=reader)
+    assert not (tmp_path / "out" / "stock_updated.xlsx").exists()
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_merge_rejects_non_integer_quantity(sample_dir, merge, write_sales, tmp_path, reader):
+    sales = write_sales(pd.DataFrame({"product_id": [1, 2], "quantity_sold": [1, 1.5]}), tmp_path / "sales.xlsx")
+
+    with pytest.raises(SchemaError, match="정수가 아닌"):
+        merge(os.path.join(sample_dir, "stock.xlsx"), sales, tmp_path / "out", reader=reader)
+
+
+def test_apply_schema_reports_bad_rows():
+    df = pd.DataFrame({"product_id": [1, "A-1", 3], "quantity_sold": [1, 2, 3]})
+
+    with pytest.raises(SchemaError, match=r"product_id 컬럼에 숫자가 아닌 값이 있습니다: 3행='A-1'"):
+        apply_schema(df, SALES_SCHEMA, "sales.xlsx")
+    with pytest.raises(SchemaError, match="날짜가 아닌"):
+        apply_schema(pd.DataFrame({"sale_date": ["2025-03-28", "어제"]}), SALES_SCHEMA)
+
+
+def test_int_columns_shrink_to_int32_and_overflow_to_int64():
+    df = apply_schema(pd.DataFrame({
+        "product_id": [1, 2, 3],
+        "stock_qty": [10, 2 ** 31, 0],
+        "product_name": ["a", "b", "a"],
+    }), STOCK_SCHEMA)
+
+    assert df["product_id"].dtype == np.int32
+    assert df["stock_qty"].dtype == np.int64
+    assert df["stock_qty"].tolist() == [10, 2 ** 31, 0]
+    assert df["product_name"].dtype == "category"
+    # 엑셀에서 float로 읽힌 정수와 빈 칸: 빈 칸이 있으면 float64로 둠(pandas 병합과 같은 결과)
+    floats = apply_schema(pd.DataFrame({"product_id": [1.0, -(2.0 ** 40)], "quantity_sold": [1.0, np.nan]}),
+                          SALES_SCHEMA)
+    assert floats["product_id"].dtype == np.int64
+    assert floats["quantity_sold"].dtype == np.float64
+
+
+def test_read_sheet_projects_sales_columns(write_sales, tmp_path):
+    df = pd.DataFrame({"order_no": ["x", "y"], "product_id": [1, 2], "quantity_sold": [3, 4], "memo": ["", ""]})
+    path = write_sales(df, tmp_path / "sales.xlsx")
+
+    sales = read_sheet(path, SALES_SCHEMA, optional=("sale_date",))
+
+    assert list(sales.columns) == ["product_id", "quantity_sold"]
+    assert sales.dtypes.tolist() == [np.int32, np.int32]
+
+
+def test_check_sales_totals():
+    check_sales_totals({1: 3, 2: 4.0, (3, "A"): 1})
+    with pytest.raises(SchemaError, match="product_id"):
+        check_sales_totals({1: 3, "A-1": 2})
+    with pytest.raises(SchemaError, match="quantity_sold"):
+        check_sales_totals({1: 2.5})
@@ -0,0 +1,84 @@
+# -------------------------------------------------------
+# stock_index: (product_id[, location]) 재고 키 인덱스, 위치별 병합, 재고 키 중복(DuplicateKeyError)
+# -------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_index import (LOCATION_KEYS, PRODUCT_KEYS, DuplicateKeyError, load_stock_index, location_text,
+                         merge_key_columns)
+
+READERS = ("pandas", "stream")
+ENGINES = ("pandas", "numpy")
+
+
+def _location_stock():
+    return pd.DataFrame({
+        "product_id": [1, 1, 2], "product_name": ["응원봉", "응원봉", "앨범"],
+        "location": ["A", "B", "A"], "stock_qty": [10, 20, 3],
+    })
+
+
+def test_location_text_and_merge_keys():
+    assert [location_text(v) for v in (3, 3.0, " 3 ", "", None, np.nan, "A")] == ["3", "3", "3", None, None, None, "A"]
+    assert merge_key_columns(["product_id", "location"], LOCATION_KEYS) == LOCATION_KEYS
+    # 판매에만 위치가 있으면 상품 단위로 차감
+    assert merge_key_columns(["product_id"], LOCATION_KEYS) == PRODUCT_KEYS
+
+
+def test_index_looks_up_location_rows_and_is_saved(tmp_path):
+    stock = _location_stock()
+
+    index, cached = load_stock_index(stock, LOCATION_KEYS, cache_dir=str(tmp_path))
+    codes, keep = index.encode(np.array([2, 1, 1, 3]), np.array(["A", "B", "C", "A"], dtype=object))
+    slots, found = index.lookup(codes)
+
+    assert not cached and keep is None
+    assert found.tolist() == [True, True, False, False]
+    assert slots[found].tolist() == [2, 1]
+    # 수량만 바뀐 재고는 저장한 인덱스를 그대로 씀
+    again, cached = load_stock_index(stock.assign(stock_qty=[0, 0, 0]), LOCATION_KEYS, cache_dir=str(tmp_path))
+    assert cached and again.lookup(codes)[1].tolist() == found.tolist()
+
+
+def test_duplicate_keys_name_sheet_rows():
+    stock = _location_stock().assign(location=["A", "A", "A"])
+
+    with pytest.raises(DuplicateKeyError, match=r"\(1, 'A'\): 2행/3행"):
+        load_stock_index(stock, LOCATION_KEYS)
+    with pytest.raises(DuplicateKeyError, match="location 컬럼이 없습니다"):
+        load_stock_index(_location_stock(), PRODUCT_KEYS)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("reader", READERS)
+def test_composite_key_subtracts_per_location(merge, write_sales, tmp_path, reader, engine):
+    stock = str(tmp_path / "stock.xlsx")
+    _location_stock().to_excel(stock, index=False)
+    sales = write_sales(pd.DataFrame({
+        "product_id": [1, 2, 1], "quantity_sold": [5, 4, 1],
+        "sale_date": pd.to_datetime(["2025-03-28 10:00", "2025-03-28 10:01", "2025-03-28 10:02"]),
+        "location": ["B", "A", "A"],
+    }), tmp_path / "sales.xlsx")
+
+    rows, updated = merge(stock, sales, tmp_path / "out", reader=reader, engine=engine)
+
+    assert rows == 3
+    result = pd.read_excel(updated)
+    assert result["location"].tolist() == ["A", "B", "A"]
+    assert result["stock_qty"].tolist() == [9, 15, 0]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_duplicate_stock_keys_raise_before_writing(sample_dir, merge, tmp_path, engine):
+    stock = str(tmp_path / "stock.xlsx")
+    pd.DataFrame({
+        "product_id": [1, 1, 2], "product_name": ["응원봉", "응원봉", "앨범"], "stock_qty": [10, 20, 3],
+    }).to_excel(stock, index=False)
+
+    with pytest.raises(DuplicateKeyError):
+        merge(stock, os.path.join(sample_dir, "sales.xlsx"), tmp_path / "out", engine=engine)
+    assert not os.path.exists(tmp_path / "out" / "stock_updated.xlsx")
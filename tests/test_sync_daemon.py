@@ -0,0 +1,123 @@
+# -------------------------------------------------------
+# sync_daemon: 재시도 간격(Backoff), 상주 루프(run_daemon), 판매 입력 서명/변화 묶기
+#
+# run_daemon에는 서명과 대기를 스크립트대로 돌려주는 가짜 감시자를 넘깁니다.
+# -------------------------------------------------------
+
+import os
+import time
+import threading
+
+import pytest
+
+import sync_daemon
+from sync_daemon import Backoff, SalesChangeWatcher, run_daemon
+
+
+class FakeWatcher:
+    """
+    signature는 self.current를 돌려줍니다. wait(timeout)마다 on_wait에서 다음 서명을 꺼내 바꾸고,
+    wait_quiet는 (현재 서명, changes)를 돌려줍니다.
+    """
+
+    def __init__(self, current="v1", on_wait=(), changes=0):
+        self.sales_spec = "sales.xlsx"
+        self.notifier = None
+        self.current = current
+        self.on_wait = list(on_wait)
+        self.changes = changes
+        self.waits = []
+
+    def signature(self):
+        return self.current
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        if self.on_wait:
+            self.current = self.on_wait.pop(0)
+
+    def wait_quiet(self, debounce, max_wait, stop=None):
+        return self.current, self.changes
+
+
+def test_backoff_doubles_up_to_cap_and_resets():
+    backoff = Backoff(base=5, cap=30)
+
+    assert [backoff.failure() for _ in range(5)] == [5, 10, 20, 30, 30]
+    backoff.reset()
+    assert backoff.failures == 0 and backoff.failure() == 5
+
+
+def test_run_daemon_retries_with_backoff(capsys):
+    stop = threading.Event()
+    calls = []
+
+    def sync_once():
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise RuntimeError("upload failed")
+        stop.set()
+
+    backoff = Backoff(base=0.01, cap=0.02)
+    stats = run_daemon(FakeWatcher(), sync_once, backoff=backoff, stop=stop)
+
+    assert stats == {"syncs": 1, "failures": 2, "coalesced": 0}
+    assert backoff.failures == 0
+    assert "2회 연속" in capsys.readouterr().out
+
+
+def test_run_daemon_syncs_only_on_new_signature():
+    stop = threading.Event()
+    # 시작 서명(v1)은 이미 반영된 것으로 보고, 대기 중에 v2로 바뀐 뒤 두 번 더 바뀐 것을 한 번에 동기화
+    watcher = FakeWatcher(on_wait=["v1", "v2"], changes=2)
+    synced = []
+
+    def sync_once():
+        synced.append(watcher.current)
+        stop.set()
+
+    stats = run_daemon(watcher, sync_once, stop=stop, initial_sync=False)
+
+    assert synced == ["v2"]
+    assert stats == {"syncs": 1, "failures": 0, "coalesced": 2}
+    assert watcher.waits == [sync_daemon.IDLE_CHECK_INTERVAL] * 2
+
+
+def test_run_daemon_stops_without_syncing_when_stopped_while_debouncing():
+    stop = threading.Event()
+    watcher = FakeWatcher()
+
+    def wait_quiet(debounce, max_wait, stop_event=None):
+        stop.set()
+        return watcher.current, 0
+
+    watcher.wait_quiet = wait_quiet
+
+    assert run_daemon(watcher, lambda: pytest.fail("synced after stop"), stop=stop)["syncs"] == 0
+
+
+def test_watcher_signature_and_wait_quiet(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_daemon, "POLL_INTERVAL", 0.02)
+    shards = tmp_path / "sales"
+    shards.mkdir()
+    watcher = SalesChangeWatcher(str(shards / "*.xlsx"))
+    try:
+        assert watcher.signature() == ()
+        (shards / "store01.xlsx").write_bytes(b"a")
+        first = watcher.signature()
+        assert [os.path.basename(p) for p, _, _ in first] == ["store01.xlsx"]
+
+        # 다른 스레드가 파일을 연달아 쓰는 동안 기다리면, 조용해진 뒤의 서명 하나로 묶임
+        def writer():
+            for i in range(3):
+                time.sleep(0.05)
+                (shards / f"store0{i + 2}.xlsx").write_bytes(b"b")
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        signature, changes = watcher.wait_quiet(debounce=0.3, max_wait=5)
+        thread.join()
+        assert len(signature) == 4 and changes >= 1
+        assert signature == watcher.signature()
+    finally:
+        watcher.close()
@@ -0,0 +1,86 @@
+# -------------------------------------------------------
+# sync_fingerprint: 판매 입력/재고 지문과 지문 저장소(기록 → 다음 실행에서 변경 없음 판단)
+# -------------------------------------------------------
+
+import os
+import json
+import shutil
+
+import pandas as pd
+
+from sync_fingerprint import (FINGERPRINT_VERSION, FingerprintStore, input_fingerprint, inputs_unchanged,
+                              stock_fingerprint, sync_unchanged)
+
+
+def test_input_fingerprint_follows_sales_and_ledger(sample_dir, tmp_path):
+    sales = str(tmp_path / "sales.xlsx")
+    shutil.copy(os.path.join(sample_dir, "sales.xlsx"), sales)
+    ledger = tmp_path / "ledger.json"
+
+    without_ledger = input_fingerprint(sales, str(ledger))
+    assert input_fingerprint(sales, str(ledger)) == without_ledger
+    # 장부가 생기거나 바뀌면 다른 지문
+    ledger.write_text('{"last_sale_date": null}', encoding="utf-8")
+    with_ledger = input_fingerprint(sales, str(ledger))
+    assert with_ledger != without_ledger
+    ledger.write_text('{"last_sale_date": "2025-03-28T12:00:00"}', encoding="utf-8")
+    assert input_fingerprint(sales, str(ledger)) != with_ledger
+    # 판매 파일 내용이 바뀌면 다른 지문
+    shutil.copy(os.path.join(sample_dir, "stock.xlsx"), sales)
+    assert input_fingerprint(sales) != input_fingerprint(os.path.join(sample_dir, "sales.xlsx"))
+
+
+def test_input_fingerprint_covers_every_shard(sample_dir, tmp_path):
+    shards = tmp_path / "sales"
+    shards.mkdir()
+    shutil.copy(os.path.join(sample_dir, "sales.xlsx"), shards / "store01.xlsx")
+    before = input_fingerprint(str(shards))
+
+    shutil.copy(os.path.join(sample_dir, "sales.xlsx"), shards / "store02.xlsx")
+
+    assert input_fingerprint(str(shards)) != before
+
+
+def test_stock_fingerprint_compares_cell_values(tmp_path):
+    df = pd.DataFrame({"product_id": [1, 2], "product_name": ["응원봉", "앨범"], "stock_qty": [9, 48]})
+    ints = str(tmp_path / "ints.xlsx")
+    floats = str(tmp_path / "floats.xlsx")
+    changed = str(tmp_path / "changed.xlsx")
+    df.to_excel(ints, index=False)
+    df.astype({"stock_qty": float}).to_excel(floats, index=False, sheet_name="다른 이름")
+    df.assign(stock_qty=[9, 47]).to_excel(changed, index=False)
+
+    # 1과 1.0은 같은 값, 시트 이름/파일 메타데이터는 지문에 들어가지 않음
+    assert stock_fingerprint(ints) == stock_fingerprint(floats)
+    assert stock_fingerprint(ints) != stock_fingerprint(changed)
+
+
+def test_store_records_and_detects_no_change(tmp_path):
+    store = FingerprintStore(str(tmp_path / "state" / "fingerprints.json"))
+
+    assert store.get("8931") is None
+    assert not inputs_unchanged(store.get("8931"), "in-1")
+    store.record("8931", "in-1", "stock-1")
+    store.record("1234", "in-9", "stock-9")
+
+    last = store.get("8931")
+    assert last["inputs"] == "in-1" and last["stock"] == "stock-1" and last["updated_at"]
+    assert inputs_unchanged(last, "in-1")
+    assert not inputs_unchanged(last, "in-2")
+    assert sync_unchanged(last, "in-1", "stock-1")
+    # 다른 사람이 WPS에서 재고를 고쳤으면 입력이 같아도 다시 병합
+    assert not sync_unchanged(last, "in-1", "stock-2")
+    assert not sync_unchanged(None, "in-1", "stock-1")
+    assert store.get("1234")["inputs"] == "in-9"
+    assert not [n for n in os.listdir(tmp_path / "state") if n.endswith(".tmp")]
+
+
+def test_store_ignores_other_version(tmp_path):
+    path = tmp_path / "fingerprints.json"
+    path.write_text(json.dumps({"version": FINGERPRINT_VERSION + 1, "docs": {"8931": {"inputs": "x"}}}),
+                    encoding="utf-8")
+    store = FingerprintStore(str(path))
+
+    assert store.get("8931") is None
+    store.record("8931", "in-1", "stock-1")
+    assert json.loads(path.read_text(encoding="utf-8"))["version"] == FINGERPRINT_VERSION
@@ -0,0 +1,118 @@
+# -------------------------------------------------------
+# sync_metrics: span 기록(JSON Lines)과 Prometheus textfile 출력
+# -------------------------------------------------------
+
+import os
+import json
+import threading
+
+import pytest
+
+from sync_metrics import SyncTracer, span, stage_totals, write_prometheus
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _prom_samples(path):
+    """주석을 뺀 "이름{라벨} 값" 줄들을 {이름{라벨}: 값} dict로."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if not line.startswith("#")]
+    return dict(line.rsplit(" ", 1) for line in lines)
+
+
+def test_span_without_active_tracer_is_noop():
+    with span("download") as s:
+        s["bytes"] = 10
+    assert s == {"bytes": 10}
+
+
+def test_tracer_writes_one_jsonl_line_per_span(tmp_path, capsys):
+    jsonl = str(tmp_path / "spans.jsonl")
+    tracer = SyncTracer(jsonl, labels={"doc": "8931"})
+
+    with tracer.activate():
+        with span("download", method="direct") as s:
+            s["bytes"] = 2048
+        with pytest.raises(ValueError):
+            with span("parse_sales", reader="stream"):
+                raise ValueError("bad sheet")
+        with span("wait", wait="user_center"):
+            pass
+    # 활성화가 끝나면 기록하지 않음
+    with span("upload"):
+        pass
+    totals = tracer.finish(success=False)
+
+    lines = _read_jsonl(jsonl)
+    assert [e["stage"] for e in lines] == ["download", "parse_sales", "wait", "total"]
+    assert {e["run_id"] for e in lines} == {tracer.run_id}
+    assert all(e["doc"] == "8931" for e in lines)
+    assert lines[0]["method"] == "direct" and lines[0]["bytes"] == 2048 and lines[0]["status"] == "ok"
+    assert lines[1]["status"] == "error" and lines[1]["reader"] == "stream"
+    assert lines[3]["status"] == "error"
+    assert set(totals) == {"download", "parse_sales", "wait", "total"}
+    # 요약에서 중첩 span(wait)은 단계가 아니라 대기 합계로 출력
+    summary = capsys.readouterr().out
+    assert "대기" in summary and "(1회)" in summary
+
+
+def test_wrap_records_from_other_thread():
+    tracer = SyncTracer()
+
+    def parse():
+        with span("parse_sales"):
+            pass
+
+    thread = threading.Thread(target=tracer.wrap(parse))
+    thread.start()
+    thread.join()
+
+    assert [e["stage"] for e in tracer.spans] == ["parse_sales"]
+
+
+def test_noop_outcome_is_recorded(tmp_path):
+    prom = str(tmp_path / "metrics" / "wps_sync_doc.prom")
+    tracer = SyncTracer(prom_path=prom)
+    with tracer.activate():
+        with span("change_check", outcome="noop"):
+            pass
+    tracer.finish(success=True)
+
+    assert tracer.spans[-1]["outcome"] == "noop"
+    samples = _prom_samples(prom)
+    assert samples["wps_sync_last_run_noop{}"] == "1"
+    assert samples["wps_sync_last_run_success{}"] == "1"
+
+
+def test_write_prometheus_output(tmp_path):
+    spans = [
+        {"stage": "download", "seconds": 1.5, "bytes": 4096, "peak_rss_mb": 100.0},
+        {"stage": "parse_sales", "seconds": 0.25, "rows": 1200, "peak_rss_mb": 150.0},
+        {"stage": "parse_sales", "seconds": 0.25, "rows": 1300, "peak_rss_mb": 120.0},
+        {"stage": "wait", "wait": "user_center", "seconds": 0.5, "peak_rss_mb": None},
+    ]
+    prom = str(tmp_path / "wps_sync.prom")
+
+    write_prometheus(prom, spans, labels={"doc": 'a"b'}, success=False)
+
+    with open(prom, encoding="utf-8") as f:
+        text = f.read()
+    assert "# TYPE wps_sync_stage_duration_seconds gauge" in text
+    samples = _prom_samples(prom)
+    assert samples['wps_sync_stage_duration_seconds{doc="a\\"b",stage="download"}'] == "1.5000"
+    assert samples['wps_sync_stage_duration_seconds{doc="a\\"b",stage="parse_sales"}'] == "0.5000"
+    assert samples['wps_sync_stage_rows{doc="a\\"b",stage="parse_sales"}'] == "1300"
+    assert samples['wps_sync_stage_bytes{doc="a\\"b",stage="download"}'] == "4096"
+    assert samples['wps_sync_wait_seconds{doc="a\\"b",wait="user_center"}'] == "0.5000"
+    assert samples['wps_sync_peak_rss_bytes{doc="a\\"b"}'] == str(150 * 1024 * 1024)
+    assert samples['wps_sync_last_run_success{doc="a\\"b"}'] == "0"
+    assert not any(name.startswith("wps_sync_last_run_noop") for name in samples)
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+
+def test_stage_totals_adds_repeated_stages():
+    spans = [{"stage": "wait", "seconds": 0.2}, {"stage": "wait", "seconds": 0.3}, {"stage": "login", "seconds": 1.0}]
+    assert stage_totals(spans) == {"wait": 0.5, "login": 1.0}
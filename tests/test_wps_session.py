@@ -0,0 +1,163 @@
+# -------------------------------------------------------
+# wps_session: 쿠키 파일 저장/복원과 로그인 상태 확보(프로필 / 쿠키 / 새 로그인)
+#
+# CDP Network.getAllCookies/setCookies와 add_cookie만 흉내 내는 가짜 드라이버를 씁니다.
+# -------------------------------------------------------
+
+import os
+import json
+import stat
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import wps_session
+from wps_session import cookie_site, save_cookies, load_cookies, ensure_logged_in
+
+
+class CookieJarDriver:
+    """
+    브라우저 쿠키 저장소(CDP 형식)를 가진 가짜 드라이버.
+    cdp=False면 CDP 명령이 실패해 get_cookies/add_cookie(현재 페이지 도메인만)로 대체됩니다.
+    """
+
+    def __init__(self, cookies=(), cdp=True, page_domain="account.wps.com"):
+        self.jar = [dict(c) for c in cookies]
+        self.cdp = cdp
+        self.page_domain = page_domain
+        self.visited = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        if not self.cdp:
+            raise WebDriverException("CDP unavailable")
+        if cmd == "Network.getAllCookies":
+            return {"cookies": [dict(c) for c in self.jar]}
+        if cmd == "Network.setCookies":
+            self.jar.extend(dict(c) for c in params["cookies"])
+            return {}
+        raise AssertionError(cmd)
+
+    def get_cookies(self):
+        return [c for c in self.jar if c["domain"].lstrip(".") == self.page_domain]
+
+    def add_cookie(self, cookie):
+        if cookie["domain"].lstrip(".") != self.page_domain:
+            raise WebDriverException("invalid cookie domain")
+        self.jar.append(dict(cookie))
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def refresh(self):
+        self.visited.append("refresh")
+
+
+def _cookie(name, domain, **extra):
+    return dict({"name": name, "value": f"{name}-value", "domain": domain, "path": "/"}, **extra)
+
+
+def test_cookie_site():
+    assert cookie_site("https://account.wps.com/") == "wps.com"
+    assert cookie_site("https://sg.docs.wps.com/p/1") == "wps.com"
+    assert cookie_site("http://127.0.0.1:8123/account") == "127.0.0.1"
+    assert cookie_site("http://localhost:8000/") == "localhost"
+
+
+def test_save_cookies_keeps_site_cookies_owner_only(tmp_path):
+    driver = CookieJarDriver([
+        _cookie("sid", ".wps.com", expires=time.time() + 3600, sameSite="Lax"),
+        _cookie("doc", "docs.wps.com", session=True, expires=-1, sameSite="Unspecified"),
+        _cookie("ads", "tracker.example"),
+    ])
+    cookie_file = str(tmp_path / "cookies.json")
+
+    assert save_cookies(driver, cookie_file, cookie_site("https://account.wps.com/")) == 2
+    with open(cookie_file, encoding="utf-8") as f:
+        saved = {c["name"]: c for c in json.load(f)}
+    assert set(saved) == {"sid", "doc"}
+    assert saved["sid"]["sameSite"] == "Lax" and "expiry" in saved["sid"]
+    assert "sameSite" not in saved["doc"] and "expiry" not in saved["doc"]
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(cookie_file).st_mode) == 0o600
+
+
+def _cookie_file(tmp_path, cookies):
+    path = str(tmp_path / "cookies.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cookies, f)
+    return path
+
+
+def test_load_cookies_adds_only_missing_unexpired(tmp_path):
+    cookie_file = _cookie_file(tmp_path, [
+        _cookie("sid", ".wps.com", expiry=int(time.time()) + 3600),
+        _cookie("old", ".wps.com", expiry=int(time.time()) - 10),
+        _cookie("doc", "docs.wps.com"),
+    ])
+    # 영구 프로필에 이미 있는 doc 쿠키는 덮어쓰지 않음
+    driver = CookieJarDriver([dict(_cookie("doc", "docs.wps.com"), value="newer")])
+
+    assert load_cookies(driver, cookie_file) == 1
+    assert sorted(c["name"] for c in driver.jar) == ["doc", "sid"]
+    assert [c["value"] for c in driver.jar if c["name"] == "doc"] == ["newer"]
+    assert load_cookies(driver, str(tmp_path / "missing.json")) == 0
+
+
+def test_load_cookies_without_cdp_adds_page_domain_only(tmp_path):
+    cookie_file = _cookie_file(tmp_path, [
+        _cookie("sid", "account.wps.com"),
+        _cookie("doc", "docs.wps.com"),
+    ])
+    driver = CookieJarDriver(cdp=False)
+
+    assert load_cookies(driver, cookie_file) == 1
+    assert [c["name"] for c in driver.jar] == ["sid"]
+
+
+@pytest.fixture
+def user_center(monkeypatch):
+    """wait_for_dom을 바꿔, state["logged_in"]이 True일 때만 'User Center'가 나타나게 합니다."""
+    state = {"logged_in": False, "login_on_wait": False, "waits": []}
+
+    def fake_wait_for_dom(driver, by, selector, text=None, max_wait=10, label=None):
+        state["waits"].append(label)
+        if label == "user_center" and state["login_on_wait"]:
+            state["logged_in"] = True
+        if not state["logged_in"]:
+            raise TimeoutException(label)
+
+    monkeypatch.setattr(wps_session, "wait_for_dom", fake_wait_for_dom)
+    return state
+
+
+def test_ensure_logged_in_reuses_profile_session(tmp_path, user_center):
+    user_center["logged_in"] = True
+    driver = CookieJarDriver([_cookie("sid", ".wps.com")])
+    cookie_file = str(tmp_path / "cookies.json")
+
+    assert ensure_logged_in(driver, cookie_file=cookie_file) == "profile"
+    assert driver.visited == [wps_session.ACCOUNT_URL]
+    assert os.path.exists(cookie_file)
+
+
+def test_ensure_logged_in_restores_cookie_file(tmp_path, user_center):
+    user_center["logged_in"] = True
+    driver = CookieJarDriver()
+
+    mode = ensure_logged_in(driver, cookie_file=_cookie_file(tmp_path, [_cookie("sid", ".wps.com")]))
+
+    assert mode == "cookies"
+    assert driver.visited == [wps_session.ACCOUNT_URL, "refresh"]
+
+
+def test_ensure_logged_in_waits_for_manual_login(tmp_path, user_center):
+    user_center["login_on_wait"] = True
+
+    assert ensure_logged_in(CookieJarDriver(), login_wait=1) == "login"
+    assert user_center["waits"] == ["session_check", "user_center"]
+
+
+def test_ensure_logged_in_times_out(user_center):
+    with pytest.raises(TimeoutException):
+        ensure_logged_in(CookieJarDriver(), login_wait=1)
@@ -0,0 +1,106 @@
+# -------------------------------------------------------
+# xlsx_patch: 바뀐 stock_qty 셀만 원본 패키지에 패치하는지
+#
+# 원본의 다른 zip 항목(customXml 등) 유지, 빈 행/숨김 행이 있는 시트의 행 번호, 빈 재고 칸(NaN),
+# 패치할 수 없을 때(수식 셀) to_excel로 대체하는 경로를 확인합니다.
+# -------------------------------------------------------
+
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xlsx_patch import write_stock_patch, patch_sheet_xml, XlsxPatchError
+from xlsx_stream import iter_xlsx_rows
+
+
+def _names(path):
+    with zipfile.ZipFile(path) as zf:
+        return set(zf.namelist())
+
+
+def _replace_in_sheet(src, dst, old, new):
+    """src 워크북의 첫 시트 XML에서 old 바이트를 new로 바꿔 dst에 저장합니다."""
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                assert data.count(old) == 1
+                data = data.replace(old, new)
+            zout.writestr(item, data)
+    return dst
+
+
+@pytest.fixture
+def spaced_stock(tmp_path):
+    """3행이 비어 있고(XML에 없음) 5행은 셀 없는 숨김 행, 6행의 stock_qty가 빈 칸인 재고 시트."""
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["product_id", "product_name", "stock_qty"])
+    ws.append([1, "응원봉", 9])
+    ws["A4"], ws["B4"], ws["C4"] = 2, "앨범", 48
+    ws.row_dimensions[5].hidden = True
+    ws["A6"], ws["B6"] = 3, "굿즈"
+    ws["A7"], ws["B7"], ws["C7"] = 4, "포토카드", 10
+    path = str(tmp_path / "stock.xlsx")
+    wb.save(path)
+    return path
+
+
+def test_patch_writer_keeps_package(sample_dir, expected, merge, tmp_path):
+    stock = os.path.join(sample_dir, "stock.xlsx")
+
+    _, updated = merge(stock, os.path.join(sample_dir, "sales.xlsx"), tmp_path / "out", writer="patch")
+
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+    assert "customXml/item1.xml" in _names(updated)
+    assert _names(updated) == _names(stock)
+
+
+def test_patch_uses_sheet_row_numbers(spaced_stock, tmp_path):
+    old = pd.read_excel(spaced_stock)["stock_qty"]
+    new = old.copy()
+    new[old == 48] = 40
+    new[old == 10] = 7
+    updated = str(tmp_path / "stock_updated.xlsx")
+
+    assert write_stock_patch(spaced_stock, updated, old, new) == 2
+
+    pd.testing.assert_series_equal(pd.read_excel(updated)["stock_qty"], new)
+    numbered = dict(iter_xlsx_rows(updated, row_numbers=True))
+    assert numbered[4][2] == 40
+    assert numbered[7][2] == 7
+
+
+def test_blank_stock_cells_are_not_updates(spaced_stock, tmp_path):
+    old = pd.read_excel(spaced_stock)["stock_qty"]
+    assert old.isna().sum() == 3
+
+    assert write_stock_patch(spaced_stock, str(tmp_path / "stock_updated.xlsx"), old, old.copy()) == 0
+
+
+def test_blank_cell_checks_old_value():
+    xml = b'<row r="2"><c r="C2" s="1"/></row><row r="3"><c r="C3"><v>5</v></c></row>'
+
+    assert b'<c r="C2" s="1"><v>4</v></c>' in patch_sheet_xml(xml, {"C2": (np.nan, 4)})
+    with pytest.raises(XlsxPatchError):
+        patch_sheet_xml(xml, {"C3": (np.nan, 4)})
+    with pytest.raises(XlsxPatchError):
+        patch_sheet_xml(xml, {"C3": (5, np.nan)})
+
+
+def test_patch_writer_falls_back_to_to_excel(sample_dir, expected, merge, tmp_path):
+    # stock_qty 셀 하나를 수식 셀(값은 그대로)로 바꾼 재고 → 셀 패치 불가
+    stock = _replace_in_sheet(
+        os.path.join(sample_dir, "stock.xlsx"), str(tmp_path / "stock.xlsx"),
+        b'<c r="C2" s="2"><v>9</v></c>', b'<c r="C2" s="2"><f>4+5</f><v>9</v></c>',
+    )
+
+    _, updated = merge(stock, os.path.join(sample_dir, "sales.xlsx"), tmp_path / "out", writer="patch")
+
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+    # to_excel로 새로 쓴 파일에는 원본의 customXml이 없음
+    assert "customXml/item1.xml" not in _names(updated)
@@ -0,0 +1,78 @@
+# -------------------------------------------------------
+# xlsx_stream: 스트리밍 리더가 pd.read_excel과 같은 값/합계를 내는지
+#
+# sample_data의 stock.xlsx + sales.xlsx를 병합하면 리더와 관계없이 stock_updated.xlsx가 나와야 합니다.
+# -------------------------------------------------------
+
+import os
+
+import pandas as pd
+import pytest
+
+from xlsx_stream import iter_xlsx_rows, stream_sales_aggregate
+
+READERS = ("pandas", "stream")
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_reader_reproduces_sample(sample_dir, sample_sales, expected, merge, tmp_path, reader):
+    rows, updated = merge(os.path.join(sample_dir, "stock.xlsx"), os.path.join(sample_dir, "sales.xlsx"),
+                          tmp_path / "out", reader=reader)
+
+    assert rows == len(sample_sales)
+    pd.testing.assert_frame_equal(pd.read_excel(updated), expected)
+
+
+def test_stream_aggregate_matches_groupby(sample_dir, sample_sales):
+    totals, rows = stream_sales_aggregate(os.path.join(sample_dir, "sales.xlsx"))
+
+    assert rows == len(sample_sales)
+    assert totals == sample_sales.groupby("product_id")["quantity_sold"].sum().to_dict()
+
+
+def test_rows_match_read_excel_values(sample_dir):
+    path = os.path.join(sample_dir, "stock.xlsx")
+    header, *rows = iter_xlsx_rows(path)
+
+    df = pd.read_excel(path)
+    assert header == list(df.columns)
+    assert rows == df.values.tolist()
+
+
+@pytest.fixture
+def gap_sheet(tmp_path):
+    """중간에 XML에 없는 빈 행(3행)과 셀 없는 숨김 행(5행)이 있는 시트."""
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["product_id", "quantity_sold"])
+    ws["A2"], ws["B2"] = 1, 2
+    ws["A4"], ws["B4"] = 2, 3
+    ws.row_dimensions[5].hidden = True
+    ws["A6"], ws["B6"] = 1, 4
+    path = str(tmp_path / "gaps.xlsx")
+    wb.save(path)
+    return path
+
+
+def test_blank_rows_keep_read_excel_positions(gap_sheet):
+    header, *rows = iter_xlsx_rows(gap_sheet)
+
+    df = pd.read_excel(gap_sheet)
+    assert header == list(df.columns)
+    assert len(rows) == len(df)
+    for row, (_, expected_row) in zip(rows, df.iterrows()):
+        values = row + [None] * (len(df.columns) - len(row))
+        assert values == [None if pd.isna(v) else v for v in expected_row]
+
+
+def test_row_numbers_are_sheet_rows(gap_sheet):
+    numbered = list(iter_xlsx_rows(gap_sheet, row_numbers=True))
+
+    assert [number for number, _ in numbered] == [1, 2, 3, 4, 5, 6]
+    assert numbered[2] == (3, [])
+    assert numbered[3] == (4, [2, 3])
+
+
+def test_stream_aggregate_skips_blank_rows(gap_sheet):
+    assert stream_sales_aggregate(gap_sheet) == ({1: 6, 2: 3}, 3)
@@ -0,0 +1,95 @@
+# -------------------------------------------------------
+# 파일 업로드: input[type=file] 직접 지정
+#
+# 기존 업로드는 "File" 버튼(label.upload-file)을 눌러 OS 파일 대화상자를 연 뒤,
+# AppleScript(type_slowly_mac) / pywinauto(type_slowly_windows)로 경로를 한 글자씩 입력했습니다.
+# 60자 경로면 8초 이상 걸리고, Linux나 headless에서는 아예 동작하지 않습니다.
+#
+# 이 모듈은 대화상자를 열지 않고, label.upload-file 뒤에 있는 실제 <input type="file">에
+# send_keys로 파일 경로를 바로 넣습니다(ChromeDriver가 파일을 브라우저로 전달).
+# 입력 요소를 찾지 못하면 False를 반환하므로, 호출하는 쪽에서 OS 대화상자 방식으로 대체합니다.
+# -------------------------------------------------------
+
+import os
+
+from selenium.common.exceptions import (
+    ElementNotInteractableException, NoSuchElementException, TimeoutException, WebDriverException
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# "File" 메뉴 항목
+FILE_LABEL_SELECTOR = "label.upload-file"
+
+# 숨겨진 input을 잠시 보이게 만드는 스크립트(send_keys가 상호작용 불가로 거절될 때만 사용)
+_REVEAL_INPUT_JS = """
+const el = arguments[0];
+el.style.display = 'block';
+el.style.visibility = 'visible';
+el.style.opacity = 1;
+el.removeAttribute('hidden');
+"""
+
+
+def find_file_input(driver, max_wait=10):
+    """
+    label.upload-file에 연결된 <input type="file">을 찾습니다.
+
+    찾는 순서:
+    1) label의 for 속성이 가리키는 id의 input
+    2) label 안에 들어 있는 input[type=file]
+    3) 페이지 전체에서 첫 번째 input[type=file]
+
+    :return: WebElement 또는 None.
+    """
+
+    def locate(d):
+        labels = d.find_elements(By.CSS_SELECTOR, FILE_LABEL_SELECTOR)
+        for label in labels:
+            target_id = label.get_attribute("for")
+            if target_id:
+                found = d.find_elements(By.ID, target_id)
+                if found and found[0].get_attribute("type") == "file":
+                    return found[0]
+            inner = label.find_elements(By.CSS_SELECTOR, "input[type=file]")
+            if inner:
+                return inner[0]
+        inputs = d.find_elements(By.CSS_SELECTOR, "input[type=file]")
+        return inputs[0] if inputs else False
+
+    try:
+        return WebDriverWait(driver, max_wait).until(locate)
+    except TimeoutException:
+        return None
+
+
+def upload_via_file_input(driver, file_path, max_wait=10):
+    """
+    OS 대화상자 없이 <input type="file">에 파일 경로를 직접 지정해 업로드를 시작합니다.
+
+    1) find_file_input으로 입력 요소를 찾습니다(label.upload-file은 클릭하지 않음 → 대화상자가 뜨지 않음).
+    2) 절대경로를 send_keys로 넣습니다. 요소가 숨겨져 있어 거절되면 잠시 보이게 만든 뒤 다시 시도합니다.
+    3) 업로드 완료는 호출하는 쪽에서 page_ready.wait_for_upload_complete로 기다립니다.
+
+    :param driver: Selenium WebDriver 객체.
+    :param file_path: 업로드할 파일 경로.
+    :param max_wait: 입력 요소를 찾는 최대 시간(초).
+    :return: 경로를 지정했으면 True, 입력 요소를 찾지 못했거나 실패하면 False(→ OS 대화상자로 대체).
+    """
+
+    file_input = find_file_input(driver, max_wait)
+    if file_input is None:
+        return False
+
+    path = os.path.abspath(file_path)
+    try:
+        file_input.send_keys(path)
+    except ElementNotInteractableException:
+        driver.execute_script(_REVEAL_INPUT_JS, file_input)
+        try:
+            file_input.send_keys(path)
+        except WebDriverException:
+            return False
+    except (NoSuchElementException, WebDriverException):
+        return False
+    return True
@@ -25,16 +25,19 @@ import shutil
 #    - sys.argv : 명령줄 인수, sys.exit() : 인터프리터 종료, sys.path : 모듈 검색 경로 등.
 import sys
 
-# 6) subprocess : 새로운 프로세스를 생성하고 관리할 수 있는 모듈입니다.
+# 6) signal : 프로세스 시그널(SIGTERM 등)을 받았을 때 실행할 처리기를 등록합니다.
+#    - 상주 모드에서 서비스 관리자가 보내는 종료 요청에도 드라이버를 닫고 끝나도록 씁니다.
+import signal
+
+# 7) asyncio : 이벤트 루프로 여러 작업을 동시에 기다리는 표준 라이브러리입니다.
+#    - 판매 파일 준비를 크롬 시작/로그인/다운로드와 겹쳐 실행할 때(asyncio.to_thread) 씁니다.
+import asyncio
+
+# 8) subprocess : 새로운 프로세스를 생성하고 관리할 수 있는 모듈입니다.
 #    - 예: subprocess.run(["ls", "-l"]) → OS 명령 실행,
 #      명령의 결과, 표준 입출력 등을 파이썬에서 제어 가능.
 import subprocess
 
-# 7) pandas : 데이터 분석을 손쉽게 해주는 핵심 라이브러리입니다.
-#    - 엑셀이나 CSV 파일 로드(pd.read_excel, pd.read_csv), 
-#      데이터프레임을 이용한 필터링, 그룹화, 결합 등 고급 연산을 지원.
-import pandas as pd
-
 # -------------------------------------------------------
 # 셀레니움(Selenium) 관련 임포트.
 # 웹드라이버를 이용해 브라우저를 자동 제어(크롤링, 테스트 자동화)하는 데 쓰입니다.
@@ -49,12 +52,47 @@ from selenium.webdriver.common.by import By
 # Options : Chrome 브라우저 실행 시 특정 옵션(예: headless 모드, 브라우저 창 크기 등)을 설정할 때 사용.
 from selenium.webdriver.chrome.options import Options
 
-# WebDriverWait, expected_conditions(EC) : 
-#    웹 자동화 시, 특정 요소가 표시될 때까지 대기하거나(element_to_be_clickable),
-#    텍스트가 특정 값이 될 때까지 대기하는 등의 동기화 제어를 위해 사용.
-#    즉, 페이지 로딩 지연, AJAX 갱신 등을 고려해 안정적인 테스트/크롤링이 가능케 함.
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+# -------------------------------------------------------
+# 같은 폴더의 보조 모듈
+# -------------------------------------------------------
+
+# download_watch : CDP 다운로드 이벤트 + inotify로, 이번 세션이 받은 파일을 완료 즉시 찾아주는 감시자.
+from download_watch import DownloadWatcher
+
+# dom_wait : WebDriverWait 폴링 대신 MutationObserver로 요소/텍스트가 나타나는 순간 반환하는 대기 함수.
+from dom_wait import wait_for_dom
+
+# page_ready : 고정 sleep 대신 편집기 준비/네트워크 유휴/업로드 완료 신호를 기다리는 대기 함수.
+from page_ready import wait_for_editor_ready, wait_for_upload_complete
+
+# wps_session : 영구 프로필/쿠키 파일로 로그인 세션을 이어 가고, 만료되었을 때만 로그인을 기다리는 모듈.
+from wps_session import ensure_logged_in, save_cookies, cookie_site
+
+# browser_lean : headless/리소스 차단 경량 모드와 크롬 프로세스 트리 RSS/CPU 측정.
+from browser_lean import apply_lean_options, lean_prefs, block_heavy_resources, report_browser_usage
+
+# upload_backend : OS 파일 대화상자 없이 페이지의 input[type=file]에 경로를 직접 넣는 업로드.
+from upload_backend import upload_via_file_input
+
+# direct_export : 한 번 기록해 둔 내보내기 URL을 로그인 쿠키로 직접 요청해, 편집기를 열지 않고 xlsx를 받는 모듈.
+from direct_export import fetch_stock_direct, record_export_request
+
+# batch_sync : 여러 (문서, 판매 파일) 작업을 브라우저 워커 풀로 동시에 처리하는 배치 모드.
+from batch_sync import load_sync_jobs, doc_key, run_sync_pool, report_sync_results
+
+# run_dirs : 실행(작업)마다 빈 다운로드 폴더를 만들어 받은 파일을 정확히 찾고, 오래된 폴더는 보존 정책으로 정리.
+from run_dirs import create_run_dir, finish_run_dir, find_single_download, cleanup_run_dirs
+
+# sync_metrics : 단계별 span(소요 시간/행 수/파일 크기/최대 RSS)을 JSON Lines와 Prometheus textfile로 기록.
+from sync_metrics import SyncTracer, span
+
+# 판다스를 쓰는 보조 모듈은 처음 쓰는 함수 안에서 import합니다.
+# (stock_cli.py의 download/upload 명령이 판다스를 로드하지 않고 바로 시작하도록)
+#   stock_merge      : 판매 준비(prepare_local_sales)와 재고+판매 병합(merge_local_sales_with_downloaded_stock).
+#                      스트리밍 리더, 판매 반영 장부, 셀 패치 writer, NumPy 엔진, 시트 스키마, 판매 샤드 집계를 씁니다.
+#   sales_ledger     : 업로드가 끝난 뒤 판매 반영 장부 확정(commit_ledger).
+#   sync_fingerprint : 판매 입력/장부/재고 셀 값의 지문을 문서별로 남겨, 바뀐 것이 없으면 병합/업로드를 건너뛰는 변경 감지.
+#   sync_daemon      : 판매 폴더를 inotify로 감시하다가 변화를 debounce로 묶어 동기화하는 상주 루프.
 
 # ---------------------------------
 # 경로 설정
@@ -62,21 +100,162 @@ from selenium.webdriver.support import expected_conditions as EC
 DOWNLOAD_DIR = "/Users/hyeonuk/Downloads"
 # 로컬 판매 파일(sales.xlsx)을 기본으로 Downloads 폴더에 두도록 설정합니다.
 # 필요에 따라 다른 디렉터리를 지정할 수도 있습니다.
+# POS가 CSV나 Arrow IPC로 내보내면 .csv / .arrow / .feather 경로를 그대로 지정하면 됩니다(엑셀 파싱 없이 읽음).
 LOCAL_SALES_PATH = os.path.join(DOWNLOAD_DIR, "sales.xlsx")
+# LOCAL_SALES_PATH에는 매장/일자별 판매 파일이 모인 폴더나 glob 패턴(예: ".../sales/*.xlsx")을 줄 수도 있습니다.
+# 그 경우 파일마다 워커 프로세스에서 집계한 뒤 합칩니다. 워커 수(None이면 CPU 수):
+SALES_SHARD_WORKERS = None
+# 판매 파일 읽기/합산을 크롬 시작·로그인·재고 다운로드와 동시에 진행(메인 로직).
+# 재고가 도착하면 미리 합산한 판매로 바로 차감합니다. False면 예전처럼 다운로드가 끝난 뒤 차례로 읽습니다.
+OVERLAP_SALES_PREP = True
+# 판매 파일 리더: "pandas"(pd.read_excel) 또는 "stream"(xlsx_stream 스트리밍 집계).
+# 판매 행이 수십만 건 이상이면 "stream"이 파싱 시간과 메모리를 크게 줄여줍니다.
+SALES_READER = "pandas"
+# 판매 반영 장부 경로. 이미 반영한 판매를 다시 차감하지 않도록 마지막 sale_date를 기록합니다.
+# None으로 두면 예전처럼 매번 판매 파일 전체를 반영합니다.
+SALES_LEDGER_PATH = os.path.join(DOWNLOAD_DIR, "sales_ledger.json")
+# 파싱된 엑셀(DataFrame) 캐시 폴더. 내용이 바뀌지 않은 엑셀은 다시 파싱하지 않습니다. None이면 사용 안 함.
+FRAME_CACHE_DIR = os.path.join(DOWNLOAD_DIR, ".frame_cache")
+# stock_updated.xlsx 저장 방식: "patch"(원본 복사 + 바뀐 셀만 수정, WPS 서식 유지) 또는 "openpyxl"(to_excel 전체 재작성).
+STOCK_WRITER = "patch"
+# 판매 차감 엔진: "numpy"(상품 인덱스 + np.bincount, 정수 product_id가 아니면 자동으로 pandas) 또는 "pandas"(groupby + merge).
+MERGE_ENGINE = "numpy"
+# 실행별 전용 다운로드 폴더들의 상위 폴더. 매 실행은 여기 아래 빈 폴더에 받고, 그 폴더에서 병합/업로드합니다.
+RUNS_DIR = os.path.join(DOWNLOAD_DIR, ".wps_runs")
+# 보존 정책: 최근 RUN_DIR_KEEP개는 항상 남기고, 그 밖에 RUN_DIR_MAX_AGE_HOURS시간이 지난 실행 폴더는 삭제
+RUN_DIR_KEEP = 5
+RUN_DIR_MAX_AGE_HOURS = 24
+# 단계별 span 기록(JSON Lines, 실행마다 덧붙임)과 Prometheus textfile collector 폴더(문서마다 wps_sync_<문서키>.prom).
+# None이면 기록하지 않습니다.
+METRICS_JSONL = os.path.join(DOWNLOAD_DIR, "sync_spans.jsonl")
+METRICS_PROM_DIR = os.path.join(DOWNLOAD_DIR, "metrics")
+# 문서별로 마지막 성공 동기화의 지문(판매 입력/장부 내용, 재고 셀 값)을 남기는 파일.
+# 바뀐 것이 없으면 병합/저장/업로드를 건너뛰고 no-op으로 기록합니다. None이면 매번 끝까지 실행합니다.
+SYNC_FINGERPRINT_FILE = os.path.join(DOWNLOAD_DIR, "sync_fingerprints.json")
+
+# ---------------------------------
+# 대기 설정
+# ---------------------------------
+# 페이지 로드 전략: "normal"(모든 리소스 로드까지 대기) 또는 "eager"(DOMContentLoaded에서 바로 진행).
+# eager로 두고, 필요한 준비 신호는 page_ready의 함수로 따로 기다립니다.
+PAGE_LOAD_STRATEGY = "eager"
+# 스프레드시트 편집기 준비 대기 상한(초). 버튼이 준비된 뒤의 네트워크 유휴는 page_ready.EDITOR_IDLE_MAX_WAIT까지만 기다림
+PAGE_READY_MAX_WAIT = 30
+# 업로드 완료 대기 상한(초). 수동 선택이 필요한 환경에서는 사람이 파일을 고르는 시간도 포함됩니다.
+UPLOAD_MAX_WAIT = 60
+
+# ---------------------------------
+# 로그인 세션 유지
+# ---------------------------------
+# 크롬 프로필(--user-data-dir) 폴더. 쿠키가 실행 사이에 유지되어 매번 로그인하지 않아도 됩니다.
+# None이면 예전처럼 매번 새 프로필로 시작합니다.
+BROWSER_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".wps_selenium_profile")
+# 로그인 쿠키 백업 파일(JSON). 프로필을 새로 만든 경우에도 세션을 복원하는 데 씁니다.
+SESSION_COOKIE_FILE = os.path.join(os.path.expanduser("~"), ".wps_selenium_cookies.json")
+# 경량 모드(headless, GPU/확장 끄기, 이미지/폰트 차단, 작은 뷰포트).
+# 화면이 없으므로 로그인 세션이 살아 있는 상태(영구 프로필)에서 켜는 것을 권장합니다.
+LEAN_BROWSER = False
+# 업로드 방식: "input"(input[type=file]에 경로 직접 지정, 실패 시 OS 대화상자로 대체) 또는 "dialog"(OS 대화상자만 사용)
+UPLOAD_BACKEND = "input"
+# OS 파일 대화상자에 경로를 넣는 함수(경로 문자열 하나를 받음). None이면 macOS는 type_slowly_mac, 그 밖의 OS는 수동 선택.
+# windows_wps_selenium_script가 pywinauto로 넣는 함수를 지정합니다.
+OS_DIALOG_PATH_INPUT = None
+
+# ---------------------------------
+# WPS 주소 / 직접 받기
+# ---------------------------------
+# 로그인 확인용 계정 페이지와 업로드 버튼이 있는 문서 목록 페이지. (e2e_mock은 이 주소들을 모의 사이트로 바꿔 실행)
+WPS_ACCOUNT_URL = "https://account.wps.com/"
+UPLOAD_PAGE_URL = "https://docs.wps.com/"
+# 재고 스프레드시트 문서 URL
+STOCK_DOC_URL = "https://sg.docs.wps.com/p/89316816846831"
+# True면 기록된 내보내기 URL을 HTTP로 직접 요청하고, 실패하거나 기록이 없을 때만 편집기에서 다운로드합니다.
+DIRECT_EXPORT = True
+# 편집기 다운로드에서 관찰한 내보내기 URL을 문서별로 저장하는 파일
+EXPORT_RECIPE_FILE = os.path.join(DOWNLOAD_DIR, "export_recipe.json")
+
+# ---------------------------------
+# 배치 모드 (여러 문서 동시 동기화)
+# ---------------------------------
+# 작업 목록 JSON: [{"doc_url": ..., "sales_file": ..., ("ledger_path": ...)}, ...]
+SYNC_JOBS_FILE = os.path.join(DOWNLOAD_DIR, "sync_jobs.json")
+# 동시에 띄울 브라우저 워커 수
+SYNC_WORKERS = 3
+
+# ---------------------------------
+# 상주 모드 (판매 파일이 바뀌면 바로 동기화)
+# ---------------------------------
+# 마지막 변화 뒤 이만큼(초) 조용하면 동기화. POS가 파일을 연달아 쓰는 동안은 한 번으로 묶습니다.
+DAEMON_DEBOUNCE_SECONDS = 3.0
+# 변화가 계속되어도 첫 변화 뒤 이만큼(초) 지나면 동기화
+DAEMON_MAX_BATCH_SECONDS = 30.0
+# 실패 시 재시도 간격: 처음 BASE초, 실패할 때마다 두 배, 최대 MAX초
+DAEMON_BACKOFF_BASE_SECONDS = 5.0
+DAEMON_BACKOFF_MAX_SECONDS = 300.0
+# 띄워 둔 드라이버의 로그인 상태를 다시 확인하는 간격(초). 그 사이의 동기화는 로그인 확인 없이 바로 진행합니다.
+DAEMON_LOGIN_RECHECK_SECONDS = 30 * 60
+
+# DOWNLOAD_DIR 아래에 두는 경로 설정들(use_download_dir가 함께 옮김)
+DOWNLOAD_DIR_SETTINGS = (
+    "LOCAL_SALES_PATH", "SALES_LEDGER_PATH", "FRAME_CACHE_DIR", "RUNS_DIR", "METRICS_JSONL", "METRICS_PROM_DIR",
+    "SYNC_FINGERPRINT_FILE", "EXPORT_RECIPE_FILE", "SYNC_JOBS_FILE",
+)
+
+
+def use_download_dir(download_dir):
+    """
+    DOWNLOAD_DIR를 바꾸고, 그 아래에 두던 경로 설정(DOWNLOAD_DIR_SETTINGS)도 같은 상대 위치로 옮깁니다.
+    다른 곳을 가리키도록 이미 바꾼 설정과 None인 설정은 그대로 둡니다. (windows_wps_selenium_script가 사용)
+
+    :param download_dir: 새 다운로드 폴더.
+    """
+
+    global DOWNLOAD_DIR
+    current = globals()
+    for name in DOWNLOAD_DIR_SETTINGS:
+        value = current[name]
+        if value and os.path.commonpath([value, DOWNLOAD_DIR]) == DOWNLOAD_DIR:
+            current[name] = os.path.join(download_dir, os.path.relpath(value, DOWNLOAD_DIR))
+    DOWNLOAD_DIR = download_dir
 
 # ---------------------------------
 # 크롬드라이버 생성
 # ---------------------------------
-def get_chrome_driver():
+def get_chrome_driver(page_load_strategy="normal", profile_dir=None, lean=False, download_dir=None,
+                      download_events=True):
     """
     Selenium용 ChromeDriver 인스턴스를 생성하는 함수.
 
     1) chrome_options를 통해 다운로드 설정(pref) 및 헤드리스 모드 등
        다양한 브라우저 환경 옵션을 지정할 수 있습니다.
-    2) "download.default_directory" 등으로 다운로드 경로를 DOWNLOAD_DIR로 설정하여,
-       웹에서 다운받는 파일(예: 엑셀, CSV 등)을 지정된 폴더에 저장합니다.
-    3) 필요할 경우 headless 모드(브라우저 UI 없이 백그라운드 실행)를 활성화하려면
-       chrome_options.add_argument("--headless") 주석을 해제하면 됩니다.
+    2) "download.default_directory" 등으로 다운로드 경로를 download_dir(실행 전용 폴더, 7 참고)로 설정하여,
+       웹에서 다운받는 파일(예: 엑셀, CSV 등)을 그 폴더에 저장합니다. download_dir이 없을 때만 DOWNLOAD_DIR.
+       이 경로는 driver.download_dir에 남겨, DownloadWatcher가 다른 폴더로 바꾸지 못했을 때 알아챌 수 있게 합니다.
+    3) headless 모드(브라우저 UI 없이 백그라운드 실행)는 따로 켜지 않고 lean=True(LEAN_BROWSER)의
+       경량 모드에 포함되어 있습니다(6 참고).
+    4) page_load_strategy="eager"면 driver.get()이 전체 리소스 로드를 기다리지 않고
+       DOMContentLoaded 시점에 바로 돌아옵니다.
+
+    5) profile_dir이 주어지면 그 폴더를 크롬 프로필(--user-data-dir)로 고정해
+       로그인 쿠키가 실행 사이에 유지되도록 합니다.
+       같은 프로필 폴더는 동시에 한 크롬만 쓸 수 있습니다.
+
+    6) lean=True면 경량 모드로 실행합니다. (browser_lean 참고)
+       headless, GPU/확장 프로그램 끄기, 작은 고정 뷰포트, CDP로 이미지/폰트 요청 차단.
+
+    7) download_dir이 주어지면 DOWNLOAD_DIR 대신 그 폴더로 다운로드합니다
+       (run_dirs.create_run_dir로 만든 실행/작업 전용 빈 폴더. 받은 파일을 이름 검색 없이 정확히 찾기 위함).
+
+    8) download_events=True면 ChromeDriver 성능 로그(Page 이벤트)를 켜서, DownloadWatcher가
+       Page.downloadWillBegin/downloadProgress로 완료 순간과 내보내기 URL(direct_export 기록용)을 얻게 합니다.
+       성능 로그는 DownloadWatcher만 비우므로, 오래 띄워 두는 배치/상주 드라이버는 False로 만들고
+       (로그가 쌓이지 않음) 다운로드 완료는 폴더 감시로 확인합니다.
+
+    :param page_load_strategy: "normal"(기본값), "eager", "none" 중 하나.
+    :param profile_dir: (선택) 영구 크롬 프로필 폴더 경로.
+    :param lean: 경량 모드 사용 여부(기본값: False).
+    :param download_dir: (선택) 실행 전용 다운로드 폴더(run_dirs). None이면 DOWNLOAD_DIR.
+    :param download_events: 다운로드 이벤트용 성능 로그 사용 여부(기본값: True).
     """
 
     chrome_options = Options()
@@ -86,17 +265,43 @@ def get_chrome_driver():
     #     - "download.prompt_for_download": False → 다운로드 시 묻지 않고 진행
     #     - "download.directory_upgrade": True → 기존 폴더보다 상위폴더 설정 가능
     prefs = {
-        "download.default_directory": DOWNLOAD_DIR,
+        "download.default_directory": download_dir or DOWNLOAD_DIR,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True
     }
+    if lean:
+        # 경량 모드: 이미지 로드 차단
+        prefs.update(lean_prefs())
     chrome_options.add_experimental_option("prefs", prefs)
 
-    # (B) 필요할 경우 다음 옵션을 활성화하면 브라우저 UI 없이 백엔드에서 크롤링/테스트 실행 가능.
-    # chrome_options.add_argument("--headless")
+    # (A-2) 다운로드 완료 이벤트(Page.downloadWillBegin/downloadProgress)를 성능 로그로 받기 위한 설정.
+    #       네트워크 이벤트는 필요 없으므로 끄고 Page 이벤트만 기록합니다. (download_watch.DownloadWatcher에서 사용)
+    if download_events:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": False, "enablePage": True})
+
+    # (B) lean=True면 headless를 포함한 경량 모드 옵션을 한꺼번에 적용합니다.
+    if lean:
+        apply_lean_options(chrome_options)
+
+    # (B-2) 영구 프로필: 로그인 세션(쿠키)을 실행 사이에 유지
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        chrome_options.add_argument("--profile-directory=Default")
+
+    # (C) 페이지 로드 전략 (normal / eager / none)
+    chrome_options.page_load_strategy = page_load_strategy
 
-    # (C) webdriver.Chrome()에 준비한 chrome_options를 적용하여 드라이버 인스턴스를 생성.
-    return webdriver.Chrome(options=chrome_options)
+    # (D) webdriver.Chrome()에 준비한 chrome_options를 적용하여 드라이버 인스턴스를 생성.
+    driver = webdriver.Chrome(options=chrome_options)
+    # 크롬이 실제로 받는 폴더 (DownloadWatcher가 CDP로 다른 폴더로 바꾸지 못했을 때 비교용)
+    driver.download_dir = prefs["download.default_directory"]
+
+    # (E) 경량 모드: 이미지/폰트 요청을 CDP로 네트워크 단계에서 차단
+    if lean:
+        block_heavy_resources(driver)
+    return driver
 
 # ---------------------------------
 # Explicit Wait 유틸
@@ -108,20 +313,20 @@ def wait_for_user_center(driver, max_wait=60):
     주로 로그인 완료 후 특정 페이지가 뜨는지 확인할 때 사용합니다.
     예: <div class="header-title">User Center</div> 요소가 렌더링되면 
        로그인 절차가 성공적으로 끝났다고 판단.
+    0.5초 폴링 대신 MutationObserver로 텍스트가 나타나는 즉시 반환합니다(dom_wait.wait_for_dom).
 
     :param driver: Selenium WebDriver 객체(ChromeDriver 등).
     :param max_wait: 최대 대기 시간(초).
     :raises TimeoutException: 지정 시간 안에 해당 텍스트가 안 나타나면 예외 발생.
     """
 
-    wait = WebDriverWait(driver, max_wait)
-    wait.until(
-        EC.text_to_be_present_in_element((By.CSS_SELECTOR, "div.header-title"), "User Center")
-    )
+    wait_for_dom(driver, By.CSS_SELECTOR, "div.header-title", text="User Center",
+                 max_wait=max_wait, label="user_center")
 
 def wait_for_element(driver, by, locator, max_wait=10):
     """
     특정 요소가 DOM(Document Object Model)에 나타날 때까지 최대 max_wait초 대기.
+    요소가 추가되는 즉시 반환합니다(dom_wait.wait_for_dom, 대기 시간은 "wait" span으로 기록).
 
     :param driver: Selenium WebDriver 객체.
     :param by: 요소를 찾는 방식(예: By.CSS_SELECTOR, By.ID 등).
@@ -131,8 +336,7 @@ def wait_for_element(driver, by, locator, max_wait=10):
     :raises TimeoutException: 지정 시간 안에 요소가 없으면 예외 발생.
     """
 
-    wait = WebDriverWait(driver, max_wait)
-    return wait.until(EC.presence_of_element_located((by, locator)))
+    return wait_for_dom(driver, by, locator, max_wait=max_wait)
 
 
 
@@ -141,7 +345,7 @@ def wait_for_element(driver, by, locator, max_wait=10):
 # ---------------------------------
 # 파일 다운로드 대기
 # ---------------------------------
-def wait_for_file_download(keyword="stock", timeout=30):
+def wait_for_file_download(keyword="stock", timeout=30, watcher=None, download_dir=None):
     """
     지정된 DOWNLOAD_DIR에서, 파일명에 'keyword'가 들어간 .xlsx 파일이 
     최대 timeout초 내에 생길 때까지 대기(polling)하는 함수입니다.
@@ -152,23 +356,40 @@ def wait_for_file_download(keyword="stock", timeout=30):
     4) 찾은 파일(found_path)은 'stock.xlsx'라는 고정 파일명으로 rename하여 
        최종 경로(final_path)에 저장합니다(중복 명 처리, 통일된 파일명 관리 목적).
     5) rename한 최종 경로(final_path)를 반환합니다.
+    6) watcher(DownloadWatcher)가 주어지면 1)~3)의 폴링 대신, Download 클릭 전에 만들어 둔 감시자로
+       이번 세션이 받은 파일을 완료 즉시(CDP 이벤트/inotify) 정확히 찾습니다.
+       예전 실행에서 남은 stock(3).xlsx나 아직 받는 중인 .crdownload 파일은 잡지 않습니다.
+    7) download_dir(실행 전용 빈 폴더)이 주어지면 1)~2)의 이름 검색 대신, 그 폴더에 생긴
+       완성 파일 하나를 그대로 이번 다운로드로 봅니다(find_single_download). keyword는 쓰지 않습니다.
 
     :param keyword: 검색할 키워드(기본값: "stock"). 예: "stock", "invoice", ...
     :param timeout: 최대 대기 시간(초). 기본값 30초.
+    :param watcher: (선택) Download 클릭 전에 만든 DownloadWatcher.
+    :param download_dir: (선택) 실행 전용 다운로드 폴더. None이면 공용 DOWNLOAD_DIR에서 keyword로 검색.
     :return: 최종적으로 rename된 파일의 전체 경로(final_path).
     :raises Exception: 주어진 시간(timeout) 내에 keyword가 들어간 .xlsx 파일을 찾지 못한 경우.
     """
 
+    isolated = download_dir is not None
+    download_dir = download_dir or DOWNLOAD_DIR
     start_time = time.time()
     found_path = None
-    while True:
-        # glob로 DOWNLOAD_DIR 내 모든 .xlsx 파일 목록을 가져옵니다.
-        xlsx_files = glob.glob(os.path.join(DOWNLOAD_DIR, "*.xlsx"))
-        for f in xlsx_files:
-            # 파일명에서 keyword를 찾으면 found_path에 할당하고 break
-            if keyword.lower() in os.path.basename(f).lower():
-                found_path = f
-                break
+    if watcher is not None:
+        # 클릭 전에 만든 감시자로, 이번 세션이 받은 파일을 완료되는 즉시 받음
+        found_path = watcher.wait(timeout)
+
+    while found_path is None:
+        if isolated:
+            # 실행 전용 폴더: 이름과 상관없이 완성된 파일이 정확히 하나 생기면 그것이 이번 다운로드
+            found_path = find_single_download(download_dir, ".xlsx")
+        else:
+            # glob로 DOWNLOAD_DIR 내 모든 .xlsx 파일 목록을 가져옵니다.
+            xlsx_files = glob.glob(os.path.join(download_dir, "*.xlsx"))
+            for f in xlsx_files:
+                # 파일명에서 keyword를 찾으면 found_path에 할당하고 break
+                if keyword.lower() in os.path.basename(f).lower():
+                    found_path = f
+                    break
 
         if found_path:
             # 해당 파일을 찾으면 대기 루프 탈출
@@ -185,83 +406,11 @@ def wait_for_file_download(keyword="stock", timeout=30):
     # 파일명을 'stock.xlsx'로 고정 rename한 후 경로 반환
     # ex) found_path = '/Downloads/stock(1).xlsx' → '/Downloads/stock.xlsx'
     # ---------------------------------
-    final_path = os.path.join(DOWNLOAD_DIR, "stock.xlsx")
+    final_path = os.path.join(download_dir, "stock.xlsx")
     if found_path != final_path:
         shutil.move(found_path, final_path)
     return final_path
 
-# ---------------------------------
-# 재고+판매 엑셀 병합
-# ---------------------------------
-def merge_local_sales_with_downloaded_stock(stock_file: str, sales_file: str) -> int:
-    """
-    다운로드 받은 재고 파일(stock_file)과 
-    로컬 판매 파일(sales_file)을 병합해 재고를 차감한 뒤, 
-    'stock_updated.xlsx'라는 이름으로 저장하는 함수.
-
-    1) stock_file(엑셀)과 sales_file(엑셀)을 각각 읽어서 
-       Pandas DataFrame(stock_df, sales_df)에 로드합니다.
-    2) sales_df를 product_id 기준으로 판매 개수(quantity_sold) 합계를 구하여 
-       stock_df와 병합.
-    3) 기존 재고(stock_qty)에서 판매 수량(quantity_sold)을 차감해 updated_stock를 계산.
-       음수가 되지 않도록 0으로 처리합니다.
-    4) 최종 재고를 'stock_updated.xlsx' 파일에 저장하고,
-       이 함수가 처리한 판매 건수(len(sales_df))를 정수로 반환합니다.
-
-    :param stock_file: 다운로드된 재고 파일 경로(str).
-    :param sales_file: 로컬 판매 파일 경로(str).
-    :return: 판매 엑셀(sales_df)의 행 수(판매 건수)를 int로 반환.
-    :raises FileNotFoundError: stock_file 또는 sales_file이 존재하지 않을 경우.
-    """
-
-    # ---------------------------------
-    # 파일 존재 여부 체크
-    # ---------------------------------
-    if not os.path.exists(stock_file):
-        raise FileNotFoundError("다운로드된 재고 파일이 없음.")
-    if not os.path.exists(sales_file):
-        raise FileNotFoundError("로컬 판매 파일(sales.xlsx)이 없음.")
-
-    # ---------------------------------
-    # 엑셀 읽기
-    # ---------------------------------
-    stock_df = pd.read_excel(stock_file)
-    sales_df = pd.read_excel(sales_file)
-
-    # ---------------------------------
-    # 판매 수량 합산(sales_agg)
-    # product_id별 quantity_sold 합계를 구하여, 
-    # 그룹화 결과를 sales_agg에 저장
-    # ---------------------------------
-    sales_agg = sales_df.groupby("product_id")["quantity_sold"].sum().reset_index()
-
-    # ---------------------------------
-    # stock_df와 sales_agg를 병합
-    # how="left"로, 재고에 없는 product_id는 무시, 
-    # 재고에 있지만 판매된 적이 없다면 NaN(→0 처리)
-    # ---------------------------------
-    merged_df = pd.merge(stock_df, sales_agg, on="product_id", how="left")
-    merged_df["quantity_sold"] = merged_df["quantity_sold"].fillna(0)
-
-    # ---------------------------------
-    # updated_stock = stock_qty - quantity_sold
-    # 음수가 되면 0으로 처리하여 재고가 음수가 되지 않도록 함.
-    # ---------------------------------
-    merged_df["updated_stock"] = merged_df["stock_qty"] - merged_df["quantity_sold"]
-    merged_df.loc[merged_df["updated_stock"] < 0, "updated_stock"] = 0
-
-    # ---------------------------------
-    # 병합 결과를 원본 stock_df에 반영한 뒤,
-    # 'stock_updated.xlsx'로 저장
-    # ---------------------------------
-    stock_df["stock_qty"] = merged_df["updated_stock"]
-    updated_path = os.path.join(DOWNLOAD_DIR, "stock_updated.xlsx")
-    stock_df.to_excel(updated_path, index=False)
-
-    # 반환값: 판매 파일의 총 행 수(= len(sales_df))
-    # 참고: 실제 판매 건수(총 qty 합)는 아니라, sales_df의 행 row 개수를 의미.
-    return len(sales_df)
-
 # ---------------------------------
 # AppleScript: 한 글자씩 천천히 입력
 # ---------------------------------
@@ -309,60 +458,77 @@ def type_slowly_mac(path_str):
     full_script = "\n".join(script_lines)
     subprocess.run(["osascript", "-e", full_script])
 
-
-
-
-
 # ---------------------------------
-# 메인 로직: 로그인 -> 문서 페이지 -> 다운로드 -> 병합 -> 업로드
+# OS 파일 대화상자로 업로드 (대체 경로)
 # ---------------------------------
-def download_merge_upload_with_finder():
+def upload_via_os_dialog(driver, updated_path):
     """
-    (A) 웹 로그인 & 문서 페이지 접근:
-        1) get_chrome_driver()로 Selenium WebDriver를 생성하고, WPS Docs 계정에 로그인.
-        2) wait_for_user_center() 함수를 통해 'User Center' 텍스트가 화면에 뜰 때까지 대기(로그인 성공 판단).
+    "File" 버튼을 눌러 OS 파일 대화상자를 열고 경로를 입력하는 기존 업로드 방식.
+    upload_via_file_input이 실패했거나 UPLOAD_BACKEND="dialog"일 때만 사용합니다.
+    경로는 OS_DIALOG_PATH_INPUT(Windows: pywinauto)으로, 없으면 macOS에서 type_slowly_mac(AppleScript)으로 넣습니다.
 
-    (B) 스프레드시트 문서 열람 & 다운로드:
-        1) 특정 스프레드시트 페이지(https://sg.docs.wps.com/p/89316816846831)에 접속해 페이지 로딩을 기다림.
-        2) File Operations 메뉴를 클릭하여 'Download' 항목을 선택.
-        3) wait_for_file_download("stock", timeout=30)로 'stock.xlsx' 파일 다운 완료를 대기.
-           - 파일명이 'stock'을 포함하고 있으면 잡아서 'stock.xlsx'라는 고정 이름으로 rename.
+    :param driver: Selenium WebDriver 객체.
+    :param updated_path: 업로드할 파일 경로.
+    """
 
-    (C) 로컬 판매 파일(sales.xlsx)과 다운로드된 재고 파일(stock.xlsx) 병합:
-        1) merge_local_sales_with_downloaded_stock(...)로 재고와 판매 기록을 병합해 재고를 차감.
-        2) 새로 만들어진 'stock_updated.xlsx'를 로컬에 저장.
+    # ---------------------------------
+    # "File" 버튼 클릭 -> OS 대화상자(Finder/열기 창) 열림
+    # ---------------------------------
+    file_btn = wait_for_element(driver, By.CSS_SELECTOR, "label.upload-file", max_wait=10)
+    file_btn.click()
+    print("File 버튼 클릭 -> OS 대화상자 열림")
 
-    (D) WPS Docs 업로드:
-        1) 업로드 페이지(https://docs.wps.com/)로 이동.
-        2) "Upload" → "File" 버튼을 차례로 클릭해 Finder(또는 OS 파일 선택 창) 열기.
-        3) macOS인 경우 type_slowly_mac(...)를 사용해 경로를 한 글자씩 천천히 입력 후 Enter 2회로 업로드.
-           - 다른 OS면 자동화 로직이 없어, 일단 수동으로 선택하도록 5초 대기.
+    # ---------------------------------
+    # 지정된 입력 함수(Windows) 또는 macOS AppleScript로 경로 입력
+    # ---------------------------------
+    if OS_DIALOG_PATH_INPUT is not None:
+        print(f"대화상자에 경로 입력: {updated_path}")
+        OS_DIALOG_PATH_INPUT(updated_path)
+    elif sys.platform == "darwin":
+        # macOS: 한 글자씩 천천히 입력
+        print(f"AppleScript로 (천천히) 경로 입력: {updated_path}")
+        type_slowly_mac(updated_path)
+    else:
+        # 입력 함수가 없는 OS(Linux 등)는 자동화 미지원 → 수동 선택 필요
+        print("이 OS는 아직 자동화 로직 없음. 수동으로 선택 필요.")
 
-    (E) 종료:
-        - 모든 과정이 끝나면 driver.quit()로 브라우저 세션 종료.
 
-    :return: None
+
+
+
+# ---------------------------------
+# 편집기에서 재고 파일 다운로드
+# ---------------------------------
+def download_stock_via_editor(driver, doc_url, recipe_file=None, work_dir=None):
+    """
+    스프레드시트 편집기를 열고 File Operations → Download로 재고 파일을 받습니다.
+
+    1) 문서 페이지를 열고 편집기가 준비될 때까지 대기.
+    2) File Operations 버튼 → Download 항목 클릭.
+    3) DownloadWatcher로 이번에 받은 파일을 완료 즉시 찾아 'stock.xlsx'로 정리.
+    4) recipe_file이 있고 CDP 이벤트로 다운로드 URL을 알 수 있으면, 다음 실행의 직접 받기를 위해 기록.
+
+    :param driver: 로그인된 Selenium WebDriver.
+    :param doc_url: 스프레드시트 문서 URL.
+    :param recipe_file: (선택) 내보내기 URL을 기록할 레시피 파일 경로.
+    :param work_dir: (선택) 실행 전용 다운로드 폴더. None이면 새로 만듭니다(create_run_dir).
+    :return: 다운로드된 재고 파일 경로.
     """
 
-    driver = get_chrome_driver()
-    stock_file_path = None
-    try:
-        # ---------------------------------
-        # (1) 로그인 과정
-        # ---------------------------------
-        driver.get("https://account.wps.com/")
-        # 'User Center' 텍스트로 로그인 성공 판단
-        wait_for_user_center(driver, max_wait=120)
-        print("User Center 감지됨 → 문서 페이지로 이동")
+    work_dir = work_dir or create_run_dir(RUNS_DIR)
 
-        # ---------------------------------
-        # (2) 스프레드시트 페이지
-        # ---------------------------------
-        driver.get("https://sg.docs.wps.com/p/89316816846831")
-        time.sleep(10) # 페이지 로딩 대기(임시)
+    # ---------------------------------
+    # (1) 스프레드시트 페이지
+    # ---------------------------------
+    with span("page_load"):
+        driver.get(doc_url)
+        # 고정 대기 대신 File Operations 버튼이 준비되고 네트워크가 잦아들 때까지 대기
+        waited = wait_for_editor_ready(driver, max_wait=PAGE_READY_MAX_WAIT)
+    print(f"편집기 준비 완료 ({waited:.1f}초)")
 
+    with span("menu"):
         # ---------------------------------
-        # (3) File Operations 버튼 클릭
+        # (2) File Operations 버튼 클릭
         # ---------------------------------
         file_ops_btn = wait_for_element(
             driver, By.CSS_SELECTOR, "button.kd-button.kd-button-icon", max_wait=30
@@ -371,66 +537,615 @@ def download_merge_upload_with_finder():
         print("File Operations 버튼 클릭")
 
         # ---------------------------------
-        # (4) Download 항목 클릭
+        # (3) Download 항목 클릭
         # ---------------------------------
         download_elem = wait_for_element(
             driver, By.XPATH, '//div[@data-key="Download"]', max_wait=30
         )
+    # 클릭 "전에" 감시자를 만들어 폴더 스냅샷을 떠 두어야, 예전 파일과 이번 다운로드를 구분할 수 있음
+    # 실행 전용 빈 폴더이므로 이름(keyword)으로 거르지 않고, 새로 생긴 .xlsx 하나를 그대로 받음
+    download_watcher = DownloadWatcher(driver, work_dir)
+
+    # ---------------------------------
+    # (4) Download 클릭 → 다운 완료 대기 -> 'stock.xlsx'
+    # ---------------------------------
+    with span("download", method="editor") as s:
         download_elem.click()
         print("Download 메뉴 클릭")
+        stock_file_path = wait_for_file_download(
+            "stock", timeout=30, watcher=download_watcher, download_dir=work_dir
+        )
+        s["bytes"] = os.path.getsize(stock_file_path)
 
-        # ---------------------------------
-        # (5) 다운 완료 대기 -> 'stock.xlsx'
-        # ---------------------------------
-        stock_file_path = wait_for_file_download("stock", timeout=30)
-        print(f"다운로드된 재고 파일: {stock_file_path}")
+    # ---------------------------------
+    # (5) 다음 실행을 위해 내보내기 URL 기록
+    #     (URL은 성능 로그의 다운로드 이벤트로만 알 수 있으므로 download_events=False 드라이버에서는 기록하지 않음.
+    #      한 번 실행(download_merge_upload_with_finder)이 기록한 URL은 배치/상주 모드도 같이 씀)
+    # ---------------------------------
+    if recipe_file and download_watcher.download_url:
+        if record_export_request(recipe_file, doc_url, download_watcher.download_url):
+            print("내보내기 URL 기록 → 다음 실행부터 직접 받기")
+        else:
+            print("내보내기 URL이 http(s)가 아니라(blob:/data:) 기록하지 않음 → 다음에도 편집기에서 다운로드")
+    return stock_file_path
 
-        # ---------------------------------
-        # (6) 병합 (재고+판매)
-        # ---------------------------------
-        updated_path = os.path.join(DOWNLOAD_DIR, "stock_updated.xlsx")
-        merge_local_sales_with_downloaded_stock(stock_file_path, LOCAL_SALES_PATH)
-        print("병합 완료 →", updated_path)
 
+# ---------------------------------
+# 단계별 지표 기록기
+# ---------------------------------
+def metrics_tracer(doc_url):
+    """
+    문서 하나의 동기화 span을 METRICS_JSONL과 METRICS_PROM_DIR/wps_sync_<문서키>.prom에 기록할 SyncTracer를 만듭니다.
+    """
+
+    prom_path = None
+    if METRICS_PROM_DIR:
+        os.makedirs(METRICS_PROM_DIR, exist_ok=True)
+        prom_path = os.path.join(METRICS_PROM_DIR, f"wps_sync_{doc_key(doc_url)}.prom")
+    return SyncTracer(METRICS_JSONL, prom_path, labels={"doc": doc_key(doc_url)})
+
+
+# ---------------------------------
+# 변경 감지 (바뀐 것이 없는 실행 건너뛰기)
+# ---------------------------------
+def fingerprint_store():
+    """SYNC_FINGERPRINT_FILE의 지문 저장소. 설정이 None이면 None(변경 감지 끔)."""
+    if not SYNC_FINGERPRINT_FILE:
+        return None
+    from sync_fingerprint import FingerprintStore
+    return FingerprintStore(SYNC_FINGERPRINT_FILE)
+
+
+def sales_unchanged_since_last_sync(doc_url, sales_file, ledger_path):
+    """
+    브라우저를 띄우기 전의 확인. 장부를 쓰고, 판매 입력과 장부가 마지막으로 성공한 동기화 때와 같으면 True.
+    (반영할 새 판매가 없으므로 재고를 받아 병합해도 바뀌는 것이 없음)
+
+    :param doc_url: 재고 스프레드시트 문서 URL.
+    :param sales_file: 로컬 판매 파일 경로(또는 판매 샤드 폴더/glob 패턴).
+    :param ledger_path: 판매 반영 장부 경로. None이면 판매 전체를 매번 반영하므로 항상 False.
+    :return: 건너뛰어도 되면 True.
+    """
+
+    store = fingerprint_store()
+    if store is None or not ledger_path:
+        return False
+    from sync_fingerprint import input_fingerprint, inputs_unchanged
+
+    with span("change_check", point="inputs") as s:
+        unchanged = inputs_unchanged(store.get(doc_key(doc_url)), input_fingerprint(sales_file, ledger_path))
+        s["outcome"] = "noop" if unchanged else "changed"
+    if unchanged:
+        print(f"[no-op] 새 판매가 없습니다(판매 입력/장부가 마지막 동기화 이후 그대로) → 건너뜀: {doc_url}")
+    return unchanged
+
+
+# ---------------------------------
+# 재고 파일 받기: 직접 받기 → 실패 시 편집기에서 다운로드
+# ---------------------------------
+def download_stock_document(driver, doc_url, work_dir):
+    """
+    DIRECT_EXPORT면 기록된 내보내기 URL로 재고를 직접 받고, 안 되면 편집기에서 다운로드합니다.
+
+    :param driver: 로그인된 Selenium WebDriver.
+    :param doc_url: 재고 스프레드시트 문서 URL.
+    :param work_dir: 실행 전용 다운로드 폴더.
+    :return: 받은 재고 파일 경로(str).
+    """
+
+    stock_file_path = None
+    if DIRECT_EXPORT:
+        with span("download", method="direct") as s:
+            stock_file_path = fetch_stock_direct(
+                driver, doc_url, os.path.join(work_dir, "stock.xlsx"), EXPORT_RECIPE_FILE
+            )
+            s["bytes"] = os.path.getsize(stock_file_path) if stock_file_path else 0
+    if stock_file_path is None:
+        stock_file_path = download_stock_via_editor(
+            driver, doc_url, recipe_file=EXPORT_RECIPE_FILE if DIRECT_EXPORT else None, work_dir=work_dir
+        )
+    # 로그인 직후에는 없던 docs.wps.com 쿠키까지 쿠키 파일에 남김(새 프로필에서 복원할 때 문서 쪽 세션도 살아 있도록)
+    if SESSION_COOKIE_FILE:
+        save_cookies(driver, SESSION_COOKIE_FILE, cookie_site(WPS_ACCOUNT_URL))
+    return stock_file_path
+
+
+# ---------------------------------
+# 업로드 페이지에서 재고 파일 올리기
+# ---------------------------------
+def upload_stock_document(driver, updated_path):
+    """
+    업로드 페이지에서 "Upload" 버튼 → 파일 지정(input[type=file], 안 되면 OS 대화상자)으로 올리고 완료 신호를 기다립니다.
+
+    :param driver: 로그인된 Selenium WebDriver.
+    :param updated_path: 업로드할 파일 경로.
+    :return: 업로드 완료 신호까지 기다린 초(float).
+    """
+
+    with span("upload", bytes=os.path.getsize(updated_path)):
         # ---------------------------------
-        # (7) 업로드 페이지 이동
+        # (3) 업로드 페이지 이동
         # ---------------------------------
-        driver.get("https://docs.wps.com/")  # 업로드 버튼 있는 URL
+        driver.get(UPLOAD_PAGE_URL)  # 업로드 버튼 있는 URL
 
         # ---------------------------------
-        # (8) "Upload" 버튼 클릭
+        # (4) "Upload" 버튼 클릭
         # ---------------------------------
         upload_btn = wait_for_element(driver, By.CSS_SELECTOR, "label.upload-btn-warp", max_wait=10)
         upload_btn.click()
         print("Upload 버튼 클릭")
-        
-        # ---------------------------------
-        # (9) "File" 버튼 클릭 -> Finder 창 열림
-        # ---------------------------------
-        file_btn = wait_for_element(driver, By.CSS_SELECTOR, "label.upload-file", max_wait=10)
-        file_btn.click()
-        print("File 버튼 클릭 -> OS 대화상자 열림")
 
         # ---------------------------------
-        # (A) macOS 환경에서 AppleScript 자동 입력
+        # (5) 파일 지정: input[type=file]에 경로를 바로 넣고, 안 되면 OS 파일 대화상자로 대체
         # ---------------------------------
-        if sys.platform == "darwin":
-            # macOS: 한 글자씩 천천히 입력
-            print(f"AppleScript로 (천천히) 경로 입력: {updated_path}")
-            type_slowly_mac(updated_path)
-            time.sleep(5)
-            print("업로드 완료(추정)!")
+        if UPLOAD_BACKEND == "input" and upload_via_file_input(driver, updated_path):
+            print(f"input[type=file]에 경로 지정: {updated_path}")
         else:
-            # Windows/Linux 등 macOS 외 환경은 자동화 미지원 → 수동 선택 필요
-            print("이 OS는 아직 자동화 로직 없음. 수동으로 선택 필요.")
-            time.sleep(5)
+            upload_via_os_dialog(driver, updated_path)
+
+        # 고정 5초 대기 대신 업로드 완료 신호(토스트/네트워크 유휴)를 기다림
+        waited = wait_for_upload_complete(driver, max_wait=UPLOAD_MAX_WAIT)
+    print(f"업로드 완료 ({waited:.1f}초)")
+
+    print("업로드 프로세스 끝!")
+    return waited
+
+
+# ---------------------------------
+# 문서 하나 동기화: 재고 받기 -> 병합 -> 업로드 -> 장부 확정
+# ---------------------------------
+def sync_stock_document(driver, doc_url, sales_file, work_dir=None, ledger_path=None, stock_file_path=None,
+                        prepared_sales=None, shard_workers=None):
+    """
+    로그인된 드라이버로 재고 문서 하나를 동기화합니다. 메인 로직과 배치 모드의 워커가 함께 씁니다.
+
+    1) 재고 파일 받기: download_stock_document(...) (stock_file_path로 이미 받은 파일을 넘기면 생략).
+       판매 입력/장부와 받은 재고가 마지막 성공 동기화의 지문과 같으면 여기서 끝냄(no-op, 0 반환).
+    2) merge_local_sales_with_downloaded_stock(...)로 판매를 차감해 'stock_updated.xlsx' 저장.
+       prepared_sales로 미리 준비한 판매(prepare_local_sales)를 넘기면 재고만 읽고 바로 차감.
+    3) 업로드 페이지에서 업로드하고 완료 신호를 기다림.
+       병합 결과의 셀 값이 받은 재고와 같으면(반영할 판매가 없음) 업로드를 건너뜀.
+    4) 업로드가 끝났으면 판매 반영 장부를 확정(commit_ledger)하고 이번 동기화의 지문을 기록.
+
+    :param driver: 로그인된 Selenium WebDriver.
+    :param doc_url: 재고 스프레드시트 문서 URL.
+    :param sales_file: 로컬 판매 파일 경로(또는 판매 샤드 폴더/glob 패턴).
+    :param work_dir: (선택) 실행 전용 다운로드/병합 결과 폴더. None이면 새로 만듭니다(create_run_dir).
+    :param ledger_path: (선택) 판매 반영 장부 경로. None이면 판매 파일 전체를 반영.
+    :param stock_file_path: (선택) 이미 받은 재고 파일 경로.
+    :param prepared_sales: (선택) 같은 판매 파일/장부로 미리 부른 prepare_local_sales(...)의 결과.
+    :param shard_workers: (선택) 판매 샤드 집계 워커 수. None이면 SALES_SHARD_WORKERS.
+    :return: 이번에 반영한 판매 행 수(int).
+    """
+
+    from stock_merge import merge_local_sales_with_downloaded_stock
+    from sales_ledger import commit_ledger
+    from sync_fingerprint import input_fingerprint, stock_fingerprint, sync_unchanged
+
+    work_dir = work_dir or create_run_dir(RUNS_DIR)
+    if stock_file_path is None:
+        stock_file_path = download_stock_document(driver, doc_url, work_dir)
+    print(f"다운로드된 재고 파일: {stock_file_path}")
+
+    # ---------------------------------
+    # (1-1) 변경 감지: 판매 입력/장부와 받은 재고가 마지막 성공 동기화 때와 같으면 병합/업로드 생략
+    # ---------------------------------
+    store = fingerprint_store()
+    if store is not None:
+        with span("change_check", point="stock") as s:
+            stock_fp = stock_fingerprint(stock_file_path)
+            unchanged = sync_unchanged(
+                store.get(doc_key(doc_url)), input_fingerprint(sales_file, ledger_path), stock_fp
+            )
+            s["outcome"] = "noop" if unchanged else "changed"
+        if unchanged:
+            print("[no-op] 판매 입력과 재고가 마지막 동기화 이후 그대로입니다. 병합/저장/업로드를 건너뜁니다.")
+            return 0
 
-        print("업로드 프로세스 끝!")
+    # ---------------------------------
+    # (2) 병합 (재고+판매)
+    # ---------------------------------
+    updated_path = os.path.join(work_dir, "stock_updated.xlsx")
+    applied_rows = merge_local_sales_with_downloaded_stock(
+        stock_file_path, sales_file, reader=SALES_READER,
+        ledger_path=ledger_path, cache_dir=FRAME_CACHE_DIR, writer=STOCK_WRITER, work_dir=work_dir,
+        engine=MERGE_ENGINE, shard_workers=shard_workers or SALES_SHARD_WORKERS, prepared_sales=prepared_sales
+    )
+    print("병합 완료 →", updated_path)
+
+    # 병합 결과가 받은 재고와 셀 값까지 같으면 올릴 필요가 없음
+    skip_upload = False
+    if store is not None:
+        with span("change_check", point="merged") as s:
+            updated_fp = stock_fingerprint(updated_path)
+            skip_upload = updated_fp == stock_fp
+            s["outcome"] = "noop" if skip_upload else "changed"
+
+    if skip_upload:
+        print("[no-op] 병합 결과가 받은 재고와 같습니다(반영할 판매 없음). 업로드를 건너뜁니다.")
+    else:
+        upload_stock_document(driver, updated_path)
+
+    # ---------------------------------
+    # 업로드까지 끝났으므로 이번에 반영한 판매를 장부에 확정
+    # ---------------------------------
+    if ledger_path and commit_ledger(ledger_path):
+        print("판매 반영 장부 갱신 완료")
+
+    # 다음 실행의 변경 감지용 지문(확정된 장부 내용 기준). 올린(또는 그대로 둔) 재고의 셀 값으로 기록
+    if store is not None:
+        store.record(doc_key(doc_url), input_fingerprint(sales_file, ledger_path), updated_fp)
+    return applied_rows
+
+
+# ---------------------------------
+# 드라이버 시작 + 로그인
+# ---------------------------------
+def start_logged_in_driver(state):
+    """
+    state["run_dir"]을 다운로드 폴더로 쓰는 드라이버를 만들어 state["driver"]에 넣고 로그인을 확인합니다.
+    (만든 드라이버는 중간에 실패해도 state["driver"]에 남으므로 호출한 쪽이 닫습니다)
+
+    :param state: {"driver": None, "run_dir": 실행 폴더} dict.
+    :return: 로그인된 WebDriver.
+    """
+
+    state["driver"] = get_chrome_driver(
+        page_load_strategy=PAGE_LOAD_STRATEGY, profile_dir=BROWSER_PROFILE_DIR, lean=LEAN_BROWSER,
+        download_dir=state["run_dir"]
+    )
+    # ---------------------------------
+    # (1) 로그인 과정
+    # ---------------------------------
+    # 영구 프로필/쿠키로 세션이 살아 있으면 바로 통과하고,
+    # 만료되었을 때만 'User Center' 텍스트가 뜰 때까지(로그인 완료) 최대 120초 대기
+    with span("login") as s:
+        login_mode = ensure_logged_in(
+            state["driver"], login_wait=120, cookie_file=SESSION_COOKIE_FILE, account_url=WPS_ACCOUNT_URL
+        )
+        s["mode"] = login_mode
+    print(f"User Center 감지됨({login_mode}) → 문서 페이지로 이동")
+    return state["driver"]
+
+
+# ---------------------------------
+# 판매 준비를 브라우저 단계와 겹쳐 실행 (asyncio)
+# ---------------------------------
+async def sync_with_overlapped_sales_prep(tracer, state, doc_url, sales_file, ledger_path=None):
+    """
+    판매 준비(prepare_local_sales)를 크롬 시작 → 로그인 → 재고 다운로드와 동시에 실행하고,
+    재고 파일이 도착하면 미리 합산한 판매로 바로 병합/업로드합니다.
+    판매 쪽은 브라우저와 무관하므로 전체 시간이 (브라우저 + 판매 준비)에서 대략 max(브라우저, 판매 준비)로 줄어듭니다.
+
+    1) 두 작업은 셀레니움/엑셀 파싱 같은 블로킹 호출이라 asyncio.to_thread로 각각 스레드에서 돌리고,
+       tracer.wrap으로 두 스레드의 span(login/download/parse_sales 등)을 같은 tracer에 기록합니다.
+    2) 한쪽이 실패하면 다른 쪽 결과를 쓰지 않고 그 예외를 올립니다(예: 판매 헤더 오류면 병합/업로드로 가지 않음).
+       이미 돌고 있는 스레드는 asyncio.run이 끝날 때 마무리되며, 그 사이 만든 드라이버는 state["driver"]로 닫습니다.
+    3) 둘 다 끝나면 sync_stock_document(...)에 받은 재고와 준비된 판매를 넘겨 병합 → 업로드 → 장부 확정을 합니다.
+    4) 브라우저 단계 뒤에 가려진 판매 준비 시간을 출력합니다.
+
+    :param tracer: 이번 실행의 SyncTracer.
+    :param state: {"driver": None, "run_dir": 실행 폴더} dict. 만든 드라이버는 state["driver"]에 남아 호출한 쪽이 닫습니다.
+    :param doc_url: 재고 스프레드시트 문서 URL.
+    :param sales_file: 로컬 판매 파일 경로(또는 판매 샤드 폴더/glob 패턴).
+    :param ledger_path: (선택) 판매 반영 장부 경로.
+    :return: 이번에 반영한 판매 행 수(int).
+    """
+
+    def browser_stages():
+        start = time.perf_counter()
+        driver = start_logged_in_driver(state)
+        stock_file_path = download_stock_document(driver, doc_url, state["run_dir"])
+        return stock_file_path, time.perf_counter() - start
+
+    def sales_prep():
+        start = time.perf_counter()
+        # 판다스 등 병합 모듈 import도 이 스레드에서 해 브라우저 단계와 겹치게 함
+        from stock_merge import prepare_local_sales
+        prepared = prepare_local_sales(sales_file, SALES_READER, ledger_path, FRAME_CACHE_DIR, SALES_SHARD_WORKERS)
+        return prepared, time.perf_counter() - start
+
+    browser_task = asyncio.create_task(asyncio.to_thread(tracer.wrap(browser_stages)))
+    sales_task = asyncio.create_task(asyncio.to_thread(tracer.wrap(sales_prep)))
+    done, _ = await asyncio.wait({browser_task, sales_task}, return_when=asyncio.FIRST_EXCEPTION)
+    for task in done:
+        if task.exception() is not None:
+            raise task.exception()
+    stock_file_path, browser_seconds = await browser_task
+    prepared_sales, prep_seconds = await sales_task
+    print(f"[overlap] 판매 준비 {prep_seconds:.1f}초 중 {min(prep_seconds, browser_seconds):.1f}초를 "
+          f"브라우저 단계({browser_seconds:.1f}초)와 겹쳐 실행")
+
+    # ---------------------------------
+    # (2) 받은 재고 + 준비된 판매 → 병합 → 업로드 → 장부 확정
+    # ---------------------------------
+    return sync_stock_document(
+        state["driver"], doc_url, sales_file, work_dir=state["run_dir"], ledger_path=ledger_path,
+        stock_file_path=stock_file_path, prepared_sales=prepared_sales
+    )
+
+
+# ---------------------------------
+# 메인 로직: 로그인 -> 문서 페이지 -> 다운로드 -> 병합 -> 업로드
+# ---------------------------------
+def download_merge_upload_with_finder():
+    """
+    (A) 웹 로그인 & 문서 페이지 접근:
+        1) get_chrome_driver()로 Selenium WebDriver를 생성하고, WPS Docs 계정에 로그인.
+        2) ensure_logged_in()으로 영구 프로필/쿠키 세션이 살아 있는지 먼저 확인하고,
+           만료된 경우에만 'User Center' 텍스트가 화면에 뜰 때까지 대기(로그인 성공 판단).
+
+    (B)~(D)는 sync_stock_document(...) 한 번으로 처리합니다. (배치 모드의 워커도 같은 함수를 씀)
+
+    (B) 스프레드시트 문서 다운로드:
+        1) DIRECT_EXPORT이면 fetch_stock_direct(...)로 기록된 내보내기 URL을 로그인 쿠키로 직접 요청
+           (편집기를 열지 않음). 응답이 xlsx가 아니거나 기록이 없으면 2)로 대체.
+        2) download_stock_via_editor(...)로 스프레드시트 페이지(STOCK_DOC_URL)를 열고
+           File Operations → Download로 'stock.xlsx'를 받음. 이때 내보내기 URL을 다시 기록.
+
+    (C) 로컬 판매 파일(sales.xlsx)과 다운로드된 재고 파일(stock.xlsx) 병합:
+        1) merge_local_sales_with_downloaded_stock(...)로 재고와 판매 기록을 병합해 재고를 차감.
+        2) 새로 만들어진 'stock_updated.xlsx'를 로컬에 저장.
+
+    (D) WPS Docs 업로드:
+        1) 업로드 페이지(UPLOAD_PAGE_URL)로 이동.
+        2) "Upload" 버튼을 클릭한 뒤, upload_via_file_input(...)으로 input[type=file]에 경로를 바로 지정.
+        3) 그게 안 되면 "File" 버튼으로 Finder(또는 OS 파일 선택 창)를 열고,
+           macOS인 경우 type_slowly_mac(...)를 사용해 경로를 한 글자씩 천천히 입력 후 Enter 2회로 업로드.
+           - OS_DIALOG_PATH_INPUT이 있으면(Windows 스크립트: pywinauto) 그 함수로 경로를 넣음.
+           - 그 밖의 OS면 자동화 로직이 없어, 수동으로 선택하는 동안 업로드 완료 신호를 최대 UPLOAD_MAX_WAIT초 대기.
+
+    (A-0) 변경 감지(SYNC_FINGERPRINT_FILE):
+        - 브라우저를 띄우기 전, 장부를 쓰고 판매 입력/장부가 마지막 성공 동기화 때와 같으면 바로 끝냄.
+        - 재고를 받은 뒤 재고 셀 값까지 같으면 병합/저장/업로드를, 병합 결과가 받은 재고와 같으면 업로드를 건너뜀.
+        - 어느 경우든 결과를 no-op으로 기록(JSON Lines의 total span outcome, Prometheus last_run_noop).
+
+    (A-1) 판매 준비 겹치기(OVERLAP_SALES_PREP):
+        - 판매 파일 확인/읽기/합산(prepare_local_sales)을 크롬 시작·로그인·재고 다운로드와 동시에 실행하고
+          (sync_with_overlapped_sales_prep), 재고가 도착하면 미리 합산한 판매로 바로 (C)를 진행.
+
+    (E) 단계별 지표:
+        - change_check/login/page_load/menu/download/parse_stock/parse_sales/aggregate/write/upload 단계의
+          소요 시간, 행 수, 파일 크기, 최대 RSS를 METRICS_JSONL(JSON Lines)과
+          METRICS_PROM_DIR(Prometheus textfile)에 기록하고, 가장 오래 걸린 단계를 출력.
+
+    (F) 종료:
+        - 모든 과정이 끝나면 driver.quit()로 브라우저 세션 종료.
+
+    :return: None
+    """
+
+    tracer = metrics_tracer(STOCK_DOC_URL)
+    # 장부 기준으로 새 판매가 없으면 크롬을 띄우지 않고 no-op으로 끝냄
+    with tracer.activate():
+        noop = sales_unchanged_since_last_sync(STOCK_DOC_URL, LOCAL_SALES_PATH, SALES_LEDGER_PATH)
+    if noop:
+        tracer.finish(True)
+        return
+
+    # 이번 실행 전용 빈 다운로드 폴더 (오래된 실행 폴더는 보존 정책에 따라 먼저 정리)
+    cleanup_run_dirs(RUNS_DIR, keep=RUN_DIR_KEEP, max_age_hours=RUN_DIR_MAX_AGE_HOURS)
+    run_dir = create_run_dir(RUNS_DIR)
+    success = False
+    state = {"driver": None, "run_dir": run_dir}
+    try:
+        with tracer.activate():
+            if OVERLAP_SALES_PREP:
+                # 판매 준비를 크롬 시작/로그인/다운로드와 동시에 하고, 재고가 도착하면 바로 병합/업로드
+                asyncio.run(sync_with_overlapped_sales_prep(
+                    tracer, state, STOCK_DOC_URL, LOCAL_SALES_PATH, ledger_path=SALES_LEDGER_PATH
+                ))
+            else:
+                start_logged_in_driver(state)
+                # ---------------------------------
+                # (2) 재고 받기 → 병합 → 업로드 → 장부 확정
+                # ---------------------------------
+                sync_stock_document(
+                    state["driver"], STOCK_DOC_URL, LOCAL_SALES_PATH, work_dir=run_dir,
+                    ledger_path=SALES_LEDGER_PATH
+                )
+        success = True
     finally:
         # ---------------------------------
-        # 드라이버 세션 종료
+        # 크롬 프로세스 트리 자원 사용량 보고 후 드라이버 세션 종료
         # ---------------------------------
-        driver.quit()
+        if state["driver"] is not None:
+            report_browser_usage(state["driver"])
+            state["driver"].quit()
+        finish_run_dir(run_dir)
+        # 단계별 span 요약 출력 + Prometheus 파일 갱신 (실패해도 어디까지 갔는지 남김)
+        tracer.finish(success)
+
+# ---------------------------------
+# 배치 모드: 여러 문서를 브라우저 워커 풀로 동시에 동기화
+# ---------------------------------
+def sync_documents_batch(jobs_file=None, workers=None):
+    """
+    SYNC_JOBS_FILE의 (문서 URL, 판매 파일) 작업들을 최대 workers개의 브라우저로 나눠 동기화합니다.
+
+    1) load_sync_jobs로 작업 목록을 읽습니다(문서별 장부는 DOWNLOAD_DIR/sales_ledger_<문서키>.json).
+       장부 기준으로 새 판매가 없는 문서(sales_unchanged_since_last_sync)는 브라우저 없이 no-op으로 끝냅니다.
+    2) 워커마다 전용 크롬 프로필("<BROWSER_PROFILE_DIR>-w<번호>")과 실행 폴더를 써서 드라이버를 만들고,
+       ensure_logged_in으로 로그인합니다(새 프로필이어도 SESSION_COOKIE_FILE의 쿠키로 복원).
+    3) 각 워커는 작업을 하나씩 꺼내, 작업 전용 빈 폴더(create_run_dir)에서 sync_stock_document(...)를 실행합니다.
+       다운로드 경로는 DownloadWatcher가 CDP로 작업 폴더로 바꿉니다(바꾸지 못하면 워커 폴더에 받아지므로 그 문서는 바로 실패).
+       판매가 샤드 폴더면 문서마다 SALES_SHARD_WORKERS(None이면 CPU 수)를 동시 워커 수로 나눈 만큼만 워커 프로세스를 씁니다.
+       문서마다 단계별 span을 METRICS_JSONL / METRICS_PROM_DIR에 기록합니다.
+    4) 끝나면(실패/중단 포함) 모든 워커의 크롬 자원 사용량을 출력하고 driver.quit()으로 닫습니다.
+    5) 성공/실패 건수와 처리량(문서/분)을 출력합니다.
+
+    :param jobs_file: 작업 목록 JSON 경로. None이면 SYNC_JOBS_FILE.
+    :param workers: 최대 동시 워커 수. None이면 SYNC_WORKERS.
+    :return: report_sync_results의 요약 dict.
+    """
+
+    jobs_file = SYNC_JOBS_FILE if jobs_file is None else jobs_file
+    workers = SYNC_WORKERS if workers is None else workers
+    jobs = load_sync_jobs(jobs_file, ledger_dir=DOWNLOAD_DIR)
+
+    # 장부 기준으로 새 판매가 없는 문서는 브라우저 워커에 넘기지 않음(no-op)
+    pending_jobs = []
+    for job in jobs:
+        tracer = metrics_tracer(job["doc_url"])
+        with tracer.activate():
+            noop = sales_unchanged_since_last_sync(job["doc_url"], job["sales_file"], job["ledger_path"])
+        if noop:
+            tracer.finish(True)
+        else:
+            pending_jobs.append(job)
+    if len(pending_jobs) < len(jobs):
+        print(f"[batch] 새 판매가 없는 문서 {len(jobs) - len(pending_jobs)}개는 건너뜀(no-op)")
+    jobs = pending_jobs
+
+    cleanup_run_dirs(RUNS_DIR, keep=RUN_DIR_KEEP, max_age_hours=RUN_DIR_MAX_AGE_HOURS)
+    # 브라우저 워커마다 샤드 풀을 CPU 수만큼 띄우지 않도록 동시 문서 수로 나눔
+    from sales_shards import shard_workers_per_job
+    shard_workers = shard_workers_per_job(min(workers, len(jobs)), SALES_SHARD_WORKERS)
+    # {드라이버: 워커 실행 폴더} - 드라이버를 닫을 때 사용 중 표시를 지우기 위함
+    worker_run_dirs = {}
+
+    def make_worker_driver(index):
+        # 같은 크롬 프로필 폴더는 동시에 한 브라우저만 쓸 수 있으므로 워커마다 따로 둡니다.
+        profile_dir = f"{BROWSER_PROFILE_DIR}-w{index}" if BROWSER_PROFILE_DIR else None
+        run_dir = create_run_dir(RUNS_DIR, f"w{index}")
+        # 오래 쓰는 워커 드라이버는 성능 로그를 끔(다운로드 완료는 폴더 감시로 확인)
+        driver = get_chrome_driver(
+            page_load_strategy=PAGE_LOAD_STRATEGY, profile_dir=profile_dir, lean=LEAN_BROWSER,
+            download_dir=run_dir, download_events=False
+        )
+        worker_run_dirs[driver] = run_dir
+        try:
+            login_mode = ensure_logged_in(
+                driver, login_wait=120, cookie_file=SESSION_COOKIE_FILE, account_url=WPS_ACCOUNT_URL
+            )
+        except Exception:
+            close_worker_driver(driver)
+            raise
+        print(f"[batch] w{index} 로그인 확인({login_mode})")
+        return driver
+
+    def sync_job(driver, job, index):
+        job_dir = create_run_dir(RUNS_DIR, doc_key(job["doc_url"]))
+        # 문서마다 자기 tracer를 이 워커 스레드에서 활성화 (로그인은 워커 시작 때 한 번뿐이라 문서 span에는 없음)
+        tracer = metrics_tracer(job["doc_url"])
+        success = False
+        try:
+            with tracer.activate():
+                applied_rows = sync_stock_document(
+                    driver, job["doc_url"], job["sales_file"], work_dir=job_dir, ledger_path=job["ledger_path"],
+                    shard_workers=shard_workers
+                )
+            success = True
+            return applied_rows
+        finally:
+            finish_run_dir(job_dir)
+            tracer.finish(success)
+
+    def close_worker_driver(driver):
+        try:
+            report_browser_usage(driver)
+            driver.quit()
+        finally:
+            finish_run_dir(worker_run_dirs.pop(driver))
+
+    start = time.perf_counter()
+    results = run_sync_pool(jobs, make_worker_driver, sync_job, workers=workers, close_driver=close_worker_driver)
+    return report_sync_results(results, time.perf_counter() - start, max(1, min(workers, len(jobs))))
+
+# ---------------------------------
+# 상주 모드: 판매 파일이 바뀔 때마다 로그인된 드라이버로 동기화
+# ---------------------------------
+def run_sync_daemon():
+    """
+    프로세스를 띄워 둔 채로 LOCAL_SALES_PATH(파일 또는 샤드 폴더/glob)의 변화를 감시하다가 동기화합니다.
+
+    1) 시작할 때 한 번, 그 뒤로는 판매 입력이 바뀔 때마다 동기화합니다(sync_daemon.run_daemon).
+       변화가 연달아 생기면 DAEMON_DEBOUNCE_SECONDS 동안 조용해질 때까지(최대 DAEMON_MAX_BATCH_SECONDS) 묶습니다.
+    2) 드라이버는 처음 필요할 때 만들어 로그인하고, 이후 동기화에서 계속 재사용합니다(크롬 시작/로그인 비용 1회).
+       로그인 상태는 DAEMON_LOGIN_RECHECK_SECONDS마다만 다시 확인합니다.
+    3) 동기화마다 실행 전용 폴더(create_run_dir)에서 sync_stock_document(...)를 실행하고 단계별 span을 기록합니다.
+       새 판매가 없으면(sales_unchanged_since_last_sync) 브라우저를 건드리지 않고 no-op으로 끝냅니다.
+    4) 동기화가 실패하면 드라이버를 닫고(다음 시도에서 새로 만들고 로그인),
+       DAEMON_BACKOFF_BASE_SECONDS부터 두 배씩(최대 DAEMON_BACKOFF_MAX_SECONDS) 기다렸다가 다시 시도합니다.
+    5) Ctrl+C나 SIGTERM으로 끝나면 드라이버를 닫고 실행 폴더를 정리합니다.
+
+    :return: run_daemon의 통계 dict({"syncs", "failures", "coalesced"}).
+    """
+
+    from sync_daemon import SalesChangeWatcher, Backoff, run_daemon
+
+    state = {"driver": None, "run_dir": None, "login_checked": None}
+
+    def close_driver():
+        driver, state["driver"] = state["driver"], None
+        if driver is None:
+            return
+        try:
+            report_browser_usage(driver)
+            driver.quit()
+        finally:
+            finish_run_dir(state["run_dir"])
+
+    def warm_driver():
+        if state["driver"] is None:
+            state["run_dir"] = create_run_dir(RUNS_DIR, "daemon")
+            # 계속 띄워 두는 드라이버는 성능 로그를 끔(다운로드 완료는 폴더 감시로 확인)
+            state["driver"] = get_chrome_driver(
+                page_load_strategy=PAGE_LOAD_STRATEGY, profile_dir=BROWSER_PROFILE_DIR, lean=LEAN_BROWSER,
+                download_dir=state["run_dir"], download_events=False
+            )
+            state["login_checked"] = None
+        checked = state["login_checked"]
+        if checked is None or time.monotonic() - checked > DAEMON_LOGIN_RECHECK_SECONDS:
+            with span("login") as s:
+                s["mode"] = ensure_logged_in(
+                    state["driver"], login_wait=120, cookie_file=SESSION_COOKIE_FILE, account_url=WPS_ACCOUNT_URL
+                )
+            state["login_checked"] = time.monotonic()
+        return state["driver"]
+
+    def sync_once():
+        cleanup_run_dirs(RUNS_DIR, keep=RUN_DIR_KEEP, max_age_hours=RUN_DIR_MAX_AGE_HOURS)
+        tracer = metrics_tracer(STOCK_DOC_URL)
+        success = False
+        try:
+            with tracer.activate():
+                if not sales_unchanged_since_last_sync(STOCK_DOC_URL, LOCAL_SALES_PATH, SALES_LEDGER_PATH):
+                    job_dir = create_run_dir(RUNS_DIR)
+                    try:
+                        sync_stock_document(
+                            warm_driver(), STOCK_DOC_URL, LOCAL_SALES_PATH, work_dir=job_dir,
+                            ledger_path=SALES_LEDGER_PATH
+                        )
+                    finally:
+                        finish_run_dir(job_dir)
+            success = True
+        except Exception:
+            # 실패한 브라우저는 어떤 화면에 멈춰 있는지 알 수 없으므로 닫고 다음 시도에서 새로 시작
+            close_driver()
+            raise
+        finally:
+            tracer.finish(success)
+
+    # systemd 등이 보내는 SIGTERM도 Ctrl+C처럼 정리하고 끝나도록
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    watcher = SalesChangeWatcher(LOCAL_SALES_PATH)
+    try:
+        return run_daemon(
+            watcher, sync_once, debounce=DAEMON_DEBOUNCE_SECONDS, max_batch=DAEMON_MAX_BATCH_SECONDS,
+            backoff=Backoff(DAEMON_BACKOFF_BASE_SECONDS, DAEMON_BACKOFF_MAX_SECONDS)
+        )
+    finally:
+        watcher.close()
+        close_driver()
 
 if __name__ == "__main__":
-    download_merge_upload_with_finder()
\ No newline at end of file
+    # "--batch"로 실행하면 SYNC_JOBS_FILE의 여러 문서를 워커 풀로 동시에 동기화
+    # "--daemon"으로 실행하면 판매 파일 변화를 감시하며 계속 동기화(상주 모드)
+    # 병합만/받기만/올리기만 하려면 필요한 모듈만 불러오는 stock_cli.py(merge/download/upload/sync)를 씀
+    if "--batch" in sys.argv[1:]:
+        sync_documents_batch()
+    elif "--daemon" in sys.argv[1:]:
+        run_sync_daemon()
+    else:
+        download_merge_upload_with_finder()
\ No newline at end of file
@@ -0,0 +1,215 @@
+# -------------------------------------------------------
+# WPS 로그인 세션 유지
+#
+# 매 실행마다 새 Chrome을 띄우면 쿠키가 없으므로 account.wps.com에서 사람이 로그인할 때까지
+# wait_for_user_center(driver, max_wait=120)로 막혀 있어야 했습니다.
+#
+# 여기서는 두 가지로 로그인 상태를 이어 갑니다.
+# 1) 영구 브라우저 프로필 : get_chrome_driver(profile_dir=...)로 --user-data-dir을 고정
+#                          (쿠키/로컬스토리지가 실행 사이에 유지됨)
+# 2) 쿠키 파일           : 로그인 직후 쿠키를 JSON으로 저장해 두고, 다음 실행에서 다시 넣어 줌
+#                          (프로필을 새로 만들었거나 다른 머신으로 옮겼을 때 대비)
+#                          현재 페이지(account.wps.com) 쿠키만이 아니라 CDP로 wps.com 전체(docs.wps.com 포함)를 저장/복원
+# 세션이 살아 있으면 바로 문서로 넘어가고, 실제로 만료되었을 때만 사람의 로그인을 기다립니다.
+# 로그인 확인은 한 번, 짧게(SESSION_CHECK_WAIT) 합니다. 만료된 세션에서 확인 대기로 시간을 버리지 않도록.
+# -------------------------------------------------------
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from dom_wait import wait_for_dom
+
+ACCOUNT_URL = "https://account.wps.com/"
+# 로그인되어 있으면 account.wps.com에 나타나는 제목
+USER_CENTER_SELECTOR = "div.header-title"
+USER_CENTER_TEXT = "User Center"
+# 기존 세션이 살아 있는지 확인하는 시간(초). 살아 있으면 제목이 나타나는 즉시 통과하므로 짧게 둡니다.
+SESSION_CHECK_WAIT = 3
+# CDP 쿠키의 sameSite 값 중 add_cookie/Network.setCookies가 받는 값
+SAME_SITE_VALUES = ("Strict", "Lax", "None")
+
+
+# ---------------------------------
+# 쿠키 저장/복원
+# ---------------------------------
+def cookie_site(url):
+    """
+    쿠키를 저장/복원할 도메인. 호스트의 상위 도메인(account.wps.com → wps.com)이라 docs.wps.com 쿠키도 포함됩니다.
+    IP 주소나 localhost(모의 사이트)는 호스트 그대로입니다.
+    """
+
+    host = urlsplit(url).hostname or ""
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    return ".".join(labels[-2:])
+
+
+def _in_site(domain, site):
+    domain = (domain or "").lstrip(".")
+    return not site or domain == site or domain.endswith("." + site)
+
+
+def browser_cookies(driver, site=None):
+    """
+    브라우저의 쿠키를 Selenium get_cookies() 형식 리스트로 반환합니다.
+
+    driver.get_cookies()는 현재 페이지 도메인의 쿠키만 돌려주므로, CDP Network.getAllCookies로
+    모든 도메인의 쿠키를 읽고 site(와 하위 도메인)만 남깁니다. CDP를 쓸 수 없으면 현재 페이지 쿠키를 씁니다.
+
+    :param driver: Selenium WebDriver 객체(크롬).
+    :param site: (선택) 남길 도메인(cookie_site 참고). None이면 전부.
+    :return: 쿠키 dict 리스트.
+    """
+
+    try:
+        raw = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    except (AttributeError, KeyError, WebDriverException):
+        return [c for c in driver.get_cookies() if _in_site(c.get("domain"), site)]
+
+    cookies = []
+    for c in raw:
+        if not _in_site(c.get("domain"), site):
+            continue
+        cookie = {
+            "name": c["name"], "value": c["value"], "domain": c.get("domain"), "path": c.get("path", "/"),
+            "secure": c.get("secure", False), "httpOnly": c.get("httpOnly", False),
+        }
+        if c.get("sameSite") in SAME_SITE_VALUES:
+            cookie["sameSite"] = c["sameSite"]
+        # 세션 쿠키는 expires가 -1
+        if not c.get("session") and c.get("expires", -1) > 0:
+            cookie["expiry"] = int(c["expires"])
+        cookies.append(cookie)
+    return cookies
+
+
+def save_cookies(driver, cookie_file, site=None):
+    """
+    브라우저의 쿠키(site와 하위 도메인)를 JSON 파일로 저장합니다.
+    로그인 토큰이 들어 있으므로 파일 권한을 소유자 전용(600)으로 설정합니다.
+
+    :return: 저장한 쿠키 수(int).
+    """
+
+    cookies = browser_cookies(driver, site)
+    # 배치 모드의 워커들이 같은 쿠키 파일에 동시에 저장할 수 있으므로 임시 파일명을 스레드마다 다르게 둡니다.
+    tmp_path = f"{cookie_file}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cookies, f, ensure_ascii=False, indent=2)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, cookie_file)
+    return len(cookies)
+
+
+def load_cookies(driver, cookie_file):
+    """
+    저장해 둔 쿠키 중 브라우저에 아직 없는 것을 넣습니다. (영구 프로필의 더 새 쿠키를 덮어쓰지 않음)
+    만료 시각이 지난 쿠키는 건너뜁니다.
+
+    CDP Network.setCookies로 도메인에 상관없이 한 번에 넣고(docs.wps.com 포함), CDP를 쓸 수 없으면
+    driver.add_cookie로 현재 페이지 도메인의 쿠키만 넣습니다(먼저 같은 도메인 페이지를 열어 두어야 함).
+
+    :return: 넣은 쿠키 수(int). 파일이 없으면 0.
+    """
+
+    if not cookie_file or not os.path.exists(cookie_file):
+        return 0
+    with open(cookie_file, encoding="utf-8") as f:
+        cookies = json.load(f)
+
+    now = time.time()
+    present = {(c["name"], (c.get("domain") or "").lstrip("."), c.get("path", "/")) for c in browser_cookies(driver)}
+    missing = []
+    for cookie in cookies:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue
+        if (cookie["name"], (cookie.get("domain") or "").lstrip("."), cookie.get("path", "/")) in present:
+            continue
+        # add_cookie가 받지 않는 sameSite 값은 빼고 넣습니다.
+        if cookie.get("sameSite") not in SAME_SITE_VALUES:
+            cookie.pop("sameSite", None)
+        missing.append(cookie)
+    if not missing:
+        return 0
+
+    cdp_cookies = []
+    for cookie in missing:
+        c = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if k in cookie}
+        if cookie.get("expiry"):
+            c["expires"] = cookie["expiry"]
+        cdp_cookies.append(c)
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+        return len(cdp_cookies)
+    except (AttributeError, WebDriverException):
+        pass
+
+    added = 0
+    for cookie in missing:
+        try:
+            driver.add_cookie(cookie)
+            added += 1
+        except WebDriverException:
+            # 현재 도메인과 맞지 않는 쿠키 등은 무시
+            continue
+    return added
+
+
+# ---------------------------------
+# 로그인 상태 확인
+# ---------------------------------
+def is_logged_in(driver, check_wait=SESSION_CHECK_WAIT):
+    """
+    account.wps.com에서 'User Center'가 check_wait초 안에 나타나면 로그인된 것으로 봅니다.
+    (현재 페이지가 account.wps.com이라고 가정)
+    """
+
+    try:
+        wait_for_dom(driver, By.CSS_SELECTOR, USER_CENTER_SELECTOR, text=USER_CENTER_TEXT,
+                     max_wait=check_wait, label="session_check")
+        return True
+    except TimeoutException:
+        return False
+
+
+def ensure_logged_in(driver, login_wait=120, check_wait=SESSION_CHECK_WAIT, cookie_file=None, account_url=ACCOUNT_URL):
+    """
+    로그인 상태를 확보합니다. 세션이 살아 있으면 사람의 입력 없이 바로 반환합니다.
+
+    1) account.wps.com을 열고, cookie_file의 쿠키 중 브라우저(영구 프로필)에 없는 것이 있으면 넣고 새로고침합니다.
+    2) 로그인되어 있는지 한 번, check_wait초만 확인합니다(살아 있으면 제목이 나타나는 즉시 통과).
+    3) 아니면 세션이 만료된 것이므로 바로 안내하고, 사람이 로그인할 때까지 최대 login_wait초 기다립니다.
+    4) 로그인이 확인되면 wps.com 전체(docs.wps.com 포함) 쿠키를 cookie_file에 저장해 다음 실행에서 다시 씁니다.
+
+    :param driver: Selenium WebDriver 객체.
+    :param login_wait: 세션 만료 시 사람의 로그인을 기다리는 최대 시간(초).
+    :param check_wait: 기존 세션이 유효한지 확인하는 데 쓰는 시간(초).
+    :param cookie_file: (선택) 쿠키 JSON 파일 경로.
+    :param account_url: 로그인 확인에 쓸 계정 페이지 주소(모의 사이트로 바꿔 시험할 때 지정).
+    :return: "profile"(프로필 세션 재사용), "cookies"(쿠키 파일로 복원), "login"(새로 로그인) 중 하나.
+    :raises TimeoutException: login_wait 안에 로그인하지 않은 경우.
+    """
+
+    site = cookie_site(account_url)
+    driver.get(account_url)
+    restored = load_cookies(driver, cookie_file)
+    if restored:
+        driver.refresh()
+    if is_logged_in(driver, check_wait):
+        if cookie_file:
+            save_cookies(driver, cookie_file, site)
+        return "cookies" if restored else "profile"
+
+    print(f"저장된 세션이 만료되었습니다 → {account_url}에서 로그인해 주세요 (최대 {login_wait}초)")
+    wait_for_dom(driver, By.CSS_SELECTOR, USER_CENTER_SELECTOR, text=USER_CENTER_TEXT,
+                 max_wait=login_wait, label="user_center")
+    if cookie_file:
+        save_cookies(driver, cookie_file, site)
+    return "login"
@@ -0,0 +1,195 @@
+# -------------------------------------------------------
+# xlsx 셀 패치 writer
+#
+# stock_df.to_excel(...)은 openpyxl로 워크북 전체를 새로 만들기 때문에
+# 시트가 크면 느리고, 다운로드한 stock.xlsx에 있던 WPS 서식/사용자 데이터(etc: 네임스페이스,
+# customXml 등)가 모두 사라집니다.
+#
+# 이 모듈은 다운로드한 xlsx 패키지를 그대로 복사하면서, 첫 번째 시트 XML 안에서
+# 값이 바뀐 stock_qty 셀의 <v> 값만 바꿔 끼웁니다.
+# - 시트 XML 이외의 zip 항목은 내용 그대로 스트리밍 복사합니다.
+# - 시트 XML은 XML 파싱 없이 바이트 검색으로 바뀐 셀만 찾아 교체합니다.
+#   (행 순서대로 앞에서부터 찾아 나가므로 한 번 훑는 비용 + 바뀐 셀 수에 비례하는 작업)
+# - 셀 주소의 행 번호는 스트리밍 리더가 읽은 실제 시트 행 번호입니다(빈 행/숨김 행이 있어도 어긋나지 않음).
+# - 패치할 수 없는 경우(셀이 없음, 수식 셀, 값 불일치 등)에는 XlsxPatchError를 던지므로
+#   호출하는 쪽에서 기존 to_excel 방식으로 되돌아가면 됩니다.
+# -------------------------------------------------------
+
+import os
+import re
+import math
+import shutil
+import zipfile
+
+from xlsx_stream import first_sheet_path, iter_xlsx_rows, column_index
+
+
+class XlsxPatchError(ValueError):
+    """셀 패치 방식으로 저장할 수 없을 때 발생하는 예외(호출하는 쪽에서 to_excel로 대체)."""
+
+
+# ---------------------------------
+# 셀 주소 계산
+# ---------------------------------
+def column_letter(index):
+    """
+    0부터 시작하는 열 번호를 엑셀 열 문자로 바꿉니다. (0 → "A", 27 → "AB")
+    """
+
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _is_blank(value):
+    """빈 칸(None/NaN)인지. pandas는 빈 셀을 NaN으로 읽습니다."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _format_number(value):
+    """
+    엑셀 <v>에 넣을 숫자 문자열. 8.0처럼 정수로 떨어지면 "8"로 씁니다.
+    """
+
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# ---------------------------------
+# 시트 XML 패치
+# ---------------------------------
+def patch_sheet_xml(xml, updates):
+    """
+    시트 XML(bytes)에서 updates에 있는 셀들의 값만 바꿔 새 XML(bytes)을 반환합니다.
+
+    1) updates를 행/열 순서로 정렬한 뒤, 앞에서부터 '<c r="C5"' 를 찾아 나갑니다.
+       (셀은 XML 안에서 행 순서대로 나오므로, 검색 시작 위치가 계속 앞으로만 움직입니다.)
+    2) 찾은 <c ...>...</c> 요소를 '<c r="C5" s="기존 스타일"><v>새 값</v></c>'로 바꿉니다.
+       기존 스타일(s 속성)은 유지하고, 문자열 타입(t 속성)은 숫자로 바뀌므로 제거합니다.
+    3) 셀이 XML에 없거나 수식(<f>)이 있는 셀이면 XlsxPatchError를 던집니다.
+       기존 값이 빈 칸(NaN)이면 셀에 값이 없어야 하고, 새 값이 빈 칸이면 패치하지 않습니다(XlsxPatchError).
+
+    :param xml: 원본 시트 XML(bytes).
+    :param updates: {셀 주소: (기존 값, 새 값)} dict. 예) {"C5": (48, 46)}
+    :return: 패치된 시트 XML(bytes).
+    :raises XlsxPatchError: 셀을 찾지 못했거나, 수식 셀이거나, 기존 값이 다르거나, 새 값이 빈 칸인 경우.
+    """
+
+    def sort_key(ref):
+        digits = ref.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        return int(digits), column_index(ref)
+
+    parts = []
+    pos = 0
+    for ref in sorted(updates, key=sort_key):
+        old_value, new_value = updates[ref]
+        if _is_blank(new_value):
+            raise XlsxPatchError(f"{ref} 셀을 빈 값으로 바꿀 수 없습니다.")
+        start = xml.find(b'<c r="' + ref.encode() + b'"', pos)
+        if start < 0:
+            raise XlsxPatchError(f"{ref} 셀을 시트 XML에서 찾지 못했습니다.")
+
+        open_end = xml.find(b">", start)
+        if xml[open_end - 1:open_end] == b"/":
+            # <c r="C5" s="2"/> 처럼 값이 없는 셀
+            end = open_end + 1
+            open_tag = xml[start:open_end - 1]
+            inner = b""
+        else:
+            close = xml.find(b"</c>", open_end)
+            end = close + len(b"</c>")
+            open_tag = xml[start:open_end]
+            inner = xml[open_end + 1:close]
+
+        if b"<f" in inner:
+            raise XlsxPatchError(f"{ref} 셀은 수식이 있어 값만 바꿀 수 없습니다.")
+        current = re.search(rb"<v>([^<]*)</v>", inner)
+        if _is_blank(old_value):
+            matches = current is None or current.group(1) == b""
+        else:
+            matches = current is not None and float(current.group(1)) == float(old_value)
+        if not matches:
+            raise XlsxPatchError(f"{ref} 셀의 기존 값이 DataFrame과 다릅니다. (행 위치 불일치)")
+
+        style = re.search(rb'\ss="(\d+)"', open_tag)
+        style_attr = b' s="' + style.group(1) + b'"' if style else b""
+        new_cell = (b'<c r="' + ref.encode() + b'"' + style_attr + b"><v>"
+                    + _format_number(new_value).encode() + b"</v></c>")
+
+        parts.append(xml[pos:start])
+        parts.append(new_cell)
+        pos = end
+
+    parts.append(xml[pos:])
+    return b"".join(parts)
+
+
+def patch_xlsx_cells(src_path, dst_path, updates):
+    """
+    src_path xlsx를 dst_path로 복사하면서 첫 번째 시트의 updates 셀만 바꿉니다.
+
+    - 시트 XML 외 모든 zip 항목(서식, customXml, docProps 등)은 압축 방식까지 그대로 복사합니다.
+    - 임시 파일에 먼저 쓴 뒤 os.replace로 교체하므로, 실패해도 dst_path가 깨지지 않습니다.
+
+    :param src_path: 원본 xlsx 경로(다운로드된 stock.xlsx).
+    :param dst_path: 저장할 xlsx 경로(stock_updated.xlsx).
+    :param updates: {셀 주소: (기존 값, 새 값)} dict.
+    """
+
+    tmp_path = dst_path + ".tmp"
+    try:
+        with zipfile.ZipFile(src_path) as zin, zipfile.ZipFile(tmp_path, "w") as zout:
+            sheet_path = first_sheet_path(zin)
+            for info in zin.infolist():
+                if info.filename == sheet_path and updates:
+                    zout.writestr(info, patch_sheet_xml(zin.read(info), updates),
+                                  compress_type=info.compress_type)
+                    continue
+                with zin.open(info) as src, zout.open(info, "w") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_stock_patch(stock_file, updated_path, old_qty, new_qty, column="stock_qty"):
+    """
+    재고 DataFrame의 변경 전/후 stock_qty를 비교해, 바뀐 셀만 원본 stock.xlsx에 패치해서 저장합니다.
+
+    1) 원본 시트의 헤더 행에서 column(기본 "stock_qty")의 열 위치를 찾습니다.
+    2) 시트를 iter_xlsx_rows(row_numbers=True)로 훑어 헤더 다음 행들의 실제 시트 행 번호를 모읍니다.
+       리더가 빈 행/숨김 행도 pd.read_excel과 같은 위치로 내보내므로 DataFrame i번째 행 = 그 i번째 행 번호입니다.
+    3) 값이 바뀐 행만 {셀 주소: (기존 값, 새 값)}으로 모읍니다. 전후가 모두 빈 칸(NaN)이면 바뀐 것이 아닙니다.
+    4) patch_xlsx_cells로 복사+패치합니다. 셀의 기존 값이 DataFrame과 다르면
+       (행 위치가 어긋난 경우) XlsxPatchError가 발생합니다.
+
+    :param stock_file: 다운로드된 재고 xlsx 경로.
+    :param updated_path: 저장할 xlsx 경로.
+    :param old_qty: 변경 전 stock_qty 값들(DataFrame 행 순서).
+    :param new_qty: 변경 후 stock_qty 값들(DataFrame 행 순서).
+    :param column: 패치할 컬럼명(기본값: "stock_qty").
+    :return: 실제로 바뀐 셀 수(int).
+    """
+
+    rows = iter_xlsx_rows(stock_file, row_numbers=True)
+    _, header = next(rows, (None, None))
+    if header is None or column not in header:
+        rows.close()
+        raise XlsxPatchError(f"재고 시트 헤더에 '{column}' 컬럼이 없습니다.")
+    letter = column_letter(header.index(column))
+    sheet_rows = [number for number, _ in rows]
+
+    updates = {}
+    for sheet_row, old, new in zip(sheet_rows, old_qty, new_qty):
+        if old == new or (_is_blank(old) and _is_blank(new)):
+            continue
+        updates[f"{letter}{sheet_row}"] = (old, new)
+
+    patch_xlsx_cells(stock_file, updated_path, updates)
+    return len(updates)
@@ -0,0 +1,361 @@
+# -------------------------------------------------------
+# xlsx 스트리밍 리더
+#
+# pd.read_excel은 워크북 전체를 openpyxl로 읽어 모든 컬럼을 담은 DataFrame을 만듭니다.
+# 판매 데이터가 수십만 행이 되면 이 파싱 단계가 전체 실행 시간의 대부분을 차지합니다.
+#
+# 이 모듈은 xlsx(zip) 안의 워크시트 XML과 공유 문자열(sharedStrings.xml)을
+# iterparse로 한 행씩 읽어, 필요한 컬럼(product_id, quantity_sold)만
+# 바로 합계(dict)에 누적합니다. 처리한 <row>/<si> 요소는 부모(<sheetData>/<sst>)에서 바로 떼어 내므로
+# (clear()만 하면 빈 요소가 부모에 계속 붙어 행 수만큼 쌓임)
+# 메모리 사용량은 행 수가 아니라 공유 문자열/제품 수에 비례합니다.
+# -------------------------------------------------------
+
+import os
+import sys
+import time
+import datetime
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+# resource 모듈은 유닉스 계열(macOS, Linux)에만 있습니다. Windows에서는 최대 RSS를 보고하지 않습니다.
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# ---------------------------------
+# XML 네임스페이스
+# ---------------------------------
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# 엑셀(1900 날짜 체계) 일련번호의 기준일. 1900년 윤년 버그 때문에 12월 31일이 아니라 30일입니다.
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+# ---------------------------------
+# 워크북 구조 파악
+# ---------------------------------
+def first_sheet_path(zf):
+    """
+    workbook.xml과 workbook.xml.rels를 읽어 첫 번째 시트의 zip 내부 경로를 반환합니다.
+
+    WPS/Excel에 따라 시트 파일명이 sheet1.xml이 아닐 수 있으므로,
+    <sheets>의 첫 번째 항목이 가리키는 관계(r:id)를 따라가 실제 경로를 찾습니다.
+
+    :param zf: 열려 있는 zipfile.ZipFile 객체.
+    :return: 예) "xl/worksheets/sheet1.xml"
+    """
+
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{NS_MAIN}sheets/{NS_MAIN}sheet")
+    if sheet is None:
+        raise ValueError("워크북에 시트가 없습니다.")
+    rel_id = sheet.get(f"{NS_DOC_REL}id")
+
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{NS_PKG_REL}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            # Target은 보통 xl/ 기준 상대경로("worksheets/sheet1.xml")이고,
+            # 가끔 "/xl/worksheets/sheet1.xml" 같은 절대경로로 들어옵니다.
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise ValueError(f"시트 관계({rel_id})를 찾을 수 없습니다.")
+
+
+def load_shared_strings(zf):
+    """
+    sharedStrings.xml을 순서대로 읽어 문자열 리스트로 반환합니다.
+
+    - <si><t>텍스트</t></si> 형태와 서식이 섞인 <si><r><t>..</t></r>...</si> 형태를 모두 처리합니다.
+    - 일본어 후리가나 같은 발음 정보(<rPh>)는 셀 값이 아니므로 제외합니다.
+    - 공유 문자열 파일이 없는 워크북(숫자만 있는 시트)이면 빈 리스트를 반환합니다.
+
+    :param zf: 열려 있는 zipfile.ZipFile 객체.
+    :return: 인덱스로 접근 가능한 문자열 리스트.
+    """
+
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+
+    strings = []
+    root = None
+    with zf.open("xl/sharedStrings.xml") as fp:
+        for event, elem in ET.iterparse(fp, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event == "end" and elem.tag == f"{NS_MAIN}si":
+                parts = []
+                for child in elem:
+                    if child.tag == f"{NS_MAIN}t":
+                        parts.append(child.text or "")
+                    elif child.tag == f"{NS_MAIN}r":
+                        t = child.find(f"{NS_MAIN}t")
+                        if t is not None:
+                            parts.append(t.text or "")
+                strings.append("".join(parts))
+                # 읽은 <si>를 <sst>에서 떼어 냄
+                root.clear()
+    return strings
+
+
+def column_index(cell_ref):
+    """
+    셀 참조(예: "C12")의 열 문자를 0부터 시작하는 열 번호로 바꿉니다. ("A" → 0, "AB" → 27)
+    """
+
+    index = 0
+    for ch in cell_ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + (ord(ch.upper()) - ord("A") + 1)
+    return index - 1
+
+
+def _cell_value(cell, shared_strings):
+    """
+    <c> 요소 하나를 파이썬 값으로 변환합니다.
+
+    - t="s"        : 공유 문자열 인덱스 → 문자열
+    - t="inlineStr": <is><t>..</t></is> 안의 문자열
+    - t="b"        : 0/1 → bool
+    - t="str", "e" : 수식 결과 문자열 / 오류값 그대로
+    - 그 외(숫자)  : 정수로 떨어지면 int, 아니면 float
+      (날짜도 엑셀 일련번호 float로 남습니다. 집계에는 쓰지 않으므로 변환하지 않습니다.)
+    """
+
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        t = cell.find(f"{NS_MAIN}is/{NS_MAIN}t")
+        return t.text if t is not None else None
+
+    v = cell.find(f"{NS_MAIN}v")
+    if v is None or v.text is None:
+        return None
+    raw = v.text
+
+    if cell_type == "s":
+        return shared_strings[int(raw)]
+    if cell_type == "b":
+        return raw == "1"
+    if cell_type in ("str", "e"):
+        return raw
+
+    number = float(raw)
+    if number.is_integer():
+        return int(number)
+    return number
+
+
+def excel_serial_to_datetime(value):
+    """
+    엑셀 날짜 일련번호(float)를 datetime으로 바꿉니다.
+
+    openpyxl(= pd.read_excel)과 같은 방식으로 밀리초 단위로 반올림하므로,
+    두 리더가 같은 셀에서 같은 시각을 얻습니다. 예) 45744.423611111109 → 2025-03-28 10:10:00
+
+    :param value: 엑셀 일련번호(int/float). 이미 datetime이거나 None이면 그대로 반환합니다.
+    """
+
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    day, fraction = divmod(float(value), 1)
+    if 0 < value < 60:
+        # 엑셀은 존재하지 않는 1900-02-29를 세기 때문에, 그 이전 날짜는 하루를 보정합니다.
+        day += 1
+    return (EXCEL_EPOCH + datetime.timedelta(days=day)
+            + datetime.timedelta(milliseconds=round(fraction * 86400 * 1000)))
+
+
+# ---------------------------------
+# 행 단위 스트리밍
+# ---------------------------------
+def iter_xlsx_rows(path, row_numbers=False):
+    """
+    xlsx 파일 첫 번째 시트의 행을 하나씩 리스트로 내보내는(generator) 함수.
+
+    1) 공유 문자열 테이블을 먼저 읽습니다(문자열 셀 해석용).
+    2) 시트 XML을 iterparse로 읽으면서 </row>가 닫힐 때마다 그 행의 값 리스트를 yield합니다.
+    3) 비어 있는 셀은 XML에 나오지 않으므로, 셀 참조(r="C5")로 열 위치를 맞추고 사이를 None으로 채웁니다.
+    4) 빈 행도 XML에 나오지 않으므로, 행 번호(<row r="5">)로 1행부터 위치를 맞추고 사이를 빈 리스트로 채웁니다.
+       pd.read_excel도 1행부터 읽고 중간의 빈 행을 NaN 행으로 두므로, n번째로 내보낸 행 = pandas의 같은 위치 행입니다.
+    5) 처리한 행 요소는 <sheetData>에서 떼어 내(부모.clear()) 파싱이 끝난 행이 메모리에 쌓이지 않도록 합니다.
+
+    :param path: xlsx 파일 경로(str).
+    :param row_numbers: True면 (시트 행 번호, 값 리스트) 튜플을 내보냅니다(셀 주소 계산용).
+    :return: 행 값 리스트(또는 튜플)를 내보내는 generator. 첫 행은 보통 헤더입니다.
+    """
+
+    with zipfile.ZipFile(path) as zf:
+        shared_strings = load_shared_strings(zf)
+        sheet_path = first_sheet_path(zf)
+
+        sheet_data = None
+        next_row = 1
+        with zf.open(sheet_path) as fp:
+            for event, elem in ET.iterparse(fp, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == f"{NS_MAIN}sheetData":
+                        sheet_data = elem
+                    continue
+                if elem.tag != f"{NS_MAIN}row":
+                    continue
+
+                values = []
+                for cell in elem.iter(f"{NS_MAIN}c"):
+                    ref = cell.get("r")
+                    if ref:
+                        col = column_index(ref)
+                        if col > len(values):
+                            values.extend([None] * (col - len(values)))
+                    values.append(_cell_value(cell, shared_strings))
+
+                # r 속성이 없는 행은 바로 다음 행
+                row_number = int(elem.get("r") or next_row)
+
+                # elem.clear()만으로는 빈 <row>가 <sheetData>에 남으므로 부모에서 떼어 냄
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    elem.clear()
+
+                while next_row < row_number:
+                    yield (next_row, []) if row_numbers else []
+                    next_row += 1
+                yield (row_number, values) if row_numbers else values
+                next_row = row_number + 1
+
+
+def iter_xlsx_columns(path, columns):
+    """
+    xlsx 첫 번째 시트를 스트리밍으로 읽으면서, 지정한 컬럼들의 값만 튜플로 내보내는 함수.
+
+    헤더 행에서 각 컬럼의 위치를 한 번만 찾고, 이후 행에서는 그 칸들만 꺼냅니다.
+    완전히 빈 행(XML에 없는 행, 서식만 남은 행)은 합계에 영향이 없으므로 건너뜁니다.
+
+    :param path: xlsx 파일 경로(str).
+    :param columns: 꺼낼 컬럼명 리스트. 예) ["product_id", "quantity_sold"]
+    :return: columns 순서대로 값이 담긴 튜플을 내보내는 generator.
+    :raises ValueError: 헤더에 columns 중 하나라도 없을 경우.
+    """
+
+    rows = iter_xlsx_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} 헤더에 {missing} 컬럼이 없습니다: {header}")
+    indexes = [header.index(c) for c in columns]
+
+    for row in rows:
+        if not any(v is not None for v in row):
+            continue
+        yield tuple(row[i] if i < len(row) else None for i in indexes)
+
+
+def stream_sales_aggregate(sales_file, key_col="product_id", value_col="quantity_sold"):
+    """
+    판매 xlsx를 스트리밍으로 읽으며 key_col별 value_col 합계를 바로 누적하는 함수.
+
+    DataFrame을 만들지 않고, iter_xlsx_columns로 두 칸만 꺼내 dict에 더합니다.
+    (pandas 경로의 sales_df.groupby("product_id")["quantity_sold"].sum()과 같은 결과)
+
+    - key가 비어 있는 행은 groupby와 동일하게 건너뜁니다.
+    - 수량이 비어 있는 행은 0으로 취급합니다(groupby.sum()이 NaN을 무시하는 것과 동일).
+    - key_col이 컬럼 튜플(예: ("product_id", "location"))이면 키도 값 튜플입니다. 첫 칸(product_id)이 빈 행만 건너뛰고
+      나머지 칸이 비면 None인 채로 셉니다(재고에 location이 없으면 상품별로 합쳐 반영하므로).
+
+    :param sales_file: 판매 엑셀 파일 경로(str).
+    :param key_col: 그룹 기준 컬럼명(기본값: "product_id") 또는 컬럼명 튜플.
+    :param value_col: 합산할 컬럼명(기본값: "quantity_sold").
+    :return: (totals, row_count) 튜플.
+             totals는 {product_id: 합계} dict, row_count는 헤더를 제외한 데이터 행 수(len(sales_df)와 동일).
+    :raises ValueError: 헤더에 key_col 또는 value_col이 없을 경우.
+    """
+
+    totals = {}
+    row_count = 0
+    if isinstance(key_col, (tuple, list)):
+        for row in iter_xlsx_columns(sales_file, [*key_col, value_col]):
+            row_count += 1
+            key = row[:-1]
+            if key[0] is None:
+                continue
+            totals[key] = totals.get(key, 0) + (row[-1] or 0)
+        return totals, row_count
+
+    for key, qty in iter_xlsx_columns(sales_file, [key_col, value_col]):
+        row_count += 1
+        if key is None:
+            continue
+        totals[key] = totals.get(key, 0) + (qty or 0)
+
+    return totals, row_count
+
+
+# ---------------------------------
+# 파싱 시간 / 최대 메모리 보고
+# ---------------------------------
+def peak_rss_mb():
+    """
+    현재 프로세스의 최대 RSS(Resident Set Size)를 MB 단위로 반환합니다.
+
+    - Linux는 ru_maxrss가 KB, macOS는 바이트 단위라서 플랫폼별로 환산합니다.
+    - Windows처럼 resource 모듈이 없으면 None을 반환합니다.
+    - 프로세스 시작 이후의 "최댓값"이므로, pandas 경로와 스트리밍 경로를 비교할 때는
+      각각 별도 프로세스로 실행해야 정확합니다.
+    - Linux의 ru_maxrss는 fork/exec를 거쳐도 부모의 값이 이어지므로(큰 부모가 띄운 자식은 부모의 최댓값을 보고),
+      /proc/self/status의 VmHWM(exec 때 새로 시작하는 이 프로세스 메모리의 최댓값)을 먼저 씁니다.
+    """
+
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
+
+
+def report_parse_stats(label, elapsed, rows, path=None):
+    """
+    파싱 소요 시간과 최대 RSS를 한 줄로 출력합니다.
+
+    :param label: 리더 이름(예: "pandas", "stream").
+    :param elapsed: 파싱(+집계)에 걸린 시간(초).
+    :param rows: 읽은 데이터 행 수.
+    :param path: (선택) 읽은 파일 경로. 주어지면 파일 크기도 함께 출력합니다.
+    """
+
+    rss = peak_rss_mb()
+    rss_text = f"{rss:.1f}MB" if rss is not None else "n/a"
+    size_text = ""
+    if path and os.path.exists(path):
+        size_text = f", 파일 {os.path.getsize(path) / 1024:.1f}KB"
+    print(f"[{label}] 판매 파싱 {elapsed:.3f}초, {rows}행{size_text}, 최대 RSS {rss_text}")
+
+
+def timed_stream_sales_aggregate(sales_file, key_col="product_id", value_col="quantity_sold"):
+    """
+    stream_sales_aggregate를 실행하면서 소요 시간과 최대 RSS를 함께 출력하는 편의 함수.
+
+    :return: stream_sales_aggregate와 동일한 (totals, row_count).
+    """
+
+    start = time.perf_counter()
+    totals, row_count = stream_sales_aggregate(sales_file, key_col, value_col)
+    report_parse_stats("stream", time.perf_counter() - start, row_count, sales_file)
+    return totals, row_count